@@ -0,0 +1,534 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+import sys
+import json
+import shlex
+import logging
+import argparse
+import platform
+import resource
+from time import perf_counter
+from datetime import datetime
+import multiprocessing
+from tempfile import TemporaryDirectory
+from collections import OrderedDict
+
+from .. import __version__
+from .synthetic import generate_dataset
+from ..error import GenipeError
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["run_benchmarks"]
+
+
+# The components that are benchmarked (in order of execution)
+_COMPONENTS = ("impute2_merger", "formats_impute2", "formats_index",
+               "impute2_extractor", "imputed_stats")
+
+
+def main(args=None):
+    """The main function.
+
+    Args:
+        args (argparse.Namespace): the arguments to be parsed (if
+                                   :py:func:`main` is called by another
+                                   module)
+
+    """
+    # Creating the option parser
+    desc = ("Benchmarks the genipe components on synthetic IMPUTE2 data. "
+            "This script is part of the 'genipe' package, version "
+            "{}.".format(__version__))
+    parser = argparse.ArgumentParser(description=desc)
+
+    try:
+        # Parsing the options
+        args = parse_args(parser, args)
+
+        # Adding the logging capability
+        logging.basicConfig(
+            format="[%(asctime)s %(levelname)s] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+            level=logging.DEBUG if args.debug else logging.INFO,
+        )
+        logging.info("Program arguments: {}".format(
+            " ".join(shlex.quote(part) for part in sys.argv[1:])
+        ))
+
+        # Checking the options
+        check_args(args)
+
+        # Running the benchmarks
+        results = run_benchmarks(
+            nb_samples=args.nb_samples,
+            nb_sites=args.nb_sites,
+            nb_segments=args.nb_segments,
+            components=args.components,
+            nb_process=args.nb_process,
+            seed=args.seed,
+            work_dir=args.work_dir,
+        )
+
+        # Writing the results
+        o_filename = args.out + ".json"
+        with open(o_filename, "w") as o_file:
+            json.dump(results, o_file, indent=2)
+        logging.info("Results written in '{}'".format(o_filename))
+
+        # Comparing with previous results (if required)
+        if args.compare is not None:
+            with open(args.compare, "r") as i_file:
+                compare_results(json.load(i_file), results)
+
+    # Catching the Ctrl^C
+    except KeyboardInterrupt:
+        logging.info("Cancelled by user")
+        sys.exit(0)
+
+    # Catching the GenipeError
+    except GenipeError as e:
+        logging.error(e)
+        parser.error(e.message)
+
+    except Exception as e:
+        logging.error(e)
+        raise
+
+
+def run_benchmarks(nb_samples, nb_sites, nb_segments=4, components=None,
+                   nb_process=1, seed=None, work_dir=None):
+    """Generates a synthetic dataset and benchmarks the components.
+
+    Args:
+        nb_samples (int): the number of samples
+        nb_sites (int): the number of sites
+        nb_segments (int): the number of IMPUTE2 segments to merge
+        components (list): the components to benchmark (``None`` for all of
+                           them)
+        nb_process (int): the number of processes for ``imputed_stats``
+        seed (int): the seed for the synthetic data
+        work_dir (str): the directory for the synthetic data and the outputs
+                        (``None`` for a temporary directory)
+
+    Returns:
+        dict: the parameters, the environment and the results of each
+              component
+
+    The components are executed in order (see ``_COMPONENTS``), since they
+    use the outputs of the previous ones (the merged IMPUTE2 file). The
+    merger is always executed, even if it's not benchmarked.
+
+    Each component is executed in a new process, so that its peak memory
+    (maximum resident set size) can be measured. The results of each
+    component contain the execution time, the throughput (sites per second),
+    the peak memory and the increase of memory compared to the process
+    before the execution (*i.e.* once the Python modules are loaded) (in
+    MiB). The peak memory is the one of the largest process (the component,
+    or one of its workers), and the peak memory of the largest worker is
+    also reported. Since the peak of the workers is not summed, the memory
+    used by all the processes at once might be higher.
+
+    """
+    if components is None:
+        components = _COMPONENTS
+
+    tmp_dir = None
+    if work_dir is None:
+        tmp_dir = TemporaryDirectory(prefix="genipe_benchmark_")
+        work_dir = tmp_dir.name
+
+    try:
+        # Generating the dataset
+        logging.info("Generating {:,d} sites for {:,d} samples".format(
+            nb_sites, nb_samples,
+        ))
+        start = perf_counter()
+        dataset = generate_dataset(work_dir, nb_samples=nb_samples,
+                                   nb_sites=nb_sites, nb_segments=nb_segments,
+                                   seed=seed)
+        logging.info("  - done in {:.1f} s".format(perf_counter() - start))
+        dataset["work_dir"] = work_dir
+        dataset["prefix"] = os.path.join(work_dir, "chr1.imputed")
+        dataset["nb_process"] = nb_process
+
+        # Each component is executed in a new process
+        context = multiprocessing.get_context("spawn")
+        results = []
+        for component in _COMPONENTS:
+            if component != "impute2_merger" and component not in components:
+                continue
+
+            logging.info("Running '{}'".format(component))
+            result = _run_in_process(context, component, dataset)
+
+            if component not in components:
+                continue
+
+            result["sites_per_second"] = round(
+                nb_sites / max(result["seconds"], 1e-6), 1,
+            )
+            results.append(result)
+            logging.info(
+                "  - {seconds:,.2f} s ({sites_per_second:,.1f} sites/s), "
+                "{peak_memory:,.1f} MiB".format(**result)
+            )
+
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    return OrderedDict([
+        ("genipe_version", __version__),
+        ("python_version", platform.python_version()),
+        ("platform", platform.platform()),
+        ("date", datetime.now().isoformat(sep=" ")),
+        ("nb_samples", nb_samples),
+        ("nb_sites", nb_sites),
+        ("nb_segments", nb_segments),
+        ("nb_process", nb_process),
+        ("seed", seed),
+        ("results", results),
+    ])
+
+
+def _run_in_process(context, component, dataset):
+    """Executes a component in a new process.
+
+    Args:
+        context (multiprocessing.context.BaseContext): the multiprocessing
+                                                        context
+        component (str): the name of the component
+        dataset (dict): the synthetic dataset
+
+    Returns:
+        dict: the results of the component (see :py:func:`_run_component`)
+
+    The process is not a daemon (unlike the workers of a
+    :py:class:`multiprocessing.pool.Pool`), so that the component can start
+    its own workers (*e.g.* ``imputed_stats`` with more than one process).
+    The exception raised by the component (if any) is raised again.
+
+    """
+    r_conn, w_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_send_component_result,
+                              args=(w_conn, component, dataset))
+    process.start()
+    w_conn.close()
+
+    try:
+        success, result = r_conn.recv()
+    except EOFError:
+        success, result = False, GenipeError(
+            "{}: the process ended unexpectedly".format(component),
+        )
+    finally:
+        r_conn.close()
+        process.join()
+
+    if not success:
+        raise result
+    return result
+
+
+def _send_component_result(w_conn, component, dataset):
+    """Executes a component and sends its results (or its exception).
+
+    Args:
+        w_conn (multiprocessing.connection.Connection): the connection to
+                                                        send the results
+        component (str): the name of the component
+        dataset (dict): the synthetic dataset
+
+    """
+    try:
+        w_conn.send((True, _run_component(component, dataset)))
+    except Exception as e:
+        w_conn.send((False, e))
+    finally:
+        w_conn.close()
+
+
+def _run_component(component, dataset):
+    """Executes a component (in its own process).
+
+    Args:
+        component (str): the name of the component
+        dataset (dict): the synthetic dataset (see
+                        :py:func:`genipe.benchmarks.synthetic.generate_dataset`)
+
+    Returns:
+        dict: the results of the component
+
+    The tools are executed using their ``main`` function (with the same
+    options as on the command line), so that the benchmark is comparable
+    between versions of genipe. Only the warnings and errors of the tools
+    are logged.
+
+    """
+    # Importing here, so that the modules are loaded before measuring
+    from ..formats import impute2, index
+    from ..tools import impute2_merger, impute2_extractor, imputed_stats
+
+    logging.basicConfig(
+        format="[%(asctime)s %(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        level=logging.WARNING,
+    )
+
+    prefix = dataset["prefix"]
+    impute2_filename = prefix + ".impute2"
+    o_prefix = os.path.join(dataset["work_dir"], component)
+
+    start_memory = _get_max_rss()
+    start_worker_memory = _get_max_rss(resource.RUSAGE_CHILDREN)
+    start = perf_counter()
+
+    if component == "impute2_merger":
+        impute2_merger.main(args=[
+            "--chr", "1", "--prefix", prefix, "--impute2",
+        ] + dataset["segments"])
+
+    elif component == "formats_impute2":
+        with open(impute2_filename, "r") as i_file:
+            for line in i_file:
+                impute2.matrix_from_line(line.rstrip("\r\n").split(" "))
+
+    elif component == "formats_index":
+        index.generate_index(impute2_filename, cols=[0, 1, 2],
+                             names=["chrom", "name", "pos"], sep=" ")
+
+    elif component == "impute2_extractor":
+        impute2_extractor.main(args=[
+            "--impute2", impute2_filename, "--out", o_prefix,
+            "--format", "dosage", "--maf", "0.05",
+        ])
+
+    elif component == "imputed_stats":
+        imputed_stats.main(args=[
+            "linear", "--impute2", impute2_filename,
+            "--sample", dataset["sample"], "--pheno", dataset["pheno"],
+            "--out", o_prefix, "--sample-column", "sample_id",
+            "--gender-column", "gender", "--pheno-name", "y",
+            "--covar", "C1,C2,age,gender",
+            "--nb-process", str(dataset["nb_process"]),
+        ])
+
+    else:
+        raise GenipeError("{}: invalid component".format(component))
+
+    seconds = perf_counter() - start
+    # The peak of the children is not reset (a child might have been started
+    # while importing the modules), so the workers of the component are only
+    # measured if they used more memory
+    worker_memory = _get_max_rss(resource.RUSAGE_CHILDREN)
+    if worker_memory == start_worker_memory:
+        worker_memory = 0
+    peak_memory = max(_get_max_rss(), worker_memory)
+
+    return OrderedDict([
+        ("component", component),
+        ("seconds", round(seconds, 3)),
+        ("peak_memory", round(peak_memory / 1024, 1)),
+        ("memory_increase", round((peak_memory - start_memory) / 1024, 1)),
+        ("peak_worker_memory", round(worker_memory / 1024, 1)),
+    ])
+
+
+def _get_max_rss(who=resource.RUSAGE_SELF):
+    """Gets the peak resident set size of the current process.
+
+    Args:
+        who (int): the process to measure (``resource.RUSAGE_SELF`` for the
+                   current process, or ``resource.RUSAGE_CHILDREN`` for the
+                   terminated child processes)
+
+    Returns:
+        int: the peak resident set size (in kilobytes)
+
+    For the child processes (*e.g.* the workers of ``imputed_stats``), the
+    operating system only keeps the peak of the largest child, not the sum
+    over all the children.
+
+    """
+    # The peak resident set size is in bytes on Mac OS X (and in kilobytes
+    # on Linux)
+    max_rss = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        max_rss //= 1024
+    return max_rss
+
+
+def compare_results(previous, results):
+    """Compares the results with previous ones (and logs the differences).
+
+    Args:
+        previous (dict): the previous results (see :py:func:`run_benchmarks`)
+        results (dict): the current results
+
+    Returns:
+        list: the ratio of the throughput and of the peak memory (current
+              over previous) for each component found in both results
+
+    Only the components executed in both benchmarks are compared. A warning
+    is logged if the datasets are not the same size.
+
+    """
+    logging.info("Comparing with genipe version {}".format(
+        previous["genipe_version"],
+    ))
+    for key in ("nb_samples", "nb_sites", "nb_process"):
+        if previous[key] != results[key]:
+            logging.warning("different '{}': {} (previous) vs {}".format(
+                key, previous[key], results[key],
+            ))
+
+    previous_results = {r["component"]: r for r in previous["results"]}
+    ratios = []
+    for result in results["results"]:
+        if result["component"] not in previous_results:
+            continue
+        other = previous_results[result["component"]]
+
+        speed = result["sites_per_second"] / max(other["sites_per_second"],
+                                                 1e-6)
+        memory = result["peak_memory"] / max(other["peak_memory"], 1e-6)
+        ratios.append((result["component"], speed, memory))
+        logging.info("  - {}: {:.2f}x throughput, {:.2f}x peak "
+                     "memory".format(*ratios[-1]))
+
+    return ratios
+
+
+def check_args(args):
+    """Checks the arguments and options.
+
+    Args:
+        args (argparse.Namespace): the options to verify
+
+    Note
+    ----
+        If there is a problem, a :py:class:`genipe.error.GenipeError` is
+        raised.
+
+    """
+    for option, value in (("--samples", args.nb_samples),
+                          ("--sites", args.nb_sites),
+                          ("--segments", args.nb_segments),
+                          ("--nb-process", args.nb_process)):
+        if value < 1:
+            raise GenipeError("{}: invalid value '{}'".format(option, value))
+
+    if args.nb_segments > args.nb_sites:
+        raise GenipeError("more segments than sites")
+
+    if args.compare is not None and not os.path.isfile(args.compare):
+        raise GenipeError("{}: no such file".format(args.compare))
+
+    if args.work_dir is not None and not os.path.isdir(args.work_dir):
+        raise GenipeError("{}: no such directory".format(args.work_dir))
+
+    return True
+
+
+def parse_args(parser, args=None):
+    """Parses the command line options and arguments.
+
+    Args:
+        parser (argparse.ArgumentParser): the argument parser
+        args (list): the list of arguments (if not taken from ``sys.argv``)
+
+    Returns:
+        argparse.Namespace: the list of options and arguments
+
+    Note
+    ----
+        The only check that is done here is by the parser itself. Values are
+        verified later by the :py:func:`check_args` function.
+
+    """
+    parser.add_argument(
+        "--version",
+        action="version",
+        version="%(prog)s, part of genipe version {}".format(__version__),
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="set the logging level to debug",
+    )
+
+    # The synthetic dataset
+    group = parser.add_argument_group("Synthetic Data")
+    group.add_argument(
+        "--samples", type=int, metavar="INT", default=1000,
+        dest="nb_samples",
+        help="The number of samples. [%(default)d]",
+    )
+    group.add_argument(
+        "--sites", type=int, metavar="INT", default=5000, dest="nb_sites",
+        help="The number of sites. [%(default)d]",
+    )
+    group.add_argument(
+        "--segments", type=int, metavar="INT", default=4,
+        dest="nb_segments",
+        help="The number of IMPUTE2 segments to merge. [%(default)d]",
+    )
+    group.add_argument(
+        "--seed", type=int, metavar="INT", default=42,
+        help="The seed of the random number generator. [%(default)d]",
+    )
+    group.add_argument(
+        "--work-dir", type=str, metavar="DIR",
+        help="The directory for the synthetic data and the outputs (they are "
+             "kept). By default, a temporary directory is used.",
+    )
+
+    # The benchmark options
+    group = parser.add_argument_group("Benchmark Options")
+    group.add_argument(
+        "--components", type=str, metavar="NAME", nargs="+",
+        choices=_COMPONENTS, default=list(_COMPONENTS),
+        help="The components to benchmark (the merger is always executed, "
+             "since its output is used by the other components). "
+             "[%(default)s]",
+    )
+    group.add_argument(
+        "--nb-process", type=int, metavar="INT", default=1,
+        help="The number of process to use for 'imputed_stats'. "
+             "[%(default)d]",
+    )
+    group.add_argument(
+        "--compare", type=str, metavar="FILE",
+        help="The results of a previous benchmark (JSON file) to compare "
+             "with.",
+    )
+
+    # The output files
+    group = parser.add_argument_group("Output Options")
+    group.add_argument(
+        "--out", type=str, metavar="FILE", default="genipe_benchmark",
+        help="The prefix for the output files. [%(default)s]",
+    )
+
+    if args is not None:
+        return parser.parse_args(args)
+
+    return parser.parse_args()
+
+
+# Calling the main, if necessary
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+
+import numpy as np
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["generate_impute2", "generate_samples", "generate_phenotypes",
+           "generate_dataset"]
+
+
+# The probabilities are written with a precision of 1/1000
+_PROBABILITIES = np.array(["{:.3f}".format(i / 1000) for i in range(1001)])
+
+# The alleles of the synthetic sites
+_ALLELES = ("A", "C", "G", "T")
+
+
+def generate_impute2(filename, nb_samples, nb_sites, chrom="1", start=1,
+                     genotyped=0.05, random_state=None):
+    """Generates a synthetic IMPUTE2 file (with its companion files).
+
+    Args:
+        filename (str): the name of the IMPUTE2 file
+        nb_samples (int): the number of samples
+        nb_sites (int): the number of sites
+        chrom (str): the chromosome
+        start (int): the position of the first site
+        genotyped (float): the proportion of genotyped sites
+        random_state (numpy.random.RandomState): the random number generator
+
+    Returns:
+        int: the position following the last site
+
+    Three files are created: the IMPUTE2 file itself, the SNP-wise
+    information file (``_info``) and the summary file (``_summary``), just
+    like IMPUTE2 does for each segment.
+
+    The minor allele frequency of each site is uniformly distributed between
+    0.01 and 0.5, and the genotypes are drawn from Hardy-Weinberg
+    proportions. The probability of the real genotype is mostly close to 1
+    (so that most genotypes are good calls), the remaining probability being
+    split between the two other genotypes.
+
+    """
+    if random_state is None:
+        random_state = np.random.RandomState()
+
+    nb_genotyped = 0
+    pos = start
+    samples = np.arange(nb_samples)
+    with open(filename, "w") as o_file, \
+            open(filename + "_info", "w") as info_file:
+        print("snp_id", "rs_id", "position", "a0", "a1", "exp_freq_a1",
+              "info", "certainty", "type", "info_type0", "concord_type0",
+              "r2_type0", file=info_file)
+
+        for i in range(nb_sites):
+            pos += random_state.randint(1, 1000)
+            name = "rs{}_{}".format(chrom, pos)
+            a1, a2 = random_state.choice(_ALLELES, 2, replace=False)
+
+            # Is this site genotyped?
+            site_type = 0
+            site_chrom = "---"
+            if random_state.random_sample() < genotyped:
+                site_type = 2
+                site_chrom = chrom
+                nb_genotyped += 1
+
+            # The genotypes (and the probability of the real genotype, in
+            # thousandths)
+            maf = random_state.uniform(0.01, 0.5)
+            genotypes = random_state.binomial(2, maf, nb_samples)
+            called = 1000 - np.minimum(
+                np.round(random_state.beta(1, 30, nb_samples) * 1000), 1000,
+            ).astype(int)
+            others = 1000 - called
+            first = np.round(
+                others * random_state.random_sample(nb_samples)
+            ).astype(int)
+
+            probs = np.empty((nb_samples, 3), dtype=int)
+            probs[samples, genotypes] = called
+            probs[samples, (genotypes + 1) % 3] = first
+            probs[samples, (genotypes + 2) % 3] = others - first
+
+            print(site_chrom, name, pos, a1, a2,
+                  " ".join(_PROBABILITIES[probs.ravel()]), file=o_file)
+
+            # The information
+            freq = probs[:, 1].sum() + 2 * probs[:, 2].sum()
+            freq /= 2000 * nb_samples
+            print(site_chrom, name, pos, a1, a2, "{:.3f}".format(freq),
+                  "{:.3f}".format(1 - others.mean() / 500),
+                  "{:.3f}".format(called.mean() / 1000), site_type, -1, -1,
+                  -1, file=info_file)
+
+    # The summary
+    with open(filename + "_summary", "w") as o_file:
+        print("-Output file", file=o_file)
+        print(" --{} type 0 SNPs".format(nb_sites - nb_genotyped),
+              file=o_file)
+        print(" --0 type 1 SNPs", file=o_file)
+        print(" --{} type 2 SNPs".format(nb_genotyped), file=o_file)
+        print(" --0 type 3 SNPs", file=o_file)
+        print(" --{} total SNPs".format(nb_sites), file=o_file)
+
+    return pos + 1
+
+
+def generate_samples(filename, nb_samples, random_state=None):
+    """Generates a synthetic sample file (like the one produced by SHAPEIT).
+
+    Args:
+        filename (str): the name of the sample file
+        nb_samples (int): the number of samples
+        random_state (numpy.random.RandomState): the random number generator
+
+    Returns:
+        numpy.array: the gender of the samples (1 for males, 2 for females)
+
+    The samples are named ``sample_1`` to ``sample_N``.
+
+    """
+    if random_state is None:
+        random_state = np.random.RandomState()
+
+    genders = random_state.randint(1, 3, nb_samples)
+    with open(filename, "w") as o_file:
+        print("ID_1 ID_2 missing father mother sex plink_pheno", file=o_file)
+        print("0 0 0 D D D B", file=o_file)
+        for i, gender in enumerate(genders):
+            sample = "sample_{}".format(i + 1)
+            print(sample, sample, 0, 0, 0, gender, -9, file=o_file)
+
+    return genders
+
+
+def generate_phenotypes(filename, genders, random_state=None):
+    """Generates a synthetic phenotype file.
+
+    Args:
+        filename (str): the name of the phenotype file
+        genders (numpy.array): the gender of the samples
+        random_state (numpy.random.RandomState): the random number generator
+
+    The (tab separated) file contains the sample ID (``sample_id``), a
+    continuous phenotype (``y``), a binary phenotype (``y_d``), an age
+    (``age``), the gender (``gender``) and two covariables (``C1`` and
+    ``C2``).
+
+    """
+    if random_state is None:
+        random_state = np.random.RandomState()
+
+    nb_samples = len(genders)
+    age = random_state.randint(20, 80, nb_samples)
+    covars = random_state.normal(size=(nb_samples, 2))
+    y = 0.02 * age + covars.sum(axis=1) + random_state.normal(size=nb_samples)
+    y_d = (y > np.median(y)).astype(int)
+
+    with open(filename, "w") as o_file:
+        print("sample_id", "y", "y_d", "age", "gender", "C1", "C2", sep="\t",
+              file=o_file)
+        for i in range(nb_samples):
+            print("sample_{}".format(i + 1), "{:.6f}".format(y[i]), y_d[i],
+                  age[i], genders[i], "{:.6f}".format(covars[i, 0]),
+                  "{:.6f}".format(covars[i, 1]), sep="\t", file=o_file)
+
+
+def generate_dataset(dirname, nb_samples, nb_sites, nb_segments=1,
+                     chrom="1", seed=None):
+    """Generates a synthetic dataset (the output of the imputation).
+
+    Args:
+        dirname (str): the output directory
+        nb_samples (int): the number of samples
+        nb_sites (int): the total number of sites
+        nb_segments (int): the number of IMPUTE2 segments
+        chrom (str): the chromosome
+        seed (int): the seed of the random number generator
+
+    Returns:
+        dict: the name of the files (``segments``, ``sample`` and ``pheno``)
+
+    The sites are split between the segments (``chr{chrom}.{i}.impute2``,
+    each with its ``_info`` and ``_summary`` files), just like the files that
+    are merged by :py:mod:`genipe.tools.impute2_merger`. The sample file is
+    named ``chr{chrom}.imputed.sample``, so that it is found by
+    :py:mod:`genipe.tools.impute2_extractor` once the segments are merged
+    using the ``chr{chrom}.imputed`` prefix.
+
+    """
+    random_state = np.random.RandomState(seed)
+
+    # The segments
+    segments = []
+    pos = 1
+    for i in range(nb_segments):
+        filename = os.path.join(dirname, "chr{}.{}.impute2".format(chrom, i))
+        pos = generate_impute2(
+            filename=filename,
+            nb_samples=nb_samples,
+            nb_sites=(nb_sites // nb_segments) +
+                     (1 if i < nb_sites % nb_segments else 0),
+            chrom=chrom,
+            start=pos,
+            random_state=random_state,
+        )
+        segments.append(filename)
+
+    # The samples and the phenotypes
+    sample_filename = os.path.join(dirname,
+                                   "chr{}.imputed.sample".format(chrom))
+    genders = generate_samples(sample_filename, nb_samples, random_state)
+
+    pheno_filename = os.path.join(dirname, "phenotypes.txt")
+    generate_phenotypes(pheno_filename, genders, random_state)
+
+    return {"segments": segments, "sample": sample_filename,
+            "pheno": pheno_filename}
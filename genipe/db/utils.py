@@ -10,7 +10,9 @@
 import os
 import logging
 import sqlite3
+import threading
 from datetime import datetime
+from contextlib import contextmanager
 
 
 __author__ = "Louis-Philippe Lemieux Perreault"
@@ -20,7 +22,30 @@ __license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
 
 __all__ = ["create_task_db", "check_task_completion", "create_task_entry",
            "mark_task_completed", "mark_task_incomplete", "get_task_runtime",
-           "get_all_runtimes", "mark_drmaa_task_completed"]
+           "get_all_runtimes", "get_completed_runtimes",
+           "mark_drmaa_task_completed", "mark_task_skipped",
+           "get_skipped_tasks", "get_completed_tasks", "get_tasks_runtime",
+           "close_task_db", "get_validated_outputs", "set_validated_outputs",
+           "set_task_resources", "get_all_resources"]
+
+
+# The connections to the task DBs (one per DB and per process), and the lock
+# serializing their usage
+_connections = {}
+_connections_lock = threading.RLock()
+
+# The maximal number of values (e.g. task IDs) in a single query
+_MAX_QUERY_IDS = 500
+
+# The columns containing the resources used by the tasks (with their type)
+_RESOURCE_COLUMNS = (
+    ("exit_status", "INT"),
+    ("max_rss", "INT"),
+    ("user_time", "REAL"),
+    ("system_time", "REAL"),
+    ("read_bytes", "INT"),
+    ("write_bytes", "INT"),
+)
 
 
 def create_task_db(out_dir):
@@ -33,36 +58,78 @@ def create_task_db(out_dir):
         str: the name of the file containing the DB
 
     A SQLITE database will be created in the ``out_dir`` directory (with the
-    name ``tasks.db``. The ``genipe_task`` table is automatically created.
+    name ``tasks.db``. The ``genipe_task`` table is automatically created
+    (including the resources used by each task, see
+    :py:func:`set_task_resources`), along with the ``genipe_output`` table
+    (containing the size and modification time of the output files that were
+    validated, see :py:func:`set_validated_outputs`).
 
     """
     # The name
     db_name = os.path.join(out_dir, "tasks.db")
     logging.info("Connecting to DB '{}'".format(db_name))
 
-    # The DB
-    conn, c = _create_db_connection(db_name)
+    # A previous connection to this DB (if any) is closed, since the file
+    # might have been replaced
+    close_task_db(db_name)
+
+    with _db_cursor(db_name) as c:
+        # Creating the table if it doesn't exists
+        c.execute("""CREATE TABLE IF NOT EXISTS genipe_task (
+                        name TEXT PRIMARY KEY,
+                        launch TIMESTAMP,
+                        start TIMESTAMP,
+                        end TIMESTAMP,
+                        completed INT,
+                        skipped INT DEFAULT 0)""")
+
+        # Adding the columns missing from a DB created by a previous version
+        # (the columns containing the resources used by the tasks are always
+        # added this way)
+        c.execute("PRAGMA table_info(genipe_task)")
+        columns = {row[1] for row in c.fetchall()}
+        if "skipped" not in columns:
+            c.execute("ALTER TABLE genipe_task ADD COLUMN skipped INT "
+                      "DEFAULT 0")
+        for column, column_type in _RESOURCE_COLUMNS:
+            if column not in columns:
+                c.execute("ALTER TABLE genipe_task ADD COLUMN {} {}".format(
+                    column, column_type,
+                ))
+
+        # The validated output files
+        c.execute("""CREATE TABLE IF NOT EXISTS genipe_output (
+                        filename TEXT PRIMARY KEY,
+                        checked TEXT,
+                        size INT,
+                        mtime REAL)""")
 
-    # Creating the table if it doesn't exists
-    c.execute("""CREATE TABLE IF NOT EXISTS genipe_task (
-                    name TEXT PRIMARY KEY,
-                    launch TIMESTAMP,
-                    start TIMESTAMP,
-                    end TIMESTAMP,
-                    completed INT)""")
+    return db_name
 
-    # Committing the changes
-    conn.commit()
-    conn.close()
 
-    return db_name
+def close_task_db(db_name=None):
+    """Closes the connection(s) to the task DB.
+
+    Args:
+        db_name (str): the name of the DB (usually a file), or ``None`` to
+                       close all the connections
+
+    The connection is automatically opened again when the DB is used.
+
+    """
+    with _connections_lock:
+        for key in list(_connections.keys()):
+            if db_name is None or key[0] == os.path.abspath(db_name):
+                _connections.pop(key).close()
 
 
-def _create_db_connection(db_name):
+def _create_db_connection(db_name, check_same_thread=True):
     """Creates a DB connection.
 
     Args:
         db_name (str): the name of the database (usually a file)
+        check_same_thread (bool): whether or not only the creating thread
+                                  might use the connection
 
     Returns:
         tuple: a tuple containing the connection object and a cursor to that
@@ -73,12 +140,92 @@ def _create_db_connection(db_name):
         db_name,
         timeout=1800,
         detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        check_same_thread=check_same_thread,
     )
     c = conn.cursor()
 
     return conn, c
 
 
+def _get_db_connection(db_name):
+    """Gets the connection to a task DB (creating it if required).
+
+    Args:
+        db_name (str): the name of the database (usually a file)
+
+    Returns:
+        sqlite3.Connection: the connection to the DB
+
+    A single connection is kept for each DB (and each process), and it is
+    shared between the threads (the usage of the connection is serialized by
+    :py:func:`_db_cursor`). The DB is set in ``WAL`` journal mode, so that
+    reading the DB doesn't block (and isn't blocked by) the writes.
+
+    Note
+    ----
+        This function should be called while holding the connections lock.
+
+    """
+    key = (os.path.abspath(db_name), os.getpid())
+    if key in _connections:
+        return _connections[key]
+
+    conn, c = _create_db_connection(db_name, check_same_thread=False)
+
+    # Using the write-ahead log (which might not be available on some file
+    # systems, in which case the default journal is kept)
+    c.execute("PRAGMA journal_mode=WAL")
+    journal_mode = c.fetchone()[0]
+    if journal_mode.lower() != "wal":
+        logging.debug("{}: journal mode is '{}'".format(db_name, journal_mode))
+    c.close()
+
+    _connections[key] = conn
+    return conn
+
+
+@contextmanager
+def _db_cursor(db_name):
+    """Gets a cursor on the (shared) connection to a task DB.
+
+    Args:
+        db_name (str): the name of the database (usually a file)
+
+    The changes are committed when exiting the context (or rolled back if an
+    exception was raised). The connection can only be used by one thread at a
+    time, so that all the writes to the DB are serialized.
+
+    """
+    with _connections_lock:
+        conn = _get_db_connection(db_name)
+        c = conn.cursor()
+        try:
+            yield c
+            conn.commit()
+
+        except BaseException:
+            conn.rollback()
+            raise
+
+        finally:
+            c.close()
+
+
+def _get_chunks(values):
+    """Splits values in chunks small enough for a single query.
+
+    Args:
+        values (list): the list of values (*e.g.* task IDs or file names)
+
+    Returns:
+        list: the chunks of values
+
+    """
+    values = list(values)
+    return [values[i:i+_MAX_QUERY_IDS]
+            for i in range(0, len(values), _MAX_QUERY_IDS)]
+
+
 def check_task_completion(task_id, db_name):
     """Checks if the task exists and if it's completed.
 
@@ -96,13 +243,11 @@ def check_task_completion(task_id, db_name):
         completed otherwise.
 
     """
-    conn, c = _create_db_connection(db_name)
-
-    # Retrieving the task information
-    c.execute("SELECT completed FROM genipe_task WHERE name=?", (task_id, ))
-    r = c.fetchone()
-
-    conn.close()
+    with _db_cursor(db_name) as c:
+        # Retrieving the task information
+        c.execute("SELECT completed FROM genipe_task WHERE name=?",
+                  (task_id, ))
+        r = c.fetchone()
 
     if r is None:
         # There is not entry with this task ID
@@ -117,6 +262,35 @@ def check_task_completion(task_id, db_name):
     return True
 
 
+def get_completed_tasks(task_ids, db_name):
+    """Gets which of the tasks are completed.
+
+    Args:
+        task_ids (list): the IDs of the tasks
+        db_name (str): the name of the database (usually a file)
+
+    Returns:
+        set: the IDs of the tasks which are completed
+
+    This is the same as calling :py:func:`check_task_completion` for each
+    task, but using one query for many tasks.
+
+    """
+    completed = set()
+    with _db_cursor(db_name) as c:
+        for chunk in _get_chunks(task_ids):
+            c.execute(
+                "SELECT name FROM genipe_task "
+                "WHERE completed=1 AND name IN ({})".format(
+                    ", ".join("?" for task_id in chunk),
+                ),
+                chunk,
+            )
+            completed.update(row[0] for row in c.fetchall())
+
+    return completed
+
+
 def create_task_entry(task_id, db_name):
     """Creates (or updates) a task.
 
@@ -129,32 +303,35 @@ def create_task_entry(task_id, db_name):
 
     If the task ID already exist, it is presumed that the task will be
     relaunched, hence the database entry is updated to the current time (for
-    launch and start time) and ``completed`` is set to ``0``.
+    launch and start time), ``completed`` (and ``skipped``) is set to ``0``
+    and the resources used by the previous execution are removed.
 
     """
-    conn, c = _create_db_connection(db_name)
-
-    # Checking if the entry already exists
-    c.execute("SELECT name FROM genipe_task WHERE name=?", (task_id, ))
-    r = c.fetchone()
-
-    # The time of launch
-    time = datetime.now()
-
-    if r is None:
-        # This is the first time we see this task, so we create an new entry
-        c.execute("INSERT INTO genipe_task (name, launch, start) "
-                  "VALUES (?, ?, ?)",
-                  (task_id, time, time))
-
-    else:
-        # We saw this task, but we need to relaunch it (setting completed=0)
-        c.execute("UPDATE genipe_task "
-                  "SET launch=?, start=?, completed=0 WHERE name=?",
-                  (time, time, task_id))
-
-    conn.commit()
-    conn.close()
+    with _db_cursor(db_name) as c:
+        # Checking if the entry already exists
+        c.execute("SELECT name FROM genipe_task WHERE name=?", (task_id, ))
+        r = c.fetchone()
+
+        # The time of launch
+        time = datetime.now()
+
+        if r is None:
+            # This is the first time we see this task, so we create an new
+            # entry
+            c.execute("INSERT INTO genipe_task (name, launch, start) "
+                      "VALUES (?, ?, ?)",
+                      (task_id, time, time))
+
+        else:
+            # We saw this task, but we need to relaunch it (setting
+            # completed=0)
+            c.execute("UPDATE genipe_task "
+                      "SET launch=?, start=?, completed=0, skipped=0, "
+                      "{} WHERE name=?".format(", ".join(
+                          "{}=NULL".format(column)
+                          for column, column_type in _RESOURCE_COLUMNS
+                      )),
+                      (time, time, task_id))
 
 
 def mark_task_completed(task_id, db_name):
@@ -168,14 +345,10 @@ def mark_task_completed(task_id, db_name):
     updated to the current time.
 
     """
-    conn, c = _create_db_connection(db_name)
-
-    # Updating the end time
-    c.execute("UPDATE genipe_task SET end=?, completed=1 WHERE name=?",
-              (datetime.now(), task_id))
-
-    conn.commit()
-    conn.close()
+    with _db_cursor(db_name) as c:
+        # Updating the end time
+        c.execute("UPDATE genipe_task SET end=?, completed=1 WHERE name=?",
+                  (datetime.now(), task_id))
 
 
 def mark_task_incomplete(task_id, db_name):
@@ -189,13 +362,10 @@ def mark_task_incomplete(task_id, db_name):
     ``0``.
 
     """
-    conn, c = _create_db_connection(db_name)
-
-    # Setting the completion to 0 for this task
-    c.execute("UPDATE genipe_task SET completed=0 WHERE name=?", (task_id, ))
-
-    conn.commit()
-    conn.close()
+    with _db_cursor(db_name) as c:
+        # Setting the completion to 0 for this task
+        c.execute("UPDATE genipe_task SET completed=0 WHERE name=?",
+                  (task_id, ))
 
 
 def mark_drmaa_task_completed(task_id, launch_time, start_time, end_time,
@@ -216,19 +386,16 @@ def mark_drmaa_task_completed(task_id, launch_time, start_time, end_time,
     time that the job was completed.
 
     """
-    conn, c = _create_db_connection(db_name)
-
     # The time
     launch_time = datetime.fromtimestamp(launch_time)
     start_time = datetime.fromtimestamp(start_time)
     end_time = datetime.fromtimestamp(end_time)
 
-    # Updating
-    c.execute("UPDATE genipe_task SET launch=?, start=?, end=?, completed=1 "
-              "WHERE name=?", (launch_time, start_time, end_time, task_id))
-
-    conn.commit()
-    conn.close()
+    with _db_cursor(db_name) as c:
+        # Updating
+        c.execute("UPDATE genipe_task SET launch=?, start=?, end=?, "
+                  "completed=1 WHERE name=?",
+                  (launch_time, start_time, end_time, task_id))
 
 
 def get_task_runtime(task_id, db_name):
@@ -242,15 +409,47 @@ def get_task_runtime(task_id, db_name):
         int: the execution time of the task (in seconds)
 
     """
-    conn, c = _create_db_connection(db_name)
+    with _db_cursor(db_name) as c:
+        # Getting the start and end time
+        c.execute("SELECT start, end FROM genipe_task WHERE name=?",
+                  (task_id, ))
+        r = c.fetchone()
 
-    # Getting the start and end time
-    c.execute("SELECT start, end FROM genipe_task WHERE name=?", (task_id, ))
-    r = c.fetchone()
+    return int(round((r[1] - r[0]).total_seconds(), ndigits=0))
 
-    conn.close()
 
-    return int(round((r[1] - r[0]).total_seconds(), ndigits=0))
+def get_tasks_runtime(task_ids, db_name):
+    """Gets the run time of many tasks.
+
+    Args:
+        task_ids (list): the IDs of the tasks
+        db_name (str): the name of the DB (usually a file)
+
+    Returns:
+        dict: the execution time (seconds) of the tasks
+
+    This is the same as calling :py:func:`get_task_runtime` for each task, but
+    using one query for many tasks. The tasks without an execution time (or
+    which are not in the DB) are absent from the dictionary.
+
+    """
+    runtimes = {}
+    with _db_cursor(db_name) as c:
+        for chunk in _get_chunks(task_ids):
+            c.execute(
+                "SELECT name, start, end FROM genipe_task "
+                "WHERE name IN ({})".format(
+                    ", ".join("?" for task_id in chunk),
+                ),
+                chunk,
+            )
+            for name, start, end in c.fetchall():
+                if (start is None) or (end is None):
+                    continue
+                runtimes[name] = int(round((end - start).total_seconds(),
+                                           ndigits=0))
+
+    return runtimes
 
 
 def get_all_runtimes(db_name):
@@ -266,13 +465,10 @@ def get_all_runtimes(db_name):
     time (in second) (int).
 
     """
-    conn, c = _create_db_connection(db_name)
-
-    # Getting the start and end time
-    c.execute("SELECT name, start, end FROM genipe_task")
-    r = c.fetchall()
-
-    conn.close()
+    with _db_cursor(db_name) as c:
+        # Getting the start and end time
+        c.execute("SELECT name, start, end FROM genipe_task")
+        r = c.fetchall()
 
     # Computing the execution time
     final = {}
@@ -285,3 +481,179 @@ def get_all_runtimes(db_name):
         final[name] = int(round((end - start).total_seconds(), ndigits=0))
 
     return final
+
+
+def set_task_resources(task_id, resources, db_name):
+    """Saves the resources used by a task.
+
+    Args:
+        task_id (str): the ID of the task
+        resources (dict): the resources used by the task
+        db_name (str): the name of the DB (usually a file)
+
+    The resources (all optional) are the exit status of the task
+    (``exit_status``), its peak resident set size in kilobytes (``max_rss``),
+    its user and system CPU time in seconds (``user_time`` and
+    ``system_time``) and the number of bytes it read and wrote on the file
+    system (``read_bytes`` and ``write_bytes``). The unknown resources are
+    saved as ``NULL``.
+
+    """
+    columns = [column for column, column_type in _RESOURCE_COLUMNS]
+    with _db_cursor(db_name) as c:
+        c.execute(
+            "UPDATE genipe_task SET {} WHERE name=?".format(
+                ", ".join("{}=?".format(column) for column in columns),
+            ),
+            [resources.get(column) for column in columns] + [task_id],
+        )
+
+
+def get_all_resources(db_name):
+    """Gets the resources used by all the tasks.
+
+    Args:
+        db_name (str): the name of the DB (usually a file)
+
+    Returns:
+        dict: the resources used by all the tasks in the database
+
+    This function returns a dictionary of task ID (keys) pointing to the
+    resources used by the task (see :py:func:`set_task_resources`). The tasks
+    without any resource information (*e.g.* executed by a previous version)
+    are absent from the dictionary.
+
+    """
+    columns = [column for column, column_type in _RESOURCE_COLUMNS]
+    with _db_cursor(db_name) as c:
+        c.execute("SELECT name, {} FROM genipe_task".format(
+            ", ".join(columns),
+        ))
+        r = c.fetchall()
+
+    final = {}
+    for entry in r:
+        if all(value is None for value in entry[1:]):
+            continue
+        final[entry[0]] = dict(zip(columns, entry[1:]))
+
+    return final
+
+
+def get_completed_runtimes(db_name):
+    """Gets the execution time of all completed tasks.
+
+    Args:
+        db_name (str): the name of the DB (usually a file)
+
+    Returns:
+        dict: the execution time (seconds) of all the completed tasks in the
+              database
+
+    This function returns a dictionary of task ID (keys) pointing to execution
+    time (in second) (float). Contrary to :py:func:`get_all_runtimes`, the
+    tasks that are not completed (which might not have a valid end time) are
+    ignored.
+
+    """
+    with _db_cursor(db_name) as c:
+        # Getting the start and end time
+        c.execute("SELECT name, start, end FROM genipe_task WHERE completed=1")
+        r = c.fetchall()
+
+    return {
+        name: (end - start).total_seconds() for name, start, end in r
+        if (start is not None) and (end is not None)
+    }
+
+
+def mark_task_skipped(task_id, db_name):
+    """Marks a task as intentionally skipped (not required).
+
+    Args:
+        task_id (str): the ID of the task
+        db_name (str): the name of the DB (usually a file)
+
+    The task entry is created (or updated) with the current time as launch,
+    start and end time, ``completed=0`` and ``skipped=1``.
+
+    """
+    # The time
+    time = datetime.now()
+
+    with _db_cursor(db_name) as c:
+        c.execute("INSERT OR REPLACE INTO genipe_task "
+                  "(name, launch, start, end, completed, skipped) "
+                  "VALUES (?, ?, ?, ?, 0, 1)",
+                  (task_id, time, time, time))
+
+
+def get_skipped_tasks(db_name):
+    """Gets the tasks that were intentionally skipped.
+
+    Args:
+        db_name (str): the name of the DB (usually a file)
+
+    Returns:
+        set: the IDs of the skipped tasks
+
+    """
+    with _db_cursor(db_name) as c:
+        c.execute("SELECT name FROM genipe_task WHERE skipped=1")
+        r = c.fetchall()
+
+    return {row[0] for row in r}
+
+
+def get_validated_outputs(filenames, db_name):
+    """Gets the validation information of output files.
+
+    Args:
+        filenames (list): the names of the output files
+        db_name (str): the name of the DB (usually a file)
+
+    Returns:
+        dict: the validation information of the output files (by file name)
+
+    The validation information of a file is a tuple containing the name of the
+    file that was checked (*e.g.* the summary file of a missing IMPUTE2
+    file), along with its size and modification time when the validation was
+    performed. The files that were never validated are absent from the
+    dictionary.
+
+    """
+    validated = {}
+    with _db_cursor(db_name) as c:
+        for chunk in _get_chunks(filenames):
+            c.execute(
+                "SELECT filename, checked, size, mtime FROM genipe_output "
+                "WHERE filename IN ({})".format(
+                    ", ".join("?" for filename in chunk),
+                ),
+                chunk,
+            )
+            for filename, checked, size, mtime in c.fetchall():
+                validated[filename] = (checked, size, mtime)
+
+    return validated
+
+
+def set_validated_outputs(validated, db_name):
+    """Saves the validation information of output files.
+
+    Args:
+        validated (dict): the validation information of the output files (by
+                          file name)
+        db_name (str): the name of the DB (usually a file)
+
+    See :py:func:`get_validated_outputs` for the content of the validation
+    information. All the files are saved using a single transaction.
+
+    """
+    with _db_cursor(db_name) as c:
+        c.executemany(
+            "INSERT OR REPLACE INTO genipe_output "
+            "(filename, checked, size, mtime) VALUES (?, ?, ?, ?)",
+            [(filename, ) + tuple(info)
+             for filename, info in validated.items()],
+        )
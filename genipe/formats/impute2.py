@@ -10,6 +10,7 @@
 import logging
 
 import numpy as np
+import pandas as pd
 
 from ..error import GenipeError
 
@@ -19,9 +20,28 @@ __copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
 __license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
 
 
-__all__ = ["matrix_from_line", "get_good_probs", "maf_from_probs",
+__all__ = ["matrix_from_line", "get_sample_columns", "subset_line",
+           "split_line", "get_good_probs", "maf_from_probs",
            "dosage_from_probs", "hard_calls_from_probs",
-           "maf_dosage_from_probs", "additive_from_probs"]
+           "maf_dosage_from_probs", "additive_from_probs",
+           "create_probs_store", "read_probs_store", "quantize_probs",
+           "matrix_from_store", "create_dosage_store", "read_dosage_store",
+           "dosage_to_store", "dosage_from_store", "dosage_store_chunks"]
+
+
+# The scale of the quantized probabilities (binary probability store)
+_PROBS_SCALE = np.iinfo(np.uint16).max
+
+# The number of sites per chunk (binary dosage store)
+_DOSAGE_CHUNK_SIZE = 1024
+
+# Splitting a line up to a column costs about as much as finding the spaces of
+# this many characters (see :py:func:`split_line`). Splitting costs about 70
+# to 90 ns per field (creating a string for each field), while finding the
+# spaces using numpy costs about 3 ns per character. Since the fields of the
+# probabilities are about 5 to 6 characters long, the ratio is about 24
+# (measured on lines of 300,000 fields).
+_SPLIT_OFFSETS_RATIO = 24
 
 
 def matrix_from_line(impute2_line):
@@ -50,6 +70,92 @@ def matrix_from_line(impute2_line):
     return impute2_line[:5], probabilities
 
 
+def get_sample_columns(sample_indexes):
+    """Gets the columns of an IMPUTE2 line for a subset of samples.
+
+    Args:
+        sample_indexes (list): the indexes of the samples (in the same order
+                               as in the IMPUTE2 file)
+
+    Returns:
+        list: the index of the columns (three per sample) in an IMPUTE2 line
+              (split by space)
+
+    """
+    return [5 + (i * 3) + j for i in sample_indexes for j in range(3)]
+
+
+def subset_line(impute2_line, columns):
+    """Keeps only the required columns of an IMPUTE2 line.
+
+    Args:
+        impute2_line (list): a single line from IMPUTE2's result (split by
+                             space)
+        columns (list): the columns of the samples to keep (see
+                        :py:func:`get_sample_columns`)
+
+    Returns:
+        list: the IMPUTE2 line (the marker's information, and the
+              probabilities of the required samples only)
+
+    This is used to subset the samples of a line before the probabilities are
+    converted to float (e.g. using :py:func:`matrix_from_line`), so that only
+    the required values are decoded.
+
+    """
+    return impute2_line[:5] + [impute2_line[i] for i in columns]
+
+
+def split_line(impute2_line, columns=None):
+    """Splits an IMPUTE2 line (keeping only the required columns).
+
+    Args:
+        impute2_line (str): a single line from IMPUTE2's result (without the
+                            end of line)
+        columns (list): the columns of the samples to keep (see
+                        :py:func:`get_sample_columns`), or ``None`` to keep
+                        all the samples
+
+    Returns:
+        list: the IMPUTE2 line split by space (the marker's information, and
+              the probabilities of the required samples only)
+
+    When only a subset of the samples is kept, the whole line is never split.
+    If the required columns are at the beginning of the line (before
+    ``1 / _SPLIT_OFFSETS_RATIO`` of the line), the line is split only up to
+    the last required column, without reading the rest of the line.
+    Otherwise, the offsets of the fields are found from the positions of the
+    spaces (using :py:mod:`numpy`), and only the required fields are
+    extracted. Hence, no string is created for the samples that are not kept.
+
+    """
+    if columns is None:
+        return impute2_line.split(" ")
+
+    last_column = max(columns, default=4)
+    encoded = None
+    if last_column * _SPLIT_OFFSETS_RATIO >= len(impute2_line):
+        encoded = impute2_line.encode()
+
+    if encoded is None or len(encoded) != len(impute2_line):
+        # Splitting up to the last required column is cheaper (or the line
+        # is not ASCII, so byte offsets are not character offsets)
+        return subset_line(impute2_line.split(" ", last_column + 1), columns)
+
+    # The end offset of each field (the last field ends with the line)
+    ends = np.append(
+        np.flatnonzero(np.frombuffer(encoded, dtype=np.uint8) == 32),
+        len(encoded),
+    )
+    columns = np.asarray(columns, dtype=int)
+    return impute2_line[:ends[4]].split(" ") + [
+        impute2_line[start:end] for start, end in zip(
+            (ends[columns - 1] + 1).tolist(),
+            ends[columns].tolist(),
+        )
+    ]
+
+
 def get_good_probs(prob_matrix, min_prob=0.9):
     """Gathers good imputed genotypes (>= probability threshold).
 
@@ -274,3 +380,216 @@ def additive_from_probs(a1, a2, probs):
         minor = a1
         major = a2
     return calls, minor, major
+
+
+def create_probs_store(prefix, nb_sites, nb_samples):
+    """Creates a binary (memory-mapped) probability store.
+
+    Args:
+        prefix (str): the prefix of the store
+        nb_sites (int): the number of sites in the store
+        nb_samples (int): the number of samples in the store
+
+    Returns:
+        tuple: a tuple containing the memory-mapped array (numpy.memmap) and
+               the site table file (opened for writing)
+
+    The store consists of two files. The ``.probs.npy`` file contains the
+    probabilities (quantized as ``uint16``) in a ``nb_sites x nb_samples x 3``
+    array (in the NumPy binary format). The ``.probs.sites`` file contains the
+    marker information (first five values of an IMPUTE2 line) of each site,
+    in the same order as the array.
+
+    Note
+    ----
+        Probabilities are written using :py:func:`quantize_probs`.
+
+    """
+    store = np.lib.format.open_memmap(
+        prefix + ".probs.npy",
+        mode="w+",
+        dtype=np.uint16,
+        shape=(nb_sites, nb_samples, 3),
+    )
+
+    sites_file = open(prefix + ".probs.sites", "w")
+    print("chrom", "name", "pos", "a1", "a2", sep="\t", file=sites_file)
+
+    return store, sites_file
+
+
+def read_probs_store(prefix):
+    """Reads a binary probability store.
+
+    Args:
+        prefix (str): the prefix of the store
+
+    Returns:
+        tuple: a tuple containing the site table (pandas.DataFrame) and the
+               memory-mapped (read only) quantized probabilities
+               (numpy.memmap)
+
+    The probabilities are not read from disk until they are accessed (see
+    :py:func:`matrix_from_store`).
+
+    """
+    sites = pd.read_csv(prefix + ".probs.sites", sep="\t",
+                        dtype={"chrom": str, "name": str, "a1": str,
+                               "a2": str})
+    store = np.load(prefix + ".probs.npy", mmap_mode="r")
+
+    if store.ndim != 3 or store.shape[0] != len(sites) or store.shape[2] != 3:
+        raise GenipeError("{}: invalid probability store".format(prefix))
+
+    return sites, store
+
+
+def quantize_probs(prob_matrix):
+    """Quantizes a probability matrix (for the binary probability store).
+
+    Args:
+        prob_matrix (numpy.array): the probability matrix
+
+    Returns:
+        numpy.array: the quantized probabilities (``uint16``)
+
+    """
+    return np.rint(
+        np.clip(prob_matrix, 0, 1) * _PROBS_SCALE
+    ).astype(np.uint16)
+
+
+def matrix_from_store(store, site):
+    """Generates the probability matrix from a binary probability store.
+
+    Args:
+        store (numpy.memmap): the quantized probabilities
+        site (int): the index of the site in the store
+
+    Returns:
+        numpy.array: the probability matrix (float)
+
+    The shape of the matrix is n x 3 where n is the number of samples (the
+    same as for :py:func:`matrix_from_line`).
+
+    """
+    return store[site] / _PROBS_SCALE
+
+
+def create_dosage_store(prefix, nb_sites, nb_samples,
+                        chunk_size=_DOSAGE_CHUNK_SIZE):
+    """Creates a binary (memory-mapped) dosage store.
+
+    Args:
+        prefix (str): the prefix of the store
+        nb_sites (int): the number of sites in the store
+        nb_samples (int): the number of samples in the store
+        chunk_size (int): the number of sites per chunk
+
+    Returns:
+        tuple: a tuple containing the memory-mapped array (numpy.memmap) and
+               the site table file (opened for writing)
+
+    The store consists of two files. The ``.dosage.npy`` file contains the
+    dosage values (``float16``, ``nan`` for missing values) in chunks of
+    ``chunk_size`` sites. Each chunk is a ``nb_samples x chunk_size`` matrix,
+    hence the array has the shape ``nb_chunks x nb_samples x chunk_size`` (in
+    the NumPy binary format). The last chunk is padded with ``nan``. The
+    ``.dosage.sites`` file contains the information of each site (chromosome,
+    name, position, minor and major allele and MAF), in the same order as the
+    dosage values.
+
+    Note
+    ----
+        The dosage values are written using :py:func:`dosage_to_store`.
+
+    """
+    nb_chunks = (nb_sites + chunk_size - 1) // chunk_size
+    store = np.lib.format.open_memmap(
+        prefix + ".dosage.npy",
+        mode="w+",
+        dtype=np.float16,
+        shape=(nb_chunks, nb_samples, chunk_size),
+    )
+    store[:] = np.nan
+
+    sites_file = open(prefix + ".dosage.sites", "w")
+    print("chrom", "name", "pos", "minor", "major", "maf", sep="\t",
+          file=sites_file)
+
+    return store, sites_file
+
+
+def read_dosage_store(prefix):
+    """Reads a binary dosage store.
+
+    Args:
+        prefix (str): the prefix of the store
+
+    Returns:
+        tuple: a tuple containing the site table (pandas.DataFrame) and the
+               memory-mapped (read only) dosage values (numpy.memmap)
+
+    """
+    sites = pd.read_csv(prefix + ".dosage.sites", sep="\t",
+                        dtype={"chrom": str, "name": str, "minor": str,
+                               "major": str})
+    store = np.load(prefix + ".dosage.npy", mmap_mode="r")
+
+    if store.ndim != 3 or store.shape[0] * store.shape[2] < len(sites):
+        raise GenipeError("{}: invalid dosage store".format(prefix))
+
+    return sites, store
+
+
+def dosage_to_store(store, site, dosage):
+    """Writes the dosage of a site into a binary dosage store.
+
+    Args:
+        store (numpy.memmap): the dosage values
+        site (int): the index of the site in the store
+        dosage (numpy.array): the dosage vector
+
+    """
+    chunk, i = divmod(site, store.shape[2])
+    store[chunk, :, i] = dosage
+
+
+def dosage_from_store(store, site):
+    """Gets the dosage of a site from a binary dosage store.
+
+    Args:
+        store (numpy.memmap): the dosage values
+        site (int): the index of the site in the store
+
+    Returns:
+        numpy.array: the dosage vector (float)
+
+    """
+    chunk, i = divmod(site, store.shape[2])
+    return store[chunk, :, i].astype(float)
+
+
+def dosage_store_chunks(store, nb_sites):
+    """Generates the dosage matrices of a binary dosage store.
+
+    Args:
+        store (numpy.memmap): the dosage values
+        nb_sites (int): the number of sites in the store
+
+    Returns:
+        generator: a tuple containing the index of the first site and the
+                   dosage matrix (``nb_samples x nb_sites_in_chunk``, float)
+                   of each chunk
+
+    Each chunk is read from disk once, and the padding of the last chunk is
+    removed.
+
+    """
+    chunk_size = store.shape[2]
+    for chunk in range(store.shape[0]):
+        first_site = chunk * chunk_size
+        nb_in_chunk = min(chunk_size, nb_sites - first_site)
+        if nb_in_chunk <= 0:
+            break
+        yield first_site, store[chunk, :, :nb_in_chunk].astype(float)
@@ -23,7 +23,7 @@ __copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
 __license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
 
 
-__all__ = ["get_index", "get_open_func"]
+__all__ = ["get_index", "get_open_func", "get_line_index"]
 
 
 _CHECK_STRING = b"GENIPE INDEX FILE"
@@ -41,8 +41,11 @@ def _seek_generator(f):
     Args:
         f (file): the file object
 
+    The first position is the current position of the file object (which is
+    usually the beginning of the file).
+
     """
-    yield 0
+    yield f.tell()
     for line in f:
         yield f.tell()
 
@@ -85,6 +88,38 @@ def generate_index(fn, cols=None, names=None, sep=" "):
     return data
 
 
+def generate_line_index(fn, header=False):
+    """Build a line index (one seek position per data line) for a file.
+
+    Args:
+        fn (str): the name of the file
+        header (bool): whether the file contains a header line
+
+    Returns:
+        pandas.DataFrame: the index (a single ``seek`` column)
+
+    The row number of the index is the ordinal of the data line in the file
+    (the header, if any, is skipped). For companion files written alongside
+    an IMPUTE2 file (one line per site, in the same order), this ordinal is
+    the same as the row of the site in the IMPUTE2 file's index.
+
+    """
+    logging.info("Generating line index for '{}'".format(fn))
+
+    # Getting the seek information
+    with open(fn, "rb") as f:
+        if header:
+            f.readline()
+        data = pd.DataFrame({
+            "seek": np.fromiter(_seek_generator(f), dtype=np.uint)[:-1],
+        })
+
+    # Saving the index to file
+    write_index(get_index_fn(fn), data)
+
+    return data
+
+
 def get_open_func(fn, return_fmt=False):
     """Get the opening function.
 
@@ -159,6 +194,34 @@ def get_index(fn, cols, names, sep):
     return file_index
 
 
+def get_line_index(fn, header=False):
+    """Restores the line index for a given file.
+
+    Args:
+        fn (str): the name of the file
+        header (bool): whether the file contains a header line
+
+    Returns:
+        pandas.DataFrame: the index (a single ``seek`` column)
+
+    If the index doesn't exist for the file, it is first created (using
+    :py:func:`generate_line_index`).
+
+    """
+    if not has_index(fn):
+        # The index doesn't exists, generate it
+        return generate_line_index(fn, header)
+
+    # Retrieving the index
+    logging.info("Retrieving the line index for '{}'".format(fn))
+    file_index = read_index(get_index_fn(fn))
+
+    if "seek" not in file_index.columns:
+        raise GenipeError("{}: invalid index: reindex".format(fn))
+
+    return file_index
+
+
 def write_index(fn, index):
     """Writes the index to file.
 
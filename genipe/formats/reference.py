@@ -0,0 +1,266 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+import json
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+from ..error import GenipeError
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["ReferenceCache", "get_cache_dir"]
+
+
+# The number of FASTA lines to convert at a time (when building the cache)
+_NB_LINES_PER_CHUNK = 1000000
+
+
+def get_cache_dir(fasta_filename, fallback_dir=None):
+    """Gets the cache directory of a reference.
+
+    Args:
+        fasta_filename (str): the name of the FASTA file
+        fallback_dir (str): the directory to use if the cache can't be
+                            created next to the FASTA file
+
+    Returns:
+        str: the name of the cache directory
+
+    The cache is stored next to the FASTA file (``.genipe_cache``), so that it
+    is shared between runs. If the directory of the FASTA file isn't writable
+    (and the cache doesn't already exist), the fallback directory is used.
+
+    """
+    cache_dir = fasta_filename + ".genipe_cache"
+    if os.path.isdir(cache_dir) or fallback_dir is None:
+        return cache_dir
+
+    if not os.access(os.path.dirname(os.path.abspath(fasta_filename)),
+                     os.W_OK):
+        logging.warning("{}: can't write the reference cache, using "
+                        "'{}'".format(fasta_filename, fallback_dir))
+        return fallback_dir
+
+    return cache_dir
+
+
+class ReferenceCache(object):
+    """Chromosome sequences of a FASTA reference, cached as uint8 arrays.
+
+    Args:
+        fasta_filename (str): the name of the FASTA file (indexed using
+                              FAIDX)
+        cache_dir (str): the name of the cache directory (see
+                      :py:func:`get_cache_dir` for the default)
+
+    The sequence of each chromosome is converted (in upper case) from the
+    FASTA file the first time it's required, and it is saved in the NumPy
+    binary format (one ``.npy`` file per chromosome). The arrays are then
+    memory-mapped, so that the nucleotides of millions of markers are
+    retrieved using array indexing (see :py:meth:`ReferenceCache.get_bases`).
+
+    The names and lengths of the sequences are read from the FAIDX index, and
+    are saved in the ``manifest.json`` file of the cache, along with the size
+    and the modification time of the FASTA file. If the FASTA file changes,
+    the cache is rebuilt.
+
+    """
+    def __init__(self, fasta_filename, cache_dir=None):
+        self.fasta_filename = fasta_filename
+        self.cache_dir = cache_dir
+        if cache_dir is None:
+            self.cache_dir = get_cache_dir(fasta_filename)
+
+        # The sequences (from the FAIDX index)
+        self._index = _read_fai(fasta_filename + ".fai")
+        self._sequences = {}
+
+        # Checking the manifest of the cache
+        stat = os.stat(fasta_filename)
+        manifest = OrderedDict([
+            ("fasta", os.path.abspath(fasta_filename)),
+            ("size", stat.st_size),
+            ("mtime", stat.st_mtime),
+            ("sequences", OrderedDict(
+                (name, info[0]) for name, info in self._index.items()
+            )),
+        ])
+        manifest_filename = os.path.join(self.cache_dir, "manifest.json")
+        previous = None
+        if os.path.isfile(manifest_filename):
+            with open(manifest_filename, "r") as i_file:
+                previous = json.load(i_file)
+
+        if previous != manifest:
+            if previous is not None:
+                logging.info("{}: reference changed, rebuilding the "
+                             "cache".format(fasta_filename))
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.cache_dir, name))
+            _write_json(manifest, manifest_filename)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    @property
+    def names(self):
+        """The names of the sequences in the reference."""
+        return list(self._index.keys())
+
+    def get_sequence(self, name):
+        """Gets the (memory-mapped) sequence of a chromosome.
+
+        Args:
+            name (str): the name of the sequence in the reference
+
+        Returns:
+            numpy.memmap: the nucleotides (upper case ASCII codes, ``uint8``)
+
+        The sequence is converted from the FASTA file if it's not in the
+        cache yet.
+
+        """
+        if name not in self._sequences:
+            if name not in self._index:
+                raise GenipeError("{}: {}: no such sequence".format(
+                    self.fasta_filename, name,
+                ))
+
+            filename = self._get_filename(name)
+            if not os.path.isfile(filename):
+                self._build(name, filename)
+
+            self._sequences[name] = np.load(filename, mmap_mode="r")
+
+        return self._sequences[name]
+
+    def get_bases(self, name, positions):
+        """Gets the nucleotides at some positions of a chromosome.
+
+        Args:
+            name (str): the name of the sequence in the reference
+            positions (numpy.array): the positions (1-based)
+
+        Returns:
+            numpy.array: the nucleotides (as strings, in upper case)
+
+        Positions that are not in the sequence have an empty nucleotide.
+
+        """
+        sequence = self.get_sequence(name)
+        positions = np.asarray(positions, dtype=np.int64)
+        in_sequence = (positions >= 1) & (positions <= len(sequence))
+
+        bases = np.zeros(len(positions), dtype=np.uint8)
+        bases[in_sequence] = sequence[positions[in_sequence] - 1]
+        return bases.view("S1").astype(str)
+
+    def close(self):
+        """Closes the memory-mapped sequences."""
+        self._sequences = {}
+
+    def _get_filename(self, name):
+        """Gets the name of the cache file of a sequence."""
+        # The sequence names might contain special characters
+        safe_name = "".join(c if c.isalnum() or c in "._-" else "_"
+                            for c in name)
+        index = list(self._index.keys()).index(name)
+        return os.path.join(self.cache_dir,
+                            "{}.{}.npy".format(index, safe_name))
+
+    def _build(self, name, filename):
+        """Converts a sequence from the FASTA file (and saves it).
+
+        Args:
+            name (str): the name of the sequence
+            filename (str): the name of the cache file
+
+        The sequence is read from the FASTA file using the FAIDX index (by
+        chunks of lines). The end of lines are removed and the nucleotides
+        are converted to upper case. The file is written under a temporary
+        name, and renamed once completed.
+
+        """
+        logging.info("Caching the reference sequence of '{}'".format(name))
+        length, offset, line_bases, line_width = self._index[name]
+
+        tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+        sequence = np.lib.format.open_memmap(tmp_filename, mode="w+",
+                                             dtype=np.uint8, shape=(length, ))
+
+        with open(self.fasta_filename, "rb") as i_file:
+            i_file.seek(offset)
+            chunk_bases = _NB_LINES_PER_CHUNK * line_bases
+            for start in range(0, length, chunk_bases):
+                nb_bases = min(chunk_bases, length - start)
+                nb_lines = -(-nb_bases // line_bases)
+                data = np.frombuffer(
+                    i_file.read(nb_lines * line_width), dtype=np.uint8,
+                )
+
+                # Removing the end of lines (and converting to upper case)
+                data = data[(data != ord("\n")) & (data != ord("\r"))]
+                data = data[:nb_bases]
+                if len(data) != nb_bases:
+                    raise GenipeError("{}: {}: invalid FASTA "
+                                      "index".format(self.fasta_filename,
+                                                     name))
+                is_lower = (data >= ord("a")) & (data <= ord("z"))
+                sequence[start:start + nb_bases] = np.where(is_lower,
+                                                            data - 32, data)
+
+        sequence.flush()
+        del sequence
+        os.replace(tmp_filename, filename)
+
+
+def _read_fai(filename):
+    """Reads a FAIDX index.
+
+    Args:
+        filename (str): the name of the index file
+
+    Returns:
+        collections.OrderedDict: the length, offset, number of bases per line
+                                 and number of bytes per line of each
+                                 sequence
+
+    """
+    index = OrderedDict()
+    with open(filename, "r") as i_file:
+        for line in i_file:
+            row = line.rstrip("\r\n").split("\t")
+            if len(row) < 5:
+                raise GenipeError("{}: invalid FAIDX index".format(filename))
+            index[row[0]] = tuple(int(value) for value in row[1:5])
+    return index
+
+
+def _write_json(data, filename):
+    """Writes a JSON file (atomically).
+
+    Args:
+        data (dict): the data to write
+        filename (str): the name of the file
+
+    """
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w") as o_file:
+        json.dump(data, o_file, indent=2)
+    os.replace(tmp_filename, filename)
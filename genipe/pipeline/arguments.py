@@ -46,6 +46,11 @@ def parse_args(parser):
         "--thread", type=int, default=1,
         help="number of threads [%(default)d]",
     )
+    parser.add_argument(
+        "--memory", type=float, metavar="GB",
+        help="the amount of memory (GB) available for the tasks (by default, "
+             "the memory is not considered)",
+    )
 
     # The input files
     group = parser.add_argument_group("Input Options")
@@ -208,6 +213,12 @@ def parse_args(parser):
         "--segment-length", type=float, metavar="BP", default=5e6,
         help="The length of a single segment for imputation. [%(default).1g]",
     )
+    group.add_argument(
+        "--adaptive-segments", action="store_true",
+        help="Balance the segments according to the number of reference "
+             "variants and genotyped markers (instead of their length), "
+             "skipping the large regions without variants.",
+    )
     group.add_argument(
         "--filtering-rules", type=str, metavar="RULE", nargs="+",
         help="IMPUTE2 filtering rules (optional).",
@@ -288,6 +299,10 @@ def check_args(args):
     if args.shapeit_thread < 1:
         raise GenipeError("thread should be one or more")
 
+    # Checking the memory
+    if args.memory is not None and args.memory <= 0:
+        raise GenipeError("memory should be positive")
+
     # Checking the chromosome (if autosomes)
     if args.required_chrom == ["autosomes"]:
         args.required_chrom = tuple(autosomes)
@@ -10,6 +10,7 @@
 import os
 import re
 import sys
+import json
 import shlex
 import logging
 import argparse
@@ -17,17 +18,20 @@ from glob import glob
 from math import floor
 from shutil import copyfile
 from subprocess import Popen, PIPE
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 
-from ..task import launcher
+from ..task import launcher, scheduler
 from ..db import utils as db
 from ..error import GenipeError
+from ..formats.reference import ReferenceCache, get_cache_dir
 from .arguments import parse_args, check_args
 from ..config.parser import parse_drmaa_config
 from ..reporting.autoreport import generate_report
-from .. import __version__, autosomes, HAS_PYFAIDX, HAS_MATPLOTLIB
+from .. import __version__, autosomes, HAS_MATPLOTLIB
 
 
 if HAS_MATPLOTLIB:
@@ -35,9 +39,6 @@ if HAS_MATPLOTLIB:
     mpl.use("Agg")
     import matplotlib.pyplot as plt
 
-if HAS_PYFAIDX:
-    from pyfaidx import Fasta
-
 
 __author__ = "Louis-Philippe Lemieux Perreault"
 __copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
@@ -47,6 +48,34 @@ __license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
 _complement = {"A": "T", "T": "A", "C": "G", "G": "C"}
 
 
+# The output files of the IMPUTE2 merge (for each chromosome)
+_merge_impute2_suffixes = (".alleles", ".completion_rates", ".good_sites",
+                           ".impute2", ".impute2_info", ".imputed_sites",
+                           ".map", ".maf")
+
+# The number of threads used to read the IMPUTE2 summary files
+_NB_SUMMARY_THREADS = 16
+
+# The cross-validation section of the IMPUTE2 summary files
+_cross_validation_nb_genotypes_re = re.compile(
+    r"^In the current analysis, IMPUTE2 masked, imputed, and evaluated (\d+) "
+    r"genotypes",
+    re.MULTILINE,
+)
+_cross_validation_table_header_re = re.compile(
+    r"Interval\s+#Genotypes\s+%Concordance\s+Interval\s+%Called\s+"
+    r"%Concordance",
+)
+_cross_validation_table_1_intervals = [
+    "[0.0-0.1]", "[0.1-0.2]", "[0.2-0.3]", "[0.3-0.4]", "[0.4-0.5]",
+    "[0.5-0.6]", "[0.6-0.7]", "[0.7-0.8]", "[0.8-0.9]", "[0.9-1.0]",
+]
+_cross_validation_table_2_intervals = [
+    "[>=0.0]", "[>=0.1]", "[>=0.2]", "[>=0.3]", "[>=0.4]", "[>=0.5]",
+    "[>=0.6]", "[>=0.7]", "[>=0.8]", "[>=0.9]",
+]
+
+
 def main():
     """The main function of the genome-wide imputation pipeline.
 
@@ -65,6 +94,10 @@ def main():
     11. Merge IMPUTE2 files
     12. If asked by the user, compress the final IMPUTE2 files (bgzip)
 
+    Steps 4 to 12 are performed independently for each chromosome (*i.e.* a
+    step is launched as soon as the previous step of the same chromosome is
+    completed, see :py:func:`process_chromosomes`).
+
     At the end of the pipeline, a report (LaTeX) is automatically generated. It
     includes different quality statistics and imputation metrics.
 
@@ -154,7 +187,9 @@ def main():
         )
         run_information.update(numbers)
 
-        chr23_to_skip = exclude_markers_before_phasing(
+        # The tasks excluding the markers and splitting the dataset by
+        # chromosome
+        chr23_to_skip, split_tasks, reorder_tasks = get_exclusion_tasks(
             required_chrom=args.required_chrom,
             prefix=args.bfile,
             db_name=db_name,
@@ -167,9 +202,6 @@ def main():
             if chrom in chr23_to_skip
         ]
 
-        # Computing the marker missing rate
-        missing_rate = compute_marker_missing_rate(args.bfile, db_name, args)
-
         # Removing required regions (chromosome 23)
         for region in sorted(chr23_to_skip):
             logging.warning("{}: no marker left for analysis".format(region))
@@ -188,72 +220,21 @@ def main():
             if chrom not in chr23_to_skip
         )
 
-        # Checking the strand
-        numbers = check_strand(
-            required_chrom=args.required_chrom_names,
-            prefix=os.path.join(args.out_dir, "chr{chrom}", "chr{chrom}"),
-            id_suffix="_1",
-            db_name=db_name,
-            options=args,
-        )
-        run_information.update(numbers)
-
-        # Flipping the markers
-        flip_markers(
-            required_chrom=args.required_chrom_names,
-            prefix=os.path.join(args.out_dir, "chr{chrom}", "chr{chrom}"),
-            to_flip=os.path.join(args.out_dir, "chr{chrom}",
-                                 "chr{chrom}.to_flip"),
-            db_name=db_name,
-            options=args,
-        )
-
-        # Checking the strand
-        numbers = check_strand(
-            required_chrom=args.required_chrom_names,
-            prefix=os.path.join(args.out_dir, "chr{chrom}",
-                                "chr{chrom}.flipped"),
-            id_suffix="_2",
-            db_name=db_name,
-            options=args,
-            exclude=True,
-        )
-        run_information.update(numbers)
-
-        # The final marker exclusion
-        numbers = final_exclusion(
+        # Processing each chromosome independently (strand check, flip,
+        # strand check, final exclusion, phasing, imputation, merge and
+        # compression), while computing the marker missing rate
+        numbers, samples, chrom_to_skip = process_chromosomes(
             required_chrom=args.required_chrom_names,
-            prefix=os.path.join(args.out_dir, "chr{chrom}",
-                                "chr{chrom}.flipped"),
-            to_exclude=os.path.join(args.out_dir, "chr{chrom}",
-                                    "chr{chrom}.to_exclude"),
+            split_tasks=split_tasks + reorder_tasks,
+            chrom_length=chromosome_length,
             db_name=db_name,
             options=args,
+            other_tasks=[get_missing_rate_task(args.bfile, db_name, args)],
         )
         run_information.update(numbers)
 
-        # Phasing the data
-        samples = phase_markers(
-            required_chrom=args.required_chrom_names,
-            prefix=os.path.join(args.out_dir, "chr{chrom}",
-                                "chr{chrom}.final"),
-            o_prefix=os.path.join(args.out_dir, "chr{chrom}",
-                                  "chr{chrom}.final.phased"),
-            db_name=db_name,
-            options=args,
-        )
-
-        # Performs the imputation
-        impute_markers(
-            required_chrom=args.required_chrom_names,
-            phased_haplotypes=os.path.join(args.out_dir, "chr{chrom}",
-                                           "chr{chrom}.final.phased.haps"),
-            out_prefix=os.path.join(args.out_dir, "chr{chrom}",
-                                    "chr{chrom}.{start}_{end}.impute2"),
-            chrom_length=chromosome_length,
-            db_name=db_name,
-            options=args,
-        )
+        # The marker missing rate
+        missing_rate = read_marker_missing_rate(args)
 
         # Getting the weighed average for cross-validation
         numbers = get_cross_validation_results(
@@ -263,19 +244,7 @@ def main():
         )
         run_information.update(numbers)
 
-        # Merging the impute2 files
-        chrom_to_skip = merge_impute2_files(
-            required_chrom=args.required_chrom_names,
-            in_glob=os.path.join(args.out_dir, "chr{chrom}",
-                                 "chr{chrom}.*.impute2"),
-            o_prefix=os.path.join(args.out_dir, "chr{chrom}", "final_impute2",
-                                  "chr{chrom}.imputed"),
-            probability_t=args.probability,
-            completion_t=args.completion,
-            info_t=args.info,
-            db_name=db_name,
-            options=args,
-        )
+        # The chromosomes without imputed sites
         run_information["no_imputed_sites"] = [
             chrom for chrom in args.required_chrom
             if chrom in chrom_to_skip
@@ -287,17 +256,6 @@ def main():
             if chrom not in chrom_to_skip
         )
 
-        # If required, zipping the impute2 files
-        if args.bgzip:
-            compress_impute2_files(
-                required_chrom=args.required_chrom,
-                filename_template=os.path.join(args.out_dir, "chr{chrom}",
-                                               "final_impute2",
-                                               "chr{chrom}.imputed.impute2"),
-                db_name=db_name,
-                options=args,
-            )
-
         # Gathering the imputation statistics
         numbers = gather_imputation_stats(
             required_chrom=args.required_chrom,
@@ -313,6 +271,9 @@ def main():
         # Gathering the MAF statistics
         numbers = gather_maf_stats(
             required_chrom=args.required_chrom,
+            prob_t=args.probability,
+            completion_t=args.completion,
+            info_t=args.info,
             o_dir=args.out_dir,
         )
         run_information.update(numbers)
@@ -357,6 +318,359 @@ def main():
         raise
 
 
+def process_chromosomes(required_chrom, split_tasks, chrom_length, db_name,
+                        options, other_tasks=None):
+    """Processes every chromosome independently (from strand check to merge).
+
+    Args:
+        required_chrom (tuple): the list of chromosome names to process
+        split_tasks (list): the tasks excluding markers and splitting the
+                            dataset by chromosome
+        chrom_length (dict): the length of each chromosome
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+        other_tasks (list): other independent tasks to launch at the same time
+
+    Returns:
+        tuple: the statistics about the tasks (dict), the list of phased
+               samples, and the set of chromosomes to skip (because there were
+               no IMPUTE2 files)
+
+    The tasks of each chromosome (strand check, flip, strand check, final
+    exclusion, phasing, imputation of all the segments, merge and compression)
+    are launched using :py:func:`genipe.task.scheduler.launch_task_graph`.
+    Hence, a task is launched as soon as the previous task of the same
+    chromosome is completed, regardless of the progress of the other
+    chromosomes. The size of each task (its number of study markers) is used
+    to launch the longest tasks first.
+
+    """
+    # The templates
+    chrom_dir = os.path.join(options.out_dir, "chr{chrom}")
+    chrom_prefix = os.path.join(chrom_dir, "chr{chrom}")
+    phased_prefix = chrom_prefix + ".final.phased"
+
+    # The statistics gathered while preparing the tasks
+    numbers = {"nb_flip": 0, "nb_exclude": 0, "nb_samples_no_gender": 0}
+    chrom_to_skip = set()
+
+    # The tasks splitting the dataset (the last one for each chromosome is
+    # the reordering of the chromosome 23 regions)
+    last_split_task = {}
+    for task in split_tasks:
+        chrom = re.sub(r"^plink_(exclude|reorder)_chr", "", task["task_id"])
+        last_split_task[chrom] = task["task_id"]
+
+    tasks = list(split_tasks)
+    if other_tasks is not None:
+        tasks.extend(other_tasks)
+
+    # The study markers (for the size of the tasks)
+    bim = read_bim(options.bfile + ".bim")
+
+    # The phased and reference positions of each chromosome (to find the
+    # empty segments)
+    empty_cache = {}
+
+    impute_tasks = {}
+    for chrom in required_chrom:
+        positions = get_marker_positions(bim, chrom, chrom_length)
+        chrom_tasks = []
+
+        # Checking the strand
+        check_task = get_check_strand_task(
+            chrom=chrom,
+            prefix=chrom_prefix,
+            id_suffix="_1",
+            db_name=db_name,
+            options=options,
+        )
+        check_task["dependencies"] = [last_split_task[str(chrom)]]
+        chrom_tasks.append(check_task)
+
+        # Flipping the markers (once the markers to flip are written)
+        flip_task = get_flip_markers_task(
+            chrom=chrom,
+            prefix=chrom_prefix,
+            to_flip=chrom_prefix + ".to_flip",
+            db_name=db_name,
+            options=options,
+        )
+        flip_task["dependencies"] = [check_task["task_id"]]
+        flip_task["prepare"] = _prepare_strand_problems(
+            chrom, numbers, "nb_flip", options, exclude=False,
+        )
+        chrom_tasks.append(flip_task)
+
+        # Checking the strand (for exclusion)
+        check_task = get_check_strand_task(
+            chrom=chrom,
+            prefix=chrom_prefix + ".flipped",
+            id_suffix="_2",
+            db_name=db_name,
+            options=options,
+            exclude=True,
+        )
+        check_task["dependencies"] = [flip_task["task_id"]]
+        chrom_tasks.append(check_task)
+
+        # The final marker exclusion (its command depends on the files
+        # generated by the previous tasks)
+        exclusion_task = {
+            "task_id": "plink_final_exclude_chr{}".format(chrom),
+            "name": "plink final exclude chr{}".format(chrom),
+            "task_db": db_name,
+            "dependencies": [check_task["task_id"]],
+            "prepare": _prepare_final_exclusion(chrom, numbers, db_name,
+                                                options),
+        }
+        chrom_tasks.append(exclusion_task)
+
+        # Phasing the data
+        phase_task = get_phase_markers_task(
+            chrom=chrom,
+            prefix=chrom_prefix + ".final",
+            o_prefix=phased_prefix,
+            db_name=db_name,
+            options=options,
+        )
+        phase_task["dependencies"] = [exclusion_task["task_id"]]
+        chrom_tasks.append(phase_task)
+
+        # The size of the tasks of the chromosome
+        for task in chrom_tasks:
+            task["size"] = len(positions)
+        tasks.extend(chrom_tasks)
+
+        # Imputing all the segments
+        impute_tasks[chrom] = get_impute_markers_tasks(
+            chrom=chrom,
+            phased_haplotypes=phased_prefix + ".haps",
+            out_prefix=chrom_prefix + ".{start}_{end}.impute2",
+            chrom_length=chrom_length,
+            db_name=db_name,
+            options=options,
+            positions=positions,
+        )
+        for task in impute_tasks[chrom]:
+            task["dependencies"] = [phase_task["task_id"]]
+            task["prepare"] = _prepare_impute2_segment(
+                chrom, phased_prefix + ".haps", empty_cache, db_name, options,
+            )
+            task["prepare_keeps_outputs"] = True
+            tasks.append(task)
+
+    # Merging the IMPUTE2 files (and compressing them)
+    for chrom in required_chrom:
+        if (chrom == "25_2") and ("25_1" in required_chrom):
+            # The second pseudo-autosomal region of chromosome 23 is merged
+            # with the first one
+            continue
+
+        merged_tasks = list(impute_tasks[chrom])
+        if chrom == "25_1" and "25_2" in required_chrom:
+            merged_tasks += impute_tasks["25_2"]
+        dependencies = [task["task_id"] for task in merged_tasks]
+        size = sum(task["size"] for task in merged_tasks)
+
+        merge_prefix = os.path.join(chrom_dir, "final_impute2",
+                                    "chr{chrom}.imputed").format(
+            chrom=25 if chrom == "25_1" else chrom,
+        )
+        merge_task = {
+            "task_id": "merge_impute2_chr{}".format(
+                25 if chrom == "25_1" else chrom,
+            ),
+            "name": "Merge imputed chr{}".format(
+                25 if chrom == "25_1" else chrom,
+            ),
+            "task_db": db_name,
+            "o_files": [merge_prefix + ext
+                        for ext in _merge_impute2_suffixes],
+            "dependencies": dependencies,
+            "size": size,
+            "prepare": _prepare_merge_impute2(chrom, required_chrom,
+                                              chrom_to_skip, db_name,
+                                              options),
+            "prepare_keeps_outputs": True,
+        }
+        tasks.append(merge_task)
+
+        if options.bgzip:
+            compress_chrom = chrom
+            if chrom == "25_1" or chrom == "25_2":
+                compress_chrom = 25
+
+            compress_task = get_compress_impute2_task(
+                chrom=compress_chrom,
+                filename_template=os.path.join(chrom_dir, "final_impute2",
+                                               "chr{chrom}.imputed.impute2"),
+                db_name=db_name,
+            )
+            compress_task["dependencies"] = [merge_task["task_id"]]
+            compress_task["size"] = size
+            tasks.append(compress_task)
+
+    # Executing the tasks
+    logging.info("Processing {:,d} chromosomes ({:,d} tasks)".format(
+        len(required_chrom), len(tasks),
+    ))
+    scheduler.launch_task_graph(tasks, options.thread, hpc=options.use_drmaa,
+                                hpc_options=options.task_options,
+                                out_dir=options.out_dir,
+                                preamble=options.preamble,
+                                max_memory=options.memory)
+    logging.info("Done processing chromosomes")
+
+    # The statistics
+    stats = {}
+    stats.update(summarize_strand_problems(numbers["nb_flip"]))
+    stats.update(summarize_strand_problems(numbers["nb_exclude"],
+                                           exclude=True))
+    stats.update(summarize_final_exclusion(required_chrom,
+                                           numbers["nb_samples_no_gender"],
+                                           options))
+
+    # The samples
+    samples = read_phased_samples(required_chrom, phased_prefix)
+
+    return stats, samples, chrom_to_skip
+
+
+def _prepare_strand_problems(chrom, numbers, key, options, exclude):
+    """Creates the function writing the markers with strand problems.
+
+    Args:
+        chrom (str): the chromosome
+        numbers (dict): the statistics (updated by the function)
+        key (str): the statistic to update
+        options (argparse.Namespace): the pipeline options
+        exclude (bool): should markers be excluded or flipped
+
+    Returns:
+        function: the function to call before launching the task which
+                  requires the markers with strand problems
+
+    """
+    def prepare(task):
+        numbers[key] += write_strand_problems(chrom, options, exclude)
+
+    return prepare
+
+
+def _prepare_final_exclusion(chrom, numbers, db_name, options):
+    """Creates the function preparing the final exclusion of a chromosome.
+
+    Args:
+        chrom (str): the chromosome
+        numbers (dict): the statistics (updated by the function)
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        function: the function to call before launching the final exclusion
+
+    The markers to exclude are written, and the command is created (since it
+    depends on the samples without gender information, for chromosome 23).
+
+    """
+    prefix = os.path.join(options.out_dir, "chr{chrom}", "chr{chrom}")
+
+    def prepare(task):
+        numbers["nb_exclude"] += write_strand_problems(chrom, options,
+                                                       exclude=True)
+
+        new_task, nb_samples_no_gender = get_final_exclusion_task(
+            chrom=chrom,
+            prefix=prefix + ".flipped",
+            to_exclude=prefix + ".to_exclude",
+            db_name=db_name,
+            options=options,
+        )
+        task.update(new_task)
+        numbers["nb_samples_no_gender"] += nb_samples_no_gender
+
+    return prepare
+
+
+def _prepare_impute2_segment(chrom, haps_template, cache, db_name, options):
+    """Creates the function checking if a segment needs to be imputed.
+
+    Args:
+        chrom (str): the chromosome
+        haps_template (str): the template of the phased haplotype file
+        cache (dict): the phased and reference positions (by chromosome)
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        function: the function checking the segment of a task (returning
+                  ``"not required"`` if the segment is empty)
+
+    The positions are read once per chromosome (once the phasing is done).
+    An empty segment (see :py:func:`find_empty_segments`) is marked as
+    skipped in the task DB.
+
+    """
+    def prepare(task):
+        if chrom not in cache:
+            cache[chrom] = (
+                read_haps_positions(haps_template.format(chrom=chrom)),
+                read_legend_positions(get_reference_files(chrom, options)[2]),
+            )
+
+        command = task["command"]
+        start, end = (int(i) for i in command[command.index("-int") + 1:][:2])
+        if find_empty_segments([(start, end)], *cache[chrom],
+                               buffer=get_impute2_buffer(options))[0]:
+            logging.warning("chr{}: nothing to impute from {} to {} "
+                            "(skipped)".format(chrom, start, end))
+            db.mark_task_skipped(task["task_id"], db_name)
+            return "not required"
+
+    return prepare
+
+
+def _prepare_merge_impute2(chrom, required_chrom, chrom_to_skip, db_name,
+                           options):
+    """Creates the function preparing the merge of the IMPUTE2 files.
+
+    Args:
+        chrom (str): the chromosome
+        required_chrom (tuple): the list of chromosome names to process
+        chrom_to_skip (set): the chromosomes without IMPUTE2 files (updated
+                             by the function)
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        function: the function to call before launching the merge (which
+                  returns ``False`` if there are no IMPUTE2 files to merge)
+
+    """
+    chrom_dir = os.path.join(options.out_dir, "chr{chrom}")
+
+    def prepare(task):
+        new_task, skip_chrom = get_merge_impute2_task(
+            chrom=chrom,
+            required_chrom=required_chrom,
+            in_glob=os.path.join(chrom_dir, "chr{chrom}.*.impute2"),
+            o_prefix=os.path.join(chrom_dir, "final_impute2",
+                                  "chr{chrom}.imputed"),
+            probability_t=options.probability,
+            completion_t=options.completion,
+            info_t=options.info,
+            db_name=db_name,
+        )
+        if new_task is None:
+            chrom_to_skip.add(skip_chrom)
+            return False
+
+        task.update(new_task)
+
+    return prepare
+
+
 def phase_markers(required_chrom, prefix, o_prefix, db_name, options):
     """Phase markers using shapeit.
 
@@ -375,8 +689,36 @@ def phase_markers(required_chrom, prefix, o_prefix, db_name, options):
     replaced by ``genipe/chr1/chr1.final``).
 
     """
-    commands_info = []
+    commands_info = [
+        get_phase_markers_task(chrom, prefix, o_prefix, db_name, options)
+        for chrom in required_chrom
+    ]
+
+    # Executing command
+    logging.info("Phasing markers")
+    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble,
+                          max_memory=options.memory)
+    logging.info("Done phasing markers")
+
+    return read_phased_samples(required_chrom, o_prefix)
+
+
+def get_phase_markers_task(chrom, prefix, o_prefix, db_name, options):
+    """Creates the task phasing the markers of a chromosome using shapeit.
+
+    Args:
+        chrom (str): the chromosome to phase
+        prefix (str): the prefix template of the input files
+        o_prefix (str): the prefix template of the output files
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        dict: the task information
 
+    """
     # Creating the base command
     base_command = [
         "shapeit" if options.shapeit_bin is None else options.shapeit_bin,
@@ -388,48 +730,53 @@ def phase_markers(required_chrom, prefix, o_prefix, db_name, options):
     if options.shapeit_extra:
         base_command.extend(options.shapeit_extra)
 
-    for chrom in required_chrom:
-        # The current output prefix
-        c_prefix = o_prefix.format(chrom=chrom)
+    # The current output prefix
+    c_prefix = o_prefix.format(chrom=chrom)
 
-        # The reference files
-        map_filename = options.map_template.format(chrom=chrom)
+    # The reference files
+    map_filename = options.map_template.format(chrom=chrom)
 
-        # The specific reference files for the chromosome 23
-        if chrom == 23:
-            map_filename = options.map_chr23
+    # The specific reference files for the chromosome 23
+    if chrom == 23:
+        map_filename = options.map_chr23
 
-        elif chrom == "25_1":
-            map_filename = options.map_par1
+    elif chrom == "25_1":
+        map_filename = options.map_par1
 
-        elif chrom == "25_2":
-            map_filename = options.map_par2
+    elif chrom == "25_2":
+        map_filename = options.map_par2
 
-        remaining_command = [
-            "-B", prefix.format(chrom=chrom),
-            "-M", map_filename,
-            "-O", c_prefix,
-            "-L", c_prefix + ".log",
-        ]
+    remaining_command = [
+        "-B", prefix.format(chrom=chrom),
+        "-M", map_filename,
+        "-O", c_prefix,
+        "-L", c_prefix + ".log",
+    ]
 
-        if chrom == 23:
-            remaining_command.append("--chrX")
+    if chrom == 23:
+        remaining_command.append("--chrX")
 
-        commands_info.append({
-            "task_id": "shapeit_phase_chr{}".format(chrom),
-            "name": "SHAPEIT phase chr{}".format(chrom),
-            "command": base_command + remaining_command,
-            "task_db": db_name,
-            "o_files": [c_prefix + ext for ext in (".haps", ".sample")],
-        })
+    return {
+        "task_id": "shapeit_phase_chr{}".format(chrom),
+        "name": "SHAPEIT phase chr{}".format(chrom),
+        "command": base_command + remaining_command,
+        "task_db": db_name,
+        "o_files": [c_prefix + ext for ext in (".haps", ".sample")],
+        "threads": options.shapeit_thread,
+    }
 
-    # Executing command
-    logging.info("Phasing markers")
-    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done phasing markers")
 
+def read_phased_samples(required_chrom, o_prefix):
+    """Reads (and compares) the samples of the phased chromosomes.
+
+    Args:
+        required_chrom (tuple): the list of phased chromosome
+        o_prefix (str): the prefix template of the phased files
+
+    Returns:
+        list: the list of all samples that were phased
+
+    """
     # Checking that all the sample files are the same
     compare_with = None
     for chrom in required_chrom:
@@ -470,6 +817,10 @@ def impute_markers(required_chrom, phased_haplotypes, out_prefix, chrom_length,
     chromosome number (e.g. ``genipe/chr{chrom}/chr{chrom}.final`` will be
     replaced by ``genipe/chr1/chr1.final``).
 
+    The segments without anything to impute (see
+    :py:func:`find_empty_segments`) are not launched, and they are marked as
+    skipped in the task DB.
+
     Note
     ----
         When imputing the pseudo-autosomal regions of chromosome 23, the
@@ -477,150 +828,456 @@ def impute_markers(required_chrom, phased_haplotypes, out_prefix, chrom_length,
         reduces the ``-Ne`` value by 25%.
 
     """
-    # Are we skipping DRMAA options?
-    skip_drmaa_config = False
-    if options.task_options is not None:
-        skip_drmaa_config = options.task_options.get(
-            "skip_drmaa_config",
-            False,
-        )
-
     commands_info = []
-    base_command = [
-        "impute2" if options.impute2_bin is None else options.impute2_bin,
-        "-use_prephased_g",
-    ]
-
-    # If there are any extra parameters, now is the time to add them
-    if options.impute2_extra:
-        base_command.extend(options.impute2_extra)
-
-    # Are there any filtering rules?
-    if options.filtering_rules is not None:
-        base_command.append("-filt_rules_l")
-        for rule in options.filtering_rules:
-            base_command.append(rule)
 
-    # Each chromosome have multiple segments
+    # Each chromosome have multiple segments (the empty ones are skipped)
+    empty_cache = {}
     for chrom in required_chrom:
-        # The length of the chromosome
-        length = None
-        if chrom == "25_1" or chrom == "25_2":
-            assert 25 in chrom_length
-            length = chrom_length[25]
-        else:
-            assert chrom in chrom_length
-            length = chrom_length[chrom]
+        is_required = _prepare_impute2_segment(
+            chrom, phased_haplotypes, empty_cache, db_name, options,
+        )
+        commands_info.extend(
+            task for task in get_impute_markers_tasks(
+                chrom, phased_haplotypes, out_prefix, chrom_length, db_name,
+                options,
+            )
+            if is_required(task) is None
+        )
+
+    # Executing the commands
+    logging.info("Imputing markers")
+    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble,
+                          max_memory=options.memory)
+    logging.info("Done imputing markers")
+
+
+def get_impute_markers_tasks(chrom, phased_haplotypes, out_prefix,
+                             chrom_length, db_name, options, positions=None):
+    """Creates the tasks imputing the segments of a chromosome using IMPUTE2.
+
+    Args:
+        chrom (str): the chromosome to impute
+        phased_haplotypes (str): the template for the haplotype files
+        out_prefix (str): the prefix template of the output files
+        chrom_length (dict): the length of each chromosome
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+        positions (numpy.array): the sorted positions of the study markers
+
+    Returns:
+        list: the information of the task of each segment
+
+    By default, the chromosome is split in segments of ``--segment-length``
+    base pairs. With ``--adaptive-segments``, the segments are balanced
+    according to the number of reference variants and study markers (see
+    :py:func:`get_adaptive_segments`).
+
+    If the positions of the study markers are provided, the size of each task
+    is the number of study markers in the segment. If the amount of memory
+    available is limited (``--memory``), the memory required by each task is
+    estimated from the size of the reference panel (see
+    :py:func:`estimate_impute2_memory`).
+
+    """
+    # Are we skipping DRMAA options?
+    skip_drmaa_config = False
+    if options.task_options is not None:
+        skip_drmaa_config = options.task_options.get(
+            "skip_drmaa_config",
+            False,
+        )
 
-        # The starting position of the chromosome
+    commands_info = []
+    base_command = [
+        "impute2" if options.impute2_bin is None else options.impute2_bin,
+        "-use_prephased_g",
+    ]
+
+    # If there are any extra parameters, now is the time to add them
+    if options.impute2_extra:
+        base_command.extend(options.impute2_extra)
+
+    # Are there any filtering rules?
+    if options.filtering_rules is not None:
+        base_command.append("-filt_rules_l")
+        for rule in options.filtering_rules:
+            base_command.append(rule)
+
+    # The length of the chromosome
+    length = None
+    if chrom == "25_1" or chrom == "25_2":
+        assert 25 in chrom_length
+        length = chrom_length[25]
+    else:
+        assert chrom in chrom_length
+        length = chrom_length[chrom]
+
+    # The starting position of the chromosome
+    start = 1
+
+    # If this is chromosome 23, length is a list containing two values: the
+    # starting position, and the ending position of the non
+    # pseudo-autosomal region
+    if chrom == 23:
+        assert len(length) == 2
+        start = length[0]
+        length = length[1]
+
+    # If this is the first pseudo-autosomal region of chromosome 23, the
+    # length is a list containing three values: the ending position of the
+    # first pseudo-autosomal region, the starting position of the second
+    # pseudo-autosomal region, and the ending position of the second
+    # pseudo-autosomal region.
+    elif chrom == "25_1":
+        assert len(length) == 3
         start = 1
+        length = length[0]
+
+    # If this is the first pseudo-autosomal region of chromosome 23, the
+    # length is a list containing three values: the ending position of the
+    # first pseudo-autosomal region, the starting position of the second
+    # pseudo-autosomal region, and the ending position of the second
+    # pseudo-autosomal region.
+    elif chrom == "25_2":
+        assert len(length) == 3
+        start = length[1]
+        length = length[2]
+
+    # The reference files
+    map_filename, hap_filename, legend_filename = get_reference_files(
+        chrom, options,
+    )
 
-        # If this is chromosome 23, length is a list containing two values: the
-        # starting position, and the ending position of the non
-        # pseudo-autosomal region
-        if chrom == 23:
-            assert len(length) == 2
-            start = length[0]
-            length = length[1]
-
-        # If this is the first pseudo-autosomal region of chromosome 23, the
-        # length is a list containing three values: the ending position of the
-        # first pseudo-autosomal region, the starting position of the second
-        # pseudo-autosomal region, and the ending position of the second
-        # pseudo-autosomal region.
-        elif chrom == "25_1":
-            assert len(length) == 3
-            start = 1
-            length = length[0]
-
-        # If this is the first pseudo-autosomal region of chromosome 23, the
-        # length is a list containing three values: the ending position of the
-        # first pseudo-autosomal region, the starting position of the second
-        # pseudo-autosomal region, and the ending position of the second
-        # pseudo-autosomal region.
-        elif chrom == "25_2":
-            assert len(length) == 3
-            start = length[1]
-            length = length[2]
+    # The size of the reference panel (to estimate the memory required by
+    # each segment)
+    nb_haplotypes, ref_positions = None, None
+    if options.memory is not None:
+        nb_haplotypes, ref_positions = get_reference_panel_size(
+            hap_filename, legend_filename,
+        )
+
+    # The segments to impute
+    segments = []
+    if options.adaptive_segments:
+        if ref_positions is None:
+            ref_positions = read_legend_positions(legend_filename)
+        if positions is None:
+            positions = get_marker_positions(
+                read_bim(options.bfile + ".bim"), chrom, chrom_length,
+            )
+        segments = get_adaptive_segments(
+            ref_positions=ref_positions[(ref_positions >= start) &
+                                        (ref_positions <= length)],
+            study_positions=positions[(positions >= start) &
+                                      (positions <= length)],
+            segment_length=options.segment_length,
+        )
 
+    else:
         while start < length:
             end = start + floor(options.segment_length) - 1
+            segments.append((start, end))
+            start = end + 1
+
+    for start, end in segments:
+        # The current output prefix
+        c_prefix = out_prefix.format(chrom=chrom, start=start, end=end)
 
-            # The current output prefix
-            c_prefix = out_prefix.format(chrom=chrom, start=start, end=end)
+        # The task ID
+        task_id = "impute2_chr{}_{}_{}".format(chrom, start, end)
 
-            # The task ID
-            task_id = "impute2_chr{}_{}_{}".format(chrom, start, end)
+        # The command for this segment
+        remaining_command = [
+            "-known_haps_g", phased_haplotypes.format(chrom=chrom),
+            "-h", hap_filename,
+            "-l", legend_filename,
+            "-m", map_filename,
+            "-int", str(start), str(end),
+            "-o", c_prefix,
+        ]
 
-            # The reference files
-            map_filename = options.map_template.format(chrom=chrom)
-            hap_filename = options.hap_template.format(chrom=chrom)
-            legend_filename = options.legend_template.format(chrom=chrom)
+        if chrom == 23:
+            # Getting the sample file (from the phased haplotypes file)
+            sample_file = os.path.splitext(
+                phased_haplotypes.format(chrom=chrom),
+            )[0] + ".sample"
 
-            # The specific reference files for the chromosome 23
-            if chrom == 23:
-                map_filename = options.map_chr23
-                hap_filename = options.hap_chr23
-                legend_filename = options.legend_chr23
+            # We add the '-chrX' flag
+            remaining_command.append("-chrX")
+            remaining_command.extend(["-sample_known_haps_g", sample_file])
 
-            elif chrom == "25_1":
-                map_filename = options.map_par1
-                hap_filename = options.hap_par1
-                legend_filename = options.legend_par1
+        if chrom == "25_1" or chrom == "25_2":
+            remaining_command.extend(["-chrX", "-Xpar"])
 
-            elif chrom == "25_2":
-                map_filename = options.map_par2
-                hap_filename = options.hap_par2
-                legend_filename = options.legend_par2
+        commands_info.append({
+            "task_id": task_id,
+            "name": "IMPUTE2 chr{} from {} to {}".format(chrom, start, end),
+            "command": base_command + remaining_command,
+            "task_db": db_name,
+            "o_files": [c_prefix + "_summary", c_prefix],
+        })
 
-            # The command for this segment
-            remaining_command = [
-                "-known_haps_g", phased_haplotypes.format(chrom=chrom),
-                "-h", hap_filename,
-                "-l", legend_filename,
-                "-m", map_filename,
-                "-int", str(start), str(end),
-                "-o", c_prefix,
-            ]
+        # The number of study markers in the segment
+        if positions is not None:
+            commands_info[-1]["size"] = int(
+                np.searchsorted(positions, end, side="right") -
+                np.searchsorted(positions, start, side="left")
+            )
 
-            if chrom == 23:
-                # Getting the sample file (from the phased haplotypes file)
-                sample_file = os.path.splitext(
-                    phased_haplotypes.format(chrom=chrom),
-                )[0] + ".sample"
+        # The memory required by the segment
+        if ref_positions is not None:
+            commands_info[-1]["memory"] = estimate_impute2_memory(
+                nb_haplotypes, ref_positions, start, end,
+                buffer=get_impute2_buffer(options),
+            )
 
-                # We add the '-chrX' flag
-                remaining_command.append("-chrX")
-                remaining_command.extend(["-sample_known_haps_g", sample_file])
+        # Adding the walltime for this particular task_id
+        if options.use_drmaa and not skip_drmaa_config:
+            if task_id not in options.task_options:
+                # Sending the chromosome specific instead
+                value = options.task_options["impute2_chr{}".format(chrom)]
+                options.task_options[task_id] = value
 
-            if chrom == "25_1" or chrom == "25_2":
-                remaining_command.extend(["-chrX", "-Xpar"])
+    return commands_info
 
-            commands_info.append({
-                "task_id": task_id,
-                "name": "IMPUTE2 chr{} from {} to {}".format(chrom, start,
-                                                             end),
-                "command": base_command + remaining_command,
-                "task_db": db_name,
-                "o_files": [c_prefix + "_summary", c_prefix],
-            })
 
-            # The new starting position
-            start = end + 1
+def get_reference_files(chrom, options):
+    """Gets the reference files of a chromosome.
 
-            # Adding the walltime for this particular task_id
-            if options.use_drmaa and not skip_drmaa_config:
-                if task_id not in options.task_options:
-                    # Sending the chromosome specific instead
-                    value = options.task_options["impute2_chr{}".format(chrom)]
-                    options.task_options[task_id] = value
+    Args:
+        chrom (str): the chromosome
+        options (argparse.Namespace): the pipeline options
 
-    # Executing the commands
-    logging.info("Imputing markers")
-    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done imputing markers")
+    Returns:
+        tuple: the name of the map, haplotype and legend files
+
+    """
+    # The specific reference files for the chromosome 23
+    if chrom == 23:
+        return options.map_chr23, options.hap_chr23, options.legend_chr23
+
+    elif chrom == "25_1":
+        return options.map_par1, options.hap_par1, options.legend_par1
+
+    elif chrom == "25_2":
+        return options.map_par2, options.hap_par2, options.legend_par2
+
+    return (
+        options.map_template.format(chrom=chrom),
+        options.hap_template.format(chrom=chrom),
+        options.legend_template.format(chrom=chrom),
+    )
+
+
+def get_impute2_buffer(options):
+    """Gets the length of the buffer region used by IMPUTE2.
+
+    Args:
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        int: the length of the buffer region (in base pairs)
+
+    The buffer is 250 kb, unless the ``-buffer`` option is used in
+    ``--impute2-extra``.
+
+    """
+    if options.impute2_extra and "-buffer" in options.impute2_extra:
+        i = options.impute2_extra.index("-buffer")
+        try:
+            return int(float(options.impute2_extra[i + 1]) * 1000)
+        except (IndexError, ValueError):
+            pass
+
+    return 250000
+
+
+def read_haps_positions(haps_filename):
+    """Reads the positions of the markers of a phased haplotype file.
+
+    Args:
+        haps_filename (str): the name of the haplotype file (from SHAPEIT)
+
+    Returns:
+        numpy.array: the sorted positions of the phased markers
+
+    """
+    haps = pd.read_csv(haps_filename, sep=" ", header=None, usecols=[2])
+    return np.sort(haps[2].values)
+
+
+def find_empty_segments(segments, study_positions, ref_positions, buffer):
+    """Finds the segments without anything for IMPUTE2 to analyze.
+
+    Args:
+        segments (list): the start and end positions of each segment
+        study_positions (numpy.array): the sorted phased marker positions
+        ref_positions (numpy.array): the sorted reference variant positions
+        buffer (int): the length of the buffer region used by IMPUTE2
+
+    Returns:
+        list: whether each segment is empty or not
+
+    A segment is empty if there are no reference variants in the segment
+    (IMPUTE2 quits since there is nothing to analyze), or if there are no
+    genotyped markers (at the position of a reference variant) in the segment
+    and its buffer regions (IMPUTE2 fails since there are no type 2 SNPs).
+
+    """
+    # The genotyped markers which are also in the reference panel
+    type_2 = np.intersect1d(study_positions, ref_positions)
+
+    empty = []
+    for start, end in segments:
+        nb_ref = (np.searchsorted(ref_positions, end, side="right") -
+                  np.searchsorted(ref_positions, start, side="left"))
+        nb_type_2 = (
+            np.searchsorted(type_2, end + buffer, side="right") -
+            np.searchsorted(type_2, start - buffer, side="left")
+        )
+        empty.append(bool(nb_ref == 0 or nb_type_2 == 0))
+
+    return empty
+
+
+def get_reference_panel_size(hap_filename, legend_filename):
+    """Gets the number of haplotypes and the positions of a reference panel.
+
+    Args:
+        hap_filename (str): the name of the reference haplotype file
+        legend_filename (str): the name of the reference legend file
+
+    Returns:
+        tuple: the number of reference haplotypes (int) and the sorted
+               positions of the reference variants (numpy.array)
+
+    """
+    # The number of haplotypes (the number of columns of the first line)
+    haplotypes = pd.read_csv(
+        hap_filename,
+        sep=" ",
+        header=None,
+        nrows=1,
+        compression="gzip" if hap_filename.endswith(".gz") else None,
+    )
+
+    return haplotypes.shape[1], read_legend_positions(legend_filename)
+
+
+def read_legend_positions(legend_filename):
+    """Reads the positions of the variants of a reference legend file.
+
+    Args:
+        legend_filename (str): the name of the reference legend file
+
+    Returns:
+        numpy.array: the sorted positions of the reference variants
+
+    """
+    legend = pd.read_csv(
+        legend_filename,
+        sep=" ",
+        usecols=["position"],
+        compression="gzip" if legend_filename.endswith(".gz") else None,
+    )
+
+    return np.sort(legend.position.values)
+
+
+def get_adaptive_segments(ref_positions, study_positions, segment_length,
+                          max_gap=1000000, max_length=7000000):
+    """Splits a chromosome in segments balanced by variant density.
+
+    Args:
+        ref_positions (numpy.array): the sorted reference variant positions
+        study_positions (numpy.array): the sorted study marker positions
+        segment_length (float): the (mean) length of a segment
+        max_gap (int): the length of a region without any variant after which
+                       a new segment is started
+        max_length (int): the maximal length of a segment (if it's longer
+                          than the segment length)
+
+    Returns:
+        list: the start and end positions of each segment
+
+    The number of segments is the same as when the chromosome is split in
+    segments of ``segment_length`` base pairs. Each segment contains the same
+    proportion of the reference variants and of the study markers (both
+    counts having the same weight). The segments start and end at variant
+    positions, and no segment spans a region without any variant longer than
+    ``max_gap`` base pairs (*e.g.* a centromere). Finally, no segment is
+    longer than the largest of ``max_length`` (the largest region IMPUTE2
+    imputes without ``-allow_large_regions``) and ``segment_length``.
+
+    """
+    # All the positions, and their weight
+    positions = np.union1d(ref_positions, study_positions)
+    if len(positions) == 0:
+        return []
+
+    weights = np.zeros(len(positions))
+    for subset in (ref_positions, study_positions):
+        if len(subset) > 0:
+            counts = (
+                np.searchsorted(subset, positions, side="right") -
+                np.searchsorted(subset, positions, side="left")
+            )
+            weights += counts / len(subset)
+    cumulative = np.cumsum(weights)
+
+    # The number of segments (as if they all had the same length)
+    nb_segments = max(1, int(np.ceil(
+        (positions[-1] - positions[0] + 1) / segment_length
+    )))
+
+    # The segments start at the position where the cumulative weight reaches
+    # a multiple of the weight of a segment, and after a gap
+    targets = cumulative[-1] * np.arange(1, nb_segments) / nb_segments
+    starts = set(np.searchsorted(cumulative, targets, side="right"))
+    starts.update(np.flatnonzero(np.diff(positions) > max_gap) + 1)
+    starts.add(0)
+    starts.discard(len(positions))
+    starts = sorted(starts)
+
+    # Splitting the segments that are too long
+    max_length = max(max_length, segment_length)
+    segments = []
+    for first, last in zip(starts, starts[1:] + [len(positions)]):
+        subset = positions[first:last]
+        while len(subset) > 0:
+            nb = np.searchsorted(subset, subset[0] + max_length, side="left")
+            segments.append((int(subset[0]), int(subset[nb - 1])))
+            subset = subset[nb:]
+
+    return segments
+
+
+def estimate_impute2_memory(nb_haplotypes, ref_positions, start, end,
+                            buffer=250000):
+    """Estimates the memory required by IMPUTE2 to impute a segment.
+
+    Args:
+        nb_haplotypes (int): the number of reference haplotypes
+        ref_positions (numpy.array): the sorted reference variant positions
+        start (int): the start of the segment
+        end (int): the end of the segment
+        buffer (int): the buffer region used by IMPUTE2 around the segment
+
+    Returns:
+        float: the estimated amount of memory (GB)
+
+    IMPUTE2 mostly keeps the reference haplotypes of the segment (and of its
+    buffer regions) in memory. This is a rough estimate, assuming 4 bytes
+    per reference allele (and 0.1 GB for the rest of the data).
+
+    """
+    nb_variants = (
+        np.searchsorted(ref_positions, end + buffer, side="right") -
+        np.searchsorted(ref_positions, start - buffer, side="left")
+    )
+    return 0.1 + nb_haplotypes * int(nb_variants) * 4 / 1024**3
 
 
 def merge_impute2_files(required_chrom, in_glob, o_prefix, probability_t,
@@ -647,12 +1304,6 @@ def merge_impute2_files(required_chrom, in_glob, o_prefix, probability_t,
 
     """
     commands_info = []
-    base_command = [
-        "impute2-merger",
-        "--probability", str(probability_t),
-        "--completion", str(completion_t),
-        "--info", str(info_t),
-    ]
 
     # The chromosome to skip (if required) because no IMPUTE2 files
     chrom_to_skip = set()
@@ -664,98 +1315,15 @@ def merge_impute2_files(required_chrom, in_glob, o_prefix, probability_t,
             # with the first one
             continue
 
-        # The current output prefix
-        c_prefix = o_prefix.format(chrom=chrom)
-        if chrom == "25_1":
-            c_prefix = o_prefix.format(chrom=25)
-
-        # Checking that the output directory exists
-        if not os.path.isdir(os.path.dirname(c_prefix)):
-            os.makedirs(os.path.dirname(c_prefix))
-
-        remaining_command = [
-            "--prefix", c_prefix,
-            "--chr", "25" if chrom == "25_1" else str(chrom),
-            "-i",
-        ]
-
-        # Adding the files
-        filenames = sorted(glob(in_glob.format(chrom=chrom)), key=file_sorter)
-        if chrom == "25_1":
-            filenames += sorted(glob(in_glob.format(chrom="25_2")),
-                                key=file_sorter)
-        remaining_command.extend(filenames)
-
-        # Are there any files?
-        if len(filenames) == 0:
-            skip_chrom = chrom
-            if (chrom == "25_1") or (chrom == "25_2"):
-                skip_chrom = 25
-            logging.warning("chr{}: no IMPUTE2 file left".format(skip_chrom))
+        task, skip_chrom = get_merge_impute2_task(
+            chrom, required_chrom, in_glob, o_prefix, probability_t,
+            completion_t, info_t, db_name,
+        )
+        if task is None:
             chrom_to_skip.add(skip_chrom)
             continue
 
-        # The task id and task name
-        task_id = "merge_impute2_chr{}".format(chrom)
-        task_name = "Merge imputed chr{}".format(chrom)
-        if chrom == "25_1":
-            task_id = "merge_impute2_chr{}".format(25)
-            task_name = "Merge imputed chr{}".format(25)
-
-        commands_info.append({
-            "task_id": task_id,
-            "name": task_name,
-            "command": base_command + remaining_command,
-            "task_db": db_name,
-            "o_files": [c_prefix + ext for ext in (".alleles",
-                                                   ".completion_rates",
-                                                   ".good_sites",
-                                                   ".impute2",
-                                                   ".impute2_info",
-                                                   ".imputed_sites",
-                                                   ".map",
-                                                   ".maf")],
-        })
-
-        # Getting the name of the sample file
-        sample_file = os.path.join(
-            os.path.dirname(in_glob),
-            "chr{chrom}.final.phased.sample",
-        ).format(chrom=chrom)
-
-        # Checking if the file exists
-        if not os.path.isfile(sample_file):
-            raise GenipeError("{}: no such file".format(sample_file))
-
-        # Checking that samples files are the same for the two pseudo-autosomal
-        # regions of the chromosome 23
-        if chrom == "25_1":
-            other_sample_file = os.path.join(
-                os.path.dirname(in_glob),
-                "chr{chrom}.final.phased.sample",
-            ).format(chrom="25_2")
-
-            # The "25_2" sample file could not exists if 25_2 is not in the
-            # required chromosome
-            if "25_2" in required_chrom:
-                # Checking the file exits
-                if not os.path.isfile(other_sample_file):
-                    raise GenipeError(
-                        "{}: no such file".format(other_sample_file),
-                    )
-
-                # Comparing
-                with open(sample_file, "r") as f1, \
-                        open(other_sample_file, "r") as f2:
-                    for line_f1, line_f2 in zip(f1, f2):
-                        if line_f1 != line_f2:
-                            raise GenipeError(
-                                "the two pseudo-autosomal regions have "
-                                "different sample files...",
-                            )
-
-        # Copying the file
-        copyfile(sample_file, c_prefix + ".sample")
+        commands_info.append(task)
 
     # Executing command
     logging.info("Merging impute2 files")
@@ -767,6 +1335,125 @@ def merge_impute2_files(required_chrom, in_glob, o_prefix, probability_t,
     return chrom_to_skip
 
 
+def get_merge_impute2_task(chrom, required_chrom, in_glob, o_prefix,
+                           probability_t, completion_t, info_t, db_name):
+    """Creates the task merging the impute2 files of a chromosome.
+
+    Args:
+        chrom (str): the chromosome to merge
+        required_chrom (tuple): the list of required chromosomes
+        in_glob (str): the template that will be used to find files with the
+                       :py:mod:`glob` module
+        o_prefix (str): the prefix template of the output files
+        probability_t (float): the probability threshold to use
+        completion_t (float): the completion threshold to use
+        info_t (float): the info threshold to use
+        db_name (str): the name of the DB saving tasks' information
+
+    Returns:
+        tuple: the task information and ``None``, or ``None`` and the
+               chromosome to skip (if there are no IMPUTE2 files).
+
+    The second pseudo-autosomal region of chromosome 23 is merged with the
+    first one (if it is required). The sample file of the phased chromosome
+    is also copied alongside the merged files.
+
+    """
+    base_command = [
+        "impute2-merger",
+        "--probability", str(probability_t),
+        "--completion", str(completion_t),
+        "--info", str(info_t),
+    ]
+
+    # The current output prefix
+    c_prefix = o_prefix.format(chrom=chrom)
+    if chrom == "25_1":
+        c_prefix = o_prefix.format(chrom=25)
+
+    # Checking that the output directory exists
+    if not os.path.isdir(os.path.dirname(c_prefix)):
+        os.makedirs(os.path.dirname(c_prefix))
+
+    remaining_command = [
+        "--prefix", c_prefix,
+        "--chr", "25" if chrom == "25_1" else str(chrom),
+        "-i",
+    ]
+
+    # Adding the files
+    filenames = sorted(glob(in_glob.format(chrom=chrom)), key=file_sorter)
+    if chrom == "25_1":
+        filenames += sorted(glob(in_glob.format(chrom="25_2")),
+                            key=file_sorter)
+    remaining_command.extend(filenames)
+
+    # Are there any files?
+    if len(filenames) == 0:
+        skip_chrom = chrom
+        if (chrom == "25_1") or (chrom == "25_2"):
+            skip_chrom = 25
+        logging.warning("chr{}: no IMPUTE2 file left".format(skip_chrom))
+        return None, skip_chrom
+
+    # The task id and task name
+    task_id = "merge_impute2_chr{}".format(chrom)
+    task_name = "Merge imputed chr{}".format(chrom)
+    if chrom == "25_1":
+        task_id = "merge_impute2_chr{}".format(25)
+        task_name = "Merge imputed chr{}".format(25)
+
+    task = {
+        "task_id": task_id,
+        "name": task_name,
+        "command": base_command + remaining_command,
+        "task_db": db_name,
+        "o_files": [c_prefix + ext for ext in _merge_impute2_suffixes],
+    }
+
+    # Getting the name of the sample file
+    sample_file = os.path.join(
+        os.path.dirname(in_glob),
+        "chr{chrom}.final.phased.sample",
+    ).format(chrom=chrom)
+
+    # Checking if the file exists
+    if not os.path.isfile(sample_file):
+        raise GenipeError("{}: no such file".format(sample_file))
+
+    # Checking that samples files are the same for the two pseudo-autosomal
+    # regions of the chromosome 23
+    if chrom == "25_1":
+        other_sample_file = os.path.join(
+            os.path.dirname(in_glob),
+            "chr{chrom}.final.phased.sample",
+        ).format(chrom="25_2")
+
+        # The "25_2" sample file could not exists if 25_2 is not in the
+        # required chromosome
+        if "25_2" in required_chrom:
+            # Checking the file exits
+            if not os.path.isfile(other_sample_file):
+                raise GenipeError(
+                    "{}: no such file".format(other_sample_file),
+                )
+
+            # Comparing
+            with open(sample_file, "r") as f1, \
+                    open(other_sample_file, "r") as f2:
+                for line_f1, line_f2 in zip(f1, f2):
+                    if line_f1 != line_f2:
+                        raise GenipeError(
+                            "the two pseudo-autosomal regions have "
+                            "different sample files...",
+                        )
+
+    # Copying the file
+    copyfile(sample_file, c_prefix + ".sample")
+
+    return task, None
+
+
 def compress_impute2_files(required_chrom, filename_template, db_name,
                            options):
     """Merges impute2 files.
@@ -782,23 +1469,10 @@ def compress_impute2_files(required_chrom, filename_template, db_name,
     replaced by ``genipe/chr1/chr1.final``).
 
     """
-    commands_info = []
-    base_command = ["bgzip", "-f"]
-
-    for chrom in required_chrom:
-        # The current output prefix
-        filename = filename_template.format(chrom=chrom)
-
-        remaining_command = [
-            filename,
-        ]
-        commands_info.append({
-            "task_id": "bgzip_chr{}".format(chrom),
-            "name": "Compress chr{}".format(chrom),
-            "command": base_command + remaining_command,
-            "task_db": db_name,
-            "o_files": [filename + ".gz"],
-        })
+    commands_info = [
+        get_compress_impute2_task(chrom, filename_template, db_name)
+        for chrom in required_chrom
+    ]
 
     # Executing command
     logging.info("Compressing impute2 files")
@@ -808,6 +1482,30 @@ def compress_impute2_files(required_chrom, filename_template, db_name,
     logging.info("Done compressing impute2 files")
 
 
+def get_compress_impute2_task(chrom, filename_template, db_name):
+    """Creates the task compressing the final impute2 file of a chromosome.
+
+    Args:
+        chrom (str): the chromosome
+        filename_template (str): the template for the final IMPUTE2 file
+        db_name (str): the name of the DB saving tasks' information
+
+    Returns:
+        dict: the task information
+
+    """
+    # The current output prefix
+    filename = filename_template.format(chrom=chrom)
+
+    return {
+        "task_id": "bgzip_chr{}".format(chrom),
+        "name": "Compress chr{}".format(chrom),
+        "command": ["bgzip", "-f", filename],
+        "task_db": db_name,
+        "o_files": [filename + ".gz"],
+    }
+
+
 def file_sorter(filename):
     """Helps in filename sorting.
 
@@ -957,6 +1655,45 @@ def check_strand(required_chrom, prefix, id_suffix, db_name, options,
     chromosome number (e.g. ``genipe/chr{chrom}/chr{chrom}.final`` will be
     replaced by ``genipe/chr1/chr1.final``).
 
+    """
+    commands_info = [
+        get_check_strand_task(chrom, prefix, id_suffix, db_name, options,
+                              exclude)
+        for chrom in required_chrom
+    ]
+
+    # Executing command
+    logging.info("Checking strand of markers")
+    launcher.launch_tasks(commands_info, options.thread,
+                          hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble)
+    logging.info("Done checking strand of markers")
+
+    # For each chromosome, we find markers to change strand
+    nb_total = 0
+    for chrom in required_chrom:
+        nb_total += write_strand_problems(chrom, options, exclude)
+
+    return summarize_strand_problems(nb_total, exclude)
+
+
+def get_check_strand_task(chrom, prefix, id_suffix, db_name, options,
+                          exclude=False):
+    """Creates the task checking the strand of a chromosome using SHAPEIT2.
+
+    Args:
+        chrom (str): the chromosome to check
+        prefix (str): the prefix template of the input files
+        id_suffix (str): the suffix of the task
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+        exclude (bool): should markers be excluded or flipped (default is
+                        flipped)
+
+    Returns:
+        dict: the task information
+
     """
     # Creating the command to launch
     base_command = [
@@ -964,67 +1701,84 @@ def check_strand(required_chrom, prefix, id_suffix, db_name, options,
         "-check"
     ]
 
+    # The current output prefix
+    c_prefix = _get_strand_prefix(options, exclude).format(chrom=chrom)
+
+    # The reference files
+    map_filename = options.map_template.format(chrom=chrom)
+    hap_filename = options.hap_template.format(chrom=chrom)
+    legend_filename = options.legend_template.format(chrom=chrom)
+
+    # The specific reference files for the chromosome 23
+    if chrom == 23:
+        map_filename = options.map_chr23
+        hap_filename = options.hap_chr23
+        legend_filename = options.legend_chr23
+
+    elif chrom == "25_1":
+        map_filename = options.map_par1
+        hap_filename = options.hap_par1
+        legend_filename = options.legend_par1
+
+    elif chrom == "25_2":
+        map_filename = options.map_par2
+        hap_filename = options.hap_par2
+        legend_filename = options.legend_par2
+
+    remaining_command = [
+        "-B", prefix.format(chrom=chrom),
+        "-M", map_filename,
+        "--input-ref",
+        hap_filename,
+        legend_filename,
+        options.sample_file,
+        "--output-log", c_prefix,
+    ]
+    return {
+        "task_id": "shapeit_check_chr{}{}".format(chrom, id_suffix),
+        "name": "SHAPEIT check strand chr{}".format(chrom),
+        "command": base_command + remaining_command,
+        "task_db": db_name,
+        "o_files": [c_prefix + ".snp.strand", ],
+    }
+
+
+def _get_strand_prefix(options, exclude):
+    """Gets the prefix template of the strand check output files.
+
+    Args:
+        options (argparse.Namespace): the pipeline options
+        exclude (bool): should markers be excluded or flipped
+
+    Returns:
+        str: the prefix template (containing ``{chrom}``)
+
+    """
     # The output suffix
     suffix = "alignments"
-    commands_info = []
     if exclude:
         # This is for exclusion
         suffix = "to_exclude.alignments"
 
-    # The output file prefix
-    o_prefix = os.path.join(options.out_dir, "chr{chrom}",
-                            "chr{chrom}." + suffix)
-
-    for chrom in required_chrom:
-        # The current output prefix
-        c_prefix = o_prefix.format(chrom=chrom)
-
-        # The reference files
-        map_filename = options.map_template.format(chrom=chrom)
-        hap_filename = options.hap_template.format(chrom=chrom)
-        legend_filename = options.legend_template.format(chrom=chrom)
+    return os.path.join(options.out_dir, "chr{chrom}", "chr{chrom}." + suffix)
 
-        # The specific reference files for the chromosome 23
-        if chrom == 23:
-            map_filename = options.map_chr23
-            hap_filename = options.hap_chr23
-            legend_filename = options.legend_chr23
 
-        elif chrom == "25_1":
-            map_filename = options.map_par1
-            hap_filename = options.hap_par1
-            legend_filename = options.legend_par1
+def write_strand_problems(chrom, options, exclude=False):
+    """Writes the markers with strand problems of a chromosome.
 
-        elif chrom == "25_2":
-            map_filename = options.map_par2
-            hap_filename = options.hap_par2
-            legend_filename = options.legend_par2
+    Args:
+        chrom (str): the chromosome
+        options (argparse.Namespace): the pipeline options
+        exclude (bool): should markers be excluded or flipped (default is
+                        flipped)
 
-        remaining_command = [
-            "-B", prefix.format(chrom=chrom),
-            "-M", map_filename,
-            "--input-ref",
-            hap_filename,
-            legend_filename,
-            options.sample_file,
-            "--output-log", c_prefix,
-        ]
-        commands_info.append({
-            "task_id": "shapeit_check_chr{}{}".format(chrom, id_suffix),
-            "name": "SHAPEIT check strand chr{}".format(chrom),
-            "command": base_command + remaining_command,
-            "task_db": db_name,
-            "o_files": [c_prefix + ".snp.strand", ],
-        })
+    Returns:
+        int: the number of markers to flip (or exclude)
 
-    # Executing command
-    logging.info("Checking strand of markers")
-    launcher.launch_tasks(commands_info, options.thread,
-                          hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done checking strand of markers")
+    The markers are read from the SHAPEIT2 strand check output file, and are
+    written in the ``chr{chrom}.to_flip`` (or ``chr{chrom}.to_exclude``) file.
 
+    """
     # The output suffix
     o_suffix = "to_flip"
     what = "flip"
@@ -1033,51 +1787,67 @@ def check_strand(required_chrom, prefix, id_suffix, db_name, options,
         what = "exclude"
 
     # The name of the files
-    filename = o_prefix + ".snp.strand"
-    o_filename = os.path.join(options.out_dir, "chr{chrom}",
-                              "chr{chrom}.{o_suffix}")
+    chrom_filename = _get_strand_prefix(options, exclude).format(
+        chrom=chrom,
+    ) + ".snp.strand"
+    chrom_o_filename = os.path.join(options.out_dir, "chr{chrom}",
+                                    "chr{chrom}.{o_suffix}").format(
+        chrom=chrom,
+        o_suffix=o_suffix,
+    )
 
-    # For each chromosome, we find markers to change strand
-    nb_total = 0
-    for chrom in required_chrom:
-        # The SNP to print in the output file
-        to_write = set()
+    # Checking the input file exists
+    if not os.path.isfile(chrom_filename):
+        with open(chrom_o_filename, "w") as o_file:
+            pass
+        return 0
 
-        chrom_filename = filename.format(chrom=chrom)
-        chrom_o_filename = o_filename.format(chrom=chrom, o_suffix=o_suffix)
+    # The SNP to print in the output file
+    to_write = set()
 
-        # Checking the input file exists
-        if not os.path.isfile(chrom_filename):
-            with open(chrom_o_filename, "w") as o_file:
-                pass
-            continue
+    # Markers to flip
+    with open(chrom_filename, "r") as i_file:
+        # Reading the header
+        header = i_file.readline().rstrip("\r\n").split("\t")
+        header = {name: i + 1 for i, name in enumerate(header)}
 
-        # Markers to flip
-        with open(chrom_filename, "r") as i_file:
-            # Reading the header
-            header = i_file.readline().rstrip("\r\n").split("\t")
-            header = {name: i + 1 for i, name in enumerate(header)}
+        # Checking header
+        for name in ("type", "main_id"):
+            if name not in header:
+                raise GenipeError("{}: no column named "
+                                  "{}".format(chrom_filename, name))
 
-            # Checking header
-            for name in ("type", "main_id"):
-                if name not in header:
-                    raise GenipeError("{}: no column named "
-                                      "{}".format(chrom_filename, name))
+        # Reading the file
+        for line in i_file:
+            row = line.rstrip("\r\n").split("\t")
+            if row[header["type"]] == "Strand":
+                to_write.add(row[header["main_id"]])
 
-            # Reading the file
-            for line in i_file:
-                row = line.rstrip("\r\n").split("\t")
-                if row[header["type"]] == "Strand":
-                    to_write.add(row[header["main_id"]])
+    # The number of markers to flip
+    to_flip = len(to_write)
 
-        # The number of markers to flip
-        to_flip = len(to_write)
+    with open(chrom_o_filename, "w") as o_file:
+        print(*to_write, sep="\n", file=o_file)
 
-        with open(chrom_o_filename, "w") as o_file:
-            print(*to_write, sep="\n", file=o_file)
+    logging.info("chr{}: {:,d} markers to {}".format(chrom, to_flip, what))
+
+    return to_flip
+
+
+def summarize_strand_problems(nb_total, exclude=False):
+    """Summarizes the number of markers with strand problems.
+
+    Args:
+        nb_total (int): the total number of markers to flip (or exclude)
+        exclude (bool): should markers be excluded or flipped (default is
+                        flipped)
+
+    Returns:
+        dict: statistics about the task (number of markers that will be flipped
+              or excluded)
 
-        nb_total += to_flip
-        logging.info("chr{}: {:,d} markers to {}".format(chrom, to_flip, what))
+    """
+    what = "exclude" if exclude else "flip"
 
     # Logging the last one
     logging.info("After strand check: {:,d} markers "
@@ -1102,34 +1872,11 @@ def flip_markers(required_chrom, prefix, to_flip, db_name, options):
 
     """
     # The commands to run
-    commands_info = []
-    base_command = [
-        "plink" if options.plink_bin is None else options.plink_bin,
-        "--noweb",
-        "--make-bed",
+    commands_info = [
+        get_flip_markers_task(chrom, prefix, to_flip, db_name, options)
+        for chrom in required_chrom
     ]
 
-    # The output prefix
-    o_prefix = os.path.join(options.out_dir, "chr{chrom}",
-                            "chr{chrom}.flipped")
-
-    for chrom in required_chrom:
-        # The current output prefix
-        c_prefix = o_prefix.format(chrom=chrom)
-
-        remaining_command = [
-            "--bfile", prefix.format(chrom=chrom),
-            "--flip", to_flip.format(chrom=chrom),
-            "--out", c_prefix,
-        ]
-        commands_info.append({
-            "task_id": "plink_flip_chr{}".format(chrom),
-            "name": "plink flip chr{}".format(chrom),
-            "command": base_command + remaining_command,
-            "task_db": db_name,
-            "o_files": [c_prefix + ext for ext in (".bed", ".bim", ".fam")],
-        })
-
     # Executing command
     logging.info("Flipping markers")
     launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
@@ -1138,6 +1885,44 @@ def flip_markers(required_chrom, prefix, to_flip, db_name, options):
     logging.info("Done flipping markers")
 
 
+def get_flip_markers_task(chrom, prefix, to_flip, db_name, options):
+    """Creates the task flipping the markers of a chromosome.
+
+    Args:
+        chrom (str): the chromosome
+        prefix (str): the prefix template of the input files
+        to_flip (str): the name of the file containing markers to flip
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        dict: the task information
+
+    """
+    base_command = [
+        "plink" if options.plink_bin is None else options.plink_bin,
+        "--noweb",
+        "--make-bed",
+    ]
+
+    # The current output prefix
+    c_prefix = os.path.join(options.out_dir, "chr{chrom}",
+                            "chr{chrom}.flipped").format(chrom=chrom)
+
+    remaining_command = [
+        "--bfile", prefix.format(chrom=chrom),
+        "--flip", to_flip.format(chrom=chrom),
+        "--out", c_prefix,
+    ]
+    return {
+        "task_id": "plink_flip_chr{}".format(chrom),
+        "name": "plink flip chr{}".format(chrom),
+        "command": base_command + remaining_command,
+        "task_db": db_name,
+        "o_files": [c_prefix + ext for ext in (".bed", ".bim", ".fam")],
+    }
+
+
 def final_exclusion(required_chrom, prefix, to_exclude, db_name, options):
     """Flip markers.
 
@@ -1159,64 +1944,104 @@ def final_exclusion(required_chrom, prefix, to_exclude, db_name, options):
     """
     # The commands to run
     commands_info = []
+
+    nb_samples_no_gender = 0
+    for chrom in required_chrom:
+        task, nb_no_gender = get_final_exclusion_task(chrom, prefix,
+                                                      to_exclude, db_name,
+                                                      options)
+        commands_info.append(task)
+        nb_samples_no_gender += nb_no_gender
+
+    # Executing command
+    logging.info("Final marker exclusion")
+    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble)
+    logging.info("Done final marker exclusion")
+
+    return summarize_final_exclusion(required_chrom, nb_samples_no_gender,
+                                     options)
+
+
+def get_final_exclusion_task(chrom, prefix, to_exclude, db_name, options):
+    """Creates the task of the final marker exclusion of a chromosome.
+
+    Args:
+        chrom (str): the chromosome
+        prefix (str): the prefix template of the input files
+        to_exclude (str): the name of the file containing the markers to
+                          exclude
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        tuple: the task information and the number of samples without gender
+               information (which are excluded from the chromosome 23
+               analysis)
+
+    """
     base_command = [
         "plink" if options.plink_bin is None else options.plink_bin,
         "--noweb",
         "--make-bed",
     ]
 
-    # The output prefix
-    o_prefix = os.path.join(options.out_dir, "chr{chrom}", "chr{chrom}.final")
+    # The current output prefix
+    c_prefix = os.path.join(options.out_dir, "chr{chrom}",
+                            "chr{chrom}.final").format(chrom=chrom)
 
-    # The output files (for statistics)
-    bims = []
+    remaining_command = [
+        "--bfile", prefix.format(chrom=chrom),
+        "--exclude", to_exclude.format(chrom=chrom),
+        "--out", c_prefix,
+    ]
 
+    # If chromosome 23 and a "*.nosex" file exists, we need to exclude the
+    # samples (because of gender unknown)
     nb_samples_no_gender = 0
-    for chrom in required_chrom:
-        # The current output prefix
-        c_prefix = o_prefix.format(chrom=chrom)
+    if chrom == 23:
+        if os.path.isfile(prefix.format(chrom=chrom) + ".nosex"):
+            # Counting the number of samples without known gender
+            with open(prefix.format(chrom=chrom) + ".nosex", "r") as f:
+                for line in f:
+                    nb_samples_no_gender += 1
+            logging.warning(
+                "{:,d} samples with unknown gender, they will be excluded "
+                "from the chr23 analysis".format(nb_samples_no_gender)
+            )
 
-        remaining_command = [
-            "--bfile", prefix.format(chrom=chrom),
-            "--exclude", to_exclude.format(chrom=chrom),
-            "--out", c_prefix,
-        ]
+            remaining_command += ["--remove",
+                                  prefix.format(chrom=chrom) + ".nosex"]
 
-        # If chromosome 23 and a "*.nosex" file exists, we need to exclude the
-        # samples (because of gender unknown)
-        if chrom == 23:
-            if os.path.isfile(prefix.format(chrom=chrom) + ".nosex"):
-                # Counting the number of samples without known gender
-                with open(prefix.format(chrom=chrom) + ".nosex", "r") as f:
-                    for line in f:
-                        nb_samples_no_gender += 1
-                logging.warning(
-                    "{:,d} samples with unknown gender, they will be excluded "
-                    "from the chr23 analysis".format(nb_samples_no_gender)
-                )
+    task = {
+        "task_id": "plink_final_exclude_chr{}".format(chrom),
+        "name": "plink final exclude chr{}".format(chrom),
+        "command": base_command + remaining_command,
+        "task_db": db_name,
+        "o_files": [c_prefix + ext for ext in (".bed", ".bim", ".fam")],
+    }
 
-                remaining_command += ["--remove",
-                                      prefix.format(chrom=chrom) + ".nosex"]
+    return task, nb_samples_no_gender
 
-        commands_info.append({
-            "task_id": "plink_final_exclude_chr{}".format(chrom),
-            "name": "plink final exclude chr{}".format(chrom),
-            "command": base_command + remaining_command,
-            "task_db": db_name,
-            "o_files": [c_prefix + ext for ext in (".bed", ".bim", ".fam")],
-        })
 
-        bims.append(c_prefix + ".bim")
+def summarize_final_exclusion(required_chrom, nb_samples_no_gender, options):
+    """Counts the number of remaining markers for phasing.
 
-    # Executing command
-    logging.info("Final marker exclusion")
-    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done final marker exclusion")
+    Args:
+        required_chrom (tuple): the list of chromosome
+        nb_samples_no_gender (int): the number of samples without gender
+                                    information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        dict: the number of remaining markers for phasing
 
+    """
     nb_markers = 0
-    for bim in bims:
+    for chrom in required_chrom:
+        bim = os.path.join(options.out_dir, "chr{chrom}",
+                           "chr{chrom}.final.bim").format(chrom=chrom)
         with open(bim, "r") as i_file:
             for line in i_file:
                 nb_markers += 1
@@ -1238,6 +2063,31 @@ def compute_marker_missing_rate(prefix, db_name, options):
     Returns:
         pandas.DataFrame: the missing rate for each site (results from Plink)
 
+    """
+    # The command to run
+    commands_info = [get_missing_rate_task(prefix, db_name, options)]
+
+    # Executing command
+    logging.info("Computing missing rate")
+    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble)
+    logging.info("Done computing missing rate")
+
+    return read_marker_missing_rate(options)
+
+
+def get_missing_rate_task(prefix, db_name, options):
+    """Creates the task computing (using Plink) the marker missing rate.
+
+    Args:
+        prefix (str): the prefix of the input file
+        db_name (str): the name of the DB saving tasks' information
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        dict: the task information
+
     """
     # The output prefix
     o_prefix = os.path.join(options.out_dir, "missing")
@@ -1246,7 +2096,6 @@ def compute_marker_missing_rate(prefix, db_name, options):
     o_prefix = os.path.join(o_prefix, "missing")
 
     # The command to run
-    commands_info = []
     command = [
         "plink" if options.plink_bin is None else options.plink_bin,
         "--noweb",
@@ -1255,24 +2104,30 @@ def compute_marker_missing_rate(prefix, db_name, options):
         "--out", o_prefix,
     ]
 
-    commands_info.append({
+    return {
         "task_id": "plink_missing_rate",
         "name": "plink missing rate",
         "command": command,
         "task_db": db_name,
         "o_files": [o_prefix + ext for ext in (".lmiss", ".imiss")],
-    })
+    }
 
-    # Executing command
-    logging.info("Computing missing rate")
-    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done computing missing rate")
 
-    # Getting the missing rate
+def read_marker_missing_rate(options):
+    """Reads the marker missing rate (computed by Plink).
+
+    Args:
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        pandas.DataFrame: the missing rate for each site (results from Plink)
+
+    """
     logging.info("Reading the missing rate")
-    return pd.read_csv(o_prefix + ".lmiss", delim_whitespace=True)
+    return pd.read_csv(
+        os.path.join(options.out_dir, "missing", "missing.lmiss"),
+        delim_whitespace=True,
+    )
 
 
 def find_exclusion_before_phasing(prefix, db_name, options):
@@ -1286,8 +2141,10 @@ def find_exclusion_before_phasing(prefix, db_name, options):
     Returns:
         dict: information about the data set
 
-    If required, the function uses :py:func:`is_reversed` to check if a marker
-    is on the reverse strand and needs flipping.
+    The BIM file is read once (using pandas), and the ambiguous and duplicated
+    markers are found using vectorized operations. If required, the function
+    uses :py:func:`find_reversed_markers` to check which markers are on the
+    reverse strand and need flipping.
 
     The information returned includes the initial number of markers and
     samples, the number of ambiguous, duplicated and non-autosomal markers,
@@ -1331,87 +2188,70 @@ def find_exclusion_before_phasing(prefix, db_name, options):
         # Creating the database entry
         db.create_task_entry(task_id, db_name)
 
-        # The ambiguous genotypes
-        ambiguous_genotypes = {"AT", "TA", "GC", "CG"}
-
-        # The positions that have been written to file
-        kept_positions = set()
-        nb_ambiguous = 0
-        nb_kept = 0
-        nb_dup = 0
-        to_flip = set()
-
         reference = None
         chrom_encoding = None
         if options.reference is not None:
-            reference = Fasta(options.reference, as_raw=True)
+            reference = ReferenceCache(
+                options.reference,
+                get_cache_dir(options.reference, fallback_dir=os.path.join(
+                    options.out_dir, "reference_cache",
+                )),
+            )
             chrom_encoding = get_chrom_encoding(reference)
 
         # Logging
         logging.info("Finding markers to exclude" +
                      (" and to flip" if reference else ""))
 
-        # Counting the total number of markers and samples
-        nb_markers = 0
+        # Counting the total number of samples
         nb_samples = 0
-        nb_special_markers = 0
-
         with open(prefix + ".fam", "r") as i_file:
             for line in i_file:
                 nb_samples += 1
 
+        # Reading the markers
+        markers = pd.read_csv(
+            prefix + ".bim", sep="\t", header=None, usecols=[0, 1, 3, 4, 5],
+            names=["chrom", "name", "pos", "a1", "a2"], dtype=str,
+            keep_default_na=False,
+        )
+        nb_markers = markers.shape[0]
+        is_special = markers.chrom.isin({"24", "26"}).values
+
+        # The ambiguous markers (A/T and G/C)
+        is_ambiguous = (markers.a1 + markers.a2).isin(
+            {"AT", "TA", "GC", "CG"},
+        ).values
+
+        # The duplicated markers (only the first non-ambiguous marker at a
+        # given position is kept)
+        is_dup = np.zeros(nb_markers, dtype=bool)
+        is_dup[~is_ambiguous] = markers[~is_ambiguous].duplicated(
+            ["chrom", "pos"], keep="first",
+        ).values
+
+        # Saving the markers to exclude
+        to_exclude = is_ambiguous | is_dup
         o_filename = os.path.join(options.out_dir, "markers_to_exclude.txt")
-        with open(o_filename, "w") as o_file, \
-                open(prefix + ".bim", "r") as i_file:
-            for line in i_file:
-                nb_markers += 1
-                row = line.rstrip("\r\n").split("\t")
-
-                # The marker information
-                chrom = row[0]
-                name = row[1]
-                pos = row[3]
-                a1 = row[4]
-                a2 = row[5]
-
-                is_special = False
-                if chrom in {"24", "26"}:
-                    nb_special_markers += 1
-                    is_special = True
-
-                # Checking the alleles
-                if a1 + a2 in ambiguous_genotypes:
-                    if not is_special:
-                        nb_ambiguous += 1
-                    print(name, file=o_file)
-                    logging.debug("  - {}: {}: "
-                                  "ambiguous".format(name, a1 + a2))
-                    continue
-
-                # Checking if we already have this marker
-                if (chrom, pos) in kept_positions:
-                    if not is_special:
-                        nb_dup += 1
-                    print(name, file=o_file)
-                    logging.debug("  - {}: duplicated".format(name))
-                    continue
-
-                # Checking strand if required
-                if not is_special and (reference is not None):
-                    if is_reversed(chrom, int(pos), a1, a2, reference,
-                                   chrom_encoding):
-                        to_flip.add(name)
+        with open(o_filename, "w") as o_file:
+            if to_exclude.any():
+                print(*markers.name.values[to_exclude], sep="\n",
+                      file=o_file)
 
-                # We keep this marker
-                kept_positions.add((chrom, pos))
-                if not is_special:
-                    nb_kept += 1
-
-        # Closing the reference
+        # Checking the strand of the kept markers (if required)
+        to_flip = []
         if reference is not None:
+            to_check = markers[~to_exclude & ~is_special]
+            to_flip = to_check.name.values[
+                find_reversed_markers(to_check, reference, chrom_encoding)
+            ]
             reference.close()
 
         # Saving the exclusion statistics
+        nb_special_markers = int(is_special.sum())
+        nb_ambiguous = int((is_ambiguous & ~is_special).sum())
+        nb_dup = int((is_dup & ~is_special).sum())
+        nb_kept = int((~to_exclude & ~is_special).sum())
         exclusion_statistics["nb_special_markers"] = nb_special_markers
         exclusion_statistics["nb_ambiguous"] = nb_ambiguous
         exclusion_statistics["nb_dup"] = nb_dup
@@ -1489,6 +2329,46 @@ def exclude_markers_before_phasing(required_chrom, prefix, db_name,
     samples, the number of ambiguous, duplicated and non-autosomal markers,
     along with the number of markers to flip if the reference was checked.
 
+    """
+    chr23_regions_to_skip, commands_info, reorder_commands_info = \
+        get_exclusion_tasks(required_chrom, prefix, db_name, chrom_length,
+                            options)
+
+    # Executing command
+    logging.info("Excluding and splitting markers")
+    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble)
+    logging.info("Done excluding and splitting markers")
+
+    # Executing command
+    logging.info("Reordering markers")
+    launcher.launch_tasks(reorder_commands_info, options.thread,
+                          hpc=options.use_drmaa,
+                          hpc_options=options.task_options,
+                          out_dir=options.out_dir, preamble=options.preamble)
+    logging.info("Done reordering markers")
+
+    return chr23_regions_to_skip
+
+
+def get_exclusion_tasks(required_chrom, prefix, db_name, chrom_length,
+                        options):
+    """Creates the tasks excluding markers and splitting the chromosomes.
+
+    Args:
+        required_chrom (tuple): the list of required chromosomes
+        prefix (str): the prefix of the input files
+        db_name (str): the name of the DB saving tasks' information
+        chrom_length (dict): the length of each chromosomes
+        options (argparse.Namespace): the pipeline options
+
+    Returns:
+        tuple: the set of chromosome 23 regions to skip (because there were
+               no markers left), the list of exclusion (and split) tasks, and
+               the list of tasks reordering the chromosome 23 regions (which
+               depend on the exclusion task of the same region).
+
     """
     # Needs to flip?
     to_flip = set()
@@ -1528,13 +2408,14 @@ def exclude_markers_before_phasing(required_chrom, prefix, db_name,
                 bim = read_bim(prefix + ".bim", (23, 25))
 
             # Getting the command(s) for chromosome 23
-            chr23_regions_to_skip, commands = extract_chromosome_23(
+            regions_to_skip, commands = extract_chromosome_23(
                 chrom=chrom,
                 prefix=c_prefix,
                 bim=bim,
                 chrom_length=chrom_length,
                 base_command=base_command,
             )
+            chr23_regions_to_skip |= regions_to_skip
 
             # Adding the command(s) to execute
             for command in commands:
@@ -1559,16 +2440,13 @@ def exclude_markers_before_phasing(required_chrom, prefix, db_name,
             "o_files": [c_prefix + ext for ext in (".bed", ".bim", ".fam")],
         })
 
-    # Executing command
-    logging.info("Excluding and splitting markers")
-    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done excluding and splitting markers")
-
     # Reordering the chromosomes (if required)
-    commands_info = []
+    reorder_commands_info = []
     for chrom in processed_chrom_23:
+        if chrom in chr23_regions_to_skip:
+            # There is nothing to reorder
+            continue
+
         base_command = [
             "plink" if options.plink_bin is None else options.plink_bin,
             "--noweb",
@@ -1585,16 +2463,12 @@ def exclude_markers_before_phasing(required_chrom, prefix, db_name,
 
         for command in commands:
             command["task_db"] = db_name
-            commands_info.append(command)
-
-    # Executing command
-    logging.info("Reordering markers")
-    launcher.launch_tasks(commands_info, options.thread, hpc=options.use_drmaa,
-                          hpc_options=options.task_options,
-                          out_dir=options.out_dir, preamble=options.preamble)
-    logging.info("Done reordering markers")
+            command["dependencies"] = [
+                command["task_id"].replace("plink_reorder_", "plink_exclude_")
+            ]
+            reorder_commands_info.append(command)
 
-    return chr23_regions_to_skip
+    return chr23_regions_to_skip, commands_info, reorder_commands_info
 
 
 def reorder_chromosome_23(chrom, to_skip, prefix, base_command):
@@ -1779,6 +2653,45 @@ def extract_chromosome_23(chrom, prefix, bim, chrom_length, base_command):
     return region_to_skip, command_info
 
 
+def get_marker_positions(bim, chrom, chrom_length):
+    """Gets the positions of the study markers located on a chromosome.
+
+    Args:
+        bim (pandas.DataFrame): the BIM file
+        chrom (str): the chromosome (or the chromosome 23 region)
+        chrom_length (dict): the length of each of the chromosomes
+
+    Returns:
+        numpy.array: the sorted positions of the markers
+
+    Note
+    ----
+        Just like :py:func:`extract_chromosome_23`, the markers of the
+        chromosome 23 regions are dispatched according to their genomic
+        location.
+
+    """
+    if chrom == 23:
+        lower_bound, upper_bound = chrom_length[23][:2]
+        in_region = (
+            bim.chrom.isin((23, 25)) &
+            (bim.pos >= lower_bound) & (bim.pos <= upper_bound)
+        )
+
+    elif chrom == "25_1":
+        lower_bound = chrom_length[25][0]
+        in_region = bim.chrom.isin((23, 25)) & (bim.pos <= lower_bound)
+
+    elif chrom == "25_2":
+        upper_bound = chrom_length[25][1]
+        in_region = bim.chrom.isin((23, 25)) & (bim.pos >= upper_bound)
+
+    else:
+        in_region = bim.chrom == chrom
+
+    return np.sort(bim.loc[in_region, "pos"].values)
+
+
 def read_bim(bim_fn, chromosomes=tuple()):
     """Reads a BIM file and extracts chromosomes.
 
@@ -1810,7 +2723,7 @@ def get_chrom_encoding(reference):
     """Gets the chromosome's encoding (e.g. 1 vs chr1, X vs 23, etc).
 
     Args:
-        reference (pyfaidx.Fasta): the reference
+        reference (genipe.formats.reference.ReferenceCache): the reference
 
     Returns:
         dict: the chromosome encoding
@@ -1912,6 +2825,90 @@ def is_reversed(chrom, pos, a1, a2, reference, encoding):
                       "invalid".format(chrom, pos, ref, a1, a2))
 
 
+def find_reversed_markers(markers, reference, encoding):
+    """Finds the markers on the reverse strand (vectorized).
+
+    Args:
+        markers (pandas.DataFrame): the markers (with the ``chrom``, ``name``,
+                                    ``pos``, ``a1`` and ``a2`` columns)
+        reference (genipe.formats.reference.ReferenceCache): the reference
+        encoding (dict): the chromosome encoding in the reference
+
+    Returns:
+        numpy.array: a boolean array, ``True`` for the markers that are on the
+                     reverse strand
+
+    This is the vectorized equivalent of :py:func:`is_reversed`. The
+    reference nucleotides of all the markers of a chromosome are retrieved at
+    once from the cached (memory-mapped) sequence of the chromosome. Just
+    like :py:func:`is_reversed`, a marker with invalid alleles, or on a
+    chromosome (or at a position) missing from the reference, isn't on the
+    reverse strand.
+
+    """
+    is_flipped = np.zeros(markers.shape[0], dtype=bool)
+
+    # The alleles (only A, C, G and T can be checked)
+    a1 = _upper_alleles(markers.a1.values)
+    a2 = _upper_alleles(markers.a2.values)
+    is_valid = np.in1d(a1, list(_complement)) & np.in1d(a2, list(_complement))
+
+    chromosomes = markers.chrom.values
+    for chrom in pd.unique(chromosomes[is_valid]):
+        # If the chromosome is not present, we suppose no strand problem
+        if chrom not in encoding:
+            continue
+
+        # The reference nucleotides of the markers on this chromosome (which
+        # need to be valid)
+        indexes = np.flatnonzero(is_valid & (chromosomes == chrom))
+        ref = reference.get_bases(encoding[chrom],
+                                  markers.pos.values[indexes].astype(int))
+        is_valid_ref = np.in1d(ref, list(_complement))
+        indexes = indexes[is_valid_ref]
+        ref = ref[is_valid_ref]
+
+        # If either a1 or a2 equals to ref, no strand problem, and if the
+        # complement equals, then incorrect strand
+        m_a1 = a1[indexes]
+        m_a2 = a2[indexes]
+        is_same = (m_a1 == ref) | (m_a2 == ref)
+        is_complement = (
+            (pd.Series(m_a1).map(_complement).values == ref) |
+            (pd.Series(m_a2).map(_complement).values == ref)
+        )
+
+        # If nothing works, raising an exception
+        is_invalid = ~is_same & ~is_complement
+        if is_invalid.any():
+            i = np.flatnonzero(is_invalid)[0]
+            raise GenipeError("chr{}: {}: {}: {}/{}: invalid".format(
+                chrom, markers.pos.values[indexes[i]], ref[i],
+                markers.a1.values[indexes[i]], markers.a2.values[indexes[i]],
+            ))
+
+        is_flipped[indexes[~is_same & is_complement]] = True
+
+    return is_flipped
+
+
+def _upper_alleles(alleles):
+    """Converts alleles to upper case.
+
+    Args:
+        alleles (numpy.array): the alleles
+
+    Returns:
+        numpy.array: the alleles in upper case
+
+    There are only a few distinct alleles, so each one is converted once.
+
+    """
+    codes, uniques = pd.factorize(alleles)
+    return np.array([allele.upper() for allele in uniques],
+                    dtype=object)[codes]
+
+
 def get_cross_validation_results(required_chrom, glob_pattern):
     """Creates a weighted mean for each chromosome for cross-validation.
 
@@ -1928,38 +2925,17 @@ def get_cross_validation_results(required_chrom, glob_pattern):
     IMPUTE2 (but using weighted means) for all autosomes, and the two summary
     tables for each chromosome.
 
+    The summary files are read concurrently (using a pool of threads, since
+    there are hundreds of small files, usually on a network file system, see
+    :py:func:`read_cross_validation_summary`). The rows of all the tables are
+    then gathered in a single :py:class:`pandas.DataFrame`, and the weighted
+    sums are computed for all the chromosomes at once.
+
     """
     logging.info("Gathering cross-validation statistics")
 
-    # The regular expressions used here
-    nb_genotypes_re = re.compile(r"^In the current analysis, IMPUTE2 masked, "
-                                 r"imputed, and evaluated (\d+) genotypes")
-    table_header_re = re.compile(r"Interval\s+#Genotypes\s+%Concordance\s+"
-                                 r"Interval\s+%Called\s+%Concordance")
-    split_re = re.compile(r"\s+")
-
-    # The intervals
-    table_1_intervals = ["[0.0-0.1]", "[0.1-0.2]", "[0.2-0.3]", "[0.3-0.4]",
-                         "[0.4-0.5]", "[0.5-0.6]", "[0.6-0.7]", "[0.7-0.8]",
-                         "[0.8-0.9]", "[0.9-1.0]"]
-    table_2_intervals = ["[>=0.0]", "[>=0.1]", "[>=0.2]", "[>=0.3]", "[>=0.4]",
-                         "[>=0.5]", "[>=0.6]", "[>=0.7]", "[>=0.8]", "[>=0.9]"]
-
-    # The final data per chromosome
-    per_chrom_table_1 = {}
-    per_chrom_table_2 = {}
-    chrom_nb_geno = {}
-
-    # The final data for all the dataset
-    tot_concordance = defaultdict(float)
-    tot_nb_geno = defaultdict(int)
-    tot_weight = defaultdict(int)
-    tot_cumm_called = defaultdict(int)
-    tot_cumm_concordance = defaultdict(float)
-    tot_cumm_weight = defaultdict(int)
-    final_nb_genotypes = 0
-
-    # For each chromosome
+    # The summary files of each chromosome
+    chrom_filenames = []
     for chrom in required_chrom:
         if (chrom == "25_2") and ("25_1" in required_chrom):
             # We want to skip the second pseudo-autosomal region of chromosome
@@ -1973,189 +2949,93 @@ def get_cross_validation_results(required_chrom, glob_pattern):
             # region of chromosome 23
             filenames += glob(glob_pattern.format(chrom="25_2"))
 
-        # The total number of genotypes for this chromosome
-        tot_chrom_nb_genotypes = 0
-
-        # The numbers for table 1
-        tot_chrom_concordance = defaultdict(float)
-        tot_chrom_nb_geno = defaultdict(int)
-        tot_chrom_weight = defaultdict(int)
-
-        # The numbers for table 2
-        tot_chrom_cumm_called = defaultdict(int)
-        tot_chrom_cumm_concordance = defaultdict(float)
-        tot_chrom_cumm_weight = defaultdict(int)
-
-        for filename in filenames:
-            with open(filename, "r") as i_file:
-                line = i_file.readline()
-                nb_genotypes = nb_genotypes_re.search(line)
-                while (line != "") and (nb_genotypes is None):
-                    line = i_file.readline()
-                    nb_genotypes = nb_genotypes_re.search(line)
-
-                # Check if we have data
-                if nb_genotypes is None:
-                    continue
-
-                # We have the number of genotypes
-                nb_genotypes = int(nb_genotypes.group(1))
-                if nb_genotypes == 0:
-                    continue
-
-                # Increasing the total number of genotypes for this chromosome
-                tot_chrom_nb_genotypes += nb_genotypes
-                final_nb_genotypes += nb_genotypes
-
-                # Looking for the headers of the two tables
-                line = i_file.readline()
-                table_header = table_header_re.search(line)
-                while (line != "") and (table_header is None):
-                    line = i_file.readline()
-                    table_header = table_header_re.search(line)
-
-                # We now should have data
-                if table_header is None:
-                    raise GenipeError("Problem with {}".format(filename))
-
-                # Now reading the data inside the tables
-                for line in i_file:
-                    # Getting the value for the tables
-                    table = split_re.split(line.strip())
-
-                    # The first table
-                    interval, nb_geno, concordance = table[:3]
-
-                    # Casting to values
-                    nb_geno = int(nb_geno)
-                    concordance = float(concordance)
-
-                    # The total number of genotypes for this interval
-                    tot_nb_geno[interval] += nb_geno
-                    tot_chrom_nb_geno[interval] += nb_geno
-
-                    # The concordance for this interval
-                    tot_concordance[interval] += (concordance * nb_geno)
-                    tot_chrom_concordance[interval] += (concordance * nb_geno)
-
-                    # The weight for this interval
-                    tot_weight[interval] += nb_geno
-                    tot_chrom_weight[interval] += nb_geno
-
-                    # The second table
-                    table = table[3:]
-                    interval = "".join(table[:3])
-                    pc_called = float(table[-2])
-                    pc_concordance = float(table[-1])
-
-                    # The interval number of genotypes
-                    nb_called = pc_called * nb_genotypes / 100
-                    tot_chrom_cumm_called[interval] += nb_called
-                    tot_cumm_called[interval] += nb_called
-
-                    # The concordance for this interval
-                    weighted_value = nb_called * pc_concordance
-                    tot_chrom_cumm_concordance[interval] += weighted_value
-                    tot_cumm_concordance[interval] += weighted_value
-
-                    # The weight for this interval
-                    tot_chrom_cumm_weight[interval] += nb_called
-                    tot_cumm_weight[interval] += nb_called
-
-        # Computing the weighted average for the first table
-        table_1_data = []
-        for interval in table_1_intervals:
-            nb_geno = tot_chrom_nb_geno[interval]
-            concordance = tot_chrom_concordance[interval]
-            weight = tot_chrom_weight[interval]
-
-            # Computing the weighted concordance
-            weighted_concordance = 0
-            if weight != 0:
-                weighted_concordance = concordance / weight
-
-            # Saving the data for the current chromosome
-            table_1_data.append([
-                interval,
-                "{:,d}".format(nb_geno),
-                "{:.1f}".format(weighted_concordance),
-            ])
-
-        # Computing the weighed average for the second table
-        table_2_data = []
-        for interval in table_2_intervals:
-            nb_called = tot_chrom_cumm_called[interval]
-            concordance = tot_chrom_cumm_concordance[interval]
-            weight = tot_chrom_cumm_weight[interval]
-
-            # Computing the weighted concordance
-            weighted_concordance = 0
-            if weight != 0:
-                weighted_concordance = concordance / weight
-
-            # Computing the percentage of called genotypes
-            pct_called = 0
-            if tot_chrom_nb_genotypes != 0:
-                pct_called = nb_called / tot_chrom_nb_genotypes * 100
-
-            # Saving the data for the current chromosome
-            table_2_data.append([
-                interval,
-                "{:.1f}".format(pct_called),
-                "{:.1f}".format(weighted_concordance),
-            ])
-
         # We want to save the two pseudo-autosomal regions of chromosome 23
         # together
         if (chrom == "25_1") or (chrom == "25_2"):
             chrom = 25
 
-        # Saving the tables
-        per_chrom_table_1[chrom] = table_1_data
-        per_chrom_table_2[chrom] = table_2_data
-        chrom_nb_geno[chrom] = tot_chrom_nb_genotypes
-
-    # The final table 1
-    table_1_data = []
-    for interval in table_1_intervals:
-        nb_geno = tot_nb_geno[interval]
-        concordance = tot_concordance[interval]
-        weight = tot_weight[interval]
-
-        # Computing the weighted concordance
-        weighted_concordance = 0
-        if weight != 0:
-            weighted_concordance = concordance / weight
-
-        table_1_data.append([
-            interval,
-            "{:,d}".format(nb_geno),
-            "{:.1f}".format(weighted_concordance),
-        ])
+        chrom_filenames.append((chrom, filenames))
 
-    # The final table 2
-    table_2_data = []
-    for interval in table_2_intervals:
-        nb_called = tot_cumm_called[interval]
-        concordance = tot_cumm_concordance[interval]
-        weight = tot_cumm_weight[interval]
-
-        # Computing the weighted concordance
-        weighted_concordance = 0
-        if weight != 0:
-            weighted_concordance = concordance / weight
-
-        # Saving the data for all the chromosome
-        table_2_data.append([
-            interval,
-            "{:.1f}".format(nb_called / final_nb_genotypes * 100),
-            "{:.1f}".format(weighted_concordance),
-        ])
+    # Reading the summary files
+    filenames = [filename for _, chrom_files in chrom_filenames
+                 for filename in chrom_files]
+    with ThreadPoolExecutor(max_workers=_NB_SUMMARY_THREADS) as executor:
+        summaries = dict(zip(
+            filenames,
+            executor.map(read_cross_validation_summary, filenames),
+        ))
+
+    # Gathering the summaries (the number of genotypes, and the rows of the
+    # two tables)
+    chrom_nb_geno = OrderedDict()
+    rows = []
+    rows_chrom = []
+    rows_nb_genotypes = []
+    for i, (chrom, chrom_files) in enumerate(chrom_filenames):
+        chrom_nb_geno[chrom] = 0
+        for filename in chrom_files:
+            if summaries[filename] is None:
+                continue
+
+            nb_genotypes, file_rows = summaries[filename]
+            chrom_nb_geno[chrom] += nb_genotypes
+            rows.extend(file_rows)
+            rows_chrom.extend([i] * len(file_rows))
+            rows_nb_genotypes.extend([nb_genotypes] * len(file_rows))
+
+    final_nb_genotypes = sum(chrom_nb_geno.values())
+
+    # The two tables (of all the files)
+    tables = pd.DataFrame(rows, columns=["interval_1", "nb_geno",
+                                         "concordance_1", "interval_2",
+                                         "pc_called", "concordance_2"])
+    tables = tables.astype({"nb_geno": int, "concordance_1": float,
+                            "pc_called": float, "concordance_2": float})
+    tables["chrom"] = np.array(rows_chrom, dtype=int)
+
+    # The weighted sums of the first table (the weight is the number of
+    # genotypes)
+    table_1 = pd.DataFrame({
+        "chrom": tables.chrom,
+        "interval": tables.interval_1,
+        "nb_geno": tables.nb_geno,
+        "weighted": tables.concordance_1 * tables.nb_geno,
+    }).groupby(["chrom", "interval"]).sum()
+
+    # The weighted sums of the second table (the weight is the number of
+    # called genotypes, computed from the percentage of called genotypes)
+    nb_called = (tables.pc_called *
+                 np.array(rows_nb_genotypes, dtype=int) / 100)
+    table_2 = pd.DataFrame({
+        "chrom": tables.chrom,
+        "interval": tables.interval_2,
+        "nb_called": nb_called,
+        "weighted": tables.concordance_2 * nb_called,
+    }).groupby(["chrom", "interval"]).sum()
+
+    # The tables for each chromosome
+    per_chrom_table_1 = {}
+    per_chrom_table_2 = {}
+    for i, chrom in enumerate(chrom_nb_geno.keys()):
+        per_chrom_table_1[chrom] = _format_cross_validation_table_1(
+            _get_chrom_table(table_1, i),
+        )
+        per_chrom_table_2[chrom] = _format_cross_validation_table_2(
+            _get_chrom_table(table_2, i), chrom_nb_geno[chrom],
+        )
+
+    # The tables for all the chromosomes
+    table_1_data = _format_cross_validation_table_1(
+        table_1.groupby(level="interval").sum(),
+    )
+    table_2_data = _format_cross_validation_table_2(
+        table_2.groupby(level="interval").sum(), final_nb_genotypes,
+    )
 
     # Returning the data
     return {
         "cross_validation_final_nb_genotypes": final_nb_genotypes,
-        "cross_validation_nb_genotypes_chrom": chrom_nb_geno,
+        "cross_validation_nb_genotypes_chrom": dict(chrom_nb_geno),
         "cross_validation_table_1":            table_1_data,
         "cross_validation_table_2":            table_2_data,
         "cross_validation_table_1_chrom":      per_chrom_table_1,
@@ -2163,6 +3043,131 @@ def get_cross_validation_results(required_chrom, glob_pattern):
     }
 
 
+def read_cross_validation_summary(filename):
+    """Reads the cross-validation tables of an IMPUTE2 summary file.
+
+    Args:
+        filename (str): the name of the IMPUTE2 summary file
+
+    Returns:
+        tuple: the number of genotypes that were masked, and the rows of the
+               two concordance tables (or ``None`` if there was no
+               cross-validation, or no genotypes)
+
+    Each row contains the interval, the number of genotypes and the
+    concordance (first table), followed by the interval, the percentage of
+    called genotypes and the concordance (second table). The values are not
+    converted (they are strings).
+
+    """
+    with open(filename, "r") as i_file:
+        content = i_file.read()
+
+    # The number of genotypes
+    match = _cross_validation_nb_genotypes_re.search(content)
+    if match is None:
+        return None
+
+    nb_genotypes = int(match.group(1))
+    if nb_genotypes == 0:
+        return None
+
+    # Looking for the headers of the two tables
+    table_header = _cross_validation_table_header_re.search(content,
+                                                            match.end())
+    if table_header is None:
+        raise GenipeError("Problem with {}".format(filename))
+
+    # The data inside the tables (the end of the header line is skipped)
+    rows = []
+    for line in content[table_header.end():].splitlines()[1:]:
+        row = line.split()
+        if len(row) == 0:
+            continue
+        rows.append((row[0], row[1], row[2], "".join(row[3:6]), row[-2],
+                     row[-1]))
+
+    return nb_genotypes, rows
+
+
+def _get_chrom_table(table, chrom):
+    """Gets the cross-validation table of a single chromosome.
+
+    Args:
+        table (pandas.DataFrame): the table (indexed by chromosome and
+                                  interval)
+        chrom (int): the chromosome
+
+    Returns:
+        pandas.DataFrame: the table of the chromosome (indexed by interval)
+
+    """
+    if chrom not in table.index.get_level_values("chrom"):
+        return table.iloc[:0].droplevel("chrom")
+    return table.xs(chrom, level="chrom")
+
+
+def _format_cross_validation_table_1(table):
+    """Formats the first cross-validation table (weighted concordance).
+
+    Args:
+        table (pandas.DataFrame): the number of genotypes (``nb_geno``) and
+                                  the weighted concordance (``weighted``) for
+                                  each interval
+
+    Returns:
+        list: the interval, the number of genotypes and the concordance
+
+    """
+    table = table.reindex(_cross_validation_table_1_intervals, fill_value=0)
+    nb_geno = table.nb_geno.values.astype(int)
+
+    # Computing the weighted concordance
+    concordance = np.zeros(len(table))
+    has_weight = nb_geno != 0
+    concordance[has_weight] = (table.weighted.values[has_weight] /
+                               nb_geno[has_weight])
+
+    return [
+        [interval, "{:,d}".format(nb), "{:.1f}".format(value)]
+        for interval, nb, value in zip(table.index, nb_geno, concordance)
+    ]
+
+
+def _format_cross_validation_table_2(table, nb_genotypes):
+    """Formats the second cross-validation table (weighted concordance).
+
+    Args:
+        table (pandas.DataFrame): the number of called genotypes
+                                  (``nb_called``) and the weighted concordance
+                                  (``weighted``) for each interval
+        nb_genotypes (int): the total number of genotypes
+
+    Returns:
+        list: the interval, the percentage of called genotypes and the
+              concordance
+
+    """
+    table = table.reindex(_cross_validation_table_2_intervals, fill_value=0)
+    nb_called = table.nb_called.values.astype(float)
+
+    # Computing the weighted concordance
+    concordance = np.zeros(len(table))
+    has_weight = nb_called != 0
+    concordance[has_weight] = (table.weighted.values[has_weight] /
+                               nb_called[has_weight])
+
+    # Computing the percentage of called genotypes
+    pct_called = np.zeros(len(table))
+    if nb_genotypes != 0:
+        pct_called = nb_called / nb_genotypes * 100
+
+    return [
+        [interval, "{:.1f}".format(pct), "{:.1f}".format(value)]
+        for interval, pct, value in zip(table.index, pct_called, concordance)
+    ]
+
+
 def gather_imputation_stats(required_chrom, prob_t, completion_t, info_t,
                             nb_samples, missing, o_dir):
     """Gathers imputation statistics from the merged dataset.
@@ -2237,6 +3242,11 @@ def gather_imputation_stats(required_chrom, prob_t, completion_t, info_t,
     |                                | after imputation                       |
     +--------------------------------+----------------------------------------+
 
+    The statistics of each chromosome are read from the summary written by
+    the merger (see :py:func:`read_merge_stats`). They are computed from the
+    merged files if there is no summary, or if the summary was computed for
+    another chromosome or using other thresholds (see
+    :py:func:`get_merge_stats_from_files`).
 
     """
     logging.info("Gathering imputation statistics")
@@ -2259,54 +3269,32 @@ def gather_imputation_stats(required_chrom, prob_t, completion_t, info_t,
     for chrom in required_chrom:
         logging.info("  - chromosome {}".format(chrom))
 
-        # First, we read the imputed sites
-        filename = filename_template.format(chrom=chrom,
-                                            suffix="imputed_sites")
-        imputed_sites = None
-        with open(filename, "r") as i_file:
-            imputed_sites = {i for i in i_file.read().splitlines()}
-
-        # Then, we read the completion using a DataFrame
-        filename = filename_template.format(chrom=chrom,
-                                            suffix="completion_rates")
-        completion_data = pd.read_csv(filename, sep="\t")
-
-        # Then, we read the information file using a DataFrame
-        filename = filename_template.format(chrom=chrom,
-                                            suffix="impute2_info")
-        info_data = pd.read_csv(filename, sep="\t")
-
-        # Merging the two dataset
-        completion_data = pd.merge(completion_data, info_data, left_on="name",
-                                   right_on="name")
-
-        # Checking there is no missing data...
-        assert completion_data["completion_rate"].isnull().sum() == 0
-        assert completion_data["info"].isnull().sum() == 0
-
-        # Counting the number of good sites in the file...
-        nb_good_sites = None
-        filename = filename_template.format(chrom=chrom,
-                                            suffix="good_sites")
-        with open(filename, "r") as i_file:
-            nb_good_sites = len(i_file.read().splitlines())
+        # The statistics gathered by the merger (or from the merged files,
+        # if the merger didn't write them)
+        merge_stats = read_merge_stats(
+            filename_template.format(chrom=chrom, suffix="stats.json"),
+            chrom, prob_t, completion_t, info_t,
+        )
+        if merge_stats is None:
+            merge_stats = get_merge_stats_from_files(
+                chrom, filename_template, completion_t, info_t,
+            )
 
         # Saving the stats for all sites
-        tot_nb_sites += completion_data.shape[0]
-        sum_rates += completion_data.completion_rate.sum()
+        tot_nb_sites += merge_stats["nb_sites"]
+        sum_rates += merge_stats["sum_completion_rates"]
 
         # Saving the stats for good sites
-        good_sites = (
-            (completion_data.completion_rate >= completion_t) &
-            (completion_data["info"] >= info_t)
-        )
-        assert nb_good_sites == good_sites.sum()
-        tot_good_sites += completion_data[good_sites].shape[0]
-        sum_good_rates += completion_data[good_sites].completion_rate.sum()
-
-        # Saving the imputed sites call rates
-        imputed_sites = completion_data.name.isin(imputed_sites)
-        genotyped_sites.append(completion_data[~imputed_sites])
+        tot_good_sites += merge_stats["nb_good_sites"]
+        sum_good_rates += merge_stats["sum_good_completion_rates"]
+
+        # Saving the genotyped sites (not imputed) number of missing values
+        genotyped = merge_stats["genotyped_nb_missing"]
+        genotyped_sites.append(pd.DataFrame(
+            {"name": list(genotyped.keys()),
+             "nb_missing": list(genotyped.values())},
+            columns=["name", "nb_missing"],
+        ))
 
     # Concatenating the completion rates for the genotyped sites
     genotyped_sites = pd.concat(genotyped_sites)
@@ -2356,11 +3344,200 @@ def gather_imputation_stats(required_chrom, prob_t, completion_t, info_t,
     }
 
 
-def gather_maf_stats(required_chrom, o_dir):
+def read_merge_stats(filename, chrom, prob_t, completion_t, info_t):
+    """Reads the summary statistics written by the merger.
+
+    Args:
+        filename (str): the name of the file (``.stats.json``)
+        chrom (str): the required chromosome
+        prob_t (float): the probability threshold (>= t)
+        completion_t (float): the completion threshold (>= t)
+        info_t (float): the information threshold (>= t)
+
+    Returns:
+        dict: the summary statistics (or ``None`` if the file doesn't exist,
+              or if the statistics can't be used)
+
+    The summary statistics of a chromosome are gathered by
+    :py:mod:`genipe.tools.impute2_merger` while the sites are merged (see
+    :py:class:`genipe.tools.impute2_merger.MergeStats`), so that the merged
+    files (which might contain tens of millions of sites) don't need to be
+    read again.
+
+    The statistics are used only if they were gathered for the required
+    chromosome, using the same thresholds (*e.g.* a previous merge might have
+    used other thresholds). Otherwise, a warning is logged and ``None`` is
+    returned.
+
+    """
+    if not os.path.isfile(filename):
+        return None
+
+    merge_stats = None
+    with open(filename, "r") as i_file:
+        merge_stats = json.load(i_file)
+
+    # The chromosome and thresholds used by the merger
+    expected = {
+        "chrom": str(chrom),
+        "thresholds": {"probability": prob_t, "completion": completion_t,
+                       "info": info_t},
+    }
+    observed = {
+        "chrom": str(merge_stats.get("chrom")),
+        "thresholds": merge_stats.get("thresholds"),
+    }
+    if observed != expected:
+        logging.warning(
+            "{}: summary statistics were computed for chromosome {chrom} "
+            "with thresholds {thresholds} (ignored)".format(filename,
+                                                            **observed),
+        )
+        return None
+
+    return merge_stats
+
+
+def get_merge_stats_from_files(chrom, filename_template, completion_t,
+                               info_t):
+    """Computes the merger's summary statistics from the merged files.
+
+    Args:
+        chrom (str): the chromosome
+        filename_template (str): the template of the merged files
+        completion_t (float): the completion threshold (>= t)
+        info_t (float): the information threshold (>= t)
+
+    Returns:
+        dict: the summary statistics (the same as
+              :py:func:`read_merge_stats`, without the MAF)
+
+    This is only required if the merger didn't write the summary statistics
+    (*e.g.* if the chromosome was merged by a previous version of
+    :py:mod:`genipe`).
+
+    """
+    # First, we read the imputed sites
+    filename = filename_template.format(chrom=chrom, suffix="imputed_sites")
+    imputed_sites = None
+    with open(filename, "r") as i_file:
+        imputed_sites = {i for i in i_file.read().splitlines()}
+
+    # Then, we read the completion using a DataFrame
+    filename = filename_template.format(chrom=chrom,
+                                        suffix="completion_rates")
+    completion_data = pd.read_csv(filename, sep="\t")
+
+    # Then, we read the information file using a DataFrame
+    filename = filename_template.format(chrom=chrom, suffix="impute2_info")
+    info_data = pd.read_csv(filename, sep="\t")
+
+    # Merging the two dataset
+    completion_data = pd.merge(completion_data, info_data, left_on="name",
+                               right_on="name")
+
+    # Checking there is no missing data...
+    assert completion_data["completion_rate"].isnull().sum() == 0
+    assert completion_data["info"].isnull().sum() == 0
+
+    # Counting the number of good sites in the file...
+    nb_good_sites = None
+    filename = filename_template.format(chrom=chrom, suffix="good_sites")
+    with open(filename, "r") as i_file:
+        nb_good_sites = len(i_file.read().splitlines())
+
+    # The good sites
+    good_sites = (
+        (completion_data.completion_rate >= completion_t) &
+        (completion_data["info"] >= info_t)
+    )
+    assert nb_good_sites == good_sites.sum()
+
+    # The genotyped sites (not imputed)
+    genotyped = completion_data[~completion_data.name.isin(imputed_sites)]
+
+    return {
+        "nb_sites": completion_data.shape[0],
+        "sum_completion_rates": completion_data.completion_rate.sum(),
+        "nb_good_sites": completion_data[good_sites].shape[0],
+        "sum_good_completion_rates": (
+            completion_data[good_sites].completion_rate.sum()
+        ),
+        "nb_imputed_sites": completion_data.shape[0] - genotyped.shape[0],
+        "genotyped_nb_missing": OrderedDict(zip(genotyped.name,
+                                                genotyped.nb_missing)),
+    }
+
+
+def get_maf_stats_from_files(chrom, filename_template):
+    """Computes the merger's MAF summary statistics from the merged files.
+
+    Args:
+        chrom (str): the chromosome
+        filename_template (str): the template of the merged files
+
+    Returns:
+        dict: the MAF summary statistics of the good sites (the same as the
+              ``maf`` entry of :py:func:`read_merge_stats`)
+
+    This is only required if the merger didn't write the summary statistics
+    (*e.g.* if the chromosome was merged by a previous version of
+    :py:mod:`genipe`).
+
+    """
+    # The name of the file
+    maf_filename = filename_template.format(chrom=chrom, suffix="maf")
+    good_sites_filename = filename_template.format(chrom=chrom,
+                                                   suffix="good_sites")
+
+    # Checking the file exists
+    for filename in [maf_filename, good_sites_filename]:
+        if not os.path.isfile(filename):
+            raise GenipeError("{}: no such file".format(filename))
+
+    # Reading the list of good sites
+    good_sites = None
+    with open(good_sites_filename, "r") as i_file:
+        good_sites = set(i_file.read().splitlines())
+
+    # Reading the file using pandas
+    maf = pd.read_csv(maf_filename, sep="\t")
+
+    # Keeping only the good sites
+    maf = maf[maf.name.isin(good_sites)]
+
+    # Excluding sites with no MAF (NaN values)
+    null_maf = maf.maf.isnull()
+    nb_nan = null_maf.sum()
+    maf = maf[~null_maf]
+
+    # The sites with the lowest and highest MAF
+    maf_min = None
+    maf_max = None
+    if maf.shape[0] > 0:
+        maf_min = maf.loc[maf.maf.idxmin(), ["name", "maf"]].tolist()
+        maf_max = maf.loc[maf.maf.idxmax(), ["name", "maf"]].tolist()
+
+    return {
+        "bins": {
+            "lt_01": (maf.maf < 0.01).sum(),
+            "geq_01_lt_05": ((maf.maf >= 0.01) & (maf.maf < 0.05)).sum(),
+            "geq_05": (maf.maf >= 0.05).sum(),
+        },
+        "nb_nan": nb_nan,
+        "min": maf_min,
+        "max": maf_max,
+    }
+
+
+def gather_maf_stats(required_chrom, prob_t, completion_t, info_t, o_dir):
     """Gather minor allele frequencies from imputation.
 
     Args:
         required_chrom (tuple): the list of chromosome to gather statistics
+        prob_t (float): the probability threshold (>= t)
+        completion_t (float): the completion threshold (>= t)
+        info_t (float): the information threshold (>= t)
         o_dir (str): the output directory
 
     Returns:
@@ -2401,6 +3578,12 @@ def gather_maf_stats(required_chrom, o_dir):
     |                          | (if it was created)                          |
     +--------------------------+----------------------------------------------+
 
+    The statistics of each chromosome are read from the summary written by
+    the merger (see :py:func:`read_merge_stats`). They are computed from the
+    merged files if there is no summary, or if the summary was computed for
+    another chromosome or using other thresholds (see
+    :py:func:`get_maf_stats_from_files`).
+
     """
     logging.info("Gathering frequency statistics")
 
@@ -2419,65 +3602,48 @@ def gather_maf_stats(required_chrom, o_dir):
     for chrom in required_chrom:
         logging.info("  - chromosome {}".format(chrom))
 
-        # The name of the file
-        maf_filename = filename_template.format(chrom=chrom, suffix="maf")
-        good_sites_filename = filename_template.format(chrom=chrom,
-                                                       suffix="good_sites")
-
-        # Checking the file exists
-        for filename in [maf_filename, good_sites_filename]:
-            if not os.path.isfile(filename):
-                raise GenipeError("{}: no such file".format(filename))
-
-        # Reading the list of good sites
-        good_sites = None
-        with open(good_sites_filename, "r") as i_file:
-            good_sites = set(i_file.read().splitlines())
-
-        # Reading the file using pandas
-        maf = pd.read_csv(maf_filename, sep="\t")
-
-        # Keeping only the good sites
-        maf = maf[maf.name.isin(good_sites)]
-
-        # Excluding sites with no MAF (NaN values)
-        null_maf = maf.maf.isnull()
-        nb_nan = null_maf.sum()
-        maf = maf[~null_maf]
+        # The statistics gathered by the merger (or from the merged files,
+        # if the merger didn't write them)
+        merge_stats = read_merge_stats(
+            filename_template.format(chrom=chrom, suffix="stats.json"),
+            chrom, prob_t, completion_t, info_t,
+        )
+        if merge_stats is None:
+            maf_stats = get_maf_stats_from_files(chrom, filename_template)
+        else:
+            maf_stats = merge_stats["maf"]
 
         # There should not be any NaN sites...
+        nb_nan = maf_stats["nb_nan"]
         if nb_nan > 0:
             logging.warning("chr{}: good sites with invalid MAF "
                             "(NaN)".format(chrom))
 
         # Checking we have MAF (and not just frequencies)
-        maf_description = maf.maf.describe()
-        if maf_description["max"] > 0.5:
-            bad = maf.loc[maf.maf.idxmax(), ["name", "maf"]]
-            raise GenipeError("{}: {}: invalid MAF".format(str(bad["name"]),
-                                                           round(bad.maf, 3)))
-        if maf_description["max"] < 0:
-            bad = maf.loc[maf.maf.idxmin(), ["name", "maf"]]
-            raise GenipeError("{}: {}: invalid MAF".format(str(bad["name"]),
-                                                           round(bad.maf, 3)))
-
-        # Some of the true/false we need to keep (to not compute multiple time)
-        maf_geq_01 = maf.maf >= 0.01
-        maf_lt_05 = maf.maf < 0.05
+        if maf_stats["max"] is not None:
+            bad = None
+            if maf_stats["max"][1] > 0.5:
+                bad = maf_stats["max"]
+            elif maf_stats["max"][1] < 0:
+                bad = maf_stats["min"]
+            if bad is not None:
+                raise GenipeError("{}: {}: invalid MAF".format(
+                    str(bad[0]), round(bad[1], 3),
+                ))
+
+        # The number of markers in each MAF bin
+        lt_01 = maf_stats["bins"]["lt_01"]
+        geq_01_lt_05 = maf_stats["bins"]["geq_01_lt_05"]
+        geq_05 = maf_stats["bins"]["geq_05"]
 
         # Updating the statistics
-        nb_marker_with_maf += maf.shape[0]
+        nb_marker_with_maf += lt_01 + geq_01_lt_05 + geq_05
         nb_maf_nan += nb_nan
-        nb_maf_geq_01 += maf_geq_01.sum()
-        nb_maf_geq_05 += (maf.maf >= 0.05).sum()
-        nb_maf_lt_05 += maf_lt_05.sum()
-        nb_maf_lt_01 += (maf.maf < 0.01).sum()
-        nb_maf_geq_01_lt_05 += (maf_geq_01 & maf_lt_05).sum()
-
-    # Checking
-    nb_total = nb_maf_lt_01 + nb_maf_geq_01_lt_05 + nb_maf_geq_05
-    if nb_total != nb_marker_with_maf:
-        raise GenipeError("something went wrong")
+        nb_maf_geq_01 += geq_01_lt_05 + geq_05
+        nb_maf_geq_05 += geq_05
+        nb_maf_lt_05 += lt_01 + geq_01_lt_05
+        nb_maf_lt_01 += lt_01
+        nb_maf_geq_01_lt_05 += geq_01_lt_05
 
     # Computing the percentages
     pct_maf_geq_01 = 0
@@ -2580,10 +3746,36 @@ def gather_execution_time(required_chrom, db_name):
     Returns:
         dict: the execution time for all tasks
 
+    The resources used by the tasks (see
+    :py:func:`genipe.db.utils.set_task_resources`) are also summarized for
+    each kind of task (*e.g.* ``impute2`` for all the IMPUTE2 segments): the
+    number of tasks, the highest peak resident set size (in kilobytes), and
+    the total CPU time (in seconds) and number of bytes read and written.
+
     """
     # Getting all the execution time from the DB
     exec_time = db.get_all_runtimes(db_name)
 
+    # Getting the resources used by the tasks (for each kind of task)
+    kind_resources = defaultdict(list)
+    for task_id, resources in db.get_all_resources(db_name).items():
+        kind_resources[launcher._get_task_kind(task_id)].append(resources)
+
+    resource_usage = []
+    for kind, all_resources in sorted(kind_resources.items()):
+        row = [kind, len(all_resources)]
+        for names, summarize in ((("max_rss", ), max),
+                                 (("user_time", "system_time"), sum),
+                                 (("read_bytes", ), sum),
+                                 (("write_bytes", ), sum)):
+            values = [
+                sum(resources[name] for name in names)
+                for resources in all_resources
+                if all(resources[name] is not None for name in names)
+            ]
+            row.append(summarize(values) if len(values) > 0 else None)
+        resource_usage.append(row)
+
     # Getting the execution time for the steps
     plink_exclude_exec_time = []
     shapeit_check_1_exec_time = []
@@ -2674,6 +3866,7 @@ def gather_execution_time(required_chrom, db_name):
         "merge_impute2_exec_time":   merge_impute2_exec_time,
         "impute2_exec_time":         impute2_exec_time,
         "bgzip_exec_time":           bgzip_exec_time,
+        "resource_usage":            resource_usage,
     }
 
 
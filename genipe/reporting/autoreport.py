@@ -646,7 +646,7 @@ def _generate_annex(templates, run_options, run_information):
                           "plink_missing_exec_time", "plink_flip_exec_time",
                           "plink_final_exec_time", "shapeit_phase_exec_time",
                           "merge_impute2_exec_time", "impute2_exec_time",
-                          "bgzip_exec_time"]
+                          "bgzip_exec_time", "resource_usage"]
     for required_variable in required_variables:
         assert required_variable in run_information, required_variable
 
@@ -768,9 +768,73 @@ def _generate_annex(templates, run_options, run_information):
             float_t=float_template,
         )
 
+    # The resources used by the tasks (if they were recorded)
+    if run_information["resource_usage"]:
+        content += _generate_resource_float(
+            table=run_information["resource_usage"],
+            tabular_t=tabular_template,
+            float_t=float_template,
+        )
+
     return content
 
 
+def _generate_resource_float(table, tabular_t, float_t):
+    """Generates the table of the resources used by the tasks.
+
+    Args:
+        table (list): the resources used by each kind of task
+        tabular_t (jinja2.Template): the template for the tabular
+        float_t (jinja2.Template): the template for the float
+
+    Returns:
+        str: a LaTeX float
+
+    Each row of the table contains the kind of task, the number of tasks, the
+    highest peak resident set size (kilobytes), the total CPU time (seconds),
+    and the total number of bytes read and written (unknown values are
+    ``None``).
+
+    """
+    header = [
+        utils.format_tex(utils.sanitize_tex(name), "textbf")
+        for name in ("Task", "Nb", "Max. RSS", "CPU T.", "Read", "Written")
+    ]
+
+    data = []
+    for kind, nb_tasks, max_rss, cpu_time, read, written in table:
+        data.append([
+            utils.format_tex(utils.sanitize_tex(kind), "texttt"),
+            "{:,d}".format(nb_tasks),
+            "-" if max_rss is None else utils.format_size(max_rss * 1024),
+            "-" if cpu_time is None else utils.colorize_time(
+                int(round(cpu_time, 0)),
+            ),
+            "-" if read is None else utils.format_size(read),
+            "-" if written is None else utils.format_size(written),
+        ])
+
+    # The caption
+    caption = utils.sanitize_tex(
+        "Resources used by the tasks (peak memory of the largest task, and "
+        "total CPU time and input/output of all the tasks)."
+    )
+
+    return utils.create_float(
+        template=float_t,
+        float_type="table",
+        caption=utils.wrap_tex(caption),
+        label="tab:resource_usage",
+        placement="H",
+        content=utils.create_tabular(
+            template=tabular_t,
+            header=header,
+            col_align=["l"] + ["r"] * (len(header) - 1),
+            data=data,
+        ),
+    )
+
+
 def _generate_time_float(task_name, label, table, header, tabular_t, float_t,
                          first_time_col=1):
     """Generates time tables (split one long table in two).
@@ -20,7 +20,7 @@ __license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
 
 __all__ = ["config_jinja2", "sanitize_tex", "format_tex", "wrap_tex",
            "create_tabular", "create_float", "tex_inline_math", "format_time",
-           "colorize_time"]
+           "colorize_time", "format_size"]
 
 
 _char_mod = {
@@ -324,3 +324,27 @@ def colorize_time(total_seconds):
 
     # Formatting the time
     return colored_time
+
+
+def format_size(nb_bytes):
+    """Format a size (in bytes) using the most appropriate unit.
+
+    Args:
+        nb_bytes (int): the number of bytes
+
+    Returns:
+        str: a string representation of the size (*e.g.* ``1.5 GB``)
+
+    The size is displayed using binary multiples (*i.e.* 1 KB is 1,024
+    bytes).
+
+    """
+    size = float(nb_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            if unit == "B":
+                return "{:d} {}".format(int(size), unit)
+            return "{:.1f} {}".format(size, unit)
+        size /= 1024
+
+    return "{:,.1f} TB".format(size)
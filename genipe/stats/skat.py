@@ -0,0 +1,519 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from ..error import GenipeError
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["fit_null_model", "skat", "skat_o", "mixture_chi2_pvalue",
+           "liu_pvalue"]
+
+
+# Check if scipy is installed
+try:
+    from scipy import stats
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+# The grid of correlations used by SKAT-O (same as the SKAT R package)
+_SKAT_O_RHO = np.array([0, 0.1**2, 0.2**2, 0.3**2, 0.4**2, 0.5**2, 0.5, 1])
+
+# The number of quadrature nodes (per segment) for the SKAT-O p-value
+_SKAT_O_NB_NODES = 16
+
+# The number of terms of the fixed Talbot inversion (and the smallest p-value
+# it computes accurately, about 100 times its absolute error)
+_TALBOT_NB_TERMS = 24
+_TALBOT_MIN_PVALUE = 1e-10
+
+
+# The null model
+NullModel = namedtuple("NullModel", ("outcome_type", "included", "x",
+                                     "residuals", "s2", "variance"))
+
+
+def fit_null_model(outcome, covariates=None, outcome_type="continuous",
+                   max_iter=100, tol=1e-10):
+    """Fits the SKAT null model (without any genotype).
+
+    Args:
+        outcome (numpy.array): the outcome of each sample
+        covariates (numpy.array): the covariates (samples x covariates)
+        outcome_type (str): either ``continuous`` or ``discrete``
+        max_iter (int): the maximal number of iterations (logistic regression)
+        tol (float): the convergence tolerance (logistic regression)
+
+    Returns:
+        NullModel: the null model
+
+    Samples with a missing outcome or covariate are excluded from the model
+    (the ``included`` mask of the null model is used to select the same
+    samples from the genotype matrix). An intercept is always added to the
+    covariates. The null model is fitted only once, and shared by all the SNP
+    sets.
+
+    For a continuous outcome, a linear regression is used (``s2`` is the
+    residual variance). For a discrete (0/1) outcome, a logistic regression is
+    fitted using iteratively reweighted least squares (``variance`` is the
+    variance of each fitted value).
+
+    """
+    outcome = np.asarray(outcome, dtype=float)
+    x = np.ones((len(outcome), 1), dtype=float)
+    if covariates is not None:
+        covariates = np.asarray(covariates, dtype=float)
+        if covariates.ndim == 1:
+            covariates = covariates[:, np.newaxis]
+        x = np.hstack((x, covariates))
+
+    # Excluding the samples with missing values
+    included = ~(np.isnan(outcome) | np.isnan(x).any(axis=1))
+    outcome = outcome[included]
+    x = x[included]
+    if len(outcome) <= x.shape[1]:
+        raise GenipeError("not enough samples to fit the SKAT null model")
+
+    if outcome_type == "continuous":
+        beta = np.linalg.lstsq(x, outcome, rcond=None)[0]
+        residuals = outcome - x.dot(beta)
+        s2 = residuals.dot(residuals) / (len(outcome) - x.shape[1])
+        return NullModel(outcome_type=outcome_type, included=included, x=x,
+                         residuals=residuals, s2=s2, variance=None)
+
+    if outcome_type != "discrete":
+        raise GenipeError("{}: invalid outcome type".format(outcome_type))
+
+    if not np.all((outcome == 0) | (outcome == 1)):
+        raise GenipeError("discrete outcome should be coded as 0 or 1")
+
+    # Fitting the logistic regression (IRLS)
+    beta = np.zeros(x.shape[1], dtype=float)
+    for i in range(max_iter):
+        mu = 1 / (1 + np.exp(-x.dot(beta)))
+        variance = mu * (1 - mu)
+        step = np.linalg.solve(
+            x.T.dot(x * variance[:, np.newaxis]),
+            x.T.dot(outcome - mu),
+        )
+        beta += step
+        if np.max(np.abs(step)) < tol:
+            break
+    else:
+        logging.warning("SKAT null model: logistic regression did not "
+                        "converge")
+
+    mu = 1 / (1 + np.exp(-x.dot(beta)))
+    return NullModel(outcome_type=outcome_type, included=included, x=x,
+                     residuals=outcome - mu, s2=1.0, variance=mu * (1 - mu))
+
+
+def _prepare_genotypes(null_model, genotypes, weights):
+    """Prepares the (weighted) genotype matrix of a SNP set.
+
+    Args:
+        null_model (NullModel): the null model
+        genotypes (numpy.array): the dosage matrix (samples x variants)
+        weights (numpy.array): the weight of each variant (``None`` to use
+                               the default Beta(1, 25) weights on the MAF)
+
+    Returns:
+        numpy.array: the weighted genotype matrix (samples x variants), for
+                     the samples included in the null model
+
+    As in the SKAT R package, the dosage is flipped for variants with a MAF
+    higher than 0.5, and monomorphic variants are excluded.
+
+    """
+    genotypes = np.asarray(genotypes, dtype=float)
+    if genotypes.ndim == 1:
+        genotypes = genotypes[:, np.newaxis]
+    genotypes = genotypes[null_model.included]
+
+    # Flipping the dosage (if required)
+    maf = genotypes.mean(axis=0) / 2
+    flipped = maf > 0.5
+    genotypes[:, flipped] = 2 - genotypes[:, flipped]
+    maf[flipped] = 1 - maf[flipped]
+
+    # The weights
+    if weights is None:
+        weights = stats.beta.pdf(maf, 1, 25)
+    weights = np.asarray(weights, dtype=float)
+
+    # Excluding the monomorphic variants
+    polymorphic = maf > 0
+    return genotypes[:, polymorphic] * weights[polymorphic]
+
+
+def _project_genotypes(null_model, genotypes):
+    """Projects the genotypes on the null model.
+
+    Args:
+        null_model (NullModel): the null model
+        genotypes (numpy.array): the weighted genotype matrix
+
+    Returns:
+        numpy.array: the projected genotypes ``Z1`` (where ``Z1' Z1`` is the
+                     variance of the score ``Z' res``, divided by 2)
+
+    """
+    x = null_model.x
+    if null_model.outcome_type == "continuous":
+        z1 = genotypes - x.dot(np.linalg.solve(x.T.dot(x),
+                                               x.T.dot(genotypes)))
+
+    else:
+        v = null_model.variance[:, np.newaxis]
+        z1 = (genotypes * np.sqrt(v)) - (x * np.sqrt(v)).dot(
+            np.linalg.solve(x.T.dot(x * v), x.T.dot(genotypes * v)),
+        )
+
+    return z1 / np.sqrt(2)
+
+
+def _get_lambda(k):
+    """Gets the (non-null) eigenvalues of a symmetric matrix.
+
+    Args:
+        k (numpy.array): the matrix
+
+    Returns:
+        numpy.array: the eigenvalues
+
+    """
+    values = np.linalg.eigvalsh(k)
+    positive = values[values >= 0]
+    if len(positive) == 0:
+        return positive
+    return values[values > positive.mean() / 100000]
+
+
+def _liu_params(lambdas):
+    """Computes the parameters of Liu's moment-matching approximation.
+
+    Args:
+        lambdas (numpy.array): the eigenvalues
+
+    Returns:
+        tuple: the mean and the standard deviation of the mixture, and the
+               degrees of freedom and non-centrality of the chi-squared
+               approximation
+
+    This is the modified version of Liu *et al.* (2009) used by SKAT (the
+    kurtosis is matched when the skewness cannot be).
+
+    """
+    c1, c2, c3, c4 = (np.sum(lambdas**i) for i in range(1, 5))
+    s1 = c3 / c2**1.5
+    s2 = c4 / c2**2
+    if s1**2 > s2:
+        a = 1 / (s1 - np.sqrt(s1**2 - s2))
+        d = s1 * a**3 - a**2
+        df = a**2 - 2 * d
+    else:
+        df = 1 / s2
+        d = 0
+    return c1, np.sqrt(2 * c2), df, d
+
+
+def liu_pvalue(q, lambdas):
+    """Computes the p-value of a mixture of chi-squared (Liu's method).
+
+    Args:
+        q (float): the statistic
+        lambdas (numpy.array): the eigenvalues (weights of the mixture)
+
+    Returns:
+        float: the probability that the mixture is higher than ``q``
+
+    """
+    mu_q, sigma_q, df, d = _liu_params(lambdas)
+    mu_x = df + d
+    sigma_x = np.sqrt(2 * (df + 2 * d))
+    q_norm = (q - mu_q) / sigma_q * sigma_x + mu_x
+    if d == 0:
+        return stats.chi2.sf(q_norm, df)
+    return stats.ncx2.sf(q_norm, df, d)
+
+
+def _talbot_pvalue(q, lambdas):
+    """Computes the p-value of a mixture of chi-squared (Talbot's method).
+
+    Args:
+        q (numpy.array): the statistics
+        lambdas (numpy.array): the eigenvalues (weights of the mixture)
+
+    Returns:
+        numpy.array: the probability that the mixture is higher than each
+                     ``q``
+
+    The Laplace transform of the survival function of the mixture is
+    numerically inverted using the fixed Talbot contour (Abate and Valkó,
+    2004) with a fixed number of terms (``_TALBOT_NB_TERMS``). As in Davies'
+    method used by SKAT, the transform is known exactly, but the contour
+    makes the terms decrease exponentially, so that a few terms are
+    sufficient (instead of an adaptive integration). All the statistics are
+    computed at once.
+
+    The absolute error is about ``1e-12`` (the terms are computed in double
+    precision), hence smaller p-values are not accurate.
+
+    """
+    q = np.asarray(q, dtype=float)
+    p_values = np.ones_like(q)
+    positive = q > 0
+    if not np.any(positive):
+        return p_values
+    t = q[positive][:, np.newaxis]
+
+    # The points on the contour (and the derivative of the contour)
+    n = _TALBOT_NB_TERMS
+    theta = np.arange(1, n) * np.pi / n
+    cot = 1 / np.tan(theta)
+    r = 2 * n / (5 * t)
+    s = r * theta * (cot + 1j)
+    sigma = theta + (theta * cot - 1) * cot
+
+    def sf_transform(s):
+        """The Laplace transform of the survival function."""
+        log_l = -0.5 * np.sum(np.log1p(2 * s[..., np.newaxis] * lambdas),
+                              axis=-1)
+        return -np.expm1(log_l) / s
+
+    terms = np.exp(t * s) * sf_transform(s) * (1 + 1j * sigma)
+    first = 0.5 * np.exp(r * t) * sf_transform(r + 0j).real
+    p_values[positive] = (r / n * (first + np.sum(terms.real, axis=1,
+                                                  keepdims=True))).ravel()
+
+    return p_values
+
+
+def mixture_chi2_pvalue(q, lambdas):
+    """Computes the p-value of a mixture of chi-squared.
+
+    Args:
+        q (numpy.array): the statistic(s)
+        lambdas (numpy.array): the eigenvalues (weights of the mixture)
+
+    Returns:
+        numpy.array: the probability that the mixture is higher than ``q``
+
+    The exact p-value is computed first (see :py:func:`_talbot_pvalue`). As
+    in the SKAT R package, Liu's approximation is used if there is a single
+    eigenvalue, or if the exact method fails (*i.e.* it returns a p-value
+    outside of ]0, 1], or smaller than its precision,
+    ``_TALBOT_MIN_PVALUE``).
+
+    """
+    if len(lambdas) == 1:
+        return liu_pvalue(q, lambdas)
+
+    p_values = _talbot_pvalue(q, lambdas)
+    failed = (np.isnan(p_values) | (p_values < _TALBOT_MIN_PVALUE) |
+              (p_values > 1))
+    if np.any(failed):
+        p_values = np.where(failed, liu_pvalue(q, lambdas), p_values)
+
+    return p_values
+
+
+def skat(null_model, genotypes, weights=None):
+    """Computes the SKAT variance component score test.
+
+    Args:
+        null_model (NullModel): the null model (see :py:func:`fit_null_model`)
+        genotypes (numpy.array): the dosage matrix (samples x variants)
+        weights (numpy.array): the weight of each variant (``None`` to use
+                               the default Beta(1, 25) weights on the MAF)
+
+    Returns:
+        tuple: the *p-value* and the *Q* statistic
+
+    The *Q* statistic is the same as the one reported by the SKAT R package
+    (*i.e.* ``res' Z W W Z' res / (2 s2)``).
+
+    """
+    genotypes = _prepare_genotypes(null_model, genotypes, weights)
+    if genotypes.shape[1] == 0:
+        return 1.0, np.nan
+
+    return _skat(null_model, genotypes)
+
+
+def _skat(null_model, genotypes):
+    """Computes the SKAT test on the weighted genotypes.
+
+    Args:
+        null_model (NullModel): the null model
+        genotypes (numpy.array): the weighted genotype matrix (see
+                                 :py:func:`_prepare_genotypes`)
+
+    Returns:
+        tuple: the *p-value* and the *Q* statistic
+
+    """
+    # The statistic
+    score = null_model.residuals.dot(genotypes)
+    q = score.dot(score) / null_model.s2 / 2
+
+    # The eigenvalues of the null distribution
+    z1 = _project_genotypes(null_model, genotypes)
+    lambdas = _get_lambda(z1.T.dot(z1))
+
+    return float(mixture_chi2_pvalue(q, lambdas)), q
+
+
+def _skat_o_rho_matrix_sqrt(rho, m):
+    """Computes the square root of the SKAT-O correlation matrix.
+
+    Args:
+        rho (float): the correlation
+        m (int): the number of variants
+
+    Returns:
+        numpy.array: the square root of ``(1 - rho) I + rho 1 1'``
+
+    """
+    j = np.full((m, m), 1 / m)
+    return (np.sqrt(1 - rho) * (np.eye(m) - j) +
+            np.sqrt(1 - rho + m * rho) * j)
+
+
+def skat_o(null_model, genotypes, weights=None, rho=_SKAT_O_RHO):
+    """Computes the SKAT-O optimal unified test.
+
+    Args:
+        null_model (NullModel): the null model (see :py:func:`fit_null_model`)
+        genotypes (numpy.array): the dosage matrix (samples x variants)
+        weights (numpy.array): the weight of each variant (``None`` to use
+                               the default Beta(1, 25) weights on the MAF)
+        rho (numpy.array): the grid of correlations
+
+    Returns:
+        float: the *p-value*
+
+    This follows the ``optimal.adj`` method of the SKAT R package (Lee *et
+    al.*, 2012). The minimum p-value over the grid of correlations (between
+    SKAT, ``rho = 0``, and the burden test, ``rho = 1``) is used as the
+    statistic, and its p-value is computed by a one dimensional integration.
+
+    """
+    genotypes = _prepare_genotypes(null_model, genotypes, weights)
+    m = genotypes.shape[1]
+    if m == 0:
+        return 1.0
+    if m == 1:
+        # All the correlations lead to the same test
+        return _skat(null_model, genotypes)[0]
+
+    rho = np.asarray(rho, dtype=float)
+    if len(rho) == 1:
+        # There is nothing to optimize (the same test as the SKAT R package
+        # with a single correlation)
+        r_sqrt = _skat_o_rho_matrix_sqrt(rho[0], m)
+        return _skat(null_model, genotypes.dot(r_sqrt))[0]
+
+    rho = np.minimum(rho, 0.999)
+
+    # The statistic for each correlation
+    score = null_model.residuals.dot(genotypes)
+    q_rho = ((1 - rho) * score.dot(score) + rho * score.sum()**2)
+    q_rho = q_rho / null_model.s2 / 2
+
+    # The p-value for each correlation
+    z1 = _project_genotypes(null_model, genotypes)
+    a = z1.T.dot(z1)
+    p_rho = np.zeros(len(rho), dtype=float)
+    liu_params = []
+    for i, r in enumerate(rho):
+        r_sqrt = _skat_o_rho_matrix_sqrt(r, m)
+        lambdas = _get_lambda(r_sqrt.dot(a).dot(r_sqrt))
+        p_rho[i] = mixture_chi2_pvalue(q_rho[i], lambdas)
+        liu_params.append(_liu_params(lambdas))
+    p_min = np.min(p_rho)
+
+    # The quantile of the minimum p-value for each correlation
+    q_min = np.zeros(len(rho), dtype=float)
+    for i, (mu_q, sigma_q, df, d) in enumerate(liu_params):
+        q_min[i] = ((stats.chi2.isf(p_min, df) - df) / np.sqrt(2 * df) *
+                    sigma_q + mu_q)
+
+    # The parameters of the mixture (the part of the genotypes that is
+    # orthogonal to the mean genotype)
+    z_mean = z1.mean(axis=1)
+    z_mean_ss = z_mean.dot(z_mean)
+    coefficients = z_mean.dot(z1) / z_mean_ss
+    z_item1 = np.outer(z_mean, coefficients)
+    z_item2 = z1 - z_item1
+    k2 = z_item2.T.dot(z_item2)
+    lambdas = _get_lambda(k2)
+    var_remain = np.sum(z_item1.T.dot(z_item1) * k2) * 4
+    mu_q = np.sum(lambdas)
+    var_q = np.sum(lambdas**2) * 2 + var_remain
+    sd_ratio = np.sqrt(var_q - var_remain) / np.sqrt(var_q)
+    tau = (m**2 * rho + np.sum(coefficients**2) * (1 - rho)) * z_mean_ss
+
+    # The statistic of the mixture (for the minimum p-value) is the minimum
+    # over the correlations of lines in x (the chi-squared component with one
+    # degree of freedom). The integral over x in [0, 40] is split where the
+    # lines intersect (or where the statistic becomes null), so that the
+    # integrand is smooth on every segment.
+    intercepts = q_min / (1 - rho)
+    slopes = tau / (1 - rho)
+    null_q = mu_q * (1 - 1 / sd_ratio)
+    breaks = [0, 40]
+    for i in range(len(rho)):
+        for j in range(i + 1, len(rho)):
+            if slopes[i] != slopes[j]:
+                breaks.append((intercepts[i] - intercepts[j]) /
+                              (slopes[i] - slopes[j]))
+        if slopes[i] > 0:
+            breaks.append((intercepts[i] - null_q) / slopes[i])
+    breaks = np.sqrt(np.unique(np.clip(breaks, 0, 40)))
+
+    # Gauss-Legendre quadrature on each segment (using x = t**2)
+    nodes, node_weights = np.polynomial.legendre.leggauss(_SKAT_O_NB_NODES)
+    half_widths = np.diff(breaks)[:, np.newaxis] / 2
+    t = ((nodes + 1) * half_widths + breaks[:-1, np.newaxis]).ravel()
+    t_weights = (node_weights * half_widths).ravel()
+
+    q_raw = np.min(intercepts[:, np.newaxis] - np.outer(slopes, t**2),
+                   axis=0)
+    q = (q_raw - mu_q) * sd_ratio + mu_q
+    tail = np.ones_like(q)
+    if len(lambdas) > 0:
+        tail[q > 0] = mixture_chi2_pvalue(q[q > 0], lambdas)
+        tail[q_raw > np.sum(lambdas) * 10**4] = 0
+        p_value = stats.chi2.sf(40, 1) + np.sum(
+            t_weights * np.minimum(tail, 1) * 2 * stats.norm.pdf(t),
+        )
+        p_value = min(p_value, p_min * len(rho))
+    else:
+        p_value = np.nan
+
+    # SKAT-O should be between SKAT and the burden test (conservative
+    # correction if the integration failed)
+    multi = 3 if len(rho) >= 3 else 2
+    if np.isnan(p_value) or p_value <= 0 or np.any(p_rho <= 0):
+        p_value = p_min * multi
+    if p_value == 0 and np.any(p_rho > 0):
+        p_value = np.min(p_rho[p_rho > 0])
+
+    return p_value
@@ -10,17 +10,21 @@
 import os
 import re
 import sys
+import stat
 import shlex
 import logging
 import traceback
+from queue import Queue, Empty
 from os.path import isfile
-from multiprocessing import Pool
-from subprocess import Popen, PIPE
+from threading import Thread, Lock
 from tempfile import NamedTemporaryFile
-from multiprocessing.pool import ThreadPool
+from collections import defaultdict, OrderedDict
+from subprocess import Popen, DEVNULL, STDOUT
+from concurrent.futures import ThreadPoolExecutor
 
 from ..db import utils as db
 from ..error import GenipeError
+from .status import StatusFile, TaskProgress
 
 
 __author__ = "Louis-Philippe Lemieux Perreault"
@@ -28,11 +32,16 @@ __copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
 __license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
 
 
-__all__ = ["launch_tasks", ]
+__all__ = ["launch_tasks", "get_expected_runtimes", "get_output_tail",
+           "TaskResources", "TaskSupervisor"]
+
+
+# The number of threads used to check the output files of the completed tasks
+_NB_CHECK_THREADS = 16
 
 
 def launch_tasks(to_process, nb_threads, check_rc=True, hpc=False,
-                 hpc_options=None, out_dir=None, preamble=""):
+                 hpc_options=None, out_dir=None, preamble="", max_memory=None):
     """Executes commands.
 
     Args:
@@ -43,6 +52,34 @@ def launch_tasks(to_process, nb_threads, check_rc=True, hpc=False,
         hpc_options (dict): the DRMAA options
         out_dir (str): the output directory
         preamble (str): the script preamble (for DRMAA)
+        max_memory (float): the total amount of memory (GB) available for
+                            the tasks (``None`` if the memory is not
+                            considered)
+
+    The task DB is queried once for all the tasks to find the ones that were
+    already completed in a previous run, and the output files of those tasks
+    are checked all at once (see :py:func:`_check_completed_outputs`). The
+    completion of the tasks to launch is not checked again when they are
+    launched.
+
+    When more than one process is used, the tasks are launched from the
+    longest to the shortest (according to their expected execution time, see
+    :py:func:`get_expected_runtimes`), so that the longest tasks don't start
+    last.
+
+    A task might require more than one processor (the optional ``threads``
+    key) and a certain amount of memory (the optional ``memory`` key, in GB).
+    Tasks are launched only when the processors and memory they require are
+    available (see :py:class:`TaskResources`). The commands are launched and
+    reaped by a :py:class:`TaskSupervisor`, so that a new task is launched as
+    soon as one finishes. A failed task doesn't stop the others (the failures
+    are reported once all the tasks are finished).
+
+    The output of each task (standard output and error) is written in
+    ``logs/{task_id}.log`` in the output directory. The last lines of this
+    file are logged when a task fails. The progress of the tasks is
+    periodically written in ``status.json`` in the output directory (see
+    :py:class:`genipe.task.status.TaskProgress`).
 
     """
     # Do we need a DRMAA session?
@@ -52,25 +89,41 @@ def launch_tasks(to_process, nb_threads, check_rc=True, hpc=False,
         drmaa_session = drmaa.Session()
         drmaa_session.initialize()
 
-    # Do we need to check the return code?
-    to_run = []
     for i in range(len(to_process)):
         assert "name" in to_process[i]
         assert "task_id" in to_process[i]
         assert "task_db" in to_process[i]
         assert "o_files" in to_process[i]
 
+    # The tasks completed in a previous run (and those with valid output
+    # files)
+    completed = _get_completed_tasks(to_process)
+    valid = _check_completed_outputs(to_process, completed)
+
+    # The expected execution time of the tasks (to launch the longest tasks
+    # first, and to estimate the remaining time)
+    expected = {}
+    if nb_threads > 1 or out_dir is not None:
+        expected = get_expected_runtimes(to_process)
+
+    # The resources used by the tasks, and the progress of the tasks
+    resources = TaskResources(nb_threads, max_memory, hpc=hpc)
+    progress = _get_task_progress(to_process, out_dir, resources, expected)
+
+    # Do we need to check the return code?
+    to_run = []
+    for i in range(len(to_process)):
         task_name = to_process[i]["name"]
         task_id = to_process[i]["task_id"]
         db_name = to_process[i]["task_db"]
-        o_files = to_process[i]["o_files"]
 
         # Checking if we need to run this task
-        if db.check_task_completion(task_id, db_name):
-            if _check_output_files(o_files, task_id):
-                run_time = db.get_task_runtime(task_id, db_name)
+        if task_id in completed:
+            if task_id in valid:
+                run_time = completed[task_id]
                 logging.info("Task '{}': already performed in {:,d} "
                              "seconds".format(task_name, run_time))
+                progress.set_state(task_id, "done")
                 continue
 
             else:
@@ -78,68 +131,82 @@ def launch_tasks(to_process, nb_threads, check_rc=True, hpc=False,
                 # output files. Setting this task completion to '0'
                 db.mark_task_incomplete(task_id, db_name)
 
-        # The name of the task
-        task_id = to_process[i]["task_id"]
-
-        # Some options to add
-        to_process[i]["check_retcode"] = check_rc
-        to_process[i]["out_dir"] = out_dir
+        # The completion of the task was checked (it won't be checked again
+        # when launching the task)
+        to_process[i]["completion_checked"] = True
 
         # Setting the task options
-        if hpc:
-            assert hpc_options is not None
-            walltime = None
-            nodes = None
-            if task_id in hpc_options:
-                if "walltime" in hpc_options[task_id]:
-                    walltime = hpc_options[task_id]["walltime"]
-                if "nodes" in hpc_options[task_id]:
-                    nodes = hpc_options[task_id]["nodes"]
-            to_process[i]["walltime"] = walltime
-            to_process[i]["nodes"] = nodes
-            to_process[i]["preamble"] = preamble
-            to_process[i]["drmaa_session"] = drmaa_session
+        _set_task_options(to_process[i], check_rc=check_rc, out_dir=out_dir,
+                          hpc=hpc, hpc_options=hpc_options, preamble=preamble,
+                          drmaa_session=drmaa_session)
 
         # Adding to list to run
         to_run.append(to_process[i])
 
-    # The execution function and the execution type
+    # The execution function
     execute_func = _execute_command
-    GenipePool = Pool
     if hpc:
         execute_func = _execute_command_drmaa
-        GenipePool = ThreadPool
 
     # Launching the command
     if nb_threads > 1:
+        # The longest tasks are launched first
+        to_run.sort(key=lambda task: expected[task["task_id"]], reverse=True)
+
         # Running all the processes
-        pool = GenipePool(processes=nb_threads)
-        results = None
+        supervisor = TaskSupervisor(hpc=hpc)
+        problems = []
 
         try:
-            results = pool.map(execute_func, to_run)
+            while len(to_run) > 0 or supervisor.nb_running > 0:
+                # Launching the longest tasks fitting in the available
+                # resources
+                i = 0
+                while i < len(to_run):
+                    if not resources.fits(to_run[i]):
+                        i += 1
+                        continue
+
+                    task = to_run.pop(i)
+                    resources.acquire(task)
+                    supervisor.submit(task)
+                    progress.set_state(task["task_id"], "running")
+
+                # Waiting for a task to finish (updating the status while
+                # waiting)
+                finished = supervisor.wait(
+                    timeout=progress.status_file.interval,
+                )
+                if finished is None:
+                    progress.write()
+                    continue
+
+                task, result = finished
+                resources.release(task)
+
+                # Checking the result
+                if not result[0]:
+                    problems.append(result[1])
+                    logging.error("Task '{}': did not "
+                                  "finish...".format(result[1]))
+                    _log_output_tail(task)
+                    progress.set_state(task["task_id"], "failed")
+                else:
+                    logging.info("Task '{}': {} in {:,d} seconds".format(
+                        result[1], result[2], result[3],
+                    ))
+                    progress.set_state(task["task_id"], "done")
 
-        except Exception as e:
-            pool.terminate()
+        except BaseException:
+            supervisor.terminate()
             traceback.print_exc(file=sys.stdout)
             raise
 
         finally:
-            # Closing the pool
-            pool.close()
-
+            progress.write(force=True)
             if drmaa_session is not None:
                 drmaa_session.exit()
 
-        # Checking the results
-        problems = []
-        for result in results:
-            if not result[0]:
-                problems.append(result[1])
-                logging.error("Task '{}': did not finish...".format(result[1]))
-            else:
-                logging.info("Task '{}': {} in {:,d} "
-                             "seconds".format(result[1], result[2], result[3]))
         if len(problems) > 0:
             raise GenipeError("the following task did not work: " +
                               repr(problems))
@@ -148,23 +215,479 @@ def launch_tasks(to_process, nb_threads, check_rc=True, hpc=False,
         try:
             for data in to_run:
                 logging.info("Executing {}".format(data["name"]))
+                resources.acquire(data)
+                progress.set_state(data["task_id"], "running")
                 result = execute_func(data)
+                resources.release(data)
                 if result[0]:
                     logging.info("Task '{}': {} in {:,d} " "seconds".format(
                         result[1],
                         result[2],
                         result[3],
                     ))
+                    progress.set_state(data["task_id"], "done")
                 else:
+                    _log_output_tail(data)
+                    progress.set_state(data["task_id"], "failed")
                     raise GenipeError(
                         "problem executing {}".format(data["name"])
                     )
 
         finally:
+            progress.write(force=True)
             if drmaa_session is not None:
                 drmaa_session.exit()
 
 
+class TaskResources(object):
+    """The processors and memory used by the running tasks.
+
+    Args:
+        nb_threads (int): the total number of processors
+        max_memory (float): the total amount of memory (GB) (``None`` if the
+                            memory is not considered)
+        hpc (bool): whether or not the tasks are executed on a cluster (DRMAA)
+
+    A task requires the number of processors in its ``threads`` key (1 by
+    default), and the amount of memory in its ``memory`` key (0 by default).
+    On a cluster, the resources are managed by the scheduler of the cluster,
+    hence each task only counts as a single job.
+
+    A task fits in the available resources if its requirements don't exceed
+    what is left. When no task is running, any task fits (so that a task
+    requiring more than the total resources is still executed, by itself).
+
+    """
+    def __init__(self, nb_threads, max_memory=None, hpc=False):
+        self.nb_threads = nb_threads
+        self.max_memory = max_memory
+        self.hpc = hpc
+
+        # The resources in use
+        self.nb_running = 0
+        self.used_threads = 0
+        self.used_memory = 0
+
+    def get_requirements(self, task):
+        """Gets the resources required by a task.
+
+        Args:
+            task (dict): information about the task
+
+        Returns:
+            tuple: the number of processors and the amount of memory (GB)
+
+        """
+        if self.hpc:
+            return 1, 0
+
+        threads = min(task.get("threads", 1), self.nb_threads)
+        memory = 0
+        if self.max_memory is not None:
+            memory = min(task.get("memory", 0), self.max_memory)
+
+        return threads, memory
+
+    def fits(self, task):
+        """Checks if a task fits in the available resources.
+
+        Args:
+            task (dict): information about the task
+
+        Returns:
+            bool: ``True`` if the task can be launched, ``False`` otherwise
+
+        """
+        if self.nb_running == 0:
+            return True
+
+        threads, memory = self.get_requirements(task)
+        if self.used_threads + threads > self.nb_threads:
+            return False
+
+        if self.max_memory is not None:
+            if self.used_memory + memory > self.max_memory:
+                return False
+
+        return True
+
+    def acquire(self, task):
+        """Reserves the resources of a task (once it's launched).
+
+        Args:
+            task (dict): information about the task
+
+        """
+        threads, memory = self.get_requirements(task)
+        self.nb_running += 1
+        self.used_threads += threads
+        self.used_memory += memory
+
+    def release(self, task):
+        """Releases the resources of a task (once it's finished).
+
+        Args:
+            task (dict): information about the task
+
+        """
+        threads, memory = self.get_requirements(task)
+        self.nb_running -= 1
+        self.used_threads -= threads
+        self.used_memory -= memory
+
+
+class TaskSupervisor(object):
+    """Launches the tasks and reaps them as soon as they finish.
+
+    Args:
+        hpc (bool): whether or not the tasks are executed on a cluster (DRMAA)
+
+    Locally, the commands are launched directly (without any worker
+    process), and each one is waited for by a lightweight thread which
+    checks its outcome (see :py:func:`_finish_command`) as soon as it exits.
+    On a cluster, each thread submits and waits for its job (see
+    :py:func:`_execute_command_drmaa`).
+
+    The finished tasks (and their results) are retrieved (in the order they
+    finish) using :py:meth:`TaskSupervisor.wait`.
+
+    """
+    def __init__(self, hpc=False):
+        self.hpc = hpc
+
+        # The finished tasks
+        self._finished = Queue()
+
+        # The running processes (by task ID)
+        self._processes = {}
+        self._lock = Lock()
+
+        # The number of tasks submitted, but not yet retrieved
+        self.nb_running = 0
+
+    def submit(self, task):
+        """Launches a task.
+
+        Args:
+            task (dict): information about the task
+
+        """
+        self.nb_running += 1
+
+        if self.hpc:
+            self._start_thread(_execute_task, _execute_command_drmaa, task)
+            return
+
+        try:
+            proc = _start_command(task)
+        except Exception:
+            logging.error("Task '{}': {}".format(task["name"],
+                                                 traceback.format_exc()))
+            self._finished.put((task, (False, task["name"], "problem", None)))
+            return
+
+        if isinstance(proc, tuple):
+            # The task was already performed
+            self._finished.put((task, proc))
+            return
+
+        with self._lock:
+            self._processes[task["task_id"]] = proc
+        self._start_thread(self._wait_process, task, proc)
+
+    def wait(self, timeout=None):
+        """Waits for a task to finish.
+
+        Args:
+            timeout (float): the maximal number of seconds to wait (``None``
+                             to wait until a task finishes)
+
+        Returns:
+            tuple: the task and the results of the execution (see
+                   :py:func:`_execute_command`), or ``None`` if no task
+                   finished before the timeout
+
+        """
+        try:
+            task, result = self._finished.get(timeout=timeout)
+        except Empty:
+            return None
+
+        self.nb_running -= 1
+        return task, result
+
+    def terminate(self):
+        """Kills all the running processes."""
+        with self._lock:
+            for proc in self._processes.values():
+                if proc.poll() is None:
+                    proc.kill()
+
+    def _start_thread(self, target, *args):
+        """Starts a daemon thread."""
+        thread = Thread(target=target, args=args)
+        thread.daemon = True
+        thread.start()
+
+    def _wait_process(self, task, proc):
+        """Waits for a process to exit, and checks its outcome."""
+        rc, resources = _wait_command(proc)
+        with self._lock:
+            del self._processes[task["task_id"]]
+
+        try:
+            result = _finish_command(task, rc, resources)
+        except Exception:
+            logging.error("Task '{}': {}".format(task["name"],
+                                                 traceback.format_exc()))
+            result = False, task["name"], "problem", None
+
+        self._finished.put((task, result))
+
+
+def get_expected_runtimes(tasks):
+    """Estimates the execution time of tasks.
+
+    Args:
+        tasks (list): a list of tasks
+
+    Returns:
+        dict: the expected execution time (in seconds) of each task (by task
+              ID)
+
+    If a task was completed in a previous run, its execution time (from the
+    task DB) is used. Otherwise, the execution time is estimated from the size
+    of the task (the optional ``size`` key, *e.g.* the number of markers,
+    which is 1 by default) and the execution time per unit of size of the
+    completed tasks of the same kind (*e.g.* the other IMPUTE2 segments). The
+    kind of a task is its ID without the chromosome (*e.g.* ``impute2`` for
+    ``impute2_chr1_1_5000000``).
+
+    """
+    # The execution time of the completed tasks
+    runtimes = {}
+    for db_name in {task["task_db"] for task in tasks}:
+        runtimes.update(db.get_completed_runtimes(db_name))
+
+    # The execution time and size of the completed tasks of each kind
+    kind_time = defaultdict(float)
+    kind_size = defaultdict(float)
+    for task in tasks:
+        if task["task_id"] in runtimes:
+            kind = _get_task_kind(task["task_id"])
+            kind_time[kind] += runtimes[task["task_id"]]
+            kind_size[kind] += task.get("size", 1)
+
+    # The default execution time per unit of size (for unknown kinds)
+    default_rate = 1
+    if sum(kind_size.values()) > 0 and sum(kind_time.values()) > 0:
+        default_rate = sum(kind_time.values()) / sum(kind_size.values())
+
+    expected = {}
+    for task in tasks:
+        task_id = task["task_id"]
+        if task_id in runtimes:
+            expected[task_id] = runtimes[task_id]
+            continue
+
+        kind = _get_task_kind(task_id)
+        rate = default_rate
+        if kind_size[kind] > 0:
+            rate = kind_time[kind] / kind_size[kind]
+        expected[task_id] = rate * task.get("size", 1)
+
+    return expected
+
+
+def _get_task_kind(task_id):
+    """Gets the kind of a task (its ID without the chromosome).
+
+    Args:
+        task_id (str): the ID of the task
+
+    Returns:
+        str: the kind of the task
+
+    """
+    return re.sub(r"_chr.+$", "", task_id)
+
+
+def _get_task_progress(tasks, out_dir, resources, expected=None):
+    """Creates the object keeping track of the progress of the tasks.
+
+    Args:
+        tasks (list): a list of tasks
+        out_dir (str): the output directory
+        resources (TaskResources): the resources used by the running tasks
+        expected (dict): the expected execution time of the tasks (computed
+                         using :py:func:`get_expected_runtimes` if ``None``)
+
+    Returns:
+        genipe.task.status.TaskProgress: the progress of the tasks
+
+    The status is written in ``status.json`` in the output directory (if
+    any). The stage of a task is its kind (see :py:func:`_get_task_kind`).
+
+    """
+    filename = None
+    if out_dir is not None:
+        filename = os.path.join(out_dir, "status.json")
+
+    if expected is None:
+        expected = {}
+        if filename is not None:
+            expected = get_expected_runtimes(tasks)
+
+    return TaskProgress(
+        status_file=StatusFile(filename),
+        stages=OrderedDict(
+            (task["task_id"], _get_task_kind(task["task_id"]))
+            for task in tasks
+        ),
+        expected=expected,
+        resources=resources,
+    )
+
+
+def _get_completed_tasks(tasks):
+    """Gets the tasks that were completed in a previous run.
+
+    Args:
+        tasks (list): a list of tasks
+
+    Returns:
+        dict: the execution time (in seconds) of the completed tasks (by task
+              ID)
+
+    The task DB is queried once for all the tasks (instead of once per task).
+    The output files of the tasks are not checked.
+
+    """
+    # The tasks of each DB
+    db_tasks = defaultdict(list)
+    for task in tasks:
+        db_tasks[task["task_db"]].append(task["task_id"])
+
+    completed = {}
+    for db_name, task_ids in db_tasks.items():
+        completed_ids = db.get_completed_tasks(task_ids, db_name)
+        runtimes = db.get_tasks_runtime(completed_ids, db_name)
+        for task_id in completed_ids:
+            completed[task_id] = runtimes.get(task_id, 0)
+
+    return completed
+
+
+def _execute_task(execute_func, task):
+    """Executes a task (in a thread).
+
+    Args:
+        execute_func (function): the function used to execute the task
+        task (dict): information about the task
+
+    Returns:
+        tuple: the task and the results of the execution function
+
+    """
+    try:
+        return task, execute_func(task)
+
+    except Exception:
+        logging.error("Task '{}': {}".format(task["name"],
+                                             traceback.format_exc()))
+        return task, (False, task["name"], "problem", None)
+
+
+def get_output_tail(log_file, nb_lines=10, max_size=8192):
+    """Gets the last lines of the output of a task.
+
+    Args:
+        log_file (str): the name of the log file of the task
+        nb_lines (int): the maximal number of lines
+        max_size (int): the maximal number of bytes to read
+
+    Returns:
+        list: the last lines of the file (an empty list if the file doesn't
+              exist)
+
+    Only the end of the file is read, so that the output of long tasks is not
+    loaded in memory.
+
+    """
+    if (log_file is None) or (not isfile(log_file)):
+        return []
+
+    with open(log_file, "rb") as i_file:
+        i_file.seek(0, os.SEEK_END)
+        size = i_file.tell()
+        i_file.seek(max(0, size - max_size))
+        data = i_file.read().decode(errors="replace")
+
+    lines = data.splitlines()
+    if size > max_size and len(lines) > 0:
+        # The first line is probably incomplete
+        lines = lines[1:]
+
+    return lines[-nb_lines:]
+
+
+def _log_output_tail(task):
+    """Logs the last lines of the output of a failed task.
+
+    Args:
+        task (dict): information about the task
+
+    """
+    lines = get_output_tail(task.get("log_file"))
+    if len(lines) == 0:
+        return
+
+    logging.error("Task '{}': last lines of {}\n{}".format(
+        task["name"], task["log_file"], "\n".join(lines),
+    ))
+
+
+def _set_task_options(task, check_rc, out_dir, hpc=False, hpc_options=None,
+                      preamble="", drmaa_session=None):
+    """Sets the execution options of a task.
+
+    Args:
+        task (dict): the task (updated)
+        check_rc (bool): whether or not to check the return code of the task
+        out_dir (str): the output directory
+        hpc (bool): whether or not to execute the task on a cluster (DRMAA)
+        hpc_options (dict): the DRMAA options
+        preamble (str): the script preamble (for DRMAA)
+        drmaa_session (drmaa.Session): the DRMAA session
+
+    """
+    # Some options to add
+    task["check_retcode"] = check_rc
+    task["out_dir"] = out_dir
+
+    # The output of the task
+    task["log_file"] = None
+    if out_dir is not None:
+        log_dir = os.path.join(out_dir, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        task["log_file"] = os.path.join(log_dir, task["task_id"] + ".log")
+
+    # Setting the DRMAA options
+    if hpc:
+        assert hpc_options is not None
+        walltime = None
+        nodes = None
+        if task["task_id"] in hpc_options:
+            if "walltime" in hpc_options[task["task_id"]]:
+                walltime = hpc_options[task["task_id"]]["walltime"]
+            if "nodes" in hpc_options[task["task_id"]]:
+                nodes = hpc_options[task["task_id"]]["nodes"]
+        task["walltime"] = walltime
+        task["nodes"] = nodes
+        task["preamble"] = preamble
+        task["drmaa_session"] = drmaa_session
+
+
 def _check_output_files(o_files, task):
     """Check that the files exist.
 
@@ -185,24 +708,154 @@ def _check_output_files(o_files, task):
 
     """
     for filename in o_files:
-        if filename.endswith(".impute2"):
-            # IMPUTE2 files might be gzipped
-            if not (isfile(filename) or isfile(filename + ".gz")):
-                if not _check_impute2_file(filename, task):
-                    return False
-
-        elif filename.endswith(".snp.strand"):
-            # SHAPEIT alignment file might not exits
-            if not isfile(filename):
-                if not _check_shapeit_align_file(filename, task):
-                    return False
-
-        elif not isfile(filename):
+        if not _check_output_file(filename, task):
             return False
 
     return True
 
 
+def _check_output_file(filename, task):
+    """Check that a single file exists.
+
+    Args:
+        filename (str): the name of the file to check
+        task (str): the name of the task
+
+    Returns:
+        bool: ``True`` if the file exists, ``False`` otherwise
+
+    See :py:func:`_check_output_files` for more information.
+
+    """
+    if filename.endswith(".impute2"):
+        # IMPUTE2 files might be gzipped
+        if not (isfile(filename) or isfile(filename + ".gz")):
+            return _check_impute2_file(filename, task)
+
+    elif filename.endswith(".snp.strand"):
+        # SHAPEIT alignment file might not exits
+        if not isfile(filename):
+            return _check_shapeit_align_file(filename, task)
+
+    elif not isfile(filename):
+        return False
+
+    return True
+
+
+def _stat_output_file(filename):
+    """Gets the size and modification time of an output file.
+
+    Args:
+        filename (str): the name of the output file
+
+    Returns:
+        tuple: the name of the file which was found, along with its size and
+               modification time (``None`` if no file was found)
+
+    If an IMPUTE2 file (or a SHAPEIT alignment file) doesn't exist, its
+    validation relies on another file (*i.e.* the compressed IMPUTE2 file, the
+    IMPUTE2 summary file or the SHAPEIT log file, see
+    :py:func:`_check_output_files`). The information about this other file is
+    returned instead.
+
+    """
+    candidates = [filename]
+    if filename.endswith(".impute2"):
+        candidates.extend([filename + ".gz", filename + "_summary"])
+    elif filename.endswith(".snp.strand"):
+        candidates.append(filename.replace(".snp.strand", "") + ".log")
+
+    for candidate in candidates:
+        try:
+            info = os.stat(candidate)
+        except OSError:
+            continue
+
+        if stat.S_ISREG(info.st_mode):
+            return candidate, info.st_size, info.st_mtime
+
+    return None
+
+
+def _check_completed_outputs(tasks, completed):
+    """Checks the output files of all the completed tasks.
+
+    Args:
+        tasks (list): a list of tasks
+        completed (dict): the tasks completed in a previous run (see
+                          :py:func:`_get_completed_tasks`)
+
+    Returns:
+        set: the IDs of the completed tasks for which all the output files are
+             valid
+
+    The output files are checked concurrently (using a pool of threads),
+    since they might be on a network file system. The size and modification
+    time of the valid files are saved in the task DB (see
+    :py:func:`genipe.db.utils.set_validated_outputs`), so that the files which
+    didn't change since a previous run are not validated again (*e.g.* by
+    reading the IMPUTE2 summary of a missing IMPUTE2 file).
+
+    """
+    # The output files of the completed tasks (for each task DB)
+    db_tasks = defaultdict(list)
+    for task in tasks:
+        if task["task_id"] in completed:
+            db_tasks[task["task_db"]].append(task)
+
+    valid_tasks = set()
+    with ThreadPoolExecutor(max_workers=_NB_CHECK_THREADS) as executor:
+        for db_name, db_task_list in db_tasks.items():
+            filenames = sorted({
+                filename for task in db_task_list
+                for filename in task["o_files"]
+            })
+
+            # Getting the size and modification time of all the files
+            file_info = dict(zip(
+                filenames,
+                executor.map(_stat_output_file, filenames),
+            ))
+
+            # The files which didn't change since their last validation
+            previous = db.get_validated_outputs(filenames, db_name)
+            valid_files = {
+                filename for filename, info in file_info.items()
+                if info is not None and previous.get(filename) == info
+            }
+
+            # Validating the other files (if they exist)
+            to_validate = {}
+            for task in db_task_list:
+                for filename in task["o_files"]:
+                    if filename in valid_files or filename in to_validate:
+                        continue
+                    if file_info[filename] is not None:
+                        to_validate[filename] = task["task_id"]
+
+            results = executor.map(
+                lambda item: _check_output_file(*item),
+                to_validate.items(),
+            )
+            newly_valid = {
+                filename: file_info[filename]
+                for filename, result in zip(to_validate.keys(), results)
+                if result
+            }
+            if len(newly_valid) > 0:
+                db.set_validated_outputs(newly_valid, db_name)
+            valid_files.update(newly_valid.keys())
+
+            # The tasks for which all the output files are valid
+            for task in db_task_list:
+                if all(filename in valid_files
+                       for filename in task["o_files"]):
+                    valid_tasks.add(task["task_id"])
+
+    return valid_tasks
+
+
 def _check_shapeit_failed_rc(fn, task=None):
     """Checks the log to explain a failure return code.
 
@@ -375,16 +1028,46 @@ def _execute_command(command_info):
     assert "task_db" in command_info
     assert "o_files" in command_info
 
+    # Launching the command
+    proc = _start_command(command_info)
+    if isinstance(proc, tuple):
+        # The task was already performed
+        return proc
+
+    # Waiting for the process to terminate
+    rc, resources = _wait_command(proc)
+
+    return _finish_command(command_info, rc, resources)
+
+
+def _start_command(command_info):
+    """Launches a command (without waiting for it).
+
+    Args:
+        command_info (dict): information about the command
+
+    Returns:
+        subprocess.Popen: the process executing the command (or the results,
+                          as returned by :py:func:`_execute_command`, if the
+                          task was already performed)
+
+    The task DB and the output files are not checked again if the completion
+    of the task was already checked by the caller (*i.e.* if the task's
+    ``completion_checked`` is ``True``, see :py:func:`launch_tasks`).
+
+    """
     # Getting the command's information
     name = command_info["name"]
     command = command_info["command"]
-    check_rc = command_info["check_retcode"]
     task_id = command_info["task_id"]
     db_name = command_info["task_db"]
 
     logging.debug("Checking status for '{}'".format(task_id))
-    # Checking if the command was completed
-    if db.check_task_completion(task_id, db_name):
+    # Checking if the command was completed (unless it was already checked
+    # by the caller)
+    if command_info.get("completion_checked", False):
+        logging.debug("'{}' completion already checked".format(task_id))
+    elif db.check_task_completion(task_id, db_name):
         if _check_output_files(command_info["o_files"], task_id):
             logging.debug("'{}' completed".format(task_id))
             runtime = db.get_task_runtime(task_id, db_name)
@@ -397,13 +1080,84 @@ def _execute_command(command_info):
     # Creating a new entry in the database
     db.create_task_entry(task_id, db_name)
 
-    # Launching the command
-    proc = Popen(command, stdout=PIPE, stderr=PIPE)
+    # Launching the command (its output is written directly in the log file,
+    # if any)
+    log_file = command_info.get("log_file")
+    if log_file is None:
+        return Popen(command, stdout=DEVNULL, stderr=DEVNULL)
+
+    with open(log_file, "wb") as o_file:
+        return Popen(command, stdout=o_file, stderr=STDOUT)
+
+
+def _wait_command(proc):
+    """Waits for a process to exit, and gets the resources it used.
+
+    Args:
+        proc (subprocess.Popen): the process executing the command
+
+    Returns:
+        tuple: the return code of the command and the resources it used (see
+               :py:func:`genipe.db.utils.set_task_resources`)
+
+    The resources are retrieved using ``os.wait4``. If it isn't available (or
+    if the process was already reaped), only the exit status is known.
+
+    """
+    try:
+        pid, status, usage = os.wait4(proc.pid, 0)
+
+    except (AttributeError, ChildProcessError):
+        rc = proc.wait()
+        return rc, {"exit_status": rc}
+
+    # The return code (just like subprocess.Popen)
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+
+    # The peak resident set size is in bytes on Mac OS X (and in kilobytes
+    # on Linux), and the blocks are 512 bytes
+    max_rss = usage.ru_maxrss
+    if sys.platform == "darwin":
+        max_rss //= 1024
+
+    return proc.returncode, {
+        "exit_status": proc.returncode,
+        "max_rss": max_rss,
+        "user_time": usage.ru_utime,
+        "system_time": usage.ru_stime,
+        "read_bytes": usage.ru_inblock * 512,
+        "write_bytes": usage.ru_oublock * 512,
+    }
+
+
+def _finish_command(command_info, rc, resources=None):
+    """Checks the outcome of a command (once it's finished).
+
+    Args:
+        command_info (dict): information about the command
+        rc (int): the return code of the command
+        resources (dict): the resources used by the command (see
+                          :py:func:`_wait_command`)
+
+    Returns:
+        tuple: the results, as returned by :py:func:`_execute_command`
+
+    """
+    # Getting the command's information
+    name = command_info["name"]
+    check_rc = command_info["check_retcode"]
+    task_id = command_info["task_id"]
+    db_name = command_info["task_db"]
     logging.debug("'{}' finished".format(task_id))
 
-    # Waiting for the process to terminate
-    outs, errs = proc.communicate()
-    rc = proc.returncode
+    # Saving the resources used by the task (even if it failed)
+    if resources is None:
+        resources = {"exit_status": rc}
+    db.set_task_resources(task_id, resources, db_name)
+
     if check_rc and rc != 0:
         if task_id.startswith("impute2"):
             # Task is IMPUTE2, and it might be normal according to message in
@@ -488,9 +1242,12 @@ def _execute_command_drmaa(command_info):
     preamble = command_info["preamble"]
     drmaa_session = command_info["drmaa_session"]
 
-    # Checking if the command was completed
+    # Checking if the command was completed (unless it was already checked
+    # by the caller)
     logging.debug("Checking status for '{}'".format(task_id))
-    if db.check_task_completion(task_id, db_name):
+    if command_info.get("completion_checked", False):
+        logging.debug("'{}' completion already checked".format(task_id))
+    elif db.check_task_completion(task_id, db_name):
         if _check_output_files(command_info["o_files"], task_id):
             logging.debug("'{}' completed".format(task_id))
             runtime = db.get_task_runtime(task_id, db_name)
@@ -533,6 +1290,9 @@ def _execute_command_drmaa(command_info):
         job.hardWallclockTimeLimit = command_info["walltime"]
     if command_info["nodes"] is not None:
         job.nativeSpecification = command_info["nodes"]
+    if command_info.get("log_file") is not None:
+        job.outputPath = ":" + command_info["log_file"]
+        job.joinFiles = True
 
     # Creating a new entry in the database
     db.create_task_entry(task_id, db_name)
@@ -559,6 +1319,9 @@ def _execute_command_drmaa(command_info):
     # Removing the temporary file
     os.remove(tmp_file.name)
 
+    # Saving the resources used by the task (even if it failed)
+    db.set_task_resources(task_id, _get_drmaa_resources(ret_val), db_name)
+
     # Checking the task's return values
     if ret_val.hasCoreDump or ret_val.wasAborted or ret_val.hasSignal:
         logging.debug("'{}' problems ({}, {}, {})".format(
@@ -614,3 +1377,43 @@ def _execute_command_drmaa(command_info):
     # Everything when well
     logging.debug("'{}' everything was fine".format(task_id))
     return True, name, "performed", db.get_task_runtime(task_id, db_name)
+
+
+def _get_drmaa_resources(ret_val):
+    """Gets the resources used by a DRMAA job.
+
+    Args:
+        ret_val (drmaa.JobInfo): the information about the finished job
+
+    Returns:
+        dict: the resources used by the job (see
+              :py:func:`genipe.db.utils.set_task_resources`)
+
+    The resource usage reported by DRMAA depends on the cluster (*e.g.* Sun
+    Grid Engine reports ``ru_maxrss``, ``ru_utime`` and ``ru_stime``, like
+    ``getrusage``). The resources which are not reported are unknown.
+
+    """
+    resources = {}
+    if ret_val.hasExited:
+        resources["exit_status"] = ret_val.exitStatus
+
+    usage = ret_val.resourceUsage
+    for name, key, convert in (("max_rss", "ru_maxrss", int),
+                               ("user_time", "ru_utime", float),
+                               ("system_time", "ru_stime", float),
+                               ("read_bytes", "ru_inblock", int),
+                               ("write_bytes", "ru_oublock", int)):
+        if key not in usage:
+            continue
+        try:
+            resources[name] = convert(float(usage[key]))
+        except ValueError:
+            continue
+
+    # The blocks are 512 bytes
+    for name in ("read_bytes", "write_bytes"):
+        if name in resources:
+            resources[name] *= 512
+
+    return resources
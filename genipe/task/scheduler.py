@@ -0,0 +1,440 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import heapq
+import logging
+from collections import defaultdict
+
+from ..db import utils as db
+from ..error import GenipeError
+from .launcher import TaskResources, TaskSupervisor, get_expected_runtimes, \
+                      _set_task_options, _check_output_files, \
+                      _log_output_tail, _get_completed_tasks, \
+                      _check_completed_outputs, _get_task_progress
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["launch_task_graph", ]
+
+
+def launch_task_graph(tasks, nb_threads, check_rc=True, hpc=False,
+                      hpc_options=None, out_dir=None, preamble="",
+                      max_memory=None):
+    """Executes tasks according to their dependencies.
+
+    Args:
+        tasks (list): a list of tasks to process
+        nb_threads (int): the number of processors available for the tasks
+        check_rc (bool): whether or not to check the return code of the task
+        hpc (bool): whether or not to execute the tasks on a cluster (DRMAA)
+        hpc_options (dict): the DRMAA options
+        out_dir (str): the output directory
+        preamble (str): the script preamble (for DRMAA)
+        max_memory (float): the total amount of memory (GB) available for
+                            the tasks (``None`` if the memory is not
+                            considered)
+
+    Returns:
+        dict: the status of each task (``performed``, ``already performed``,
+              ``not required`` or ``skipped``)
+
+    Each task is described by a dictionary, just like the ones required by
+    :py:func:`genipe.task.launcher.launch_tasks`. The following optional keys
+    are also available:
+
+    - ``dependencies``: the list of task IDs that need to be completed before
+      this task is launched.
+    - ``prepare``: a function called with the task as argument, once all of
+      its dependencies are completed (and just before it is launched). This
+      function might update the task (*e.g.* its command or output files),
+      and it returns ``False`` if the task should be skipped, or
+      ``"not required"`` if the task doesn't need to be executed (in which
+      case the tasks depending on it are still executed).
+    - ``prepare_keeps_outputs``: ``True`` if the ``prepare`` function doesn't
+      change the output files of the task (which are then already known).
+      Such a task is checked for completion before being prepared, so that
+      the function isn't called for a task completed in a previous run.
+
+    A task is launched as soon as all of its dependencies are completed, so
+    that independent chains of tasks (*e.g.* one per chromosome) progress
+    without waiting for each other. Tasks are launched only when the
+    processors and memory they require are available (see
+    :py:class:`genipe.task.launcher.TaskResources`). When more tasks are
+    ready than what the resources allow, the tasks on the longest path to the
+    end of the graph (according to their expected execution time, see
+    :py:func:`genipe.task.launcher.get_expected_runtimes`) are launched
+    first (smaller tasks fill the remaining resources). The tasks depending
+    on a skipped task are also skipped. The tasks completed in a previous run
+    (and their output files) are checked all at once when the graph is
+    launched (see :py:func:`genipe.task.launcher.launch_tasks`), and their
+    progress is periodically written in ``status.json`` in the output
+    directory. When a task fails, the tasks which don't depend on it are
+    still executed (so that they are saved as completed in the task DB), and
+    a :py:class:`genipe.error.GenipeError` is raised at the end.
+
+    """
+    # The tasks (by ID) in their original order
+    graph = _build_graph(tasks)
+
+    # The number of dependencies to complete for each task, and the tasks
+    # depending on each task
+    to_complete = {}
+    dependents = defaultdict(list)
+    for task_id, task in graph.items():
+        to_complete[task_id] = len(task.get("dependencies", []))
+        for dependency in task.get("dependencies", []):
+            dependents[dependency].append(task_id)
+
+    # The priority of the tasks (and their original order, to break ties)
+    expected = get_expected_runtimes(
+        [task for task in graph.values() if "task_db" in task],
+    )
+    priorities = _get_priorities(graph, dependents, expected)
+    order = {task_id: i for i, task_id in enumerate(graph.keys())}
+
+    def _push_ready(task_id):
+        """Adds a task to the heap of ready tasks."""
+        heapq.heappush(ready, (-priorities[task_id], order[task_id], task_id))
+
+    # The tasks that are ready to be launched (the highest priority first)
+    ready = []
+    for task_id, nb in to_complete.items():
+        if nb == 0:
+            _push_ready(task_id)
+
+    # Do we need a DRMAA session?
+    drmaa_session = None
+    if hpc:
+        import drmaa
+        drmaa_session = drmaa.Session()
+        drmaa_session.initialize()
+
+    # The tasks completed in a previous run (the task DB is queried once for
+    # all the tasks that already know their DB)
+    prefetched = {
+        task_id for task_id, task in graph.items() if "task_db" in task
+    }
+    completed = _get_completed_tasks(
+        [task for task in graph.values() if "task_db" in task],
+    )
+
+    # The output files of the completed tasks are checked all at once (except
+    # for the tasks whose output files might be changed by their preparation).
+    # The tasks with valid output files are marked as done as soon as they
+    # are ready, without waiting for the resources (they are not launched).
+    bulk_checked = {
+        task_id for task_id, task in graph.items()
+        if task_id in completed and not _is_prepared_first(task)
+    }
+    valid = _check_completed_outputs(
+        [graph[task_id] for task_id in bulk_checked], completed,
+    )
+
+    # The status of every task
+    status = {}
+    problems = []
+
+    # The tasks are launched and reaped by the supervisor
+    supervisor = TaskSupervisor(hpc=hpc)
+    resources = TaskResources(nb_threads, max_memory, hpc=hpc)
+    progress = _get_task_progress(list(graph.values()), out_dir, resources,
+                                  expected)
+
+    def _task_done(task_id, task_status):
+        """Sets the status of a task and releases its dependents."""
+        status[task_id] = task_status
+        progress.set_state(
+            task_id, "skipped" if task_status == "skipped" else "done",
+        )
+        for dependent in dependents[task_id]:
+            to_complete[dependent] -= 1
+            if to_complete[dependent] == 0:
+                _push_ready(dependent)
+
+    def _already_performed(task_id):
+        """Checks if a task was completed (with all its output files)."""
+        task = graph[task_id]
+        if task_id not in prefetched and \
+                db.check_task_completion(task_id, task["task_db"]):
+            completed[task_id] = db.get_task_runtime(task_id,
+                                                     task["task_db"])
+
+        if task_id not in completed:
+            return False
+
+        if task_id in bulk_checked:
+            outputs_ok = task_id in valid
+        else:
+            outputs_ok = _check_output_files(task["o_files"], task_id)
+
+        if not outputs_ok:
+            # The DB said the task was completed, but there is a missing
+            # output files.
+            db.mark_task_incomplete(task_id, task["task_db"])
+            completed.pop(task_id)
+            return False
+
+        logging.info("Task '{}': already performed in {:,d} "
+                     "seconds".format(task["name"], completed[task_id]))
+        _task_done(task_id, "already performed")
+        return True
+
+    try:
+        while len(ready) > 0 or supervisor.nb_running > 0:
+            # Launching as many tasks as possible
+            while len(ready) > 0:
+                task_id = _pop_fitting_task(ready, graph, resources, valid)
+                if task_id is None:
+                    break
+                task = graph[task_id]
+
+                # Is one of the dependencies skipped?
+                if any(status[dependency] == "skipped"
+                       for dependency in task.get("dependencies", [])):
+                    logging.info("Task '{}': skipped".format(task["name"]))
+                    _task_done(task_id, "skipped")
+                    continue
+
+                # Checking if we need to run this task (once it's prepared,
+                # if its output files might change)
+                prepared_first = _is_prepared_first(task)
+                if not prepared_first and _already_performed(task_id):
+                    continue
+
+                # Preparing the task (if required)
+                if "prepare" in task:
+                    prepared = task["prepare"](task)
+                    if prepared is False:
+                        logging.info("Task '{}': skipped".format(task["name"]))
+                        _task_done(task_id, "skipped")
+                        continue
+
+                    if prepared == "not required":
+                        logging.info("Task '{}': not required".format(
+                            task["name"],
+                        ))
+                        _task_done(task_id, "not required")
+                        continue
+
+                for key in ("name", "command", "task_db", "o_files"):
+                    assert key in task
+
+                if prepared_first and _already_performed(task_id):
+                    continue
+
+                # The completion of the task was checked (it won't be checked
+                # again when launching the task)
+                task["completion_checked"] = True
+
+                # Setting the task options
+                _set_task_options(task, check_rc=check_rc, out_dir=out_dir,
+                                  hpc=hpc, hpc_options=hpc_options,
+                                  preamble=preamble,
+                                  drmaa_session=drmaa_session)
+
+                logging.debug("Launching '{}'".format(task_id))
+                resources.acquire(task)
+                supervisor.submit(task)
+                progress.set_state(task_id, "running")
+
+            if supervisor.nb_running == 0:
+                # Some tasks were released, but none were launched
+                continue
+
+            # Waiting for a task to finish (updating the status while
+            # waiting)
+            finished = supervisor.wait(timeout=progress.status_file.interval)
+            if finished is None:
+                progress.write()
+                continue
+
+            task, result = finished
+            task_id = task["task_id"]
+            resources.release(task)
+
+            if result[0]:
+                logging.info("Task '{}': {} in {:,d} seconds".format(
+                    result[1], result[2], result[3],
+                ))
+                _task_done(task_id, result[2])
+
+            else:
+                logging.error("Task '{}': did not finish...".format(
+                    result[1],
+                ))
+                _log_output_tail(task)
+                problems.append(result[1])
+                progress.set_state(task_id, "failed")
+
+    except BaseException:
+        supervisor.terminate()
+        raise
+
+    finally:
+        progress.write(force=True)
+        if drmaa_session is not None:
+            drmaa_session.exit()
+
+    if len(problems) > 0:
+        nb_not_launched = len(graph) - len(status) - len(problems)
+        if nb_not_launched > 0:
+            logging.error("{:,d} task{} not launched because of the "
+                          "failures".format(nb_not_launched,
+                                            "s were" if nb_not_launched > 1
+                                            else " was"))
+        raise GenipeError("the following task did not work: " +
+                          repr(problems))
+
+    return status
+
+
+def _is_prepared_first(task):
+    """Checks if a task needs to be prepared before checking its completion.
+
+    Args:
+        task (dict): the task
+
+    Returns:
+        bool: ``True`` if the task's preparation might change its output files
+
+    """
+    return "prepare" in task and not task.get("prepare_keeps_outputs", False)
+
+
+def _build_graph(tasks):
+    """Checks the tasks and their dependencies.
+
+    Args:
+        tasks (list): the list of tasks
+
+    Returns:
+        dict: the tasks (by ID, in the same order as in the list)
+
+    Duplicated task IDs, dependencies to unknown tasks and dependency cycles
+    raise a :py:class:`genipe.error.GenipeError`.
+
+    """
+    graph = {}
+    for task in tasks:
+        assert "task_id" in task
+        if task["task_id"] in graph:
+            raise GenipeError("{}: duplicated task".format(task["task_id"]))
+        graph[task["task_id"]] = task
+
+    # Checking the dependencies
+    for task_id, task in graph.items():
+        for dependency in task.get("dependencies", []):
+            if dependency not in graph:
+                raise GenipeError("{}: unknown dependency '{}'".format(
+                    task_id, dependency,
+                ))
+
+    # Checking for cycles (by removing the tasks without dependencies until
+    # there is no task left)
+    remaining = {
+        task_id: set(task.get("dependencies", []))
+        for task_id, task in graph.items()
+    }
+    while len(remaining) > 0:
+        no_dependency = {
+            task_id for task_id, dependencies in remaining.items()
+            if len(dependencies) == 0
+        }
+        if len(no_dependency) == 0:
+            raise GenipeError("dependency cycle between tasks: {}".format(
+                ", ".join(sorted(remaining.keys())),
+            ))
+
+        remaining = {
+            task_id: dependencies - no_dependency
+            for task_id, dependencies in remaining.items()
+            if task_id not in no_dependency
+        }
+
+    return graph
+
+
+def _get_priorities(graph, dependents, expected=None):
+    """Computes the priority of each task of the graph.
+
+    Args:
+        graph (dict): the tasks (by ID, see :py:func:`_build_graph`)
+        dependents (dict): the tasks depending on each task
+        expected (dict): the expected execution time of the tasks (computed
+                         using
+                         :py:func:`genipe.task.launcher.get_expected_runtimes`
+                         if ``None``)
+
+    Returns:
+        dict: the priority of each task
+
+    The priority of a task is the expected execution time of the longest path
+    from this task to the end of the graph (*i.e.* the task's own expected
+    execution time and the highest priority of its dependents).
+
+    """
+    if expected is None:
+        expected = get_expected_runtimes(
+            [task for task in graph.values() if "task_db" in task],
+        )
+
+    priorities = {}
+    remaining = set(graph.keys())
+    while len(remaining) > 0:
+        # The tasks for which all the dependents have a priority
+        computable = [
+            task_id for task_id in remaining
+            if all(dependent in priorities
+                   for dependent in dependents[task_id])
+        ]
+        for task_id in computable:
+            priorities[task_id] = expected.get(task_id, 0) + max(
+                (priorities[dependent] for dependent in dependents[task_id]),
+                default=0,
+            )
+        remaining.difference_update(computable)
+
+    return priorities
+
+
+def _pop_fitting_task(ready, graph, resources, no_resources=frozenset()):
+    """Gets the ready task with the highest priority fitting the resources.
+
+    Args:
+        ready (list): the heap of ready tasks
+        graph (dict): the tasks (by ID)
+        resources (TaskResources): the resources used by the running tasks
+        no_resources (set): the tasks which won't use any resources (*e.g.*
+                            the tasks completed in a previous run)
+
+    Returns:
+        str: the ID of the task (``None`` if no task fits)
+
+    The task is removed from the heap (the other tasks stay in the heap). The
+    tasks which won't use any resources always fit (so that they don't wait
+    for the running tasks to finish).
+
+    """
+    task_id = None
+    not_fitting = []
+    while len(ready) > 0:
+        item = heapq.heappop(ready)
+        if item[-1] in no_resources or resources.fits(graph[item[-1]]):
+            task_id = item[-1]
+            break
+        not_fitting.append(item)
+
+    for item in not_fitting:
+        heapq.heappush(ready, item)
+
+    return task_id
@@ -0,0 +1,197 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from collections import OrderedDict
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["StatusFile", "TaskProgress"]
+
+
+class StatusFile(object):
+    """Periodically writes the status of a run in a JSON file.
+
+    Args:
+        filename (str): the name of the status file (``None`` if the status
+                        shouldn't be written)
+        interval (float): the minimal number of seconds between two writes
+
+    The status is a dictionary updated using :py:meth:`StatusFile.update`.
+    The time of the last update (``updated``) and the number of seconds since
+    the beginning of the run (``elapsed``) are automatically added. The file
+    is replaced atomically, so that it can be read at any time by a
+    monitoring tool.
+
+    """
+    def __init__(self, filename, interval=5):
+        self.filename = filename
+        self.interval = interval
+        self.status = OrderedDict()
+
+        self._start = time.time()
+        self._last_write = None
+
+    def update(self, force=False, **values):
+        """Updates the status (writing the file if required).
+
+        Args:
+            force (bool): whether or not to write the file, even if the last
+                          write was less than ``interval`` seconds ago
+
+        The other keyword arguments are the values to update.
+
+        """
+        self.status.update(values)
+        if self.filename is None or not (force or self.is_due()):
+            return
+
+        self.status["updated"] = datetime.now().isoformat(sep=" ")
+        self.status["elapsed"] = round(self.get_elapsed(), 1)
+
+        tmp_filename = self.filename + ".tmp"
+        try:
+            with open(tmp_filename, "w") as o_file:
+                json.dump(self.status, o_file, indent=2)
+            os.replace(tmp_filename, self.filename)
+
+        except OSError as e:
+            # The status is only informative
+            logging.warning("{}: cannot write status ({})".format(
+                self.filename, e,
+            ))
+
+        self._last_write = time.time()
+
+    def get_elapsed(self):
+        """Gets the number of seconds since the beginning of the run.
+
+        Returns:
+            float: the number of seconds since the creation of the status file
+
+        """
+        return time.time() - self._start
+
+    def is_due(self):
+        """Checks if the file needs to be written.
+
+        Returns:
+            bool: ``True`` if the file was written more than ``interval``
+                  seconds ago (or never), ``False`` otherwise (or if there is
+                  no status file)
+
+        """
+        if self.filename is None:
+            return False
+
+        if self._last_write is None:
+            return True
+
+        return time.time() - self._last_write >= self.interval
+
+
+class TaskProgress(object):
+    """Keeps track of the progress of tasks (for the status file).
+
+    Args:
+        status_file (StatusFile): the status file
+        stages (dict): the stage of each task (by task ID)
+        expected (dict): the expected execution time of each task (by task
+                         ID, in seconds)
+        resources (TaskResources): the resources used by the running tasks
+
+    Each task is either ``queued``, ``running``, ``done`` (including the
+    tasks performed in a previous run), ``skipped`` or ``failed``. The status
+    contains the number of tasks in each state for each stage, the usage of
+    the processors and the memory, and a rough estimation of the remaining
+    time (the expected execution time of the remaining tasks divided by the
+    number of processors).
+
+    """
+    _states = ("queued", "running", "done", "skipped", "failed")
+
+    def __init__(self, status_file, stages, expected, resources):
+        self.status_file = status_file
+        self.stages = stages
+        self.expected = expected
+        self.resources = resources
+
+        self._state = OrderedDict(
+            (task_id, "queued") for task_id in stages.keys()
+        )
+        self._start = {}
+
+    def set_state(self, task_id, state):
+        """Sets the state of a task (and updates the status).
+
+        Args:
+            task_id (str): the ID of the task
+            state (str): the new state of the task
+
+        """
+        assert state in self._states
+        self._state[task_id] = state
+        if state == "running":
+            self._start[task_id] = time.time()
+
+        self.write()
+
+    def write(self, force=False):
+        """Updates the status file.
+
+        Args:
+            force (bool): whether or not to write the file, even if it was
+                          written recently
+
+        """
+        if self.status_file.filename is None:
+            return
+
+        if not (force or self.status_file.is_due()):
+            return
+
+        # The number of tasks in each state (for each stage)
+        stages = OrderedDict()
+        for task_id, state in self._state.items():
+            stage = self.stages[task_id]
+            if stage not in stages:
+                stages[stage] = OrderedDict((s, 0) for s in self._states)
+            stages[stage][state] += 1
+
+        # The remaining execution time
+        now = time.time()
+        remaining = 0
+        for task_id, state in self._state.items():
+            if state == "queued":
+                remaining += self.expected.get(task_id, 0)
+            elif state == "running":
+                remaining += max(
+                    0,
+                    self.expected.get(task_id, 0) -
+                    (now - self._start[task_id]),
+                )
+
+        self.status_file.update(
+            force=force,
+            stages=stages,
+            running=self.resources.nb_running,
+            threads_used=self.resources.used_threads,
+            threads_total=self.resources.nb_threads,
+            memory_used=self.resources.used_memory,
+            memory_total=self.resources.max_memory,
+            eta=round(remaining / max(1, self.resources.nb_threads), 1),
+        )
@@ -57,6 +57,9 @@ class TestArguments(unittest.TestCase):
         # shapeit_thread
         self.args.shapeit_thread = 1
 
+        # memory
+        self.args.memory = None
+
         # hap_template, legend_template and map_template
         hap_template = os.path.join(self.output_dir.name, "chr{chrom}.hap.gz")
         leg_template = os.path.join(self.output_dir.name, "chr{chrom}.leg.gz")
@@ -218,6 +221,14 @@ class TestArguments(unittest.TestCase):
                 check_args(self.args)
             self.assertEqual("thread should be one or more", str(cm.exception))
 
+    def test_invalid_memory(self):
+        """Tests with an invalid amount of memory."""
+        for i in (-1, 0):
+            self.args.memory = i
+            with self.assertRaises(GenipeError) as cm:
+                check_args(self.args)
+            self.assertEqual("memory should be positive", str(cm.exception))
+
     def test_missing_plink_file(self):
         """Tests with missing Plink file."""
         # Deleting each of the required plink file
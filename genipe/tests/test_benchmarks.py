@@ -0,0 +1,190 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+import sys
+import logging
+import resource
+import unittest
+import subprocess
+import multiprocessing
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from ..benchmarks import runner
+from ..benchmarks.synthetic import generate_dataset
+from ..tools import impute2_merger
+from ..error import GenipeError
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["TestBenchmarks"]
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    @staticmethod
+    def clean_logging_handlers():
+        handlers = list(logging.root.handlers)
+        for handler in handlers:
+            logging.root.removeHandler(handler)
+
+    def setUp(self):
+        """Setup the tests."""
+        # Creating the temporary directory
+        self.output_dir = TemporaryDirectory(prefix="genipe_test_")
+
+    def tearDown(self):
+        """Finishes the test."""
+        # Deleting the output directory
+        self.output_dir.cleanup()
+
+    def test_generate_dataset(self):
+        """Tests the 'generate_dataset' function."""
+        dataset = generate_dataset(self.output_dir.name, nb_samples=20,
+                                   nb_sites=11, nb_segments=3, seed=1)
+        self.assertEqual(3, len(dataset["segments"]))
+
+        # The number of sites and of probabilities in each segment
+        positions = []
+        for filename, expected in zip(dataset["segments"], (4, 4, 3)):
+            data = pd.read_csv(filename, sep=" ", header=None)
+            self.assertEqual((expected, 5 + 20 * 3), data.shape)
+            positions.extend(data[2])
+
+            # The probabilities sum to one
+            probs = data.iloc[:, 5:].values.reshape(expected, 20, 3)
+            np.testing.assert_array_almost_equal(
+                np.ones((expected, 20)), probs.sum(axis=2),
+            )
+
+            # The companion files
+            info = pd.read_csv(filename + "_info", sep=" ")
+            self.assertEqual(list(data[1]), list(info.rs_id))
+            with open(filename + "_summary", "r") as i_file:
+                self.assertIn(" --{} total SNPs".format(expected),
+                              i_file.read())
+
+        # The positions are increasing across the segments
+        self.assertEqual(sorted(positions), positions)
+        self.assertEqual(len(set(positions)), len(positions))
+
+        # The samples and the phenotypes
+        samples = pd.read_csv(dataset["sample"], sep=" ").iloc[1:, ]
+        pheno = pd.read_csv(dataset["pheno"], sep="\t")
+        self.assertEqual(20, len(samples))
+        self.assertEqual(list(samples.ID_2), list(pheno.sample_id))
+        self.assertEqual(list(samples.sex.astype(int)), list(pheno.gender))
+
+        # The same seed gives the same data
+        other_dir = os.path.join(self.output_dir.name, "other")
+        os.mkdir(other_dir)
+        other = generate_dataset(other_dir, nb_samples=20, nb_sites=11,
+                                 nb_segments=3, seed=1)
+        for filename, other_filename in zip(dataset["segments"],
+                                            other["segments"]):
+            with open(filename, "r") as f1, open(other_filename, "r") as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+        # The segments can be merged
+        prefix = os.path.join(self.output_dir.name, "chr1.imputed")
+        try:
+            impute2_merger.main(args=["--chr", "1", "--prefix", prefix,
+                                      "--impute2"] + dataset["segments"])
+        finally:
+            TestBenchmarks.clean_logging_handlers()
+        with open(prefix + ".map", "r") as i_file:
+            self.assertEqual(11, len(i_file.read().splitlines()))
+
+    def test_run_benchmarks(self):
+        """Tests the 'run_benchmarks' function."""
+        results = runner.run_benchmarks(
+            nb_samples=10,
+            nb_sites=20,
+            nb_segments=2,
+            components=["formats_impute2", "formats_index"],
+            seed=1,
+            work_dir=self.output_dir.name,
+        )
+        self.assertEqual(20, results["nb_sites"])
+        self.assertEqual(["formats_impute2", "formats_index"],
+                         [r["component"] for r in results["results"]])
+        for result in results["results"]:
+            self.assertGreater(result["sites_per_second"], 0)
+            self.assertGreater(result["peak_memory"], 0)
+            self.assertGreaterEqual(result["peak_memory"],
+                                    result["peak_worker_memory"])
+
+        # The merger was executed, even if not benchmarked
+        prefix = os.path.join(self.output_dir.name, "chr1.imputed")
+        self.assertTrue(os.path.isfile(prefix + ".impute2"))
+        self.assertTrue(os.path.isfile(prefix + ".impute2.idx"))
+
+    def test_get_max_rss(self):
+        """Tests the '_get_max_rss' function."""
+        self.assertGreater(runner._get_max_rss(), 0)
+
+        # The peak memory of a child process (allocating 100 MiB)
+        subprocess.check_call([
+            sys.executable, "-c", "data = b'1' * (100 * 1024 * 1024)",
+        ])
+        self.assertGreater(runner._get_max_rss(resource.RUSAGE_CHILDREN),
+                           100 * 1024)
+
+    def test_run_in_process(self):
+        """Tests the '_run_in_process' function."""
+        context = multiprocessing.get_context("spawn")
+        dataset = {"prefix": os.path.join(self.output_dir.name, "chr1"),
+                   "work_dir": self.output_dir.name}
+
+        # The exception of the component is raised again
+        with self.assertRaises(GenipeError) as cm:
+            runner._run_in_process(context, "invalid", dataset)
+        self.assertEqual("invalid: invalid component", str(cm.exception))
+
+    def test_compare_results(self):
+        """Tests the 'compare_results' function."""
+        previous = {
+            "genipe_version": "1.3.1", "nb_samples": 10, "nb_sites": 20,
+            "nb_process": 1,
+            "results": [
+                {"component": "formats_index", "sites_per_second": 100.0,
+                 "peak_memory": 50.0},
+                {"component": "imputed_stats", "sites_per_second": 10.0,
+                 "peak_memory": 100.0},
+            ],
+        }
+        results = {
+            "genipe_version": "1.3.2", "nb_samples": 10, "nb_sites": 20,
+            "nb_process": 1,
+            "results": [
+                {"component": "formats_impute2", "sites_per_second": 10.0,
+                 "peak_memory": 10.0},
+                {"component": "formats_index", "sites_per_second": 200.0,
+                 "peak_memory": 25.0},
+            ],
+        }
+        with self.assertLogs(level="INFO"):
+            observed = runner.compare_results(previous, results)
+        self.assertEqual([("formats_index", 2.0, 0.5)], observed)
+
+        # Different datasets give a warning
+        results["nb_sites"] = 40
+        with self.assertLogs(level="WARNING") as cm:
+            runner.compare_results(previous, results)
+        self.assertEqual(
+            ["WARNING:root:different 'nb_sites': 20 (previous) vs 40"],
+            cm.output,
+        )
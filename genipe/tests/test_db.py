@@ -7,6 +7,7 @@
 # Commons, PO Box 1866, Mountain View, CA 94042, USA.
 
 
+import os
 import time
 import logging
 import sqlite3
@@ -47,7 +48,8 @@ class TestDB(unittest.TestCase):
 
     def tearDown(self):
         """Finishes the test."""
-        # Deleting the output directory
+        # Closing the connection and deleting the output directory
+        db_utils.close_task_db(self.db_name)
         self.output_dir.cleanup()
 
     def test_create_task_db(self):
@@ -64,12 +66,11 @@ class TestDB(unittest.TestCase):
         c.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = c.fetchall()
 
-        # There should only be one table (and one column)
-        self.assertEqual(1, len(tables))
-        self.assertEqual(1, len(tables[0]))
-
-        # The only value should have name=genipe_task
-        self.assertEqual("genipe_task", tables[0][0])
+        # There should be two tables
+        self.assertEqual(
+            ["genipe_output", "genipe_task"],
+            sorted(table[0] for table in tables),
+        )
 
         # Checking the columns (name, type, notnull, default, primary)
         expected_columns = {
@@ -78,6 +79,13 @@ class TestDB(unittest.TestCase):
             "start": ("start", "TIMESTAMP", 0, None, 0),
             "end": ("end", "TIMESTAMP", 0, None, 0),
             "completed": ("completed", "INT", 0, None, 0),
+            "skipped": ("skipped", "INT", 0, "0", 0),
+            "exit_status": ("exit_status", "INT", 0, None, 0),
+            "max_rss": ("max_rss", "INT", 0, None, 0),
+            "user_time": ("user_time", "REAL", 0, None, 0),
+            "system_time": ("system_time", "REAL", 0, None, 0),
+            "read_bytes": ("read_bytes", "INT", 0, None, 0),
+            "write_bytes": ("write_bytes", "INT", 0, None, 0),
         }
         c.execute("PRAGMA table_info(genipe_task)")
         col_names = set()
@@ -94,6 +102,32 @@ class TestDB(unittest.TestCase):
         if len(col_diff) != 0:  # pragma: no cover
             self.fail("not all DB columns are present")
 
+    def test_create_task_db_previous_version(self):
+        """Tests the 'create_task_db' function on a previous DB version."""
+        out_dir = os.path.join(self.output_dir.name, "previous")
+        os.mkdir(out_dir)
+
+        # A DB without the 'skipped' column
+        conn, c = _create_db_connection(os.path.join(out_dir, "tasks.db"))
+        c.execute("""CREATE TABLE genipe_task (
+                        name TEXT PRIMARY KEY,
+                        launch TIMESTAMP,
+                        start TIMESTAMP,
+                        end TIMESTAMP,
+                        completed INT)""")
+        c.execute("INSERT INTO genipe_task (name, completed) VALUES ('a', 1)")
+        conn.commit()
+        conn.close()
+
+        # The columns are added
+        db_name = db_utils.create_task_db(out_dir)
+        conn, c = _create_db_connection(db_name)
+        c.execute("SELECT name, completed, skipped, exit_status "
+                  "FROM genipe_task")
+        self.assertEqual([("a", 1, 0, None)], c.fetchall())
+        conn.close()
+        db_utils.close_task_db(db_name)
+
     def test_create_db_connection(self):
         """Tests the '_create_db_connection' function."""
         # Creating the connection
@@ -514,3 +548,171 @@ class TestDB(unittest.TestCase):
         log_m = "WARNING:root:{}: no execution time for task"
         self.assertEqual(1, len(cm.output))
         self.assertEqual(log_m.format(self.task_names[0]), cm.output[0])
+
+    def test_get_completed_runtimes(self):
+        """Tests the 'get_completed_runtimes' function."""
+        # Only the first two tasks are completed
+        time.sleep(1)
+        for task_name in self.task_names[:2]:
+            db_utils.mark_task_completed(task_name, self.db_name)
+
+        # The task is relaunched (its end time is not valid anymore)
+        db_utils.create_task_entry(self.task_names[1], self.db_name)
+
+        # Setting the end time of the last task, without completing it
+        conn, c = _create_db_connection(self.db_name)
+        c.execute("UPDATE genipe_task SET end=? WHERE name=?",
+                  (datetime.now(), self.task_names[-1]))
+        conn.commit()
+        conn.close()
+
+        observed = db_utils.get_completed_runtimes(self.db_name)
+        self.assertEqual([self.task_names[0]], list(observed.keys()))
+        self.assertAlmostEqual(1, observed[self.task_names[0]], delta=0.5)
+
+    def test_get_completed_tasks(self):
+        """Tests the 'get_completed_tasks' function."""
+        # Completing the first and third tasks
+        for task_name in self.task_names[::2]:
+            db_utils.mark_task_completed(task_name, self.db_name)
+
+        self.assertEqual(
+            set(self.task_names[::2]),
+            db_utils.get_completed_tasks(self.task_names + ["unknown"],
+                                         self.db_name),
+        )
+        self.assertEqual(
+            {self.task_names[2]},
+            db_utils.get_completed_tasks(self.task_names[1:3], self.db_name),
+        )
+        self.assertEqual(set(),
+                         db_utils.get_completed_tasks([], self.db_name))
+
+        # More tasks than what fits in a single query
+        task_names = ["task_{}".format(i) for i in range(1234)]
+        for task_name in task_names:
+            db_utils.create_task_entry(task_name, self.db_name)
+            db_utils.mark_task_completed(task_name, self.db_name)
+        self.assertEqual(
+            set(task_names),
+            db_utils.get_completed_tasks(task_names, self.db_name),
+        )
+
+    def test_get_tasks_runtime(self):
+        """Tests the 'get_tasks_runtime' function."""
+        # Completing the first two tasks
+        time.sleep(1)
+        for task_name in self.task_names[:2]:
+            db_utils.mark_task_completed(task_name, self.db_name)
+
+        observed = db_utils.get_tasks_runtime(self.task_names + ["unknown"],
+                                              self.db_name)
+        self.assertEqual(self.task_names[:2], sorted(observed.keys()))
+        for task_name in self.task_names[:2]:
+            self.assertEqual(
+                db_utils.get_task_runtime(task_name, self.db_name),
+                observed[task_name],
+            )
+
+    def test_shared_connection(self):
+        """Tests that a single connection is used for the DB."""
+        # The connection is reused
+        with db_utils._db_cursor(self.db_name) as c:
+            first_connection = c.connection
+        db_utils.mark_task_completed(self.task_names[0], self.db_name)
+        with db_utils._db_cursor(self.db_name) as c:
+            self.assertIs(first_connection, c.connection)
+
+            # The DB is in WAL mode
+            c.execute("PRAGMA journal_mode")
+            self.assertEqual("wal", c.fetchone()[0])
+
+        # The changes were committed (visible from another connection)
+        conn, c = _create_db_connection(self.db_name)
+        c.execute("SELECT completed FROM genipe_task WHERE name=?",
+                  (self.task_names[0], ))
+        self.assertEqual(1, c.fetchone()[0])
+        conn.close()
+
+        # A failed statement is rolled back
+        with self.assertRaises(sqlite3.OperationalError):
+            with db_utils._db_cursor(self.db_name) as c:
+                c.execute("UPDATE genipe_task SET completed=1")
+                c.execute("SELECT foo FROM genipe_task")
+        self.assertEqual(
+            {self.task_names[0]},
+            db_utils.get_completed_tasks(self.task_names, self.db_name),
+        )
+
+        # Closing the connection (a new one is created when required)
+        db_utils.close_task_db(self.db_name)
+        with db_utils._db_cursor(self.db_name) as c:
+            self.assertIsNot(first_connection, c.connection)
+
+    def test_validated_outputs(self):
+        """Tests the 'get/set_validated_outputs' functions."""
+        self.assertEqual({}, db_utils.get_validated_outputs(["a", "b"],
+                                                            self.db_name))
+
+        db_utils.set_validated_outputs(
+            {"a": ("a", 10, 1234.5), "b": ("b_summary", 0, 12.25)},
+            self.db_name,
+        )
+        self.assertEqual(
+            {"a": ("a", 10, 1234.5), "b": ("b_summary", 0, 12.25)},
+            db_utils.get_validated_outputs(["a", "b", "c"], self.db_name),
+        )
+
+        # Updating a file
+        db_utils.set_validated_outputs({"a": ("a", 20, 1300.0)},
+                                       self.db_name)
+        self.assertEqual(
+            {"a": ("a", 20, 1300.0)},
+            db_utils.get_validated_outputs(["a"], self.db_name),
+        )
+
+    def test_task_resources(self):
+        """Tests the 'set_task_resources' and 'get_all_resources' functions."""
+        # No resources were saved yet
+        self.assertEqual({}, db_utils.get_all_resources(self.db_name))
+
+        db_utils.set_task_resources(
+            self.task_names[0],
+            {"exit_status": 0, "max_rss": 2048, "user_time": 10.5,
+             "system_time": 1.25, "read_bytes": 512, "write_bytes": 1024},
+            self.db_name,
+        )
+        db_utils.set_task_resources(self.task_names[1], {"exit_status": 1},
+                                    self.db_name)
+        self.assertEqual(
+            {self.task_names[0]: {"exit_status": 0, "max_rss": 2048,
+                                  "user_time": 10.5, "system_time": 1.25,
+                                  "read_bytes": 512, "write_bytes": 1024},
+             self.task_names[1]: {"exit_status": 1, "max_rss": None,
+                                  "user_time": None, "system_time": None,
+                                  "read_bytes": None, "write_bytes": None}},
+            db_utils.get_all_resources(self.db_name),
+        )
+
+        # Relaunching a task removes its resources
+        db_utils.create_task_entry(self.task_names[0], self.db_name)
+        self.assertEqual([self.task_names[1]],
+                         list(db_utils.get_all_resources(self.db_name)))
+
+    def test_mark_task_skipped(self):
+        """Tests the 'mark_task_skipped' function."""
+        # An existing task and a new one
+        db_utils.mark_task_skipped(self.task_names[0], self.db_name)
+        db_utils.mark_task_skipped("new_task", self.db_name)
+
+        self.assertEqual({self.task_names[0], "new_task"},
+                         db_utils.get_skipped_tasks(self.db_name))
+        self.assertFalse(db_utils.check_task_completion("new_task",
+                                                        self.db_name))
+        self.assertEqual(0, db_utils.get_task_runtime("new_task",
+                                                      self.db_name))
+
+        # The task is launched again
+        db_utils.create_task_entry("new_task", self.db_name)
+        self.assertEqual({self.task_names[0]},
+                         db_utils.get_skipped_tasks(self.db_name))
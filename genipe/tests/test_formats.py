@@ -7,11 +7,15 @@
 # Commons, PO Box 1866, Mountain View, CA 94042, USA.
 
 
+import os
 import unittest
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
 
 import numpy as np
 
 from ..formats import impute2
+from ..formats.reference import ReferenceCache, get_cache_dir
 from ..error import GenipeError
 
 
@@ -54,6 +58,81 @@ class TestFormats(unittest.TestCase):
         with self.assertRaises(ValueError):
             impute2.matrix_from_line(input_line.split(" ")[:-1])
 
+    def test_subset_line(self):
+        """Tests the 'subset_line' function."""
+        # The IMPUTE2 line
+        input_line = ("1 marker_1 1 A AT 0 0 1 1 0 0 0 1 0 0.9 0.033 0.067 "
+                      "0 0 0")
+
+        # Keeping the second and fourth samples
+        columns = impute2.get_sample_columns([1, 3])
+        self.assertEqual([8, 9, 10, 14, 15, 16], columns)
+
+        # The expected results
+        expected_info = ["1", "marker_1", "1", "A", "AT"]
+        expected_geno = np.array([[1, 0, 0], [0.9, 0.033, 0.067]],
+                                 dtype=float)
+
+        # The observed results
+        observed_info, observed_geno = impute2.matrix_from_line(
+            impute2.subset_line(input_line.split(" "), columns),
+        )
+        self.assertEqual(expected_info, observed_info)
+        self.assertTrue(np.allclose(expected_geno, observed_geno))
+
+    def test_split_line(self):
+        """Tests the 'split_line' function."""
+        input_line = ("1 marker_1 1 A AT 0 0 1 1 0 0 0 1 0 0.9 0.033 0.067 "
+                      "0 0 0")
+
+        # All the samples
+        self.assertEqual(input_line.split(" "),
+                         impute2.split_line(input_line))
+
+        # The second and fourth samples (the same as 'subset_line')
+        for samples in ([1, 3], [3, 1], [4], [0, 4], []):
+            columns = impute2.get_sample_columns(samples)
+            self.assertEqual(
+                impute2.subset_line(input_line.split(" "), columns),
+                impute2.split_line(input_line, columns),
+            )
+
+        # The end of the line is never split (nor encoded)
+        columns = impute2.get_sample_columns([0])
+        long_line = input_line + " x" * 1000
+        with patch.object(impute2.np, "frombuffer") as frombuffer:
+            self.assertEqual(input_line.split(" ")[:8],
+                             impute2.split_line(long_line, columns))
+        frombuffer.assert_not_called()
+
+        # Samples at the end of a long line (using the offsets of the fields)
+        long_line = " ".join(["0.1 0.2 0.7"] * 1000)
+        long_line = "1 marker_1 1 A AT " + long_line
+        for samples in ([999], [998, 3], [500, 999, 0]):
+            columns = impute2.get_sample_columns(samples)
+            expected = impute2.subset_line(long_line.split(" "), columns)
+            with patch.object(impute2, "subset_line") as subset_line:
+                self.assertEqual(expected,
+                                 impute2.split_line(long_line, columns))
+            subset_line.assert_not_called()
+
+        # The limit between the two methods (the same results)
+        columns = impute2.get_sample_columns([40, 2])
+        limit = max(columns) * impute2._SPLIT_OFFSETS_RATIO
+        for line in (long_line[:limit], long_line[:limit + 1]):
+            self.assertEqual(
+                impute2.subset_line(line.split(" "), columns),
+                impute2.split_line(line, columns),
+            )
+
+        # A non ASCII line
+        columns = impute2.get_sample_columns([1, 3])
+        input_line = input_line.replace("marker_1", "marqueur_é")
+        self.assertEqual(
+            impute2.subset_line(input_line.split(" "), columns),
+            impute2.split_line(input_line, columns),
+        )
+
     def test_get_good_probs(self):
         """Tests the 'get_good_probs' function."""
         # The probability matrix
@@ -602,3 +681,148 @@ class TestFormats(unittest.TestCase):
         self.assertEqual("A", minor)
         self.assertEqual("B", major)
         self.assertEqual([0, 1, 2, 0, 2, 0, 0, 1, 1, 0], list(calls))
+
+    def test_probs_store(self):
+        """Tests the binary probability store functions."""
+        output_dir = TemporaryDirectory(prefix="genipe_test_")
+        prefix = os.path.join(output_dir.name, "store")
+
+        # The probabilities for two sites and three samples
+        probs = [
+            np.array([[1, 0, 0], [0.988, 0.002, 0.01], [0, 0.003, 0.997]]),
+            np.array([[0.869, 0.130, 0.001], [0, 1, 0], [0, 0, 1]]),
+        ]
+        sites = [["1", "rs12345", "1231415", "A", "G"],
+                 ["1", "1:3214570", "3214570", "T", "TC"]]
+
+        # Creating the store
+        store, sites_file = impute2.create_probs_store(prefix, 2, 3)
+        for i, (site, prob_matrix) in enumerate(zip(sites, probs)):
+            store[i] = impute2.quantize_probs(prob_matrix)
+            print(*site, sep="\t", file=sites_file)
+        store.flush()
+        sites_file.close()
+        del store
+
+        # Reading the store
+        observed_sites, observed_store = impute2.read_probs_store(prefix)
+        self.assertEqual(["chrom", "name", "pos", "a1", "a2"],
+                         list(observed_sites.columns))
+        self.assertEqual(["rs12345", "1:3214570"],
+                         list(observed_sites.name))
+        self.assertEqual(np.uint16, observed_store.dtype)
+        self.assertEqual((2, 3, 3), observed_store.shape)
+
+        for i, expected in enumerate(probs):
+            observed = impute2.matrix_from_store(observed_store, i)
+            self.assertEqual(expected.shape, observed.shape)
+            np.testing.assert_allclose(expected, observed, atol=1e-5)
+
+        # An invalid store should raise an exception
+        with open(prefix + ".probs.sites", "a") as o_file:
+            print("1", "rs1", "1", "A", "G", sep="\t", file=o_file)
+        del observed_store
+        with self.assertRaises(GenipeError) as cm:
+            impute2.read_probs_store(prefix)
+        self.assertEqual("{}: invalid probability store".format(prefix),
+                         str(cm.exception))
+
+        output_dir.cleanup()
+
+    def test_dosage_store(self):
+        """Tests the binary dosage store functions."""
+        output_dir = TemporaryDirectory(prefix="genipe_test_")
+        prefix = os.path.join(output_dir.name, "store")
+
+        # The dosage for three sites (two per chunk) and four samples
+        dosage = np.array([[0, 0.5, 1.998, np.nan],
+                           [1, 1, 0.002, 2],
+                           [0.25, np.nan, 0, 1.5]])
+
+        # Creating the store
+        store, sites_file = impute2.create_dosage_store(prefix, 3, 4,
+                                                        chunk_size=2)
+        self.assertEqual((2, 4, 2), store.shape)
+        for i, site_dosage in enumerate(dosage):
+            impute2.dosage_to_store(store, i, site_dosage)
+            print("1", "marker_{}".format(i + 1), i + 1, "G", "A", 0.1,
+                  sep="\t", file=sites_file)
+        store.flush()
+        sites_file.close()
+        del store
+
+        # Reading the store
+        sites, store = impute2.read_dosage_store(prefix)
+        self.assertEqual(["chrom", "name", "pos", "minor", "major", "maf"],
+                         list(sites.columns))
+        self.assertEqual(np.float16, store.dtype)
+        for i, expected in enumerate(dosage):
+            np.testing.assert_allclose(
+                expected, impute2.dosage_from_store(store, i), atol=1e-3,
+            )
+
+        # Reading the chunks (the padding is removed)
+        chunks = list(impute2.dosage_store_chunks(store, len(sites)))
+        self.assertEqual([0, 2], [first for first, _ in chunks])
+        self.assertEqual([(4, 2), (4, 1)], [m.shape for _, m in chunks])
+        np.testing.assert_allclose(
+            dosage.T, np.hstack([m for _, m in chunks]), atol=1e-3,
+        )
+
+        output_dir.cleanup()
+
+    def test_reference_cache(self):
+        """Tests the 'ReferenceCache' class."""
+        output_dir = TemporaryDirectory(prefix="genipe_test_")
+        fasta_filename = os.path.join(output_dir.name, "ref.fasta")
+
+        # A reference with sequences spanning multiple lines
+        with open(fasta_filename, "w") as o_file:
+            o_file.write(">chr1\nACGT\nacgt\nAC\n>chr2 other\nggcc\nT\n")
+        with open(fasta_filename + ".fai", "w") as o_file:
+            print("chr1", 10, 6, 4, 5, sep="\t", file=o_file)
+            print("chr2", 5, 31, 4, 5, sep="\t", file=o_file)
+
+        # The cache is next to the FASTA file
+        cache_dir = get_cache_dir(fasta_filename)
+        self.assertEqual(fasta_filename + ".genipe_cache", cache_dir)
+        reference = ReferenceCache(fasta_filename)
+        self.assertEqual(["chr1", "chr2"], reference.names)
+        self.assertIn("chr2", reference)
+        self.assertNotIn("chr3", reference)
+
+        # The sequences (in upper case)
+        self.assertEqual(b"ACGTACGTAC",
+                         reference.get_sequence("chr1").tobytes())
+        self.assertEqual(b"GGCCT", reference.get_sequence("chr2").tobytes())
+        self.assertEqual(
+            ["A", "T", "C", "", ""],
+            list(reference.get_bases("chr1", [1, 8, 10, 11, 0])),
+        )
+        with self.assertRaises(GenipeError) as cm:
+            reference.get_sequence("chr3")
+        self.assertEqual("{}: chr3: no such sequence".format(fasta_filename),
+                         str(cm.exception))
+        reference.close()
+
+        # The cache is reused
+        filenames = sorted(os.listdir(cache_dir))
+        self.assertEqual(["0.chr1.npy", "1.chr2.npy", "manifest.json"],
+                         filenames)
+        reference = ReferenceCache(fasta_filename)
+        self.assertEqual(filenames, sorted(os.listdir(cache_dir)))
+        self.assertEqual(["G"], list(reference.get_bases("chr2", [2])))
+        reference.close()
+
+        # The cache is rebuilt if the reference changes
+        with open(fasta_filename, "w") as o_file:
+            o_file.write(">chr1\nTTTT\nTTTT\nTT\n>chr2 other\nAAAA\nA\n")
+        mtime = os.stat(fasta_filename).st_mtime
+        os.utime(fasta_filename, (mtime + 10, mtime + 10))
+        reference = ReferenceCache(fasta_filename)
+        self.assertEqual(["manifest.json"], os.listdir(cache_dir))
+        self.assertEqual(["T", "A"], [reference.get_bases(name, [5])[0]
+                                      for name in ("chr1", "chr2")])
+        reference.close()
+
+        output_dir.cleanup()
@@ -12,6 +12,9 @@ import logging
 import unittest
 from tempfile import TemporaryDirectory
 
+import numpy as np
+
+from ..formats import impute2
 from ..tools import impute2_extractor
 
 
@@ -1582,3 +1585,182 @@ class TestImpute2Extractor(unittest.TestCase):
         with open(maf_fn, "r") as i_file:
             observed = i_file.read()
         self.assertEqual(expected, observed)
+
+    def test_extract_companion_files_index(self):
+        """Tests the extraction of companion files using the index."""
+        # Adding companion files containing a subset of the sites
+        filename = os.path.join(self.output_dir.name, "genipe.good_sites")
+        with open(filename, "w") as o_file:
+            o_file.write("rs12345\nrs23457_2\n1:3214573\n")
+        filename = os.path.join(self.output_dir.name, "genipe.imputed_sites")
+        with open(filename, "w"):
+            pass
+
+        # Creating a file with markers to extract
+        extract_filename = os.path.join(self.output_dir.name, "to_extract")
+        with open(extract_filename, "w") as o_file:
+            o_file.write("rs23456\nrs23457_2\n1:4214570_1\n")
+
+        # Executing the script
+        args = self.common_args + [
+            "--extract", extract_filename,
+        ]
+        impute2_extractor.main(args=args)
+        TestImpute2Extractor.clean_logging_handlers()
+
+        # The companion files should have been indexed
+        template_name = os.path.join(self.output_dir.name, "genipe.{ext}")
+        for suffix in ("impute2", "map", "maf", "completion_rates",
+                       "impute2_info", "good_sites"):
+            self.assertTrue(os.path.isfile(
+                template_name.format(ext=suffix) + ".idx",
+            ))
+
+        # Checking the companion files
+        template_name = os.path.join(self.output_dir.name, "results.{ext}")
+        expected = {
+            "map": (
+                "1\trs23456\t0\t3214569\n"
+                "1\trs23457_2\t0\t3214572\n"
+                "1\t1:4214570_1\t0\t4214570\n"
+            ),
+            "completion_rates": (
+                "name\tnb_missing\tcompletion_rate\n"
+                "rs23456\t1\t{0}\n"
+                "rs23457_2\t1\t{0}\n"
+                "1:4214570_1\t3\t0\n"
+            ).format(2/3),
+            "good_sites": "rs23457_2\n",
+            "imputed_sites": "",
+        }
+        for suffix, content in expected.items():
+            with open(template_name.format(ext=suffix), "r") as i_file:
+                self.assertEqual(content, i_file.read())
+
+        # Modifying the order of the map file (the index is now invalid)
+        filename = os.path.join(self.output_dir.name, "genipe.map")
+        with open(filename, "r") as i_file:
+            lines = i_file.read().splitlines(True)
+        with open(filename, "w") as o_file:
+            o_file.write("".join(lines[::-1]))
+
+        # Executing the script (the map file is read line by line)
+        impute2_extractor.main(args=args)
+        TestImpute2Extractor.clean_logging_handlers()
+        with open(template_name.format(ext="map"), "r") as i_file:
+            self.assertEqual(
+                "1\t1:4214570_1\t0\t4214570\n"
+                "1\trs23457_2\t0\t3214572\n"
+                "1\trs23456\t0\t3214569\n",
+                i_file.read(),
+            )
+
+    def test_extract_probs_format(self):
+        """Tests the extraction in the binary probability store format."""
+        # Creating a file with markers to extract
+        extract_filename = os.path.join(self.output_dir.name, "to_extract")
+        with open(extract_filename, "w") as o_file:
+            o_file.write("rs23456\nrs23457_2\n1:4214570_1\n")
+
+        # Executing the script
+        args = [
+            "--impute2", os.path.join(self.output_dir.name, "genipe.impute2"),
+            "--format", "probs",
+            "--out", os.path.join(self.output_dir.name, "results"),
+            "--extract", extract_filename,
+        ]
+        impute2_extractor.main(args=args)
+        TestImpute2Extractor.clean_logging_handlers()
+
+        # Checking the files
+        prefix = os.path.join(self.output_dir.name, "results")
+        for suffix in (".probs.npy", ".probs.sites", ".sample"):
+            self.assertTrue(os.path.isfile(prefix + suffix))
+
+        # Reading the store
+        sites, store = impute2.read_probs_store(prefix)
+        self.assertEqual(["rs23456", "rs23457_2", "1:4214570_1"],
+                         list(sites.name))
+        self.assertEqual([3214569, 3214572, 4214570], list(sites.pos))
+        self.assertEqual(["T", "T", "T"], list(sites.a1))
+        self.assertEqual(["C", "TC", "TC"], list(sites.a2))
+
+        expected = [
+            [[0.869, 0.130, 0], [0.903, 0.095, 0.002], [0, 0, 1]],
+            [[0.869, 0.130, 0], [0, 1, 0], [0, 0, 1]],
+            [[0.869, 0.130, 0], [0.869, 0.130, 0], [0.869, 0.130, 0]],
+        ]
+        for i, site_probs in enumerate(expected):
+            np.testing.assert_allclose(
+                np.array(site_probs),
+                impute2.matrix_from_store(store, i),
+                atol=1e-5,
+            )
+
+    def test_keep(self):
+        """Tests the extraction of a subset of samples."""
+        # Creating a file with markers to extract
+        extract_filename = os.path.join(self.output_dir.name, "to_extract")
+        with open(extract_filename, "w") as o_file:
+            o_file.write("rs23456\nrs23457_2\n1:4214570_1\n")
+
+        # Creating a file with samples to keep
+        keep_filename = os.path.join(self.output_dir.name, "to_keep")
+        with open(keep_filename, "w") as o_file:
+            o_file.write("s2\ns3\n")
+
+        # Executing the script
+        args = self.common_args + [
+            "--extract", extract_filename,
+            "--keep", keep_filename,
+        ]
+        impute2_extractor.main(args=args)
+        TestImpute2Extractor.clean_logging_handlers()
+
+        # Checking the impute2 file
+        template_name = os.path.join(self.output_dir.name, "results.{ext}")
+        expected = (
+            "1 rs23456 3214569 T C 0.903 0.095 0.002 0 0 1\n"
+            "1 rs23457_2 3214572 T TC 0 1 0 0 0 1\n"
+            "1 1:4214570_1 4214570 T TC 0.869 0.130 0 0.869 0.130 0\n"
+        )
+        observed = None
+        with open(template_name.format(ext="impute2"), "r") as i_file:
+            observed = i_file.read()
+        self.assertEqual(expected, observed)
+
+        # Checking the sample file
+        expected = (
+            "ID_1 ID_2 missing father mother sex plink_pheno\n"
+            "0 0 0 D D D B\n"
+            "f2 s2 0 0 0 0 -9\n"
+            "f3 s3 0 0 0 0 -9\n"
+        )
+        observed = None
+        with open(template_name.format(ext="sample"), "r") as i_file:
+            observed = i_file.read()
+        self.assertEqual(expected, observed)
+
+        # Checking the dosage file
+        expected = (
+            "chrom\tpos\tname\tminor\tmajor\tf2/s2\tf3/s3\n"
+            "1\t3214569\trs23456\tC\tT\t0.099\t2.0\n"
+            "1\t3214572\trs23457_2\tT\tTC\t1.0\t0.0\n"
+            "1\t4214570\t1:4214570_1\tTC\tT\tnan\tnan\n"
+        )
+        observed = None
+        with open(template_name.format(ext="dosage"), "r") as i_file:
+            observed = i_file.read()
+        self.assertEqual(expected, observed)
+
+        # Checking the hard calls file
+        expected = (
+            "chrom\tname\tcm\tpos\tf2/s2\tf3/s3\n"
+            "1\trs23456\t0\t3214569\tT T\tC C\n"
+            "1\trs23457_2\t0\t3214572\tT TC\tTC TC\n"
+            "1\t1:4214570_1\t0\t4214570\t0 0\t0 0\n"
+        )
+        observed = None
+        with open(template_name.format(ext="calls"), "r") as i_file:
+            observed = i_file.read()
+        self.assertEqual(expected, observed)
@@ -8,6 +8,7 @@
 
 
 import os
+import json
 import logging
 import unittest
 from tempfile import TemporaryDirectory
@@ -151,7 +152,8 @@ class TestImpute2Merger(unittest.TestCase):
     def test_check_output_files(self):
         """Checks the presence of all the output files."""
         suffixes = [".alleles", ".completion_rates", ".good_sites", ".impute2",
-                    ".imputed_sites", ".log", ".maf", ".map", ".impute2_info"]
+                    ".imputed_sites", ".log", ".maf", ".map", ".impute2_info",
+                    ".stats.json"]
         for suffix in suffixes:
             for prefix in self.prefixes:
                 self.assertTrue(os.path.isfile(prefix + suffix))
@@ -440,3 +442,71 @@ class TestImpute2Merger(unittest.TestCase):
             with open(prefix + ".map", "r") as i_file:
                 observed = i_file.read()
             self.assertEqual(expected, observed)
+
+    def test_stats(self):
+        """Checks the '.stats.json' file."""
+        all_expected_maf = []
+        all_expected_maf.append({
+            "bins": {"lt_01": 0, "geq_01_lt_05": 0, "geq_05": 1},
+            "nb_nan": 0,
+            "min": ["rs12345", 1/6],
+            "max": ["rs12345", 1/6],
+        })
+        all_expected_maf.append({
+            "bins": {"lt_01": 1, "geq_01_lt_05": 0, "geq_05": 5},
+            "nb_nan": 0,
+            "min": ["1:3214570_1", 0],
+            "max": ["rs23457", 0.5],
+        })
+        all_expected_maf.append({
+            "bins": {"lt_01": 0, "geq_01_lt_05": 0, "geq_05": 4},
+            "nb_nan": 0,
+            "min": ["rs12345", 1/6],
+            "max": ["rs23456", 0.5],
+        })
+        all_expected_thresholds = [
+            {"probability": 0.9, "completion": 0.98, "info": 0},
+            {"probability": 0.8, "completion": 0.98, "info": 0.21},
+            {"probability": 0.9, "completion": 0.6, "info": 0.3},
+        ]
+
+        for prefix, expected_maf, expected_thresholds in zip(
+                self.prefixes, all_expected_maf, all_expected_thresholds):
+            with open(prefix + ".stats.json", "r") as i_file:
+                observed = json.load(i_file)
+
+            self.assertEqual("1", observed["chrom"])
+            self.assertEqual(expected_thresholds, observed["thresholds"])
+
+            # The statistics should be the same as the ones from the files
+            with open(prefix + ".good_sites", "r") as i_file:
+                good_sites = set(i_file.read().splitlines())
+            rates = {}
+            with open(prefix + ".completion_rates", "r") as i_file:
+                i_file.readline()
+                for line in i_file:
+                    name, nb_missing, rate = line.rstrip("\n").split("\t")
+                    rates[name] = (int(nb_missing), float(rate))
+
+            self.assertEqual(7, observed["nb_sites"])
+            self.assertAlmostEqual(
+                sum(rate for _, rate in rates.values()),
+                observed["sum_completion_rates"],
+            )
+            self.assertEqual(len(good_sites), observed["nb_good_sites"])
+            self.assertAlmostEqual(
+                sum(rates[name][1] for name in good_sites),
+                observed["sum_good_completion_rates"],
+            )
+            self.assertEqual(6, observed["nb_imputed_sites"])
+            self.assertEqual({"rs23456": rates["rs23456"][0]},
+                             observed["genotyped_nb_missing"])
+
+            # The MAF
+            observed_maf = observed["maf"]
+            self.assertEqual(expected_maf["bins"], observed_maf["bins"])
+            self.assertEqual(expected_maf["nb_nan"], observed_maf["nb_nan"])
+            for key in ("min", "max"):
+                self.assertEqual(expected_maf[key][0], observed_maf[key][0])
+                self.assertAlmostEqual(expected_maf[key][1],
+                                       observed_maf[key][1])
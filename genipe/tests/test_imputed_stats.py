@@ -7,11 +7,14 @@
 # Commons, PO Box 1866, Mountain View, CA 94042, USA.
 
 
+import re
 import os
+import json
 import random
 import logging
 import platform
 import unittest
+from argparse import Namespace
 from tempfile import TemporaryDirectory
 from itertools import zip_longest as zip
 
@@ -19,7 +22,10 @@ import numpy as np
 import pandas as pd
 from pkg_resources import resource_filename
 
-from ..tools import imputed_stats
+from ..stats import skat
+from ..formats import index
+from ..tools import imputed_stats, impute2_extractor
+from ..error import GenipeError
 
 if imputed_stats.HAS_STATSMODELS:
     # patsy is installed only if statsmodels is
@@ -569,6 +575,298 @@ class TestImputedStats(unittest.TestCase):
         # Checking
         self.assertEqual(expected, observed)
 
+    def test_skat_write_genotypes_by_set(self):
+        """Tests the '_skat_write_genotypes_by_set' function."""
+        # The IMPUTE2 file
+        impute2_filename = os.path.join(self.output_dir.name, "input.impute2")
+        with open(impute2_filename, "w") as o_file:
+            o_file.write(
+                "1 marker_1 1 A T 1 0 0 0 1 0 0 0 1\n"
+                "1 marker_2 2 A T 0 1 0 0 1 0 1 0 0\n"
+                "1 marker_3 3 A T 0 0 1 0.9 0.1 0 1 0 0\n"
+                "1 marker_4 4 A T 1 0 0 1 0 0 0 0 1\n"
+            )
+
+        # The samples and the SNP sets (marker_2 is in both sets, and
+        # marker_5 is missing from the IMPUTE2 file)
+        samples = pd.DataFrame({"ID_1": ["f1", "f2", "f3"]},
+                               index=pd.Index(["s1", "s2", "s3"], name="ID_2"))
+        snp_set = pd.DataFrame({
+            "variant": ["marker_4", "marker_2", "marker_2", "marker_3",
+                        "marker_5"],
+            "snp_set": ["set_1", "set_1", "set_2", "set_2", "set_2"],
+        })
+        markers_of_interest = set(snp_set.variant) - {"marker_3"}
+
+        # Writing the genotypes by seeking and by scanning
+        file_index = index.get_index(impute2_filename, cols=[0, 1, 2],
+                                     names=["chrom", "name", "pos"], sep=" ")
+        observed = {}
+        methods = ("by_set", "by_set_parallel", "by_scan")
+        for method in methods:
+            filenames = [
+                os.path.join(self.output_dir.name,
+                             "{}.{}.bin".format(set_id, method))
+                for set_id in ("set_1", "set_2")
+            ]
+            if method.startswith("by_set"):
+                written = imputed_stats._skat_write_genotypes_by_set(
+                    impute2_filename=impute2_filename,
+                    file_index=file_index,
+                    snp_set=snp_set,
+                    markers_of_interest=markers_of_interest,
+                    genotype_filenames=filenames,
+                    samples=samples,
+                    columns=None,
+                    nb_process=2 if method == "by_set_parallel" else 1,
+                )
+            else:
+                written = imputed_stats._skat_write_genotypes_by_scan(
+                    impute2_filename=impute2_filename,
+                    snp_set=snp_set,
+                    markers_of_interest=markers_of_interest,
+                    genotype_filenames=filenames,
+                    samples=samples,
+                    columns=None,
+                )
+            self.assertEqual({"marker_2", "marker_4"}, written)
+
+            # The genotype files are binary (little endian 64-bit floats)
+            self.assertEqual(6 * 8, os.path.getsize(filenames[0]))
+
+            observed[method] = [
+                imputed_stats.skat_read_genotypes(filename, 3)
+                for filename in filenames
+            ]
+
+        # The markers are in the same order as in the IMPUTE2 file
+        expected = [
+            pd.DataFrame([[1.0, 1.0, 0.0], [0.0, 0.0, 2.0]],
+                         index=pd.Index(["marker_2", "marker_4"],
+                                        name="variant")),
+            pd.DataFrame([[1.0, 1.0, 0.0]],
+                         index=pd.Index(["marker_2"], name="variant")),
+        ]
+        for method in methods:
+            for expected_df, observed_df in zip(expected, observed[method]):
+                pd.testing.assert_frame_equal(expected_df, observed_df)
+
+        # The number of samples should be consistent
+        with self.assertRaises(GenipeError) as cm:
+            imputed_stats.skat_read_genotypes(filenames[0], 2)
+        self.assertEqual("{}: invalid number of values".format(filenames[0]),
+                         str(cm.exception))
+
+    def write_r_genotypes(self):
+        """Writes the binary genotype files of two SNP sets for R."""
+        samples = ["s1", "s2", "s3"]
+        sample_filename = os.path.join(self.output_dir.name, "samples.txt")
+        with open(sample_filename, "w") as o_file:
+            print(*samples, sep="\n", file=o_file)
+
+        genotypes = [
+            pd.DataFrame([[0.0, 1.0, 2.0], [0.1, 0.9, 1.5]],
+                         index=["marker_1", "marker_2"], columns=samples),
+            pd.DataFrame([[2.0, 0.0, 1.2]], index=["marker_3"],
+                         columns=samples),
+        ]
+        filenames = []
+        for i, dosage in enumerate(genotypes):
+            filename = os.path.join(self.output_dir.name,
+                                    "set_{}.genotypes.bin".format(i + 1))
+            with open(filename, "wb") as o_file:
+                for _, values in dosage.iterrows():
+                    imputed_stats._skat_write_dosage(values.values, o_file)
+            imputed_stats._skat_write_variants(filename, dosage.index)
+            filenames.append(filename)
+
+        # R expects the samples as rows
+        return sample_filename, filenames, [df.T for df in genotypes]
+
+    def read_r_dosage(self, script, genotype_filename, variant_filename):
+        """Reads a genotype file as the generated R script would.
+
+        The arguments of the 'readBin' and 'matrix' calls of the script are
+        parsed, so that a change in the binary format (see
+        '_skat_write_dosage') or in the template is detected without R.
+
+        """
+        # The samples
+        sample_filename = re.search(r'samples <- readLines\("(.+)"\)',
+                                    script).group(1)
+        with open(sample_filename, "r") as i_file:
+            samples = i_file.read().splitlines()
+
+        # The variants
+        with open(variant_filename, "r") as i_file:
+            variants = i_file.read().splitlines()
+
+        # The arguments of readBin (binary file, then named arguments)
+        read_bin = re.search(r"dosage <- readBin\((.+?)\n\s*\)", script,
+                             re.DOTALL).group(1)
+        read_bin = [value.strip() for value in read_bin.split(",")]
+        read_bin = dict(value.split("=") for value in read_bin[1:])
+        self.assertEqual('"double"', read_bin["what"])
+        self.assertEqual("length(variants) * length(samples)",
+                         read_bin["n"])
+        dtype = "{}f{}".format(
+            {'"little"': "<", '"big"': ">"}[read_bin["endian"]],
+            read_bin["size"],
+        )
+        dosage = np.fromfile(genotype_filename, dtype=dtype,
+                             count=len(variants) * len(samples))
+        self.assertEqual(len(variants) * len(samples), len(dosage))
+
+        # The matrix is filled by column (one column per variant)
+        self.assertRegex(
+            script,
+            r"dosage <- matrix\(dosage, nrow=length\(samples\),\s*"
+            r"dimnames=list\(samples, variants\)\)",
+        )
+        return pd.DataFrame(
+            dosage.reshape((len(samples), len(variants)), order="F"),
+            index=samples, columns=variants,
+        )
+
+    def test_skat_generate_r_script(self):
+        """Tests the '_skat_generate_r_script' function."""
+        # A dummy object for options
+        class Dummy(object):
+            pass
+
+        args = Dummy()
+        args.outcome_type = "continuous"
+        args.skat_o = True
+
+        sample_filename, filenames, expected = self.write_r_genotypes()
+        r_files = {
+            "snp_sets": filenames,
+            "samples": sample_filename,
+            "covariates": None,
+            "outcome": "outcome.csv",
+            "weights": None,
+        }
+
+        # Generating one script per SNP set
+        scripts = imputed_stats._skat_generate_r_script(
+            dir_name=self.output_dir.name,
+            r_files=r_files,
+            args=args,
+        )
+        self.assertEqual(
+            [os.path.join(self.output_dir.name, "run_skat_set_1.R"),
+             os.path.join(self.output_dir.name, "run_skat_set_2.R")],
+            scripts,
+        )
+
+        for script, filename, expected_df in zip(scripts, filenames,
+                                                 expected):
+            with open(script, "r") as i_file:
+                content = i_file.read()
+            self.assertIn('dosage <- readBin(\n    "{}",'.format(filename),
+                          content)
+            variant_filename = imputed_stats._skat_get_variant_filename(
+                filename,
+            )
+            self.assertIn('variants <- readLines("{}")'.format(
+                variant_filename,
+            ), content)
+            self.assertIn('method="optimal.adj"', content)
+
+            # The dosage matrix read by R (samples x variants)
+            pd.testing.assert_frame_equal(
+                expected_df,
+                self.read_r_dosage(content, filename, variant_filename),
+            )
+
+    def test_skat_generate_r_batch_scripts(self):
+        """Tests the '_skat_generate_r_batch_scripts' function."""
+        # A dummy object for options
+        class Dummy(object):
+            pass
+
+        args = Dummy()
+        args.outcome_type = "discrete"
+        args.skat_o = False
+
+        r_files = {
+            "snp_sets": ["set_{}.genotypes.bin".format(i)
+                         for i in range(1, 6)],
+            "samples": "samples.txt",
+            "covariates": "covariates.csv",
+            "outcome": "outcome.csv",
+            "set_weights": None,
+        }
+        set_ids = np.array(["set_{}".format(i) for i in range(1, 6)])
+
+        # Generating the scripts of two shards
+        jobs = imputed_stats._skat_generate_r_batch_scripts(
+            dir_name=self.output_dir.name,
+            r_files=r_files,
+            set_ids=set_ids,
+            shards=np.array_split(np.arange(5), 2),
+            args=args,
+        )
+        self.assertEqual(2, len(jobs))
+
+        # Checking the shard files
+        for i, expected in enumerate([["set_1", "set_2", "set_3"],
+                                      ["set_4", "set_5"]]):
+            script, results = jobs[i]
+            self.assertEqual(
+                os.path.join(self.output_dir.name,
+                             "run_skat_shard_{}.R".format(i + 1)),
+                script,
+            )
+            shard = pd.read_csv(
+                os.path.join(self.output_dir.name,
+                             "shard_{}.txt".format(i + 1)),
+                sep="\t",
+            )
+            self.assertEqual(expected, list(shard.snp_set_id))
+            self.assertEqual([name + ".genotypes.bin" for name in expected],
+                             list(shard.filename))
+            self.assertEqual(
+                [name + ".genotypes.variants" for name in expected],
+                list(shard.variant_filename),
+            )
+
+            # The script fits the null model once, and writes the results
+            with open(script, "r") as i_file:
+                content = i_file.read()
+            self.assertEqual(1, content.count("SKAT_Null_Model("))
+            self.assertIn('out_type="D"', content)
+            self.assertIn(results, content)
+            self.assertNotIn("all_weights", content)
+
+        # The dosage matrix of every SNP set read by R (samples x variants)
+        sample_filename, filenames, expected = self.write_r_genotypes()
+        r_files["snp_sets"] = filenames
+        r_files["samples"] = sample_filename
+        script, _ = imputed_stats._skat_generate_r_batch_scripts(
+            dir_name=self.output_dir.name,
+            r_files=r_files,
+            set_ids=np.array(["set_1", "set_2"]),
+            shards=[np.arange(2)],
+            args=args,
+        )[0]
+        with open(script, "r") as i_file:
+            content = i_file.read()
+        self.assertIn("dosage <- readBin(\n        snp_sets$filename[i],",
+                      content)
+        self.assertIn("variants <- readLines(snp_sets$variant_filename[i])",
+                      content)
+
+        shard = pd.read_csv(os.path.join(self.output_dir.name, "shard_1.txt"),
+                            sep="\t")
+        self.assertEqual(2, shard.shape[0])
+        for i, expected_df in enumerate(expected):
+            pd.testing.assert_frame_equal(
+                expected_df,
+                self.read_r_dosage(content, shard.filename[i],
+                                   shard.variant_filename[i]),
+            )
+
     @unittest.skip("Test not implemented")
     def test_compute_statistics(self):  # pragma: no cover
         """Tests the 'compute_statistics' function."""
@@ -1360,6 +1658,15 @@ class TestImputedStatsLinear(unittest.TestCase):
         # Making sure the output file exists
         self.assertTrue(os.path.isfile(o_prefix + ".linear.dosage"))
 
+        # Checking the status file
+        with open(o_prefix + ".status.json", "r") as i_file:
+            status = json.load(i_file)
+        self.assertEqual(3, status["sites_read"])
+        self.assertEqual(3, status["sites_processed"])
+        self.assertEqual(status["bytes_total"], status["bytes_read"])
+        self.assertEqual(0, status["eta"])
+        self.assertEqual(1, status["nb_process"])
+
         # Reading the data
         observed = pd.read_csv(o_prefix + ".linear.dosage", sep="\t")
 
@@ -1441,6 +1748,70 @@ class TestImputedStatsLinear(unittest.TestCase):
                                           observed["adj.r-squared"]):
             self.assertAlmostEqual(expected_r, observed_r, places=10)
 
+    @unittest.skipIf(platform.system() == "Darwin",
+                     "multiprocessing not supported with Mac OS")
+    def test_full_fit_linear_profile(self):
+        """Tests the full pipeline for linear regression with profiling."""
+        # Creating the input files
+        o_prefix, options = create_input_files(
+            i_filename=self.data_filename,
+            output_dirname=self.output_dir.name,
+            analysis_type="linear",
+            nb_process=2,
+        )
+        options.append("--profile")
+
+        # Executing the tool
+        try:
+            imputed_stats.main(args=options)
+        finally:
+            clean_logging_handlers()
+
+        # The results are the same
+        observed = pd.read_csv(o_prefix + ".linear.dosage", sep="\t")
+        self.assertEqual((3, 14), observed.shape)
+        self.assertEqual(["marker_1", "marker_2", "marker_3"],
+                         list(observed.snp))
+
+        # Checking the profile
+        profile = pd.read_csv(o_prefix + ".profile.txt", sep="\t")
+        self.assertEqual(["worker", "phase", "nb", "total", "percent", "mean",
+                          "median", "p95", "max"], list(profile.columns))
+
+        # The phases of all the workers (in order)
+        merged = profile[profile.worker == "all"]
+        self.assertEqual(["read", "parse", "merge", "dosage", "formula",
+                          "fit", "write"], list(merged.phase))
+        self.assertEqual([3] * 7, list(merged.nb))
+        self.assertAlmostEqual(100, merged.percent.sum(), delta=0.5)
+
+        # The reading and writing are done by the main process, the rest by
+        # the workers
+        main = profile[profile.worker == "main"]
+        self.assertEqual(["read", "write"], list(main.phase))
+        workers = profile[~profile.worker.isin({"all", "main"})]
+        self.assertEqual(3, workers[workers.phase == "fit"].nb.sum())
+
+    def test_phase_profile(self):
+        """Tests the '_PhaseProfile' class."""
+        profile = imputed_stats._PhaseProfile()
+        for duration in (0.001, 0.002, 0.003, 0.1):
+            profile.add(duration)
+
+        other = imputed_stats._PhaseProfile()
+        other.add(0.5)
+        profile.merge(other)
+
+        self.assertEqual(5, profile.nb)
+        self.assertAlmostEqual(0.606, profile.total)
+        self.assertEqual(0.5, profile.max)
+
+        # The median is in the bin ]2.048, 4.096] ms
+        self.assertEqual(0.004096, profile.get_percentile(50))
+
+        # The maximum is used for the last bin
+        self.assertEqual(0.5, profile.get_percentile(100))
+
     @unittest.skipIf(platform.system() == "Darwin",
                      "multiprocessing not supported with Mac OS")
     def test_full_fit_linear_multiprocess(self):
@@ -1543,6 +1914,61 @@ class TestImputedStatsLinear(unittest.TestCase):
                                           observed["adj.r-squared"]):
             self.assertAlmostEqual(expected_r, observed_r, places=10)
 
+    def test_full_fit_linear_dosage_store(self):
+        """Tests the full pipeline for linear regression (dosage store)."""
+        # Creating the input files
+        o_prefix, options = create_input_files(
+            i_filename=self.data_filename,
+            output_dirname=self.output_dir.name,
+            analysis_type="linear",
+        )
+
+        # Executing the tool on the IMPUTE2 file
+        try:
+            imputed_stats.main(args=options)
+        finally:
+            clean_logging_handlers()
+        expected = pd.read_csv(o_prefix + ".linear.dosage", sep="\t")
+
+        # Creating the dosage store using impute2-extractor
+        prefix = os.path.join(self.output_dir.name, "impute2")
+        os.rename(os.path.join(self.output_dir.name, "samples.txt"),
+                  prefix + ".sample")
+        with open(prefix + ".map", "w") as o_file:
+            for i in range(1, 4):
+                print(22, "marker_{}".format(i), 0, i, sep="\t", file=o_file)
+        extract_filename = os.path.join(self.output_dir.name, "to_extract")
+        with open(extract_filename, "w") as o_file:
+            print("marker_1", "marker_2", "marker_3", sep="\n", file=o_file)
+        try:
+            impute2_extractor.main(args=[
+                "--impute2", prefix + ".txt", "--format", "dosage_bin",
+                "--extract", extract_filename,
+                "--out", os.path.join(self.output_dir.name, "store"),
+            ])
+        finally:
+            clean_logging_handlers()
+
+        # Executing the tool on the dosage store
+        prefix = os.path.join(self.output_dir.name, "store")
+        options[options.index("--impute2") + 1] = prefix + ".dosage.npy"
+        options[options.index("--sample") + 1] = prefix + ".sample"
+        try:
+            imputed_stats.main(args=options)
+        finally:
+            clean_logging_handlers()
+        observed = pd.read_csv(o_prefix + ".linear.dosage", sep="\t")
+
+        # Checking the results are the same (dosage are float16, and the MAF
+        # is computed from the dosage instead of the hard calls)
+        self.assertEqual(list(expected.columns), list(observed.columns))
+        for column in ("chr", "pos", "snp", "major", "minor", "n"):
+            self.assertEqual(list(expected[column]), list(observed[column]))
+        np.testing.assert_allclose(expected.maf, observed.maf, atol=1e-2)
+        for column in ("coef", "se", "lower", "upper", "adj.r-squared"):
+            np.testing.assert_allclose(expected[column], observed[column],
+                                       rtol=1e-2)
+
     def test_full_fit_linear_interaction(self):
         """Tests the full pipeline for linear regression with interaction."""
         # Creating the input files
@@ -3295,6 +3721,41 @@ class TestImputedStatsSkat(unittest.TestCase):
         for expected_q, observed_q in zip(expected, observed.q_value):
             self.assertAlmostEqual(expected_q, observed_q, places=10)
 
+    def test_continuous_batch(self):
+        o_prefix = os.path.join(self.tmp_dir.name, "skat_test_batch")
+        args = self.args + [
+            "--pheno-name", "outcome_continuous",
+            "--outcome-type", "continuous",
+            "--skat-backend", "R-batch",
+            "--nb-process", "2",
+            "--out", o_prefix,
+        ]
+
+        # Executing the tool
+        try:
+            imputed_stats.main(args=args)
+        finally:
+            clean_logging_handlers()
+
+        # The observed values
+        results_filename = o_prefix + ".skat.dosage"
+        observed = pd.read_csv(results_filename, header=0, sep="\t")
+        self.assertEqual((3, 3), observed.shape)
+
+        # The SNP set ID
+        expected = ["set1", "set2", "set3"]
+        for expected_id, observed_id in zip(expected, observed.snp_set_id):
+            self.assertEqual(expected_id, observed_id)
+
+        # The p values and the Q statistics
+        np.testing.assert_allclose(
+            [0.002877041, 0.09319144, 0.002877041], observed.p_value,
+            rtol=1e-6,
+        )
+        np.testing.assert_allclose(
+            [298041.5, 24870.14, 298041.5], observed.q_value, rtol=1e-6,
+        )
+
     @staticmethod
     def setup_skat_files(out_directory):
         """Parses the SKAT example files into the format expected by genipe."""
@@ -3437,3 +3898,137 @@ class TestImputedStatsSkat(unittest.TestCase):
         ]
 
         return args
+
+
+@unittest.skipIf(not skat.HAS_SCIPY, "SciPy is not installed")
+class TestImputedStatsSkatNative(unittest.TestCase):
+
+    tmp_dir = None
+    args = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = TemporaryDirectory(prefix="genipe_test_")
+        cls.args = TestImputedStatsSkat.setup_skat_files(cls.tmp_dir.name)
+        cls.args += ["--skat-backend", "python"]
+
+    @classmethod
+    def tearDownClass(cls):
+        # Cleaning the temporary directory
+        cls.tmp_dir.cleanup()
+
+    def run_skat(self, o_prefix, args):
+        """Runs the SKAT analysis and returns the results."""
+        # Executing the tool
+        try:
+            imputed_stats.main(args=self.args + args + ["--out", o_prefix])
+        finally:
+            clean_logging_handlers()
+
+        # The observed values
+        results_filename = o_prefix + ".skat.dosage"
+        observed = pd.read_csv(results_filename, header=0, sep="\t")
+
+        # The SNP set ID
+        self.assertEqual(["set1", "set2", "set3"],
+                         list(observed.snp_set_id))
+
+        return observed
+
+    def test_skat_run_native_weights(self):
+        """Tests the weights of the variants of each SNP set."""
+        random_state = np.random.RandomState(0)
+        phenotype_df = pd.DataFrame(
+            {"outcome": random_state.normal(size=50)},
+            index=pd.Index(["s{}".format(i) for i in range(50)]),
+        )
+        dosage = random_state.binomial(2, 0.3, size=(3, 50)).astype(float)
+
+        # The genotype files (marker_2 is in both sets, with a different
+        # weight, and it is duplicated in the first set)
+        snp_set = pd.DataFrame({
+            "variant": ["marker_1", "marker_2", "marker_2", "marker_2",
+                        "marker_3"],
+            "snp_set": ["set_1", "set_1", "set_1", "set_2", "set_2"],
+            "weight": [1.0, 2.0, 2.0, 0.5, 3.0],
+        })
+        filenames = []
+        for set_id, rows in (("set_1", [0, 1]), ("set_2", [1, 2])):
+            filename = os.path.join(self.tmp_dir.name,
+                                    "{}.weights.bin".format(set_id))
+            with open(filename, "wb") as o_file:
+                for row in rows:
+                    imputed_stats._skat_write_dosage(dosage[row], o_file)
+            imputed_stats._skat_write_variants(
+                filename, ["marker_{}".format(row + 1) for row in rows],
+            )
+            filenames.append(filename)
+
+        args = Namespace(pheno_name="outcome", covar=[],
+                         outcome_type="continuous", skat_o=False,
+                         nb_process=1)
+        observed = imputed_stats._skat_run_native(phenotype_df, snp_set,
+                                                  filenames, args)
+
+        # The expected values (using the weights of each set)
+        null_model = skat.fit_null_model(phenotype_df.outcome.values, None,
+                                         "continuous")
+        expected = [
+            skat.skat(null_model, dosage[[0, 1]].T, np.array([1.0, 2.0])),
+            skat.skat(null_model, dosage[[1, 2]].T, np.array([0.5, 3.0])),
+        ]
+        self.assertEqual(2, len(observed))
+        for expected_values, observed_values in zip(expected, observed):
+            np.testing.assert_allclose(expected_values, observed_values)
+
+    def test_continuous(self):
+        """Tests the native SKAT (continuous outcome) against SKAT in R."""
+        observed = self.run_skat(
+            os.path.join(self.tmp_dir.name, "skat_test_continuous"),
+            ["--pheno-name", "outcome_continuous",
+             "--outcome-type", "continuous"],
+        )
+        self.assertEqual((3, 3), observed.shape)
+
+        # The p values and the Q statistics (from the SKAT R package)
+        np.testing.assert_allclose(
+            [0.002877041, 0.09319144, 0.002877041], observed.p_value,
+            rtol=1e-5,
+        )
+        np.testing.assert_allclose(
+            [298041.5, 24870.14, 298041.5], observed.q_value, rtol=1e-6,
+        )
+
+    def test_discrete(self):
+        """Tests the native SKAT (discrete outcome) against SKAT in R."""
+        observed = self.run_skat(
+            os.path.join(self.tmp_dir.name, "skat_test_discrete"),
+            ["--pheno-name", "outcome_discrete",
+             "--outcome-type", "discrete", "--nb-process", "2"],
+        )
+        self.assertEqual((3, 3), observed.shape)
+
+        # The p values and the Q statistics (from the SKAT R package)
+        np.testing.assert_allclose(
+            [0.1401991, 0.5868036, 0.1401991], observed.p_value, rtol=1e-5,
+        )
+        np.testing.assert_allclose(
+            [34934.79, 2776.797, 34934.79], observed.q_value, rtol=1e-6,
+        )
+
+    def test_skat_o(self):
+        """Tests the native SKAT-O."""
+        observed = self.run_skat(
+            os.path.join(self.tmp_dir.name, "skat_o_test_continuous"),
+            ["--pheno-name", "outcome_continuous",
+             "--outcome-type", "continuous", "--skat-o"],
+        )
+        self.assertEqual((3, 2), observed.shape)
+
+        # The p values (the 'optimal.adj' method of the SKAT R package). They
+        # are regression values computed using this implementation, since the
+        # SKAT R package was not available to compute them independently.
+        np.testing.assert_allclose(
+            [0.00389036, 0.16282267, 0.00389036], observed.p_value,
+            rtol=1e-6,
+        )
@@ -8,11 +8,20 @@
 
 
 import os
+import sys
 import shutil
 import unittest
+from unittest.mock import patch
+from subprocess import Popen
+from datetime import datetime, timedelta
 from tempfile import TemporaryDirectory
 
-from ..task.launcher import _check_output_files
+from ..db import utils as db
+from ..db.utils import _create_db_connection
+from ..task.launcher import TaskResources, TaskSupervisor, \
+                            get_expected_runtimes, get_output_tail, \
+                            _check_output_files, _check_completed_outputs, \
+                            _wait_command
 
 
 __author__ = "Louis-Philippe Lemieux Perreault"
@@ -61,6 +70,268 @@ class TestLauncher(unittest.TestCase):
         os.remove(filenames[0])
         self.assertFalse(_check_output_files(filenames, "dummy_task_id"))
 
+    def test_check_completed_outputs(self):
+        """Tests the '_check_completed_outputs' function."""
+        db_name = db.create_task_db(self.output_dir.name)
+
+        def _get_filename(name):
+            return os.path.join(self.output_dir.name, name)
+
+        # A task with its two files, a task with a missing IMPUTE2 file (which
+        # is explained by its summary), a task with a missing file and a task
+        # which wasn't completed
+        for name in ("a_1.txt", "a_2.txt", "d.txt"):
+            with open(_get_filename(name), "w"):
+                pass
+        with open(_get_filename("b.impute2_summary"), "w") as o_file:
+            print(" There are no SNPs in the imputation interval, so there is "
+                  "nothing for IMPUTE2 to analyze; the program will quit now.",
+                  file=o_file)
+        tasks = [
+            {"task_id": "a", "o_files": [_get_filename("a_1.txt"),
+                                         _get_filename("a_2.txt")]},
+            {"task_id": "b", "o_files": [_get_filename("b.impute2")]},
+            {"task_id": "c", "o_files": [_get_filename("c.txt")]},
+            {"task_id": "d", "o_files": [_get_filename("d.txt")]},
+        ]
+        for task in tasks:
+            task["task_db"] = db_name
+        completed = {"a": 1, "b": 1, "c": 1}
+
+        self.assertEqual({"a", "b"}, _check_completed_outputs(tasks,
+                                                              completed))
+
+        # The validated files were saved
+        validated = db.get_validated_outputs(
+            [filename for task in tasks for filename in task["o_files"]],
+            db_name,
+        )
+        self.assertEqual(
+            [_get_filename(name) for name in ("a_1.txt", "a_2.txt",
+                                              "b.impute2")],
+            sorted(validated.keys()),
+        )
+        self.assertEqual(_get_filename("b.impute2_summary"),
+                         validated[_get_filename("b.impute2")][0])
+
+        # The unchanged files are not validated again
+        with patch("genipe.task.launcher._check_impute2_file",
+                   return_value=False) as mock_check:
+            self.assertEqual({"a", "b"}, _check_completed_outputs(tasks,
+                                                                  completed))
+            mock_check.assert_not_called()
+
+            # Modifying the summary file (which needs to be validated again)
+            with open(_get_filename("b.impute2_summary"), "a") as o_file:
+                print("Something else", file=o_file)
+            self.assertEqual({"a"}, _check_completed_outputs(tasks,
+                                                             completed))
+            mock_check.assert_called_once_with(_get_filename("b.impute2"),
+                                               "b")
+
+        # Deleting a file (the summary file is still valid)
+        os.remove(_get_filename("a_2.txt"))
+        self.assertEqual({"b"}, _check_completed_outputs(tasks, completed))
+
+    def test_wait_command(self):
+        """Tests the '_wait_command' function."""
+        # A command using 50 MB of memory and some CPU time
+        proc = Popen([sys.executable, "-c",
+                      "import sys\n"
+                      "data = bytearray(50 * 1024**2)\n"
+                      "sum(range(10**6))\n"
+                      "sys.exit(3)\n"])
+        rc, resources = _wait_command(proc)
+        self.assertEqual(3, rc)
+        self.assertEqual(3, proc.returncode)
+        self.assertEqual(
+            {"exit_status", "max_rss", "user_time", "system_time",
+             "read_bytes", "write_bytes"},
+            set(resources.keys()),
+        )
+        self.assertEqual(3, resources["exit_status"])
+        self.assertGreater(resources["max_rss"], 50 * 1024)
+        self.assertGreater(resources["user_time"] + resources["system_time"],
+                           0)
+
+        # A killed command
+        proc = Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        proc.kill()
+        rc, resources = _wait_command(proc)
+        self.assertLess(rc, 0)
+        self.assertEqual(rc, resources["exit_status"])
+
+        # A command that was already reaped
+        proc = Popen([sys.executable, "-c", "pass"])
+        proc.wait()
+        self.assertEqual((0, {"exit_status": 0}), _wait_command(proc))
+
+    def test_get_expected_runtimes(self):
+        """Tests the 'get_expected_runtimes' function."""
+        db_name = db.create_task_db(self.output_dir.name)
+
+        # The tasks (with their size)
+        tasks = [
+            {"task_id": "impute2_chr1_1_10", "size": 10},
+            {"task_id": "impute2_chr1_11_20", "size": 30},
+            {"task_id": "impute2_chr2_1_10", "size": 20},
+            {"task_id": "shapeit_phase_chr1", "size": 40},
+            {"task_id": "shapeit_phase_chr2", "size": 10},
+            {"task_id": "plink_missing_rate"},
+        ]
+        for task in tasks:
+            task["task_db"] = db_name
+
+        # Nothing was executed (the size is the execution time)
+        self.assertEqual(
+            {"impute2_chr1_1_10": 10, "impute2_chr1_11_20": 30,
+             "impute2_chr2_1_10": 20, "shapeit_phase_chr1": 40,
+             "shapeit_phase_chr2": 10, "plink_missing_rate": 1},
+            get_expected_runtimes(tasks),
+        )
+
+        # Some of the tasks were executed
+        conn, c = _create_db_connection(db_name)
+        start = datetime.now()
+        for task_id, runtime in (("impute2_chr1_1_10", 50),
+                                 ("impute2_chr1_11_20", 250),
+                                 ("shapeit_phase_chr1", 1000)):
+            c.execute("INSERT INTO genipe_task (name, start, end, completed) "
+                      "VALUES (?, ?, ?, 1)",
+                      (task_id, start, start + timedelta(seconds=runtime)))
+        conn.commit()
+        conn.close()
+
+        # The execution time per marker is 7.5 seconds for IMPUTE2, and 25
+        # seconds for SHAPEIT (the default is 1300 / 80 seconds)
+        self.assertEqual(
+            {"impute2_chr1_1_10": 50, "impute2_chr1_11_20": 250,
+             "impute2_chr2_1_10": 150, "shapeit_phase_chr1": 1000,
+             "shapeit_phase_chr2": 250, "plink_missing_rate": 16.25},
+            get_expected_runtimes(tasks),
+        )
+
+    def test_task_resources(self):
+        """Tests the 'TaskResources' class."""
+        resources = TaskResources(4, max_memory=10)
+        phasing = {"threads": 4}
+        impute2 = {"memory": 6}
+
+        # Any task fits when nothing is running
+        self.assertTrue(resources.fits({"threads": 8, "memory": 20}))
+        self.assertEqual((4, 10),
+                         resources.get_requirements({"threads": 8,
+                                                     "memory": 20}))
+
+        # The IMPUTE2 task uses 6 GB
+        resources.acquire(impute2)
+        self.assertFalse(resources.fits(impute2))
+        self.assertFalse(resources.fits(phasing))
+        self.assertTrue(resources.fits({}))
+        self.assertTrue(resources.fits({"threads": 3, "memory": 4}))
+
+        # Once released, all the resources are available
+        resources.release(impute2)
+        self.assertEqual((0, 0, 0), (resources.nb_running,
+                                     resources.used_threads,
+                                     resources.used_memory))
+        resources.acquire(phasing)
+        self.assertFalse(resources.fits({}))
+        resources.release(phasing)
+
+        # Memory isn't considered if there is no limit
+        resources = TaskResources(4)
+        resources.acquire(impute2)
+        self.assertTrue(resources.fits(impute2))
+
+        # On a cluster, each task is a single job
+        resources = TaskResources(2, max_memory=1, hpc=True)
+        resources.acquire(phasing)
+        self.assertTrue(resources.fits(impute2))
+        resources.acquire(impute2)
+        self.assertFalse(resources.fits({}))
+
+    def test_task_supervisor(self):
+        """Tests the 'TaskSupervisor' class."""
+        db_name = db.create_task_db(self.output_dir.name)
+
+        def get_task(name, script):
+            o_file = os.path.join(self.output_dir.name, name + ".txt")
+            return {
+                "task_id": name, "name": "task " + name, "task_db": db_name,
+                "command": [sys.executable, "-c",
+                            script.format(o_file=o_file)],
+                "o_files": [o_file], "check_retcode": True,
+            }
+
+        # A slow task, a task failing and a task without output file
+        supervisor = TaskSupervisor()
+        supervisor.submit(get_task(
+            "slow", "import time; time.sleep(1); open({o_file!r}, 'w')",
+        ))
+        supervisor.submit(get_task(
+            "fail", "import sys; open({o_file!r}, 'w'); sys.exit(1)",
+        ))
+        supervisor.submit(get_task("no_output", "pass"))
+        self.assertEqual(3, supervisor.nb_running)
+
+        # The tasks are reaped in the order they finish
+        finished = {}
+        for i in range(3):
+            task, result = supervisor.wait()
+            finished[task["task_id"]] = result[:3]
+        self.assertEqual(0, supervisor.nb_running)
+        self.assertEqual("slow", task["task_id"])
+        self.assertEqual(
+            {"slow": (True, "task slow", "performed"),
+             "fail": (False, "task fail", "problem"),
+             "no_output": (False, "task no_output", "problem")},
+            finished,
+        )
+
+        # A completed task isn't executed again
+        supervisor.submit(get_task("slow", "import sys; sys.exit(1)"))
+        self.assertEqual((True, "task slow", "already performed"),
+                         supervisor.wait()[1][:3])
+
+        # Unless its completion was already checked by the caller (the task DB
+        # isn't queried again)
+        task = get_task("slow", "open({o_file!r}, 'w')")
+        task["completion_checked"] = True
+        with patch("genipe.task.launcher.db.check_task_completion") as mock:
+            supervisor.submit(task)
+            self.assertEqual((True, "task slow", "performed"),
+                             supervisor.wait()[1][:3])
+        mock.assert_not_called()
+
+        # Terminating the running tasks
+        supervisor.submit(get_task(
+            "long", "import time; time.sleep(60); open({o_file!r}, 'w')",
+        ))
+        supervisor.terminate()
+        task, result = supervisor.wait()
+        self.assertEqual((False, "task long", "problem"), result[:3])
+
+    def test_get_output_tail(self):
+        """Tests the 'get_output_tail' function."""
+        log_fn = os.path.join(self.output_dir.name, "task.log")
+
+        # The file doesn't exist
+        self.assertEqual([], get_output_tail(log_fn))
+        self.assertEqual([], get_output_tail(None))
+
+        with open(log_fn, "w") as o_file:
+            for i in range(1, 101):
+                print("line {:03d}".format(i), file=o_file)
+
+        # The last lines
+        self.assertEqual(["line 099", "line 100"],
+                         get_output_tail(log_fn, nb_lines=2))
+
+        # Only the end of the file is read (the incomplete line is skipped)
+        self.assertEqual(["line 099", "line 100"],
+                         get_output_tail(log_fn, max_size=20))
+
     @unittest.skip("Test not implemented")
     def test_check_missing_impute2(self):
         """Tests the '_check_output_files' for missing impute2 file."""
@@ -8,15 +8,23 @@
 
 
 import os
+import json
 import unittest
 from random import randint
+from unittest.mock import patch
+from argparse import Namespace
 from tempfile import TemporaryDirectory
 
-from .. import autosomes
+import numpy as np
+import pandas as pd
+
+from .. import autosomes, HAS_PYFAIDX
 from ..pipeline import cli
+from ..db import utils as db
 from ..error import GenipeError
+from ..formats.reference import ReferenceCache
 
-if cli.HAS_PYFAIDX:
+if HAS_PYFAIDX:
     import pyfaidx
 
 
@@ -219,7 +227,115 @@ class TestMainPipeline(unittest.TestCase):
         # Testing the content
         self.assertEqual(expected_chrom, chrom_length)
 
-    @unittest.skipIf(not cli.HAS_PYFAIDX,
+    def test_get_reference_panel_size(self):
+        """Tests the 'get_reference_panel_size' function."""
+        # Creating the reference files (four haplotypes, five variants)
+        hap_fn = os.path.join(self.output_dir.name, "chr1.hap")
+        with open(hap_fn, "w") as o_file:
+            for i in range(5):
+                print("0 1 0 0", file=o_file)
+
+        legend_fn = os.path.join(self.output_dir.name, "chr1.legend")
+        with open(legend_fn, "w") as o_file:
+            print("id position a0 a1", file=o_file)
+            for position in (500, 100, 300000, 200, 900000):
+                print("rs{}".format(position), position, "A", "G",
+                      file=o_file)
+
+        nb_haplotypes, positions = cli.get_reference_panel_size(hap_fn,
+                                                                legend_fn)
+        self.assertEqual(4, nb_haplotypes)
+        self.assertEqual([100, 200, 500, 300000, 900000], list(positions))
+
+        # The memory (the segment and its buffer contain four variants)
+        self.assertAlmostEqual(
+            0.1 + 4 * 4 * 4 / 1024**3,
+            cli.estimate_impute2_memory(nb_haplotypes, positions, 1, 50000),
+        )
+
+        # Without the buffer, only three variants
+        self.assertAlmostEqual(
+            0.1 + 4 * 3 * 4 / 1024**3,
+            cli.estimate_impute2_memory(nb_haplotypes, positions, 1, 50000,
+                                        buffer=0),
+        )
+
+    def test_get_adaptive_segments(self):
+        """Tests the 'get_adaptive_segments' function."""
+        # A dense region (from 1 to 1 Mb), a gap, and a sparse region (from 3
+        # to 7 Mb)
+        ref_positions = np.concatenate([
+            np.arange(100, 1000001, 100), np.arange(3000000, 7000001, 4000),
+        ])
+        study_positions = ref_positions[::10]
+
+        # Two segments (as the region is 7 Mb long), plus the gap
+        segments = cli.get_adaptive_segments(ref_positions, study_positions,
+                                             segment_length=3.5e6)
+        self.assertEqual(
+            [(100, 550000), (550100, 1000000), (3000000, 7000000)],
+            segments,
+        )
+
+        # All the variants are in a segment
+        nb_variants = sum(
+            ((ref_positions >= start) & (ref_positions <= end)).sum()
+            for start, end in segments
+        )
+        self.assertEqual(len(ref_positions), nb_variants)
+
+        # Segments that are too long (more than the segment length) are split
+        self.assertEqual(
+            [(100, 550000), (550100, 1000000), (3000000, 6496000),
+             (6500000, 7000000)],
+            cli.get_adaptive_segments(ref_positions, study_positions,
+                                      segment_length=3.5e6,
+                                      max_length=2000000),
+        )
+
+        # No variants
+        self.assertEqual([], cli.get_adaptive_segments(np.array([]),
+                                                       np.array([]), 5e6))
+
+    def test_find_empty_segments(self):
+        """Tests the 'find_empty_segments' function."""
+        ref_positions = np.array([100, 200, 1000, 2000, 5000, 9000])
+        study_positions = np.array([150, 200, 2000, 8000])
+        segments = [(1, 999), (1000, 1999), (2001, 3000), (3001, 4000),
+                    (6000, 8500)]
+
+        # Without any buffer (the third segment has no reference variant, the
+        # last one has no genotyped marker in the reference)
+        self.assertEqual(
+            [False, True, True, True, True],
+            cli.find_empty_segments(segments, study_positions, ref_positions,
+                                    buffer=0),
+        )
+
+        # With a buffer, the markers around the segment are used (but the
+        # segments without reference variants are still empty)
+        self.assertEqual(
+            [False, False, True, True, True],
+            cli.find_empty_segments(segments, study_positions, ref_positions,
+                                    buffer=1000),
+        )
+
+    def test_get_impute2_buffer(self):
+        """Tests the 'get_impute2_buffer' function."""
+        class Dummy(object):
+            pass
+
+        options = Dummy()
+        options.impute2_extra = None
+        self.assertEqual(250000, cli.get_impute2_buffer(options))
+
+        options.impute2_extra = ["-Ne", "20000"]
+        self.assertEqual(250000, cli.get_impute2_buffer(options))
+
+        options.impute2_extra = ["-buffer", "500", "-Ne", "20000"]
+        self.assertEqual(500000, cli.get_impute2_buffer(options))
+
+    @unittest.skipIf(not HAS_PYFAIDX,
                      "optional requirement (pyfaidx) not satisfied")
     def test_get_chrom_encoding(self):
         """Tests the 'get_chrom_encoding' function."""
@@ -379,7 +495,7 @@ class TestMainPipeline(unittest.TestCase):
         self.assertEqual(log_m, cm.output)
         reference.close()
 
-    @unittest.skipIf(not cli.HAS_PYFAIDX,
+    @unittest.skipIf(not HAS_PYFAIDX,
                      "optional requirement (pyfaidx) not satisfied")
     def test_is_reversed(self):
         """Tests the 'is_reversed' function."""
@@ -450,21 +566,371 @@ class TestMainPipeline(unittest.TestCase):
         # Closing the reference
         reference.close()
 
+    def _create_reference(self):
+        """Creates a small reference (with its index)."""
+        fasta_content = (
+            ">1\n"
+            "ACGT\n"
+            ">2\n"
+            "ACGT\n"
+            ">3\n"
+            "acgt\n"
+        )
+        index_content = (
+            "1\t4\t3\t4\t5\n"
+            "2\t4\t11\t4\t5\n"
+            "3\t4\t19\t4\t5\n"
+        )
+        reference_filename = os.path.join(self.output_dir.name, "ref.fasta")
+        with open(reference_filename, "w") as o_file:
+            o_file.write(fasta_content)
+        with open(reference_filename + ".fai", "w") as o_file:
+            o_file.write(index_content)
+        return reference_filename
+
+    def test_find_reversed_markers(self):
+        """Tests the 'find_reversed_markers' function."""
+        reference_filename = self._create_reference()
+        reference = ReferenceCache(reference_filename)
+        encoding = {"1": "1", "2": "2", "3": "3"}
+
+        # The same markers as for 'is_reversed' (in a random order)
+        markers = pd.DataFrame(
+            [("1", "m1", "1", "I", "D", False),
+             ("1", "m2", "4", "A", "C", True),
+             ("1", "m3", "1", "Z", "A", False),
+             ("3", "m4", "2", "g", "c", False),
+             ("1", "m5", "1", "A", "K", False),
+             ("2", "m6", "2", "t", "g", True),
+             ("23", "m7", "1", "A", "C", False),
+             ("1", "m8", "100", "A", "C", False),
+             ("1", "m9", "1", "T", "G", True),
+             ("1", "m10", "3", "G", "T", False),
+             ("3", "m11", "3", "T", "C", True),
+             ("2", "m12", "4", "G", "T", False)],
+            columns=["chrom", "name", "pos", "a1", "a2", "expected"],
+        )
+        observed = cli.find_reversed_markers(markers, reference, encoding)
+        self.assertEqual(list(markers.expected), list(observed))
+
+        # Same results as 'is_reversed'
+        if HAS_PYFAIDX:
+            fasta = pyfaidx.Fasta(reference_filename, as_raw=True)
+            for chrom, name, pos, a1, a2, expected in markers.values:
+                self.assertEqual(expected, cli.is_reversed(
+                    chrom, int(pos), a1, a2, fasta, encoding,
+                ))
+            fasta.close()
+
+        # Alleles that can't be checked (same alleles)
+        markers = pd.DataFrame(
+            [("1", "m1", "1", "T", "G"), ("2", "m2", "3", "A", "A")],
+            columns=["chrom", "name", "pos", "a1", "a2"],
+        )
+        with self.assertRaises(GenipeError) as cm:
+            cli.find_reversed_markers(markers, reference, encoding)
+        self.assertEqual("chr2: 3: G: A/A: invalid", cm.exception.message)
+
+        reference.close()
+
+    def test_find_exclusion_before_phasing(self):
+        """Tests the 'find_exclusion_before_phasing' function."""
+        prefix = os.path.join(self.output_dir.name, "input")
+        with open(prefix + ".fam", "w") as o_file:
+            for i in range(3):
+                print("f{}".format(i), "s{}".format(i), 0, 0, 1, -9,
+                      file=o_file)
+
+        # The markers (ambiguous, duplicated, special and to flip)
+        bim_content = [
+            ("1", "m1", "1", "A", "C"),   # kept
+            ("1", "m2", "2", "A", "T"),   # ambiguous
+            ("1", "m3", "2", "T", "G"),   # kept, flipped
+            ("1", "m4", "2", "A", "G"),   # duplicated
+            ("1", "m5", "1", "G", "C"),   # ambiguous (at a kept position)
+            ("24", "m6", "1", "A", "C"),  # special
+            ("24", "m7", "1", "A", "C"),  # special, duplicated
+            ("26", "m8", "5", "C", "G"),  # special, ambiguous
+            ("2", "m9", "1", "T", "G"),   # kept, flipped
+        ]
+        with open(prefix + ".bim", "w") as o_file:
+            for chrom, name, pos, a1, a2 in bim_content:
+                print(chrom, name, 0, pos, a1, a2, sep="\t", file=o_file)
+
+        db_name = db.create_task_db(self.output_dir.name)
+        options = Namespace(out_dir=self.output_dir.name,
+                            reference=self._create_reference())
+        try:
+            with self.assertLogs(level="INFO"):
+                observed = cli.find_exclusion_before_phasing(prefix, db_name,
+                                                             options)
+        finally:
+            db.close_task_db(db_name)
+
+        expected = {
+            "initial_nb_markers": "9",
+            "initial_nb_samples": "3",
+            "nb_ambiguous": "2",
+            "nb_duplicates": "1",
+            "nb_special_markers": "3",
+            "nb_flip_reference": "2",
+            "reference_checked": True,
+        }
+        self.assertEqual(expected, observed)
+
+        # The markers to exclude and to flip (in order)
+        filename = os.path.join(self.output_dir.name, "markers_to_exclude.txt")
+        with open(filename, "r") as i_file:
+            self.assertEqual(["m2", "m4", "m5", "m7", "m8"],
+                             i_file.read().splitlines())
+        filename = os.path.join(self.output_dir.name, "markers_to_flip.txt")
+        with open(filename, "r") as i_file:
+            self.assertEqual(["m3", "m9"], i_file.read().splitlines())
+
+        # The reference was cached (next to the FASTA file)
+        self.assertTrue(os.path.isfile(os.path.join(
+            options.reference + ".genipe_cache", "manifest.json",
+        )))
+
     @unittest.skip("Test not implemented")
     def test_read_preamble(self):
         """Tests the 'read_preamble' function."""
         self.fail("Test not implemented")
 
-    @unittest.skip("Test not implemented")
+    def _create_summary(self, filename, nb_genotypes, table=None):
+        """Creates an IMPUTE2 summary file (cross-validation)."""
+        header = ("  Interval  #Genotypes %Concordance         Interval  "
+                  "%Called %Concordance")
+        with open(filename, "w") as o_file:
+            print("-Imputation accuracy assessment", file=o_file)
+            if nb_genotypes is None:
+                return
+            print("In the current analysis, IMPUTE2 masked, imputed, and "
+                  "evaluated {} genotypes that were called with high "
+                  "confidence\n".format(nb_genotypes), file=o_file)
+            print(header, file=o_file)
+            for i, row in enumerate(table):
+                nb_geno, concordance, called, cumm_concordance = row
+                print("  [{:.1f}-{:.1f}]".format(i / 10, (i + 1) / 10),
+                      nb_geno, concordance, "[ >= {:.1f}]".format(i / 10),
+                      called, cumm_concordance, file=o_file)
+
     def test_get_cross_validation_results(self):
         """Tests the 'get_cross_validation_results' function."""
-        self.fail("Test not implemented")
+        pattern = os.path.join(self.output_dir.name, "chr{chrom}",
+                               "chr{chrom}.*.impute2_summary")
+        for chrom in ("1", "2", "25_1", "25_2"):
+            os.mkdir(os.path.join(self.output_dir.name, "chr" + chrom))
+
+        def summary_name(chrom, i):
+            return pattern.format(chrom=chrom).replace("*", str(i))
+
+        # Two segments for chromosome 1 (only the last interval has data)
+        table = [(0, 0.0, 100.0, 90.0)] * 9
+        self._create_summary(summary_name("1", 1), 100,
+                             table + [(100, 90.0, 100.0, 90.0)])
+        self._create_summary(summary_name("1", 2), 300,
+                             table + [(200, 50.0, 50.0, 80.0)])
+
+        # No genotypes and no cross-validation for chromosome 2
+        self._create_summary(summary_name("2", 1), 0, table)
+        self._create_summary(summary_name("2", 2), None)
+
+        # The two pseudo-autosomal regions are merged
+        self._create_summary(summary_name("25_1", 1), 10,
+                             table + [(10, 100.0, 100.0, 100.0)])
+        self._create_summary(summary_name("25_2", 1), 30,
+                             table + [(30, 0.0, 100.0, 50.0)])
+
+        with self.assertLogs(level="INFO"):
+            observed = cli.get_cross_validation_results(
+                ("1", "2", "25_1", "25_2"), pattern,
+            )
+
+        self.assertEqual(440, observed["cross_validation_final_nb_genotypes"])
+        self.assertEqual({"1": 400, "2": 0, 25: 40},
+                         observed["cross_validation_nb_genotypes_chrom"])
+
+        # Chromosome 1 (weighted by the number of genotypes)
+        table_1 = observed["cross_validation_table_1_chrom"]["1"]
+        self.assertEqual(["[0.0-0.1]", "0", "0.0"], table_1[0])
+        self.assertEqual(["[0.9-1.0]", "300", "63.3"], table_1[-1])
+        table_2 = observed["cross_validation_table_2_chrom"]["1"]
+        self.assertEqual(["[>=0.0]", "100.0", "90.0"], table_2[0])
+        self.assertEqual(["[>=0.9]", "62.5", "84.0"], table_2[-1])
+
+        # Chromosome 2 (no data)
+        self.assertEqual(
+            ["[0.9-1.0]", "0", "0.0"],
+            observed["cross_validation_table_1_chrom"]["2"][-1],
+        )
+        self.assertEqual(
+            ["[>=0.9]", "0.0", "0.0"],
+            observed["cross_validation_table_2_chrom"]["2"][-1],
+        )
+
+        # The pseudo-autosomal regions
+        self.assertEqual(["[0.9-1.0]", "40", "25.0"],
+                         observed["cross_validation_table_1_chrom"][25][-1])
+        self.assertEqual(["[>=0.9]", "100.0", "62.5"],
+                         observed["cross_validation_table_2_chrom"][25][-1])
+
+        # All the chromosomes
+        self.assertEqual(10, len(observed["cross_validation_table_1"]))
+        self.assertEqual(["[0.9-1.0]", "340", "58.8"],
+                         observed["cross_validation_table_1"][-1])
+        self.assertEqual(["[>=0.9]", "65.9", "81.0"],
+                         observed["cross_validation_table_2"][-1])
 
     @unittest.skip("Test not implemented")
     def test_gather_imputation_stats(self):
         """Tests the 'gather_imputation_stats' function."""
         self.fail("Test not implemented")
 
+    @patch.object(cli, "HAS_MATPLOTLIB", False)
+    def test_gather_stats_from_merge_stats(self):
+        """Tests the gathering of statistics using the merger's summary."""
+        filename_template = os.path.join(self.output_dir.name, "chr{chrom}",
+                                         "final_impute2",
+                                         "chr{chrom}.imputed.stats.json")
+        all_stats = {
+            "1": {"nb_sites": 10, "sum_completion_rates": 9.5,
+                  "nb_good_sites": 8, "sum_good_completion_rates": 7.9,
+                  "nb_imputed_sites": 8,
+                  "genotyped_nb_missing": {"m1": 0, "m2": 1},
+                  "maf": {"bins": {"lt_01": 1, "geq_01_lt_05": 2,
+                                   "geq_05": 4},
+                          "nb_nan": 1, "min": ["m3", 0.001],
+                          "max": ["m4", 0.45]}},
+            "2": {"nb_sites": 10, "sum_completion_rates": 8.5,
+                  "nb_good_sites": 2, "sum_good_completion_rates": 2,
+                  "nb_imputed_sites": 9,
+                  "genotyped_nb_missing": {"m5": 2},
+                  "maf": {"bins": {"lt_01": 0, "geq_01_lt_05": 0,
+                                   "geq_05": 2},
+                          "nb_nan": 0, "min": ["m6", 0.1],
+                          "max": ["m7", 0.2]}},
+        }
+        thresholds = {"probability": 0.9, "completion": 0.98, "info": 0}
+        for chrom, stats in all_stats.items():
+            stats["chrom"] = chrom
+            stats["thresholds"] = thresholds
+            filename = filename_template.format(chrom=chrom)
+            os.makedirs(os.path.dirname(filename))
+            with open(filename, "w") as o_file:
+                json.dump(stats, o_file)
+
+        # The imputation statistics
+        missing = pd.DataFrame({"SNP": ["m1", "m2", "m5", "m8"],
+                                "N_MISS": [1, 2, 3, 4]})
+        with self.assertLogs(level="INFO"):
+            observed = cli.gather_imputation_stats(
+                required_chrom=("1", "2"), prob_t=0.9, completion_t=0.98,
+                info_t=0, nb_samples=10, missing=missing,
+                o_dir=self.output_dir.name,
+            )
+        self.assertEqual("20", observed["nb_imputed"])
+        self.assertEqual("90.0", observed["average_comp_rate"])
+        self.assertEqual("10", observed["nb_good_sites"])
+        self.assertEqual("50.0", observed["pct_good_sites"])
+        self.assertEqual("99.0", observed["average_comp_rate_cleaned"])
+        self.assertEqual("3", observed["nb_genotyped"])
+        self.assertEqual("3", observed["nb_genotyped_not_complete"])
+        self.assertEqual("6", observed["nb_missing_geno"])
+        self.assertEqual("3", observed["nb_geno_now_complete"])
+        self.assertEqual("1", observed["nb_site_now_complete"])
+
+        # The MAF statistics (with a warning for the NaN MAF)
+        with self.assertLogs(level="WARNING") as cm:
+            observed = cli.gather_maf_stats(
+                required_chrom=("1", "2"), prob_t=0.9, completion_t=0.98,
+                info_t=0, o_dir=self.output_dir.name,
+            )
+        self.assertEqual(
+            ["WARNING:root:chr1: good sites with invalid MAF (NaN)"],
+            cm.output,
+        )
+        self.assertEqual("1", observed["nb_maf_nan"])
+        self.assertEqual("9", observed["nb_marker_with_maf"])
+        self.assertEqual("8", observed["nb_maf_geq_01"])
+        self.assertEqual("6", observed["nb_maf_geq_05"])
+        self.assertEqual("3", observed["nb_maf_lt_05"])
+        self.assertEqual("1", observed["nb_maf_lt_01"])
+        self.assertEqual("2", observed["nb_maf_geq_01_lt_05"])
+
+        # An invalid MAF
+        all_stats["2"]["maf"]["max"] = ["m7", 0.6]
+        with open(filename_template.format(chrom="2"), "w") as o_file:
+            json.dump(all_stats["2"], o_file)
+        with self.assertRaises(GenipeError) as cm:
+            cli.gather_maf_stats(required_chrom=("2", ), prob_t=0.9,
+                                 completion_t=0.98, info_t=0,
+                                 o_dir=self.output_dir.name)
+        self.assertEqual("m7: 0.6: invalid MAF", str(cm.exception))
+
+    def test_gather_stats_from_other_merge_stats(self):
+        """Tests the merger's summary computed using other parameters."""
+        filename = os.path.join(self.output_dir.name, "chr1", "final_impute2",
+                                "chr1.imputed.stats.json")
+        os.makedirs(os.path.dirname(filename))
+        stats = {"chrom": "1",
+                 "thresholds": {"probability": 0.9, "completion": 0.98,
+                                "info": 0},
+                 "nb_sites": 10, "sum_completion_rates": 9.5,
+                 "nb_good_sites": 8, "sum_good_completion_rates": 7.9,
+                 "nb_imputed_sites": 8,
+                 "genotyped_nb_missing": {"m1": 0, "m2": 1},
+                 "maf": {"bins": {"lt_01": 1, "geq_01_lt_05": 2, "geq_05": 4},
+                         "nb_nan": 0, "min": ["m3", 0.001],
+                         "max": ["m4", 0.45]}}
+
+        # The statistics computed from the merged files (mocked)
+        file_stats = {"nb_sites": 4, "sum_completion_rates": 4,
+                      "nb_good_sites": 4, "sum_good_completion_rates": 4,
+                      "nb_imputed_sites": 4,
+                      "genotyped_nb_missing": {"m1": 0, "m2": 1}}
+        missing = pd.DataFrame({"SNP": ["m1", "m2"], "N_MISS": [1, 2]})
+
+        # Other thresholds, or another chromosome
+        for key, value in (("probability", 0.8), ("completion", 0.9),
+                           ("info", 0.4), ("chrom", "2"), ("chrom", None),
+                           ("thresholds", None)):
+            other_stats = json.loads(json.dumps(stats))
+            if key in other_stats:
+                other_stats[key] = value
+            else:
+                other_stats["thresholds"][key] = value
+            with open(filename, "w") as o_file:
+                json.dump(other_stats, o_file)
+
+            # The imputation statistics are computed from the merged files
+            with patch.object(cli, "get_merge_stats_from_files",
+                              return_value=file_stats) as mock_get, \
+                    self.assertLogs(level="WARNING") as cm:
+                observed = cli.gather_imputation_stats(
+                    required_chrom=("1", ), prob_t=0.9, completion_t=0.98,
+                    info_t=0, nb_samples=10, missing=missing,
+                    o_dir=self.output_dir.name,
+                )
+            self.assertEqual(1, mock_get.call_count)
+            self.assertEqual("4", observed["nb_imputed"])
+            self.assertEqual(1, len(cm.output))
+            self.assertTrue(cm.output[0].startswith(
+                "WARNING:root:{}: summary statistics were computed for "
+                "chromosome ".format(filename),
+            ))
+
+            # The MAF statistics are computed from the merged files (which
+            # don't exist)
+            with self.assertRaises(GenipeError) as cm, \
+                    self.assertLogs(level="WARNING"):
+                cli.gather_maf_stats(required_chrom=("1", ), prob_t=0.9,
+                                     completion_t=0.98, info_t=0,
+                                     o_dir=self.output_dir.name)
+            self.assertTrue(str(cm.exception).endswith(
+                "chr1.imputed.maf: no such file",
+            ))
+
     def test_gather_maf_stats(self):
         """Tests the 'gather_maf_stats' function."""
         # Creating one file per chromosome with two markers in each
@@ -585,6 +1051,9 @@ class TestMainPipeline(unittest.TestCase):
         # Executing the command (getting the observed data)
         observed = cli.gather_maf_stats(
             required_chrom=autosomes,
+            prob_t=0.9,
+            completion_t=0.98,
+            info_t=0,
             o_dir=self.output_dir.name,
         )
 
@@ -611,6 +1080,9 @@ class TestMainPipeline(unittest.TestCase):
         with self.assertRaises(GenipeError) as cm:
             cli.gather_maf_stats(
                 required_chrom=autosomes,
+                prob_t=0.9,
+                completion_t=0.98,
+                info_t=0,
                 o_dir=self.output_dir.name,
             )
         self.assertEqual("{}: {}: invalid MAF".format("marker_1",
@@ -627,6 +1099,9 @@ class TestMainPipeline(unittest.TestCase):
         with self.assertRaises(GenipeError) as cm:
             cli.gather_maf_stats(
                 required_chrom=autosomes,
+                prob_t=0.9,
+                completion_t=0.98,
+                info_t=0,
                 o_dir=self.output_dir.name,
             )
         self.assertEqual("{}: {}: invalid MAF".format("marker_1",
@@ -643,6 +1118,9 @@ class TestMainPipeline(unittest.TestCase):
         with self.assertLogs(level="WARNING") as cm:
             cli.gather_maf_stats(
                 required_chrom=autosomes,
+                prob_t=0.9,
+                completion_t=0.98,
+                info_t=0,
                 o_dir=self.output_dir.name,
             )
         log_m = "WARNING:root:chr1: good sites with invalid MAF (NaN)"
@@ -660,6 +1138,9 @@ class TestMainPipeline(unittest.TestCase):
         with self.assertLogs(level="WARNING") as cm:
             cli.gather_maf_stats(
                 required_chrom=autosomes,
+                prob_t=0.9,
+                completion_t=0.98,
+                info_t=0,
                 o_dir=self.output_dir.name,
             )
         log_m = ("WARNING:root:There were no marker with MAF (something went "
@@ -677,6 +1158,9 @@ class TestMainPipeline(unittest.TestCase):
         with self.assertRaises(GenipeError) as cm:
             cli.gather_maf_stats(
                 required_chrom=autosomes,
+                prob_t=0.9,
+                completion_t=0.98,
+                info_t=0,
                 o_dir=self.output_dir.name,
             )
         self.assertEqual("{}: no such file".format(removed_filename),
@@ -691,6 +1175,9 @@ class TestMainPipeline(unittest.TestCase):
         with self.assertRaises(GenipeError) as cm:
             cli.gather_maf_stats(
                 required_chrom=autosomes,
+                prob_t=0.9,
+                completion_t=0.98,
+                info_t=0,
                 o_dir=self.output_dir.name,
             )
         self.assertEqual("{}: no such file".format(removed_filename),
@@ -229,3 +229,12 @@ class TestReportingUtils(unittest.TestCase):
         # Testing 100 hours
         self.assertEqual("100:00:00",
                          report_utils.colorize_time(360000))
+
+    def test_format_size(self):
+        """Tests the 'format_size' function."""
+        self.assertEqual("0 B", report_utils.format_size(0))
+        self.assertEqual("1023 B", report_utils.format_size(1023))
+        self.assertEqual("1.0 KB", report_utils.format_size(1024))
+        self.assertEqual("1.5 MB", report_utils.format_size(1.5 * 1024**2))
+        self.assertEqual("10.2 GB", report_utils.format_size(10.2 * 1024**3))
+        self.assertEqual("2,048.0 TB", report_utils.format_size(2 * 1024**5))
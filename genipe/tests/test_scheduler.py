@@ -0,0 +1,327 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+import sys
+import json
+import unittest
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+from ..db import utils as db
+from ..error import GenipeError
+from ..task.launcher import TaskResources
+from ..task.scheduler import launch_task_graph, _build_graph, \
+                             _get_priorities, _pop_fitting_task
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["TestScheduler"]
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """Setup the tests."""
+        # Creating the temporary directory
+        self.output_dir = TemporaryDirectory(prefix="genipe_test_")
+
+        # The task DB
+        self.db_name = db.create_task_db(self.output_dir.name)
+
+        # The file where the tasks log their execution
+        self.log_fn = os.path.join(self.output_dir.name, "tasks.log")
+
+    def tearDown(self):
+        """Finishes the test."""
+        # Deleting the output directory
+        self.output_dir.cleanup()
+
+    def _get_task(self, name, dependencies=None, fail=False):
+        """Creates a task writing its output file and logging its name."""
+        o_file = os.path.join(self.output_dir.name, name + ".txt")
+        script = (
+            "import sys\n"
+            "print('executing', {name!r})\n"
+            "open({log!r}, 'a').write({name!r} + '\\n')\n"
+            "open({o_file!r}, 'w').close()\n"
+            "sys.exit({rc})\n"
+        ).format(log=self.log_fn, name=name, o_file=o_file, rc=int(fail))
+
+        task = {
+            "task_id": name,
+            "name": "task " + name,
+            "command": [sys.executable, "-c", script],
+            "task_db": self.db_name,
+            "o_files": [o_file],
+        }
+        if dependencies is not None:
+            task["dependencies"] = dependencies
+
+        return task
+
+    def _get_executed_tasks(self):
+        """Gets the list of executed tasks (in execution order)."""
+        if not os.path.isfile(self.log_fn):
+            return []
+
+        with open(self.log_fn, "r") as i_file:
+            return i_file.read().splitlines()
+
+    def test_launch_task_graph(self):
+        """Tests the 'launch_task_graph' function."""
+        # Two independent chains (with a task depending on both chains)
+        tasks = [
+            self._get_task("a_1"),
+            self._get_task("b_1"),
+            self._get_task("a_2", ["a_1"]),
+            self._get_task("b_2", ["b_1"]),
+            self._get_task("a_3", ["a_2"]),
+            self._get_task("final", ["a_3", "b_2"]),
+        ]
+        status = launch_task_graph(tasks, nb_threads=2,
+                                   out_dir=self.output_dir.name)
+
+        # All the tasks were performed
+        self.assertEqual({task["task_id"]: "performed" for task in tasks},
+                         status)
+
+        # The dependencies were respected
+        executed = self._get_executed_tasks()
+        self.assertEqual(len(tasks), len(executed))
+        for task in tasks:
+            for dependency in task.get("dependencies", []):
+                self.assertLess(executed.index(dependency),
+                                executed.index(task["task_id"]))
+
+        # The final status was written
+        with open(os.path.join(self.output_dir.name, "status.json")) as f:
+            status = json.load(f)
+        self.assertEqual(0, status["running"])
+        self.assertEqual([task["task_id"] for task in tasks],
+                         list(status["stages"].keys()))
+        for stage in status["stages"].values():
+            self.assertEqual({"queued": 0, "running": 0, "done": 1,
+                              "skipped": 0, "failed": 0}, stage)
+
+        # The resources used by the tasks were saved
+        resources = db.get_all_resources(self.db_name)
+        self.assertEqual({task["task_id"] for task in tasks},
+                         set(resources.keys()))
+        for task_resources in resources.values():
+            self.assertEqual(0, task_resources["exit_status"])
+            self.assertGreater(task_resources["max_rss"], 0)
+
+        # Launching the tasks a second time (nothing is executed)
+        status = launch_task_graph(tasks, nb_threads=2,
+                                   out_dir=self.output_dir.name)
+        self.assertEqual(
+            {task["task_id"]: "already performed" for task in tasks},
+            status,
+        )
+        self.assertEqual(len(tasks), len(self._get_executed_tasks()))
+
+        # Deleting an output file, only this task should be executed
+        os.remove(os.path.join(self.output_dir.name, "b_2.txt"))
+        status = launch_task_graph(tasks, nb_threads=2,
+                                   out_dir=self.output_dir.name)
+        self.assertEqual("performed", status["b_2"])
+        self.assertEqual("b_2", self._get_executed_tasks()[-1])
+
+    def test_launch_task_graph_prepare(self):
+        """Tests the 'prepare' function of the tasks."""
+        prepared = []
+
+        def prepare(task):
+            # The dependency should have been executed
+            self.assertEqual(["first"], self._get_executed_tasks())
+            task.update(self._get_task("prepared"))
+            prepared.append(task["task_id"])
+
+        def skip(task):
+            return False
+
+        def not_required(task):
+            return "not required"
+
+        tasks = [
+            self._get_task("first"),
+            {"task_id": "prepared", "name": "task prepared",
+             "task_db": self.db_name, "dependencies": ["first"],
+             "prepare": prepare},
+            {"task_id": "skipped", "name": "task skipped",
+             "task_db": self.db_name, "dependencies": ["first"],
+             "prepare": skip},
+            self._get_task("after_skipped", ["skipped"]),
+            {"task_id": "not_required", "name": "task not required",
+             "task_db": self.db_name, "dependencies": ["prepared"],
+             "prepare": not_required},
+            self._get_task("after_not_required", ["not_required"]),
+        ]
+        status = launch_task_graph(tasks, nb_threads=1,
+                                   out_dir=self.output_dir.name)
+
+        self.assertEqual(["prepared"], prepared)
+        self.assertEqual(
+            {"first": "performed", "prepared": "performed",
+             "skipped": "skipped", "after_skipped": "skipped",
+             "not_required": "not required",
+             "after_not_required": "performed"},
+            status,
+        )
+        self.assertEqual(["first", "prepared", "after_not_required"],
+                         self._get_executed_tasks())
+
+    def test_launch_task_graph_prepare_resume(self):
+        """Tests resuming tasks whose preparation keeps their outputs."""
+        prepared = []
+
+        def prepare(task):
+            prepared.append(task["task_id"])
+
+        tasks = [self._get_task("first")]
+        for name in ("segment_1", "segment_2"):
+            task = self._get_task(name, ["first"])
+            task["prepare"] = prepare
+            task["prepare_keeps_outputs"] = True
+            tasks.append(task)
+        tasks.append(self._get_task("merge", ["segment_1", "segment_2"]))
+
+        # The first time, the tasks are prepared
+        status = launch_task_graph(tasks, nb_threads=1,
+                                   out_dir=self.output_dir.name)
+        self.assertEqual({task["task_id"]: "performed" for task in tasks},
+                         status)
+        self.assertEqual(["segment_1", "segment_2"], prepared)
+
+        # When resuming, the completed tasks are not prepared (and their
+        # output files are checked all at once)
+        prepared.clear()
+        with patch("genipe.task.scheduler._check_output_files") as mock_check:
+            status = launch_task_graph(tasks, nb_threads=1,
+                                       out_dir=self.output_dir.name)
+            mock_check.assert_not_called()
+        self.assertEqual(
+            {task["task_id"]: "already performed" for task in tasks},
+            status,
+        )
+        self.assertEqual([], prepared)
+
+        # A task with a missing output file is prepared and executed again
+        os.remove(os.path.join(self.output_dir.name, "segment_2.txt"))
+        status = launch_task_graph(tasks, nb_threads=1,
+                                   out_dir=self.output_dir.name)
+        self.assertEqual(["segment_2"], prepared)
+        self.assertEqual("performed", status["segment_2"])
+        self.assertEqual("already performed", status["segment_1"])
+        self.assertEqual("segment_2", self._get_executed_tasks()[-1])
+
+    def test_launch_task_graph_failure(self):
+        """Tests the 'launch_task_graph' function when a task fails."""
+        tasks = [
+            self._get_task("a_1", fail=True),
+            self._get_task("a_2", ["a_1"]),
+            self._get_task("b_1"),
+            self._get_task("b_2", ["b_1"]),
+        ]
+        with self.assertLogs(level="ERROR") as log_cm:
+            with self.assertRaises(GenipeError) as cm:
+                launch_task_graph(tasks, nb_threads=2,
+                                  out_dir=self.output_dir.name)
+        self.assertEqual("the following task did not work: ['task a_1']",
+                         str(cm.exception))
+
+        # The output of the failed task was logged
+        log_fn = os.path.join(self.output_dir.name, "logs", "a_1.log")
+        self.assertIn(
+            "ERROR:root:Task 'task a_1': last lines of {}\n"
+            "executing a_1".format(log_fn),
+            log_cm.output,
+        )
+
+        # The independent chain was completed
+        self.assertEqual(["a_1", "b_1", "b_2"],
+                         sorted(self._get_executed_tasks()))
+        self.assertTrue(db.check_task_completion("b_2", self.db_name))
+        self.assertFalse(db.check_task_completion("a_1", self.db_name))
+
+    def test_launch_task_graph_priority(self):
+        """Tests that the longest chain of tasks is launched first."""
+        tasks = [
+            self._get_task("short"),
+            self._get_task("long_1"),
+            self._get_task("long_2", ["long_1"]),
+        ]
+        tasks[0]["size"] = 5
+        tasks[1]["size"] = 3
+        tasks[2]["size"] = 3
+
+        self.assertEqual(
+            {"short": 5, "long_1": 6, "long_2": 3},
+            _get_priorities(_build_graph(tasks),
+                            {"long_1": ["long_2"], "short": [], "long_2": []}),
+        )
+
+        launch_task_graph(tasks, nb_threads=1, out_dir=self.output_dir.name)
+        self.assertEqual(["long_1", "short", "long_2"],
+                         self._get_executed_tasks())
+
+    def test_pop_fitting_task(self):
+        """Tests the '_pop_fitting_task' function."""
+        graph = {"big": {"threads": 2}, "done": {"threads": 2},
+                 "small": {"threads": 1}}
+        ready = [(-3, 0, "big"), (-2, 1, "done"), (-1, 2, "small")]
+
+        # One of the two processors is used
+        resources = TaskResources(2)
+        resources.acquire({"threads": 1})
+
+        # The task with the highest priority fitting the resources
+        self.assertEqual("small", _pop_fitting_task(ready, graph, resources))
+        self.assertEqual(["big", "done"], sorted(item[-1] for item in ready))
+
+        # The completed task doesn't need to fit (but it has a lower priority
+        # than the big task, which doesn't fit)
+        self.assertEqual("done", _pop_fitting_task(ready, graph, resources,
+                                                   {"done"}))
+        self.assertEqual([(-3, 0, "big")], ready)
+
+        # Nothing fits anymore
+        self.assertIsNone(_pop_fitting_task(ready, graph, resources, {"done"}))
+        self.assertEqual([(-3, 0, "big")], ready)
+
+    def test_build_graph(self):
+        """Tests the '_build_graph' function."""
+        tasks = [
+            {"task_id": "a"},
+            {"task_id": "b", "dependencies": ["a"]},
+            {"task_id": "c", "dependencies": ["a", "b"]},
+        ]
+        self.assertEqual(["a", "b", "c"], list(_build_graph(tasks).keys()))
+
+        # Duplicated task
+        with self.assertRaises(GenipeError) as cm:
+            _build_graph(tasks + [{"task_id": "a"}])
+        self.assertEqual("a: duplicated task", str(cm.exception))
+
+        # Unknown dependency
+        with self.assertRaises(GenipeError) as cm:
+            _build_graph(tasks + [{"task_id": "d", "dependencies": ["e"]}])
+        self.assertEqual("d: unknown dependency 'e'", str(cm.exception))
+
+        # A cycle
+        tasks[0]["dependencies"] = ["c"]
+        with self.assertRaises(GenipeError) as cm:
+            _build_graph(tasks + [{"task_id": "d"}])
+        self.assertEqual("dependency cycle between tasks: a, b, c",
+                         str(cm.exception))
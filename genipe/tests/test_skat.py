@@ -0,0 +1,236 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import time
+import unittest
+
+import numpy as np
+
+from ..stats import skat
+from ..error import GenipeError
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["TestSkat"]
+
+
+@unittest.skipIf(not skat.HAS_SCIPY, "SciPy is not installed")
+class TestSkat(unittest.TestCase):
+
+    def setUp(self):
+        """Setup the tests."""
+        random_state = np.random.RandomState(1234)
+
+        # The samples, covariates and genotypes
+        self.nb_samples = 500
+        self.covariates = random_state.normal(size=(self.nb_samples, 2))
+        self.genotypes = random_state.binomial(2, 0.2,
+                                               size=(self.nb_samples, 5))
+        self.genotypes = self.genotypes.astype(float)
+
+        # The outcomes
+        self.continuous = (self.covariates.dot([0.5, -0.2]) +
+                           random_state.normal(size=self.nb_samples))
+        self.discrete = random_state.binomial(1, 0.4, size=self.nb_samples)
+
+    def test_mixture_chi2_pvalue(self):
+        """Tests the 'mixture_chi2_pvalue' function."""
+        # A single (scaled) chi-squared
+        self.assertAlmostEqual(
+            0.05, skat.mixture_chi2_pvalue(3.841459 * 2, np.array([2.0])),
+            places=6,
+        )
+
+        # Two chi-squared with one degree of freedom (i.e. the survival of a
+        # chi-squared with two degrees of freedom is exp(-q / 2))
+        q = np.array([0.5, 2, 5, 10])
+        np.testing.assert_allclose(
+            np.exp(-q / 2),
+            skat.mixture_chi2_pvalue(q, np.array([1.0, 1.0])),
+            rtol=1e-6,
+        )
+        self.assertAlmostEqual(
+            np.exp(-2.5), skat.mixture_chi2_pvalue(5, np.array([1.0, 1.0])),
+            places=8,
+        )
+
+        # Many statistics at once (as for the SKAT-O integration), using a
+        # mixture of two exponential distributions (of mean 2 and 4)
+        q = np.linspace(0.01, 60, 500)
+        np.testing.assert_allclose(
+            2 * np.exp(-q / 4) - np.exp(-q / 2),
+            skat.mixture_chi2_pvalue(q, np.array([1.0, 1.0, 2.0, 2.0])),
+            rtol=1e-8, atol=1e-12,
+        )
+
+        # Null statistics
+        np.testing.assert_array_equal(
+            np.ones(2),
+            skat.mixture_chi2_pvalue(np.array([0, -1.0]),
+                                     np.array([1.0, 2.0])),
+        )
+
+        # Liu's approximation is exact for a single chi-squared
+        self.assertAlmostEqual(
+            0.05, skat.liu_pvalue(3.841459, np.array([1.0])), places=6,
+        )
+
+    def test_fit_null_model(self):
+        """Tests the 'fit_null_model' function."""
+        # The continuous outcome (with a missing value)
+        outcome = self.continuous.copy()
+        outcome[0] = np.nan
+        null_model = skat.fit_null_model(outcome, self.covariates,
+                                         "continuous")
+        self.assertFalse(null_model.included[0])
+        self.assertEqual(self.nb_samples - 1, null_model.included.sum())
+        self.assertEqual((self.nb_samples - 1, 3), null_model.x.shape)
+
+        # The residuals should be orthogonal to the covariates
+        np.testing.assert_allclose(
+            np.zeros(3), null_model.x.T.dot(null_model.residuals), atol=1e-8,
+        )
+
+        # The discrete outcome (the score equations are null at the maximum)
+        null_model = skat.fit_null_model(self.discrete, self.covariates,
+                                         "discrete")
+        np.testing.assert_allclose(
+            np.zeros(3), null_model.x.T.dot(null_model.residuals), atol=1e-8,
+        )
+
+        # Invalid discrete outcome
+        with self.assertRaises(GenipeError) as cm:
+            skat.fit_null_model(self.continuous, self.covariates, "discrete")
+        self.assertEqual("discrete outcome should be coded as 0 or 1",
+                         str(cm.exception))
+
+    def test_skat_single_variant(self):
+        """Tests that SKAT on a single variant is the score test."""
+        null_model = skat.fit_null_model(self.continuous, self.covariates,
+                                         "continuous")
+        genotypes = self.genotypes[:, [0]]
+
+        # The score test (computed by hand)
+        x = null_model.x
+        g = genotypes[:, 0] - x.dot(np.linalg.lstsq(x, genotypes[:, 0],
+                                                    rcond=None)[0])
+        score = g.dot(null_model.residuals)
+        chi2 = score**2 / (null_model.s2 * g.dot(g))
+
+        p_value, q = skat.skat(null_model, genotypes, weights=np.ones(1))
+        self.assertAlmostEqual(skat.stats.chi2.sf(chi2, 1), p_value,
+                               places=10)
+        self.assertAlmostEqual(score**2 / null_model.s2 / 2, q, places=8)
+
+        # SKAT-O is the same test for a single variant
+        self.assertAlmostEqual(p_value, skat.skat_o(null_model, genotypes),
+                               places=10)
+
+    def test_skat_o(self):
+        """Tests the 'skat_o' function."""
+        null_model = skat.fit_null_model(self.discrete, self.covariates,
+                                         "discrete")
+        p_value = skat.skat_o(null_model, self.genotypes)
+        self.assertTrue(0 < p_value <= 1)
+
+        # SKAT-O p-value is bounded by the p-value of SKAT (rho = 0)
+        skat_p = skat.skat(null_model, self.genotypes)[0]
+        self.assertLessEqual(p_value, 8 * skat_p)
+
+        # Monomorphic variants are excluded
+        genotypes = np.zeros_like(self.genotypes)
+        self.assertEqual(1.0, skat.skat_o(null_model, genotypes))
+        self.assertEqual(1.0, skat.skat(null_model, genotypes)[0])
+
+    def test_skat_o_time(self):
+        """Tests that 'skat_o' is fast enough to be computed on many sets."""
+        null_model = skat.fit_null_model(self.continuous, self.covariates,
+                                         "continuous")
+        genotypes = np.random.RandomState(42).binomial(
+            2, 0.1, size=(self.nb_samples, 20),
+        ).astype(float)
+
+        # Ten sets of 20 variants should take well under a second (they took
+        # about a second each using an adaptive numerical integration)
+        start = time.time()
+        for i in range(10):
+            p_value = skat.skat_o(null_model, genotypes)
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(0 < p_value <= 1)
+
+    def test_skat_o_p_values(self):
+        """Tests the p-values of 'skat' and 'skat_o' on the fixed dataset."""
+        # The expected p-values (SKAT, SKAT with flat weights, and SKAT-O
+        # with different grids of correlations). They were computed using
+        # this implementation, since the SKAT R package was not available to
+        # compute them independently.
+        expected = {
+            "continuous": {
+                "skat": 0.0678205365, "skat_flat": 0.0281572847,
+                "default": 0.1105777445, (0, 0.5, 1): 0.1102669027,
+                (0, 0.25): 0.0884209057,
+            },
+            "discrete": {
+                "skat": 0.5274838732, "skat_flat": 0.6090207009,
+                "default": 0.7083829637, (0, 0.5, 1): 0.7083829637,
+                (0, 0.25): 0.5977860408,
+            },
+        }
+
+        for outcome_type, outcome in (("continuous", self.continuous),
+                                      ("discrete", self.discrete)):
+            null_model = skat.fit_null_model(outcome, self.covariates,
+                                             outcome_type)
+            values = expected[outcome_type]
+
+            # SKAT
+            skat_p = skat.skat(null_model, self.genotypes)[0]
+            self.assertAlmostEqual(values["skat"], skat_p, places=8)
+            self.assertAlmostEqual(
+                values["skat_flat"],
+                skat.skat(null_model, self.genotypes, weights=np.ones(5))[0],
+                places=8,
+            )
+
+            # SKAT-O
+            self.assertAlmostEqual(
+                values["default"], skat.skat_o(null_model, self.genotypes),
+                places=8,
+            )
+            for rho in [(0, 0.5, 1), (0, 0.25)]:
+                self.assertAlmostEqual(
+                    values[rho],
+                    skat.skat_o(null_model, self.genotypes, rho=rho),
+                    places=8,
+                )
+
+            # A single correlation is not optimized (i.e. SKAT with rho = 0)
+            self.assertAlmostEqual(
+                skat_p, skat.skat_o(null_model, self.genotypes, rho=[0]),
+                places=10,
+            )
+
+        # The burden test (rho = 1) is the score test of the weighted sum of
+        # the genotypes (computed by hand)
+        null_model = skat.fit_null_model(self.continuous, self.covariates,
+                                         "continuous")
+        burden = skat._prepare_genotypes(null_model, self.genotypes,
+                                         None).sum(axis=1)
+        x = null_model.x
+        g = burden - x.dot(np.linalg.lstsq(x, burden, rcond=None)[0])
+        chi2 = g.dot(null_model.residuals)**2 / (null_model.s2 * g.dot(g))
+        self.assertAlmostEqual(
+            skat.stats.chi2.sf(chi2, 1),
+            skat.skat_o(null_model, self.genotypes, rho=[1]),
+            places=10,
+        )
@@ -0,0 +1,113 @@
+
+# This file is part of genipe.
+#
+# This work is licensed under the Creative Commons Attribution-NonCommercial
+# 4.0 International License. To view a copy of this license, visit
+# http://creativecommons.org/licenses/by-nc/4.0/ or send a letter to Creative
+# Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+
+import os
+import json
+import unittest
+from tempfile import TemporaryDirectory
+
+from ..task.launcher import TaskResources
+from ..task.status import StatusFile, TaskProgress
+
+
+__author__ = "Louis-Philippe Lemieux Perreault"
+__copyright__ = "Copyright 2014, Beaulieu-Saucier Pharmacogenomics Centre"
+__license__ = "Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+
+
+__all__ = ["TestStatus"]
+
+
+class TestStatus(unittest.TestCase):
+
+    def setUp(self):
+        """Setup the tests."""
+        # Creating the temporary directory
+        self.output_dir = TemporaryDirectory(prefix="genipe_test_")
+        self.filename = os.path.join(self.output_dir.name, "status.json")
+
+    def tearDown(self):
+        """Finishes the test."""
+        # Deleting the output directory
+        self.output_dir.cleanup()
+
+    def _read_status(self):
+        """Reads the status file."""
+        with open(self.filename, "r") as i_file:
+            return json.load(i_file)
+
+    def test_status_file(self):
+        """Tests the 'StatusFile' class."""
+        status_file = StatusFile(self.filename, interval=3600)
+
+        # The first update is written
+        self.assertTrue(status_file.is_due())
+        status_file.update(sites=1)
+        status = self._read_status()
+        self.assertEqual(1, status["sites"])
+        self.assertIn("updated", status)
+        self.assertIn("elapsed", status)
+        self.assertFalse(os.path.isfile(self.filename + ".tmp"))
+
+        # The next updates are not written (unless forced)
+        self.assertFalse(status_file.is_due())
+        status_file.update(sites=2)
+        self.assertEqual(1, self._read_status()["sites"])
+        status_file.update(force=True, other="a")
+        self.assertEqual(2, self._read_status()["sites"])
+        self.assertEqual("a", self._read_status()["other"])
+
+        # Without a file, nothing is written
+        status_file = StatusFile(None)
+        self.assertFalse(status_file.is_due())
+        status_file.update(force=True, sites=1)
+        self.assertEqual({"sites": 1}, status_file.status)
+
+    def test_task_progress(self):
+        """Tests the 'TaskProgress' class."""
+        resources = TaskResources(nb_threads=2, max_memory=10)
+        progress = TaskProgress(
+            status_file=StatusFile(self.filename, interval=0),
+            stages={"impute2_chr1_1": "impute2",
+                    "impute2_chr1_2": "impute2",
+                    "impute2_chr1_3": "impute2",
+                    "merge_impute2_chr1": "merge"},
+            expected={"impute2_chr1_1": 100, "impute2_chr1_2": 100,
+                      "impute2_chr1_3": 100, "merge_impute2_chr1": 10},
+            resources=resources,
+        )
+
+        # Nothing was done yet
+        progress.write()
+        status = self._read_status()
+        self.assertEqual(
+            {"impute2": {"queued": 3, "running": 0, "done": 0, "skipped": 0,
+                         "failed": 0},
+             "merge": {"queued": 1, "running": 0, "done": 0, "skipped": 0,
+                       "failed": 0}},
+            status["stages"],
+        )
+        self.assertEqual(155, status["eta"])
+        self.assertEqual(2, status["threads_total"])
+        self.assertEqual(10, status["memory_total"])
+
+        # One task is done, another one is running, and one failed
+        progress.set_state("impute2_chr1_1", "done")
+        resources.acquire({"threads": 1, "memory": 4})
+        progress.set_state("impute2_chr1_2", "running")
+        progress.set_state("impute2_chr1_3", "failed")
+        status = self._read_status()
+        self.assertEqual(
+            {"queued": 0, "running": 1, "done": 1, "skipped": 0, "failed": 1},
+            status["stages"]["impute2"],
+        )
+        self.assertEqual(1, status["running"])
+        self.assertEqual(1, status["threads_used"])
+        self.assertEqual(4, status["memory_used"])
+        self.assertAlmostEqual(55, status["eta"], delta=1)
@@ -16,6 +16,7 @@ import logging
 import argparse
 from collections import namedtuple
 
+import numpy as np
 import pandas as pd
 from numpy import nan
 
@@ -105,6 +106,7 @@ def main(args=None):
             out_format=args.out_format,
             prob_t=args.prob,
             is_long=args.long_format,
+            keep=read_samples_to_keep(args.keep) if args.keep else None,
         )
 
     # Catching the Ctrl^C
@@ -133,7 +135,9 @@ def index_file(fn):
         fn (str): the name of the impute2 file
 
     This function uses the :py:func:`genipe.formats.index.get_index` to create
-    the index file if it's missing.
+    the index file if it's missing. The companion files containing one line
+    per site (if present) are also indexed using
+    :py:func:`genipe.formats.index.get_line_index`.
 
     Note
     ----
@@ -145,8 +149,17 @@ def index_file(fn):
     index.get_index(fn, cols=[0, 1, 2], names=["chrom", "name", "pos"],
                     sep=" ")
 
+    # The companion files
+    prefix = get_file_prefix(fn)
+    for suffix, header in ((".alleles", True), (".completion_rates", True),
+                           (".impute2_info", True), (".maf", True),
+                           (".map", False)):
+        if os.path.isfile(prefix + suffix):
+            index.get_line_index(prefix + suffix, header=header)
+
 
-def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long):
+def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long,
+                    keep=None):
     """Extracts according to names.
 
     Args:
@@ -156,12 +169,17 @@ def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long):
         out_format (list): the output format(s)
         prob_t (float): the probability threshold
         is_long (bool): True if format needs to be long
+        keep (set): the samples to keep (``None`` to keep all samples)
+
+    When only a subset of the samples is kept, only their probabilities are
+    decoded from each line (and written to the output files).
 
     """
     # The output files (probabilities)
     o_files = {
         suffix: open(out_prefix + "." + suffix, "w")
-        for suffix in out_format if suffix not in {"bed"}
+        for suffix in out_format
+        if suffix not in {"bed", "probs", "dosage_bin"}
     }
 
     # If there is the 'bed' format, we actually need pyplink
@@ -173,6 +191,18 @@ def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long):
 
     # Creating a fam (if bed)
     samples = get_samples(get_file_prefix(fn) + ".sample")
+
+    # Keeping only the required samples (if required)
+    columns = None
+    kept_samples = None
+    if keep is not None:
+        kept_samples = samples.ID_2.astype(str).isin(keep).values
+        if not kept_samples.any():
+            raise GenipeError("no sample left after '--keep'")
+        columns = impute2.get_sample_columns(np.flatnonzero(kept_samples))
+        samples = samples[kept_samples].reset_index(drop=True)
+        logging.info("Keeping {:,d} samples".format(len(samples)))
+
     sample_names = ["{}/{}".format(id_1, id_2) for id_1, id_2
                     in zip(samples.ID_1, samples.ID_2)]
 
@@ -205,25 +235,45 @@ def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long):
                                  names=["chrom", "name", "pos"], sep=" ")
 
     # Keeping only required values from the index
+    impute2_index = file_index
     file_index = file_index[file_index.name.isin(to_extract)]
 
+    # If there is the 'probs' format, we create the binary store
+    if "probs" in out_format:
+        o_files["probs"] = impute2.create_probs_store(
+            prefix=out_prefix,
+            nb_sites=len(file_index),
+            nb_samples=len(samples),
+        )
+
+    # If there is the 'dosage_bin' format, we create the binary store
+    if "dosage_bin" in out_format:
+        o_files["dosage_bin"] = impute2.create_dosage_store(
+            prefix=out_prefix,
+            nb_sites=len(file_index),
+            nb_samples=len(samples),
+        )
+
     # Getting all the markers value
     logging.info("Extracting {:,d} markers".format(len(file_index)))
     with index.get_open_func(fn)(fn, "r") as i_file:
-        for seek_value in file_index.seek.values:
+        for site, seek_value in enumerate(file_index.seek.values):
             # Seeking
             i_file.seek(int(seek_value))
 
             # Reading the line
             line = i_file.readline()
-            row = line.rstrip("\n").split(" ")
+            # Splitting the line (keeping only the required samples)
+            row = impute2.split_line(line.rstrip("\n"), columns)
+            if columns is not None:
+                line = " ".join(row) + "\n"
 
             # The marker name
             name = row[1]
 
             # Printing the data
             print_data(o_files, prob_t, samples.ID_1, samples.ID_2, line=line,
-                       row=row, is_long=is_long)
+                       row=row, is_long=is_long, site=site)
 
             # Saving statistics
             extracted.add(name)
@@ -242,8 +292,14 @@ def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long):
             i_prefix=get_file_prefix(fn),
             to_extract=to_extract,
             o_prefix=out_prefix,
+            impute2_index=impute2_index,
         )
 
+    # Writing the sample file (required to read the binary stores)
+    if len(o_files.keys() & {"impute2", "probs", "dosage_bin"}) > 0:
+        write_sample_file(get_file_prefix(fn) + ".sample",
+                          out_prefix + ".sample", kept_samples)
+
     # Writing the FAM file if bed
     if "bed" in o_files:
         cols = ["ID_1", "ID_2", "father", "mother", "sex", "plink_pheno"]
@@ -255,6 +311,9 @@ def extract_markers(fn, to_extract, out_prefix, out_format, prob_t, is_long):
         if o_format == "bed":
             o_file[0].close()
             o_file[1].close()
+        elif o_format in {"probs", "dosage_bin"}:
+            o_file[0].flush()
+            o_file[1].close()
         else:
             o_file.close()
 
@@ -282,25 +341,83 @@ def get_samples(fn):
     return sample
 
 
-def extract_companion_files(i_prefix, o_prefix, to_extract):
+def read_samples_to_keep(fn):
+    """Reads the list of samples to keep.
+
+    Args:
+        fn (str): the name of the file containing the samples to keep (one
+                  sample ID per line, as in the ``ID_2`` column of the sample
+                  file)
+
+    Returns:
+        set: the samples to keep
+
+    """
+    with open(fn, "r") as i_file:
+        return set(i_file.read().splitlines())
+
+
+def write_sample_file(i_fn, o_fn, kept_samples=None):
+    """Writes the sample file (for the kept samples).
+
+    Args:
+        i_fn (str): the name of the input sample file
+        o_fn (str): the name of the output sample file
+        kept_samples (numpy.array): a mask of the samples to keep (``None`` to
+                                    keep all samples)
+
+    The first two lines of the sample file (the header and the variable
+    types) are always kept.
+
+    """
+    if kept_samples is None:
+        shutil.copyfile(i_fn, o_fn)
+        return
+
+    with open(i_fn, "r") as i_file, open(o_fn, "w") as o_file:
+        o_file.write(i_file.readline())
+        o_file.write(i_file.readline())
+        for line, keep in zip(i_file, kept_samples):
+            if keep:
+                o_file.write(line)
+
+
+def extract_companion_files(i_prefix, o_prefix, to_extract,
+                            impute2_index=None):
     """Extract markers from companion files (if they exists).
 
     Args:
         i_prefix (str): the prefix of the input file
         o_prefix (str): the prefix of the output file
         to_extract (set): the set of markers to extract
+        impute2_index (pandas.DataFrame): the index of the IMPUTE2 file
+
+    Companion files written by the merger with one line per site (in the same
+    order as the IMPUTE2 file) are indexed by line, so that the required rows
+    are retrieved directly using the site ordinal (*i.e.* the row of the site
+    in the IMPUTE2 index). Companion files containing only a subset of the
+    sites are indexed by marker name. If the IMPUTE2 index is missing, or if
+    a companion file is not in the same order as the IMPUTE2 file, the file
+    is scanned line by line.
 
     """
     file_info = [
-        dict(suffix=".alleles", header=True, name="name"),
-        dict(suffix=".completion_rates", header=True, name="name"),
-        dict(suffix=".good_sites", header=False, index=0),
-        dict(suffix=".impute2_info", header=True, name="name"),
-        dict(suffix=".imputed_sites", header=False, index=0),
-        dict(suffix=".maf", header=True, name="name"),
-        dict(suffix=".map", header=False, index=1),
+        dict(suffix=".alleles", header=True, name="name", per_site=True),
+        dict(suffix=".completion_rates", header=True, name="name",
+             per_site=True),
+        dict(suffix=".good_sites", header=False, index=0, per_site=False),
+        dict(suffix=".impute2_info", header=True, name="name",
+             per_site=True),
+        dict(suffix=".imputed_sites", header=False, index=0, per_site=False),
+        dict(suffix=".maf", header=True, name="name", per_site=True),
+        dict(suffix=".map", header=False, index=1, per_site=True),
     ]
 
+    # The sites to extract (the row of the IMPUTE2 index is the site ordinal)
+    sites = None
+    if impute2_index is not None:
+        sites = impute2_index[impute2_index.name.isin(to_extract)]
+
     for info in file_info:
         # The name of the input file
         i_fn = i_prefix + info["suffix"]
@@ -312,34 +429,117 @@ def extract_companion_files(i_prefix, o_prefix, to_extract):
         # The name of the output file
         o_fn = o_prefix + info["suffix"]
 
-        # If the file doesn't have a header, we just read line per line
-        header = None
         with open(i_fn, "r") as i_file, open(o_fn, "w") as o_file:
-            for i, line in enumerate(i_file):
-                row = line.rstrip("\r\n").split(info.get("sep", "\t"))
-                if info["header"] and i == 0:
-                    header = {name: i for i, name in enumerate(row)}
-                    if info["name"] not in header:
-                        raise GenipeError("{}: missing column {}".format(
-                            i_fn,
-                            info["name"],
-                        ))
-
-                    info["index"] = header[info["name"]]
-                    o_file.write(line)
+            # Reading the header (if any)
+            if info["header"]:
+                line = i_file.readline()
+                header = {
+                    name: i for i, name
+                    in enumerate(line.rstrip("\r\n").split("\t"))
+                }
+                if info["name"] not in header:
+                    raise GenipeError("{}: missing column {}".format(
+                        i_fn,
+                        info["name"],
+                    ))
+
+                info["index"] = header[info["name"]]
+                o_file.write(line)
+
+            # Seeking directly to the required rows, if possible
+            if sites is not None:
+                if info["per_site"]:
+                    done = _extract_companion_by_ordinal(
+                        i_fn, i_file, o_file, info, sites,
+                        nb_sites=len(impute2_index),
+                    )
+                else:
+                    done = _extract_companion_by_name(i_fn, i_file, o_file,
+                                                      to_extract)
+                if done:
                     continue
 
+                # Starting over (reading the file line by line)
+                logging.warning("{}: not the same order as the IMPUTE2 "
+                                "file, reading line by line".format(i_fn))
+                o_file.seek(0)
+                o_file.truncate()
+                i_file.seek(0)
+                if info["header"]:
+                    o_file.write(i_file.readline())
+
+            for line in i_file:
+                row = line.rstrip("\r\n").split("\t")
                 if row[info["index"]] in to_extract:
                     o_file.write(line)
 
-    # We need to copy the sample file
-    sample_fn = i_prefix + ".sample"
-    if os.path.isfile(sample_fn):
-        o_fn = o_prefix + ".sample"
-        shutil.copyfile(sample_fn, o_fn)
 
+def _extract_companion_by_ordinal(fn, i_file, o_file, info, sites, nb_sites):
+    """Extract rows from a companion file containing one line per site.
+
+    Args:
+        fn (str): the name of the companion file
+        i_file (file): the companion file
+        o_file (file): the output file
+        info (dict): information about the companion file
+        sites (pandas.DataFrame): the IMPUTE2 index of the sites to extract
+        nb_sites (int): the total number of sites in the IMPUTE2 file
+
+    Returns:
+        bool: ``True`` if the extraction was performed, ``False`` if the file
+              is not in the same order as the IMPUTE2 file
+
+    """
+    # Getting the line index of the companion file
+    line_index = index.get_line_index(fn, header=info["header"])
+    if len(line_index) != nb_sites:
+        return False
 
-def print_data(o_files, prob_t, fid, iid, is_long, *, line=None, row=None):
+    seek_values = line_index.seek.values[sites.index.values]
+    for seek_value, name in zip(seek_values, sites.name.values):
+        i_file.seek(int(seek_value))
+        line = i_file.readline()
+
+        # Checking the marker is the same as in the IMPUTE2 file
+        row = line.rstrip("\r\n").split("\t")
+        if len(row) <= info["index"] or row[info["index"]] != str(name):
+            return False
+
+        o_file.write(line)
+
+    return True
+
+
+def _extract_companion_by_name(fn, i_file, o_file, to_extract):
+    """Extract rows from a companion file containing a subset of the sites.
+
+    Args:
+        fn (str): the name of the companion file
+        i_file (file): the companion file
+        o_file (file): the output file
+        to_extract (set): the set of markers to extract
+
+    Returns:
+        bool: ``True`` (the extraction is always performed)
+
+    """
+    # Nothing to extract from an empty file
+    if os.path.getsize(fn) == 0:
+        return True
+
+    # Getting the index of the companion file (by marker name)
+    file_index = index.get_index(fn, cols=[0], names=["name"], sep="\t")
+    file_index = file_index[file_index.name.astype(str).isin(to_extract)]
+
+    for seek_value in file_index.seek.values:
+        i_file.seek(int(seek_value))
+        o_file.write(i_file.readline())
+
+    return True
+
+
+def print_data(o_files, prob_t, fid, iid, is_long, *, line=None, row=None,
+               site=None):
     """Prints an impute2 line.
 
     Args:
@@ -350,6 +550,7 @@ def print_data(o_files, prob_t, fid, iid, is_long, *, line=None, row=None):
         is_long (bool): True if the format is long (dosage, calls)
         line (str): the impute2 line
         row (list): the impute2 line, split by spaces
+        site (int): the index of the site in the output (binary store)
 
     """
     # Probabilities?
@@ -364,7 +565,8 @@ def print_data(o_files, prob_t, fid, iid, is_long, *, line=None, row=None):
     chrom = None
     good_calls = None
     probabilities = None
-    if ("dosage" in o_files) or ("calls" in o_files) or ("bed" in o_files):
+    if len(o_files.keys() & {"dosage", "calls", "bed", "probs",
+                             "dosage_bin"}) > 0:
         # Getting the informations
         marker_info, probabilities = impute2.matrix_from_line(row)
         chrom, name, pos, a1, a2 = marker_info
@@ -372,6 +574,46 @@ def print_data(o_files, prob_t, fid, iid, is_long, *, line=None, row=None):
         # Getting the good calls
         good_calls = impute2.get_good_probs(probabilities, min_prob=prob_t)
 
+    # Binary probabilities?
+    if "probs" in o_files:
+        store, sites_file = o_files["probs"]
+        if probabilities.shape[0] != store.shape[1]:
+            raise GenipeError("{}: {:,d} samples, but {:,d} samples in the "
+                              "sample file".format(name,
+                                                   probabilities.shape[0],
+                                                   store.shape[1]))
+        store[site] = impute2.quantize_probs(probabilities)
+        print(chrom, name, pos, a1, a2, sep="\t", file=sites_file)
+
+    # Binary dosage?
+    if "dosage_bin" in o_files:
+        store, sites_file = o_files["dosage_bin"]
+        if probabilities.shape[0] != store.shape[1]:
+            raise GenipeError("{}: {:,d} samples, but {:,d} samples in the "
+                              "sample file".format(name,
+                                                   probabilities.shape[0],
+                                                   store.shape[1]))
+
+        # The minor and major alleles (using the good calls only)
+        _, maf, minor, major = impute2.maf_dosage_from_probs(
+            prob_matrix=probabilities[good_calls, :],
+            a1=a1,
+            a2=a2,
+            site_name=name,
+        )
+
+        # The dosage on the minor allele (for all samples)
+        dosage = impute2.dosage_from_probs(
+            homo_probs=probabilities[:, 2 if minor == a2 else 0],
+            hetero_probs=probabilities[:, 1],
+            scale=2,
+        )
+        dosage[~good_calls] = nan
+
+        impute2.dosage_to_store(store, site, dosage)
+        print(chrom, name, pos, minor, major, maf, sep="\t",
+              file=sites_file)
+
     # Dosage?
     if "dosage" in o_files:
         # Getting the maf
@@ -592,6 +834,11 @@ def check_args(args):
         if not os.path.isfile(args.extract):
             raise GenipeError("{}: no such file".format(args.extract))
 
+    # If keep, check the file
+    if args.keep is not None:
+        if not os.path.isfile(args.keep):
+            raise GenipeError("{}: no such file".format(args.keep))
+
     # If genomic, we check the format
     if args.genomic is not None:
         genomic_match = re.match(r"(.+):(\d+)-(\d+)$", args.genomic)
@@ -647,14 +894,15 @@ def check_args(args):
 
     # Checking the output format
     for out_format in args.out_format:
-        if out_format not in {"impute2", "dosage", "calls", "bed"}:
+        if out_format not in {"impute2", "dosage", "calls", "bed", "probs",
+                              "dosage_bin"}:
             raise GenipeError("{}: invalid output format".format(out_format))
 
         if out_format == "bed":
             if not HAS_PYPLINK:
                 raise GenipeError("missing optional module: pyplink")
 
-        if out_format in {"bed", "calls", "dosage"}:
+        if out_format in {"bed", "calls", "dosage", "probs", "dosage_bin"}:
             if not f_prefix + ".sample":
                 raise GenipeError("{}: sample file missing".format(
                     f_prefix + ".sample"),
@@ -789,6 +1037,14 @@ def parse_args(parser, args=None):
              "specified threshold. Can be use in combination with '--maf', "
              "'--rate' and '--genomic'.",
     )
+    group.add_argument(
+        "--keep",
+        type=str,
+        metavar="FILE",
+        help="File containing the samples to keep (one sample per line, "
+             "using the 'ID_2' column of the sample file). Only the "
+             "probabilities of those samples are read and written.",
+    )
 
     if args is not None:
         return parser.parse_args(args)
@@ -10,10 +10,11 @@
 import os
 import re
 import sys
+import json
 import shlex
 import logging
 import argparse
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 import numpy as np
 
@@ -97,7 +98,7 @@ def concatenate_files(i_filenames, out_prefix, real_chrom, options):
         real_chrom (str): the chromosome contained in all the input files
         options (argparse.Namespace): the options
 
-    This function will create the following seven files:
+    This function will create the following nine files:
 
     +-----------------------+-------------------------------------------------+
     | File name             | Description                                     |
@@ -135,8 +136,21 @@ def concatenate_files(i_filenames, out_prefix, real_chrom, options):
     |                       | they are all below the threshold), the MAF is   |
     |                       | ``NA``.                                         |
     +-----------------------+-------------------------------------------------+
+    | ``.stats.json``       | Summary statistics of the merged sites (see     |
+    |                       | :py:class:`MergeStats`), used by the pipeline   |
+    |                       | to create the report. This file is written      |
+    |                       | once all the other files are completed.         |
+    +-----------------------+-------------------------------------------------+
 
     """
+    # Removing the summary statistics of a previous merge (they are written
+    # once the merge is completed)
+    stats_filename = out_prefix + ".stats.json"
+    if os.path.isfile(stats_filename):
+        os.remove(stats_filename)
+    stats = MergeStats(real_chrom, options.probability, options.completion,
+                       options.info)
+
     # Opening output files
     impute2_o_file = open(out_prefix + ".impute2", "w")
     impute2_info_o_file = open(out_prefix + ".impute2_info", "w")
@@ -277,10 +291,17 @@ def concatenate_files(i_filenames, out_prefix, real_chrom, options):
             # Checking the information value
             info_value = float(info_row[info_header["info"]])
 
-            if (comp >= options.completion) and (info_value >= options.info):
+            is_good = ((comp >= options.completion) and
+                       (info_value >= options.info))
+            if is_good:
                 # The completion is over the thresholds
                 print(name, file=good_sites_o_file)
 
+            # Updating the summary statistics
+            stats.add_site(name, imputed=chrom == "---",
+                           nb_missing=geno.shape[0] - nb, completion=comp,
+                           is_good=is_good, maf=maf)
+
             # Saving the map file
             print(real_chrom, name, "0", pos, sep="\t", file=map_o_file)
 
@@ -310,6 +331,141 @@ def concatenate_files(i_filenames, out_prefix, real_chrom, options):
     map_o_file.close()
     maf_o_file.close()
 
+    # Writing the summary statistics
+    stats.write(stats_filename)
+
+
+class MergeStats(object):
+    """Summary statistics of the merged sites of a chromosome.
+
+    Args:
+        chrom (str): the chromosome
+        probability (float): the probability threshold
+        completion (float): the completion rate threshold
+        info (float): the information threshold
+
+    The statistics are gathered while the sites are merged (see
+    :py:func:`concatenate_files`), so that the pipeline doesn't need to read
+    the merged files again to create the report (see
+    :py:func:`genipe.pipeline.cli.gather_imputation_stats` and
+    :py:func:`genipe.pipeline.cli.gather_maf_stats`). They include:
+
+    * the number of sites (all and "good" sites), and the sum of their
+      completion rates;
+    * the number of imputed sites, and the number of missing genotypes of each
+      genotyped (*i.e.* not imputed) site;
+    * the number of "good" sites in each minor allele frequency bin (< 1%,
+      >= 1% and < 5%, and >= 5%), the number of "good" sites without MAF, and
+      the "good" sites with the lowest and highest MAF.
+
+    """
+    def __init__(self, chrom, probability, completion, info):
+        self.thresholds = OrderedDict([
+            ("probability", probability),
+            ("completion", completion),
+            ("info", info),
+        ])
+        self.chrom = chrom
+
+        # All the sites
+        self.nb_sites = 0
+        self.sum_rates = 0.0
+        self.nb_imputed = 0
+        self.genotyped = OrderedDict()
+
+        # The good sites
+        self.nb_good_sites = 0
+        self.sum_good_rates = 0.0
+
+        # The MAF of the good sites
+        self.maf_bins = OrderedDict([("lt_01", 0), ("geq_01_lt_05", 0),
+                                     ("geq_05", 0)])
+        self.nb_maf_nan = 0
+        self.maf_min = None
+        self.maf_max = None
+
+    def add_site(self, name, imputed, nb_missing, completion, is_good, maf):
+        """Adds a merged site.
+
+        Args:
+            name (str): the name of the site
+            imputed (bool): whether the site is imputed or not
+            nb_missing (int): the number of missing genotypes
+            completion (float): the completion rate
+            is_good (bool): whether the site passes the thresholds or not
+            maf (float): the minor allele frequency (or ``NA``)
+
+        """
+        self.nb_sites += 1
+        self.sum_rates += completion
+        if imputed:
+            self.nb_imputed += 1
+        else:
+            self.genotyped[name] = int(nb_missing)
+
+        if not is_good:
+            return
+
+        self.nb_good_sites += 1
+        self.sum_good_rates += completion
+
+        # The MAF
+        if maf == "NA" or np.isnan(maf):
+            self.nb_maf_nan += 1
+            return
+
+        maf = float(maf)
+        if maf < 0.01:
+            self.maf_bins["lt_01"] += 1
+        elif maf < 0.05:
+            self.maf_bins["geq_01_lt_05"] += 1
+        else:
+            self.maf_bins["geq_05"] += 1
+
+        if self.maf_min is None or maf < self.maf_min[1]:
+            self.maf_min = (name, maf)
+        if self.maf_max is None or maf > self.maf_max[1]:
+            self.maf_max = (name, maf)
+
+    def to_dict(self):
+        """Gets the summary statistics.
+
+        Returns:
+            collections.OrderedDict: the summary statistics
+
+        """
+        return OrderedDict([
+            ("chrom", self.chrom),
+            ("thresholds", self.thresholds),
+            ("nb_sites", self.nb_sites),
+            ("sum_completion_rates", float(self.sum_rates)),
+            ("nb_good_sites", self.nb_good_sites),
+            ("sum_good_completion_rates", float(self.sum_good_rates)),
+            ("nb_imputed_sites", self.nb_imputed),
+            ("maf", OrderedDict([
+                ("bins", self.maf_bins),
+                ("nb_nan", self.nb_maf_nan),
+                ("min", self.maf_min),
+                ("max", self.maf_max),
+            ])),
+            ("genotyped_nb_missing", self.genotyped),
+        ])
+
+    def write(self, filename):
+        """Writes the summary statistics (in JSON format).
+
+        Args:
+            filename (str): the name of the output file
+
+        The file is written under a temporary name, and renamed once
+        completed.
+
+        """
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "w") as o_file:
+            json.dump(self.to_dict(), o_file, indent=2)
+        os.replace(tmp_filename, filename)
+
 
 def check_args(args):
     """Checks the arguments and options.
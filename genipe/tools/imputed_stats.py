@@ -9,6 +9,7 @@
 import re
 import os
 import sys
+import math
 import stat
 import shlex
 import datetime
@@ -16,18 +17,24 @@ import logging
 import argparse
 import platform
 import traceback
+from time import time, perf_counter
 from shutil import which
+from functools import partial
 from multiprocessing import Pool
 from subprocess import Popen, PIPE
-from collections import namedtuple
+from collections import namedtuple, OrderedDict, Counter
 
 import jinja2
+import numpy as np
 import pandas as pd
 from numpy.linalg.linalg import LinAlgError
 
 from .. import __version__
+from ..formats import index
 from ..formats import impute2
+from ..stats import skat
 from ..error import GenipeError
+from ..task.status import StatusFile
 
 
 __author__ = ["Louis-Philippe Lemieux Perreault", "Marc-Andre Legault"]
@@ -83,6 +90,14 @@ _Row = namedtuple("_Row", ("row", "samples", "pheno", "pheno_name", "use_ml",
 # The Cox's regression required values
 _COX_REQ_COLS = ["coef", "se(coef)", "lower 0.95", "upper 0.95", "z", "p"]
 
+# The phases of the analysis of a site (for profiling)
+_PROFILE_PHASES = ("read", "parse", "merge", "dosage", "formula", "fit",
+                   "write")
+
+# The samples and the columns to keep of the SKAT genotype files written by
+# the current process (see '_skat_init_genotype_writer')
+_skat_writer_options = {}
+
 
 def main(args=None):
     """The main function.
@@ -142,6 +157,17 @@ def main(args=None):
             len(samples),
         ))
 
+        # Keeping only the required samples (if required)
+        sample_indexes = None
+        if args.keep is not None:
+            logging.info("Reading the samples to keep")
+            kept_samples = samples.index.isin(read_samples_to_keep(args.keep))
+            sample_indexes = np.flatnonzero(kept_samples)
+            samples = samples[kept_samples]
+            logging.info("  - {:,d} samples kept".format(len(samples)))
+            if len(samples) == 0:
+                raise GenipeError("no sample left after '--keep'")
+
         # Reading the sites to extract (if required)
         sites_to_extract = None
         if args.extract_sites is not None:
@@ -161,6 +187,7 @@ def main(args=None):
                 remove_gender=remove_gender,
                 out_prefix=args.out,
                 options=args,
+                sample_indexes=sample_indexes,
             )
         else:
             skat_parse_impute2(
@@ -171,6 +198,7 @@ def main(args=None):
                 remove_gender=remove_gender,
                 out_prefix=args.out,
                 args=args,
+                sample_indexes=sample_indexes,
             )
 
         logging.info("Analysis completed")
@@ -292,6 +320,31 @@ def read_samples(i_filename):
     return samples.set_index("ID_2", verify_integrity=True)
 
 
+def read_samples_to_keep(i_filename):
+    """Reads the list of samples to keep.
+
+    Args:
+        i_filename (str): The input filename containing the IDs of the samples
+                          to keep for the analysis.
+
+    Returns:
+        set: A set containing the samples.
+
+    The expected file format is simply a list of samples (as in the ``ID_2``
+    column of the sample file). Every row should correspond to a single
+    sample identifier.
+
+    Only the probabilities of the kept samples are decoded from the IMPUTE2
+    file, so that the analysis time depends on the number of kept samples
+    instead of the total number of samples.
+
+    """
+    samples_to_keep = None
+    with open(i_filename, "r") as i_file:
+        samples_to_keep = set(i_file.read().splitlines())
+    return samples_to_keep
+
+
 def skat_read_snp_set(i_filename):
     """Reads the SKAT SNP set file.
 
@@ -352,7 +405,8 @@ def read_sites_to_extract(i_filename):
 
 
 def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
-                       phenotypes, remove_gender, out_prefix, args):
+                       phenotypes, remove_gender, out_prefix, args,
+                       sample_indexes=None):
     """Read the impute2 file and run the SKAT analysis.
 
     Args:
@@ -363,6 +417,9 @@ def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
         remove_gender (bool): whether or not to remove the gender column
         out_prefix (str): the output prefix
         args (argparse.Namespace): the options
+        sample_indexes (numpy.array): the indexes of the samples to keep in
+                                      the IMPUTE2 file (``None`` if all
+                                      samples are kept)
 
 
     This function does most of the "dispatching" to run SKAT. It writes the
@@ -373,8 +430,8 @@ def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
 
     # We keep track of the files that are generated because we will need the
     # paths to generate the R script correctly.
-    r_files = {"snp_sets": [], "covariates": None, "outcome": None,
-               "weights": None}
+    r_files = {"snp_sets": [], "samples": None, "covariates": None,
+               "outcome": None, "weights": None}
 
     # Read the SNP set and create the output files.
     snp_set = skat_read_snp_set(args.snp_sets)
@@ -403,29 +460,271 @@ def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
         snp_set[["weight"]].to_csv(weight_filename, index=False, header=False)
         r_files["weights"] = weight_filename
 
-    # Open genotype CSV files for every SNP set. Those CSV files will be
-    # read in R and used by SKAT.
-    genotype_files = {}
+    # The binary genotype files for every SNP set (the names of the variants
+    # are written in a companion file). Those files will be read by R (or by
+    # the Python backend) and used by SKAT.
     snp_sets = snp_set["snp_set"].unique()
     for set_id in snp_sets:
-        filename = os.path.join(dir_name, "{}.genotypes.csv".format(set_id))
+        filename = os.path.join(dir_name, "{}.genotypes.bin".format(set_id))
         r_files["snp_sets"].append(filename)  # Track the filenames.
-        genotype_files[set_id] = open(filename, "w")
-        # We write the column headers for every file.
-        print("", *samples.index, sep=",", file=genotype_files[set_id])
+
+    # The samples (in the same order as in the genotype files)
+    r_files["samples"] = os.path.join(dir_name, "samples.txt")
+    with open(r_files["samples"], "w") as o_file:
+        print(*samples.index, sep="\n", file=o_file)
 
     # The markers of interest are the markers we want to include in the
     # analysis. Concretely, they are the markers that were included in the snp
     # sets. If a list of markers to extract is provided by the user, we also
     # look at this to filter ou undesired markers.
-    #
-    # We also fill a set of written_markers to stop whenever all the markers
-    # were written to file.
     markers_of_interest = set(snp_set["variant"])
-    written_markers = set()
     if markers_to_extract is not None:
         markers_of_interest = markers_of_interest & markers_to_extract
 
+    # The columns to keep in the IMPUTE2 file (if required)
+    columns = None
+    if sample_indexes is not None:
+        columns = impute2.get_sample_columns(sample_indexes)
+
+    # Getting the index of the IMPUTE2 file (so that we can seek directly to
+    # the markers of each SNP set). A file compressed using gzip (instead of
+    # bgzip) cannot be indexed, so it will be scanned.
+    file_index = None
+    try:
+        file_index = index.get_index(impute2_filename, cols=[0, 1, 2],
+                                     names=["chrom", "name", "pos"], sep=" ")
+    except GenipeError as e:
+        logging.warning("{}: the file will be scanned".format(e))
+
+    if file_index is not None:
+        written_markers = _skat_write_genotypes_by_set(
+            impute2_filename=impute2_filename,
+            file_index=file_index,
+            snp_set=snp_set,
+            markers_of_interest=markers_of_interest,
+            genotype_filenames=r_files["snp_sets"],
+            samples=samples,
+            columns=columns,
+            nb_process=args.nb_process,
+        )
+
+    else:
+        written_markers = _skat_write_genotypes_by_scan(
+            impute2_filename=impute2_filename,
+            snp_set=snp_set,
+            markers_of_interest=markers_of_interest,
+            genotype_filenames=r_files["snp_sets"],
+            samples=samples,
+            columns=columns,
+        )
+
+    # We will warn the user if some variants were not found.
+    number_missing = len(markers_of_interest) - len(written_markers)
+
+    if number_missing > 0:
+        logging.warning("{} markers of interest were not found in the Impute2 "
+                        "file.".format(number_missing))
+
+    # Make sure the samples are consistent by merging phenotype and samples.
+    phenotype_df = samples.join(phenotypes)
+    phenotype_df.index.name = "sample"
+
+    if args.skat_backend == "python":
+        results = _skat_run_native(phenotype_df, snp_set, r_files["snp_sets"],
+                                   args)
+
+    elif args.skat_backend == "R-batch":
+        results = _skat_run_r_batch(phenotype_df, snp_set, dir_name, r_files,
+                                    args)
+
+    else:
+        results = _skat_run_r(phenotype_df, dir_name, r_files, args)
+
+    # Finally, write the SKAT output to disk.
+    output_filename = args.out + ".skat.dosage"
+
+    logging.info("SKAT completed, writing the results to disk ({}).".format(
+        output_filename
+    ))
+
+    with open(output_filename, "w") as f:
+        # Write the header.
+        if args.skat_o:
+            print("snp_set_id", "p_value", sep="\t", file=f)
+        else:
+            print("snp_set_id", "p_value", "q_value", sep="\t", file=f)
+
+        # The order in the snp_sets list should have been consistent
+        # across the whole analysis. We just want to make sure that we
+        # actually have the right number of results.
+        assert len(snp_sets) == len(results)
+
+        # Write a tab separated file containing the set and p-values.
+        for i, (p_value, q_value) in enumerate(results):
+            set_id = snp_sets[i]
+            if args.skat_o:
+                print(set_id, p_value, sep="\t", file=f)
+            else:
+                print(set_id, p_value, q_value, sep="\t", file=f)
+
+
+def _skat_write_genotypes_by_set(impute2_filename, file_index, snp_set,
+                                 markers_of_interest, genotype_filenames,
+                                 samples, columns, nb_process):
+    """Writes the SKAT genotype files by seeking the markers of each SNP set.
+
+    Args:
+        impute2_filename (str): the name of the IMPUTE2 file
+        file_index (pandas.DataFrame): the index of the IMPUTE2 file
+        snp_set (pandas.DataFrame): the SNP sets
+        markers_of_interest (set): the markers to write
+        genotype_filenames (list): the name of the genotype file of each SNP
+                                   set (in the same order as the unique SNP
+                                   sets)
+        samples (pandas.DataFrame): the samples
+        columns (list): the columns of the samples to keep (``None`` if all
+                        samples are kept)
+        nb_process (int): the number of processes to use
+
+    Returns:
+        set: the markers that were written
+
+    Each genotype file is written independently (in parallel if more than
+    one process is used). The markers of each SNP set are read in the order
+    of the IMPUTE2 file using the index, so that only the required lines are
+    read instead of the whole file.
+
+    The SNP sets are merged with the index once, and the positions of the
+    markers are grouped by SNP set. The samples and the columns are sent once
+    to every process (instead of with every SNP set).
+
+    """
+    # Keeping only the markers of interest
+    file_index = file_index.loc[file_index.name.isin(markers_of_interest),
+                                ["name", "seek"]]
+
+    # The position of the markers of every SNP set (in the same order as in
+    # the file)
+    set_index = snp_set[["snp_set", "variant"]].drop_duplicates().merge(
+        file_index, left_on="variant", right_on="name",
+    ).sort_values("seek")
+    set_rows = set_index.groupby("snp_set").indices
+    seeks = set_index.seek.values
+    variants = set_index.variant.values
+
+    # Creating the job of every SNP set
+    jobs = []
+    for set_id, filename in zip(snp_set["snp_set"].unique(),
+                                genotype_filenames):
+        rows = set_rows.get(set_id, [])
+        jobs.append((impute2_filename, filename, seeks[rows],
+                     set(variants[rows])))
+
+    written_markers = []
+    if nb_process > 1:
+        with Pool(processes=nb_process,
+                  initializer=_skat_init_genotype_writer,
+                  initargs=(samples, columns)) as pool:
+            written_markers = pool.map(_skat_write_genotype_file, jobs)
+    else:
+        _skat_init_genotype_writer(samples, columns)
+        try:
+            written_markers = [_skat_write_genotype_file(job) for job in jobs]
+        finally:
+            _skat_writer_options.clear()
+
+    return set().union(*written_markers)
+
+
+def _skat_init_genotype_writer(samples, columns):
+    """Sets the samples and columns of the SKAT genotype files to write.
+
+    Args:
+        samples (pandas.DataFrame): the samples
+        columns (list): the columns of the samples to keep (``None`` if all
+                        samples are kept)
+
+    This is the initializer of the processes writing the genotype files (see
+    :py:func:`_skat_write_genotype_file`).
+
+    """
+    _skat_writer_options["samples"] = samples
+    _skat_writer_options["columns"] = columns
+
+
+def _skat_write_genotype_file(job):
+    """Writes the genotype file of a single SNP set.
+
+    Args:
+        job (tuple): the IMPUTE2 file name, the genotype file name, the seek
+                     positions of the markers and the markers of the SNP set
+
+    Returns:
+        set: the markers that were written
+
+    The samples and the columns to keep are set by
+    :py:func:`_skat_init_genotype_writer`.
+
+    """
+    impute2_filename, o_filename, seek_values, set_markers = job
+    samples = _skat_writer_options["samples"]
+    columns = _skat_writer_options["columns"]
+
+    written_markers = []
+    open_func = index.get_open_func(impute2_filename)
+    with open_func(impute2_filename, "r") as i_file, \
+            open(o_filename, "wb") as o_file:
+        for seek_value in seek_values:
+            i_file.seek(int(seek_value))
+            line = _skat_parse_line(i_file.readline(), set_markers, samples,
+                                    columns=columns)
+            if line is not None:
+                name, dosage = line
+                written_markers.append(name)
+                _skat_write_dosage(dosage, o_file)
+
+    _skat_write_variants(o_filename, written_markers)
+
+    return set(written_markers)
+
+
+def _skat_write_genotypes_by_scan(impute2_filename, snp_set,
+                                  markers_of_interest, genotype_filenames,
+                                  samples, columns):
+    """Writes the SKAT genotype files by scanning the IMPUTE2 file.
+
+    Args:
+        impute2_filename (str): the name of the IMPUTE2 file
+        snp_set (pandas.DataFrame): the SNP sets
+        markers_of_interest (set): the markers to write
+        genotype_filenames (list): the name of the genotype file of each SNP
+                                   set (in the same order as the unique SNP
+                                   sets)
+        samples (pandas.DataFrame): the samples
+        columns (list): the columns of the samples to keep (``None`` if all
+                        samples are kept)
+
+    Returns:
+        set: the markers that were written
+
+    This is used when the IMPUTE2 file cannot be indexed (*e.g.* compressed
+    using gzip instead of bgzip). The scan stops whenever all the markers
+    were written to file.
+
+    """
+    # Open the binary genotype files for every SNP set (and keep track of the
+    # variants written in each of them).
+    genotype_files = {}
+    set_variants = {}
+    for set_id, filename in zip(snp_set["snp_set"].unique(),
+                                genotype_filenames):
+        genotype_files[set_id] = open(filename, "wb")
+        set_variants[set_id] = []
+
+    # The SNP sets of every variant (so that the SNP set table is not scanned
+    # for every marker)
+    variant_sets = snp_set.groupby("variant")["snp_set"].unique().to_dict()
+
     # Open the file. We use subprocess if it's gunzipped because it's faster.
     # We use gzip -d -c instead of zcat because the default Mac OS zcat has
     # weird behavior.
@@ -435,6 +734,7 @@ def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
     else:
         i_file = open(impute2_filename, "rb")
 
+    written_markers = set()
     for line in i_file:
         # If we already found everything, we will stop here.
         if len(written_markers) == len(markers_of_interest):
@@ -446,32 +746,179 @@ def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
         line = line.decode("ascii")
 
         # TODO: Add the gender and do QC (men with hetero on chrX).
-        line = _skat_parse_line(line, markers_of_interest, samples)
+        line = _skat_parse_line(line, markers_of_interest, samples,
+                                columns=columns)
         if line is not None:
             name, dosage = line
             written_markers.add(name)
-            _skat_write_marker(name, dosage, snp_set, genotype_files)
-
-    # We will warn the user if some variants were not found.
-    number_missing = len(markers_of_interest) - len(written_markers)
-
-    if number_missing > 0:
-        logging.warning("{} markers of interest were not found in the Impute2 "
-                        "file.".format(number_missing))
+            _skat_write_marker(name, dosage, variant_sets[name],
+                               genotype_files, set_variants)
 
     i_file.close()
 
-    # Close the genotype files.
-    for file_handle in genotype_files.values():
+    # Close the genotype files and write the variants of every SNP set.
+    for set_id, file_handle in genotype_files.items():
         file_handle.close()
+        _skat_write_variants(file_handle.name, set_variants[set_id])
 
-    # Write the covariate file.
-    phenotype_df = samples.join(phenotypes)
-    phenotype_df.index.name = "sample"
+    return written_markers
+
+
+def _skat_run_r(phenotype_df, dir_name, r_files, args):
+    """Runs the SKAT analysis of every SNP set using the SKAT R package.
+
+    Args:
+        phenotype_df (pandas.DataFrame): the phenotypes (in the same order as
+                                         the samples of the genotype files)
+        dir_name (str): the output directory name
+        r_files (dict): contains the different input files required by the R
+                        script
+        args (argparse.Namespace): the options
+
+    Returns:
+        list: the *p-value* and the *q-value* of each SNP set
+
+    One ``Rscript`` process is launched per SNP set.
+
+    """
+    _skat_write_r_inputs(phenotype_df, dir_name, r_files, args)
+
+    r_scripts = _skat_generate_r_script(dir_name, r_files, args)
+
+    # Run the SKAT analysis by calling Rscript either in different subprocesses
+    # or linearly.
+    logging.info("Launching SKAT using {} processes on {} SNP sets.".format(
+        args.nb_process, len(r_scripts)
+    ))
+
+    results = []
+    if args.nb_process > 1:
+        with Pool(processes=args.nb_process) as pool:
+            results = pool.map(_skat_run_job, r_scripts)
+    else:
+        for script in r_scripts:
+            results.append(_skat_run_job(script))
+
+    return results
+
+
+def _skat_run_r_batch(phenotype_df, snp_set, dir_name, r_files, args):
+    """Runs the SKAT analysis using one R process per shard of SNP sets.
+
+    Args:
+        phenotype_df (pandas.DataFrame): the phenotypes (in the same order as
+                                         the samples of the genotype files)
+        snp_set (pandas.DataFrame): the SNP sets
+        dir_name (str): the output directory name
+        r_files (dict): contains the different input files required by the R
+                        script
+        args (argparse.Namespace): the options
 
+    Returns:
+        list: the *p-value* and the *q-value* of each SNP set
+
+    The SNP sets are split in as many shards as there are processes. Each R
+    process fits the null model only once, loops over the SNP sets of its
+    shard, and writes the results in a tab separated file (instead of the
+    standard output).
+
+    """
+    _skat_write_r_inputs(phenotype_df, dir_name, r_files, args)
+
+    # The weights of each SNP set (if provided)
+    r_files["set_weights"] = None
+    if "weight" in snp_set.columns:
+        filename = os.path.join(dir_name, "set_weights.txt")
+        snp_set[["variant", "snp_set", "weight"]].to_csv(
+            filename, sep="\t", index=False,
+        )
+        r_files["set_weights"] = filename
+
+    # Splitting the SNP sets into shards
+    set_ids = snp_set["snp_set"].unique()
+    nb_shards = min(args.nb_process, len(set_ids))
+    shards = [
+        shard for shard in np.array_split(np.arange(len(set_ids)), nb_shards)
+        if len(shard) > 0
+    ]
+
+    jobs = _skat_generate_r_batch_scripts(
+        dir_name=dir_name,
+        r_files=r_files,
+        set_ids=set_ids,
+        shards=shards,
+        args=args,
+    )
+
+    logging.info("Launching SKAT using {} R processes on {} SNP "
+                 "sets.".format(len(jobs), len(set_ids)))
+
+    shard_results = []
+    if len(jobs) > 1:
+        with Pool(processes=len(jobs)) as pool:
+            shard_results = pool.map(_skat_run_batch_job, jobs)
+    else:
+        shard_results = [_skat_run_batch_job(job) for job in jobs]
+
+    # Gathering the results (in the same order as the SNP sets)
+    results = pd.concat(shard_results).set_index("snp_set_id")
+    missing = set(set_ids.astype(str)) - set(results.index)
+    if len(missing) > 0:
+        raise GenipeError("SKAT did not return results for {:,d} SNP "
+                          "sets".format(len(missing)))
+
+    return [
+        (p_value, None if np.isnan(q_value) else q_value)
+        for p_value, q_value in results.loc[set_ids.astype(str),
+                                            ["p_value", "q_value"]].values
+    ]
+
+
+def _skat_run_batch_job(job):
+    """Calls Rscript with a generated batch script and reads the results.
+
+    Args:
+        job (tuple): the name of the script and of the results file
+
+    Returns:
+        pandas.DataFrame: the results (``snp_set_id``, ``p_value`` and
+                          ``q_value``) of every SNP set of the shard
+
+    """
+    script_filename, results_filename = job
+
+    proc = Popen(
+        ["Rscript", script_filename],
+        stdout=PIPE,
+        stderr=PIPE,
+    )
+    out, err = proc.communicate()
+    if err:
+        logging.info("SKAT Warning: " + err.decode("utf-8"))
+
+    if proc.returncode != 0 or not os.path.isfile(results_filename):
+        raise GenipeError("SKAT did not return properly. See script "
+                          "'{}' for details.".format(script_filename))
+
+    return pd.read_csv(results_filename, sep="\t",
+                       dtype={"snp_set_id": str, "p_value": float,
+                              "q_value": float})
+
+
+def _skat_write_r_inputs(phenotype_df, dir_name, r_files, args):
+    """Writes the covariate and outcome files required by the R scripts.
+
+    Args:
+        phenotype_df (pandas.DataFrame): the phenotypes (in the same order as
+                                         the samples of the genotype files)
+        dir_name (str): the output directory name
+        r_files (dict): contains the different input files required by the R
+                        script (updated with the new files)
+        args (argparse.Namespace): the options
+
+    """
+    # Write the covariate file.
     if args.covar:
-        # Make sure the samples are consistent by merging phenotype and
-        # samples.
         filename = os.path.join(dir_name, "covariates.csv")
         phenotype_df[args.covar].to_csv(
             filename,
@@ -490,48 +937,88 @@ def skat_parse_impute2(impute2_filename, samples, markers_to_extract,
     )
     r_files["outcome"] = filename
 
-    r_scripts = _skat_generate_r_script(dir_name, r_files, args)
 
-    # Run the SKAT analysis by calling Rscript either in different subprocesses
-    # or linearly.
+def _skat_run_native(phenotype_df, snp_set, genotype_filenames, args):
+    """Runs the SKAT analysis of every SNP set using NumPy and SciPy.
+
+    Args:
+        phenotype_df (pandas.DataFrame): the phenotypes (in the same order as
+                                         the samples of the genotype files)
+        snp_set (pandas.DataFrame): the SNP sets
+        genotype_filenames (list): the name of the genotype file of each SNP
+                                   set (in the same order as the unique SNP
+                                   sets)
+        args (argparse.Namespace): the options
+
+    Returns:
+        list: the *p-value* and the *q-value* of each SNP set
+
+    The null model is fitted only once, and shared by all the SNP sets (see
+    :py:mod:`genipe.stats.skat`).
+
+    """
+    logging.info("Fitting the SKAT null model")
+    null_model = skat.fit_null_model(
+        outcome=phenotype_df[args.pheno_name].values,
+        covariates=phenotype_df[args.covar].values if args.covar else None,
+        outcome_type=args.outcome_type,
+    )
+
+    # The weights of the variants (grouped once by SNP set)
+    set_weights = None
+    if "weight" in snp_set.columns:
+        set_weights = snp_set.drop_duplicates(["snp_set", "variant"])
+        set_rows = set_weights.groupby("snp_set").indices
+        set_weights = set_weights.set_index("variant").weight
+
+    # The jobs (one per SNP set)
+    jobs = []
+    for set_id, filename in zip(snp_set["snp_set"].unique(),
+                                genotype_filenames):
+        weights = None
+        if set_weights is not None:
+            weights = set_weights.iloc[set_rows[set_id]]
+        jobs.append((filename, null_model, weights, args.skat_o))
+
     logging.info("Launching SKAT using {} processes on {} SNP sets.".format(
-        args.nb_process, len(snp_sets)
+        args.nb_process, len(jobs)
     ))
 
     results = []
     if args.nb_process > 1:
         with Pool(processes=args.nb_process) as pool:
-            results = pool.map(_skat_run_job, r_scripts)
+            results = pool.map(_skat_run_native_job, jobs)
     else:
-        for script in r_scripts:
-            results.append(_skat_run_job(script))
+        for job in jobs:
+            results.append(_skat_run_native_job(job))
 
-    # Finally, write the SKAT output to disk.
-    output_filename = args.out + ".skat.dosage"
+    return results
 
-    logging.info("SKAT completed, writing the results to disk ({}).".format(
-        output_filename
-    ))
 
-    with open(output_filename, "w") as f:
-        # Write the header.
-        if args.skat_o:
-            print("snp_set_id", "p_value", sep="\t", file=f)
-        else:
-            print("snp_set_id", "p_value", "q_value", sep="\t", file=f)
+def _skat_run_native_job(job):
+    """Computes the SKAT (or SKAT-O) test of a single SNP set.
 
-        # The order in the snp_sets list should have been consistent
-        # across the whole analysis. We just want to make sure that we
-        # actually have the right number of results.
-        assert len(snp_sets) == len(results)
+    Args:
+        job (tuple): the name of the genotype file, the null model, the
+                     weights of the variants (``None`` to use the default
+                     weights) and whether to use SKAT-O
 
-        # Write a tab separated file containing the set and p-values.
-        for i, (p_value, q_value) in enumerate(results):
-            set_id = snp_sets[i]
-            if args.skat_o:
-                print(set_id, p_value, sep="\t", file=f)
-            else:
-                print(set_id, p_value, q_value, sep="\t", file=f)
+    Returns:
+        tuple: two values: the *p-value* and the *q-value* (for SKAT-O, the
+               *q-value* is set to None)
+
+    """
+    filename, null_model, weights, skat_o = job
+
+    # Reading the dosage (variants x samples)
+    dosage = skat_read_genotypes(filename, len(null_model.included))
+    if weights is not None:
+        weights = weights.loc[dosage.index].values
+
+    if skat_o:
+        return skat.skat_o(null_model, dosage.values.T, weights), None
+
+    return skat.skat(null_model, dosage.values.T, weights)
 
 
 def _skat_run_job(script_filename):
@@ -615,6 +1102,8 @@ def _skat_generate_r_script(dir_name, r_files, args):
             version=__version__,
 
             snp_set_file=snp_set_file,
+            variant_file=_skat_get_variant_filename(snp_set_file),
+            sample_file=r_files["samples"],
             covariate_file=r_files["covariates"],
             outcome_file=r_files["outcome"],
             weights=r_files["weights"],
@@ -625,7 +1114,7 @@ def _skat_generate_r_script(dir_name, r_files, args):
         # Write the rendered script to disk.
         script_filename = "run_skat_{}R".format(
             # We parse the set id name.
-            os.path.basename(snp_set_file)[:-len(".genotype.csv")]
+            os.path.basename(snp_set_file)[:-len("genotypes.bin")]
         )
         script_filename = os.path.join(dir_name, script_filename)
 
@@ -637,7 +1126,72 @@ def _skat_generate_r_script(dir_name, r_files, args):
     return scripts
 
 
-def _skat_parse_line(line, markers_of_interest, samples, gender=None):
+def _skat_generate_r_batch_scripts(dir_name, r_files, set_ids, shards, args):
+    """Uses jinja2 to generate the R scripts of every shard of SNP sets.
+
+    Args:
+        dir_name (str): the output directory name to write the scripts in
+        r_files (dict): contains the different input files required by the R
+                        script
+        set_ids (numpy.array): the SNP set IDs (in the same order as the
+                               genotype files)
+        shards (list): the indexes of the SNP sets of each shard
+        args (argparse.Namespace): the parsed arguments
+
+    Returns:
+        list: the name of the script and of the results file of each shard
+
+    """
+    jinja_env = jinja2.Environment(
+        loader=jinja2.PackageLoader("genipe", "script_templates")
+    )
+    template = jinja_env.get_template("run_skat_batch.R")
+
+    jobs = []
+    for i, shard in enumerate(shards):
+        # The list of SNP sets (and genotype files) of the shard
+        shard_filename = os.path.join(dir_name, "shard_{}.txt".format(i + 1))
+        filenames = [r_files["snp_sets"][j] for j in shard]
+        pd.DataFrame(
+            {"snp_set_id": set_ids[shard],
+             "filename": filenames,
+             "variant_filename": [_skat_get_variant_filename(filename)
+                                  for filename in filenames]},
+            columns=["snp_set_id", "filename", "variant_filename"],
+        ).to_csv(shard_filename, sep="\t", index=False)
+
+        results_filename = os.path.join(
+            dir_name, "shard_{}.results.txt".format(i + 1),
+        )
+
+        rendered_script = template.render(
+            version=__version__,
+
+            shard_file=shard_filename,
+            results_file=results_filename,
+            sample_file=r_files["samples"],
+            covariate_file=r_files["covariates"],
+            outcome_file=r_files["outcome"],
+            weights=r_files["set_weights"],
+
+            outcome_type="C" if args.outcome_type == "continuous" else "D",
+            skat_o=args.skat_o,
+        )
+
+        # Write the rendered script to disk.
+        script_filename = os.path.join(
+            dir_name, "run_skat_shard_{}.R".format(i + 1),
+        )
+        with open(script_filename, "w") as f:
+            f.write(rendered_script)
+
+        jobs.append((script_filename, results_filename))
+
+    return jobs
+
+
+def _skat_parse_line(line, markers_of_interest, samples, gender=None,
+                     columns=None):
     """Parses a single line of the Impute2 file.
 
     Args:
@@ -647,6 +1201,8 @@ def _skat_parse_line(line, markers_of_interest, samples, gender=None):
         samples (pandas.DataFrame): contains the samples IDs (this is useful to
                                     make sure we return a dosage vector with
                                     the appropriate data)
+        columns (list): the columns of the samples to keep (``None`` if all
+                        samples are kept)
 
     Returns:
         tuple: Either None if the marker is not of interest or a tuple of
@@ -656,7 +1212,8 @@ def _skat_parse_line(line, markers_of_interest, samples, gender=None):
                ``samples`` dataframe.
 
     """
-    line = line.split(" ")
+    line = impute2.split_line(line, columns)
+
     # info_tuple contains: chrom, name, pos, a1, a2
     # proba_matrix is a matrix of sample x (aa, ab, bb)
     info_tuple, proba_matrix = impute2.matrix_from_line(line)
@@ -687,23 +1244,87 @@ def _skat_parse_line(line, markers_of_interest, samples, gender=None):
     return (name, dosage)
 
 
-def _skat_write_marker(name, dosage, snp_set, genotype_files):
+def _skat_write_marker(name, dosage, set_ids, genotype_files, set_variants):
     """Write the dosage information to the appropriate genotype file.
 
     Args:
         name (str): the name of the marker
         dosage (numpy.array): the dosage vector
-        snp_set (pandas.DataFrame: the dataframe that allows us to identify the
-                                   correct SNP set for the specified variant
-        genotype_files (dict): a dictionary containing the opened CSV files for
-                               the genotypes
+        set_ids (list): the SNP sets containing the marker
+        genotype_files (dict): a dictionary containing the opened binary files
+                               for the genotypes
+        set_variants (dict): a dictionary containing the list of variants
+                             written in each genotype file (updated)
+
+    """
+    for set_id in set_ids:
+        _skat_write_dosage(dosage, genotype_files[set_id])
+        set_variants[set_id].append(name)
+
+
+def _skat_write_dosage(dosage, o_file):
+    """Appends a dosage vector to a binary genotype file.
+
+    Args:
+        dosage (numpy.array): the dosage vector
+        o_file (file): the binary genotype file (opened in ``wb`` mode)
+
+    The dosage values are written as little endian 64-bit floats, one variant
+    after the other (*i.e.* a variants by samples matrix in row-major order).
 
     """
-    # Identify the correct SNP set.
-    this_snp_set = snp_set.loc[snp_set["variant"] == name, "snp_set"].unique()
-    for set_id in this_snp_set:
-        file_object = genotype_files[set_id]
-        print(name, *dosage, sep=",", file=file_object)
+    np.asarray(dosage, dtype="<f8").tofile(o_file)
+
+
+def _skat_write_variants(genotype_filename, variants):
+    """Writes the variants of a binary genotype file.
+
+    Args:
+        genotype_filename (str): the name of the binary genotype file
+        variants (list): the variants (in the same order as in the genotype
+                         file)
+
+    """
+    with open(_skat_get_variant_filename(genotype_filename), "w") as o_file:
+        for variant in variants:
+            print(variant, file=o_file)
+
+
+def _skat_get_variant_filename(genotype_filename):
+    """Gets the name of the variant file of a binary genotype file.
+
+    Args:
+        genotype_filename (str): the name of the binary genotype file
+
+    Returns:
+        str: the name of the file containing the variants (one per line)
+
+    """
+    return os.path.splitext(genotype_filename)[0] + ".variants"
+
+
+def skat_read_genotypes(genotype_filename, nb_samples):
+    """Reads a binary genotype file written for SKAT.
+
+    Args:
+        genotype_filename (str): the name of the binary genotype file
+        nb_samples (int): the number of samples
+
+    Returns:
+        pandas.DataFrame: the dosage values (variants x samples)
+
+    """
+    with open(_skat_get_variant_filename(genotype_filename), "r") as i_file:
+        variants = i_file.read().splitlines()
+
+    dosage = np.fromfile(genotype_filename, dtype="<f8")
+    if len(dosage) != len(variants) * nb_samples:
+        raise GenipeError("{}: invalid number of values".format(
+            genotype_filename,
+        ))
+
+    return pd.DataFrame(dosage.reshape(len(variants), nb_samples),
+                        index=pd.Index(variants, name="variant"))
 
 
 def _extract_mixedlm_random_effect(fitted):
@@ -733,7 +1354,8 @@ def _extract_mixedlm_random_effect(fitted):
 
 
 def compute_statistics(impute2_filename, samples, markers_to_extract,
-                       phenotypes, remove_gender, out_prefix, options):
+                       phenotypes, remove_gender, out_prefix, options,
+                       sample_indexes=None):
     """Parses IMPUTE2 file while computing statistics.
 
     Args:
@@ -744,6 +1366,9 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
         remove_gender (bool): whether or not to remove the gender column
         out_prefix (str): the output prefix
         options (argparse.Namespace): the options
+        sample_indexes (numpy.array): the indexes of the samples to keep in
+                                      the IMPUTE2 file (``None`` if all
+                                      samples are kept)
 
     This function takes care of parallelism. It reads the Impute2 file and
     fills a queue that will trigger the analysis when full.
@@ -751,10 +1376,22 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
     If the number of process to launch is 1, the rows are analyzed as they
     come.
 
+    The progress of the analysis is periodically written in the
+    ``.status.json`` file (see :py:func:`_update_status`).
+
+    If profiling is required (``--profile``), the time spent in each phase of
+    the analysis of each site is measured, and a summary is written in the
+    ``.profile.txt`` file (see :py:class:`_Profile`).
+
     """
     # The name of the output file
     o_name = "{}.{}.dosage".format(out_prefix, options.analysis_type)
 
+    # The status file (and the progress of the analysis)
+    status = StatusFile("{}.status.json".format(out_prefix))
+    progress = {"sites_read": 0, "sites_processed": 0, "bytes_read": 0,
+                "bytes_total": None, "busy": 0.0}
+
     # Do we need to create a formula?
     formula = None
     if options.analysis_type != "cox":
@@ -790,13 +1427,41 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
     if options.nb_process > 1:
         pool = Pool(processes=options.nb_process)
 
+    # The function to process each site
+    process_func = process_impute2_site
+
+    # The columns to keep in the IMPUTE2 file (if required)
+    columns = None
+
     try:
-        if impute2_filename.endswith(".gz"):
-            proc = Popen(["gzip", "-d", "-c", impute2_filename], stdout=PIPE)
-            i_file = proc.stdout
+        if is_dosage_store(impute2_filename):
+            logging.info("Reading dosage from binary store (the probability "
+                         "threshold was set at extraction)")
+            rows = _read_dosage_store_rows(impute2_filename, samples,
+                                           sample_indexes)
+            process_func = process_dosage_site
 
         else:
-            i_file = open(impute2_filename, "rb")
+            if sample_indexes is not None:
+                columns = impute2.get_sample_columns(sample_indexes)
+
+            if impute2_filename.endswith(".gz"):
+                proc = Popen(["gzip", "-d", "-c", impute2_filename],
+                             stdout=PIPE)
+                i_file = proc.stdout
+
+            else:
+                i_file = open(impute2_filename, "rb")
+                progress["bytes_total"] = os.path.getsize(impute2_filename)
+
+            rows = _read_impute2_rows(i_file, progress, columns)
+
+        # Profiling?
+        profile = None
+        if vars(options).get("profile", False):
+            profile = _Profile()
+            rows = _profile_rows(rows, profile)
+            process_func = partial(_process_site_profiled, process_func)
 
         # Printing the header of the output file
         header = ("chr", "pos", "snp", "major", "minor", "maf", "n", "coef",
@@ -823,8 +1488,8 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
 
         # Reading the file
         nb_processed = 0
-        for line in i_file:
-            row = line.decode().rstrip("\r\n").split(" ")
+        for row in rows:
+            progress["sites_read"] += 1
 
             # Is this site required?
             if markers_to_extract and (row[1] not in markers_to_extract):
@@ -861,28 +1526,47 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
 
                 # Is there enough sites to process?
                 if len(sites_to_process) >= options.nb_lines:
-                    for result in pool.map(process_impute2_site,
-                                           sites_to_process):
-                        print(*result, sep="\t", file=o_file)
+                    start = time()
+                    _write_results(pool.map(process_func, sites_to_process),
+                                   o_file, profile)
+                    progress["busy"] += time() - start
 
                     # Logging
                     nb_processed += options.nb_lines
                     logging.info("Processed {:,d} lines".format(nb_processed))
+                    progress["sites_processed"] = nb_processed
+                    _update_status(status, progress, options.nb_process)
 
                     # Resetting the sites to process
                     sites_to_process = []
 
             else:
                 # Processing this row
-                print(*process_impute2_site(site), sep="\t", file=o_file)
+                start = time()
+                _write_results([process_func(site)], o_file, profile)
+                progress["busy"] += time() - start
+
+                progress["sites_processed"] += 1
+                if status.is_due():
+                    _update_status(status, progress, options.nb_process)
 
         if len(sites_to_process) > 0:
-            for result in pool.map(process_impute2_site, sites_to_process):
-                print(*result, sep="\t", file=o_file)
+            start = time()
+            _write_results(pool.map(process_func, sites_to_process), o_file,
+                           profile)
+            progress["busy"] += time() - start
 
             # Logging
             nb_processed += len(sites_to_process)
             logging.info("Processed {:,d} lines".format(nb_processed))
+            progress["sites_processed"] = nb_processed
+
+        # The analysis is completed
+        _update_status(status, progress, options.nb_process, force=True)
+
+        # Writing the profile (if required)
+        if profile is not None:
+            profile.write("{}.profile.txt".format(out_prefix))
 
     except Exception:
         if pool is not None:
@@ -892,7 +1576,8 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
 
     finally:
         # Closing the input file
-        i_file.close()
+        if i_file is not None:
+            i_file.close()
 
         # Finishing the rows if required
         if (options.nb_process > 1) and (pool is not None):
@@ -908,11 +1593,338 @@ def compute_statistics(impute2_filename, samples, markers_to_extract,
                                   "file".format(impute2_filename))
 
 
-def process_impute2_site(site_info):
+def _read_impute2_rows(i_file, progress, columns=None):
+    """Generates the rows of an IMPUTE2 file (counting the bytes read).
+
+    Args:
+        i_file (file): the IMPUTE2 file (opened in binary mode)
+        progress (dict): the progress of the analysis (the ``bytes_read``
+                         value is updated)
+        columns (list): the columns of the samples to keep (``None`` if all
+                        the samples are kept, see
+                        :py:func:`genipe.formats.impute2.split_line`)
+
+    Returns:
+        generator: the IMPUTE2 lines (split by space)
+
+    """
+    for line in i_file:
+        progress["bytes_read"] += len(line)
+        yield impute2.split_line(line.decode().rstrip("\r\n"), columns)
+
+
+def _profile_rows(rows, profile):
+    """Generates rows while measuring the time spent reading them.
+
+    Args:
+        rows (iterable): the rows to read
+        profile (_Profile): the profile of the analysis
+
+    Returns:
+        generator: the rows
+
+    """
+    rows = iter(rows)
+    while True:
+        start = perf_counter()
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        profile.add("main", "read", perf_counter() - start)
+        yield row
+
+
+def _process_site_profiled(process_func, site_info):
+    """Processes a site while measuring the time spent in each phase.
+
+    Args:
+        process_func (function): the function to process the site
+        site_info (list): the site information
+
+    Returns:
+        tuple: the results of the analysis, the time spent in each phase (a
+               dictionary) and the PID of the process
+
+    """
+    timer = _PhaseTimer()
+    result = process_func(site_info, timer=timer)
+    return result, timer.times, os.getpid()
+
+
+def _write_results(results, o_file, profile=None):
+    """Writes the results of the analysis of sites.
+
+    Args:
+        results (list): the results of the analysis of each site
+        o_file (file): the output file
+        profile (_Profile): the profile of the analysis (``None`` if not
+                            profiling)
+
+    When profiling, the results also contain the time spent in each phase
+    (see :py:func:`_process_site_profiled`), which are added to the profile.
+
+    """
+    for result in results:
+        if profile is None:
+            print(*result, sep="\t", file=o_file)
+            continue
+
+        result, times, pid = result
+        worker = "main" if pid == os.getpid() else "worker_{}".format(pid)
+        for phase, duration in times.items():
+            profile.add(worker, phase, duration)
+
+        start = perf_counter()
+        print(*result, sep="\t", file=o_file)
+        profile.add("main", "write", perf_counter() - start)
+
+
+class _PhaseTimer(object):
+    """Measures the time spent in each phase of the analysis of a site."""
+    def __init__(self):
+        self.times = OrderedDict()
+        self._last = perf_counter()
+
+    def lap(self, phase):
+        """Adds the time elapsed since the last lap to a phase.
+
+        Args:
+            phase (str): the phase that just ended
+
+        """
+        now = perf_counter()
+        self.times[phase] = self.times.get(phase, 0) + now - self._last
+        self._last = now
+
+
+def _lap(timer, phase):
+    """Ends a phase (if profiling).
+
+    Args:
+        timer (_PhaseTimer): the timer of the site (``None`` if not
+                             profiling)
+        phase (str): the phase that just ended
+
+    """
+    if timer is not None:
+        timer.lap(phase)
+
+
+class _PhaseProfile(object):
+    """The aggregated execution time of a phase.
+
+    The number of measurements, the total and the maximal time are kept, along
+    with a histogram of the times (the upper bound of each bin being a power
+    of two, in microseconds), so that the percentiles can be estimated without
+    keeping all the measurements.
+
+    """
+    def __init__(self):
+        self.nb = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = Counter()
+
+    def add(self, duration):
+        """Adds a measurement.
+
+        Args:
+            duration (float): the time spent in the phase (in seconds)
+
+        """
+        self.nb += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+        histogram_bin = 0
+        if duration > 1e-6:
+            histogram_bin = int(math.ceil(math.log2(duration * 1e6)))
+        self.histogram[histogram_bin] += 1
+
+    def merge(self, other):
+        """Merges the measurements of another profile.
+
+        Args:
+            other (_PhaseProfile): the other profile
+
+        """
+        self.nb += other.nb
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.histogram.update(other.histogram)
+
+    def get_percentile(self, q):
+        """Estimates a percentile of the measurements.
+
+        Args:
+            q (float): the percentile (between 0 and 100)
+
+        Returns:
+            float: the upper bound of the histogram bin containing the
+                   percentile (in seconds)
+
+        """
+        threshold = self.nb * q / 100
+        nb = 0
+        for histogram_bin in sorted(self.histogram.keys()):
+            nb += self.histogram[histogram_bin]
+            if nb >= threshold:
+                return min(self.max, 2 ** histogram_bin / 1e6)
+        return self.max
+
+
+class _Profile(object):
+    """The profile of the analysis (the time spent in each phase).
+
+    The time spent is aggregated by worker (``main`` being the process
+    reading the input file and writing the results) and by phase (see
+    ``_PROFILE_PHASES``). At the end of the analysis, the profiles of all the
+    workers are merged, and a summary is written in a tab separated file.
+
+    """
+    def __init__(self):
+        self.workers = OrderedDict()
+
+    def add(self, worker, phase, duration):
+        """Adds a measurement.
+
+        Args:
+            worker (str): the name of the worker
+            phase (str): the name of the phase
+            duration (float): the time spent in the phase (in seconds)
+
+        """
+        phases = self.workers.setdefault(worker, {})
+        if phase not in phases:
+            phases[phase] = _PhaseProfile()
+        phases[phase].add(duration)
+
+    def get_merged(self):
+        """Merges the profiles of all the workers.
+
+        Returns:
+            dict: the profile of each phase (for all the workers)
+
+        """
+        merged = {}
+        for phases in self.workers.values():
+            for phase, phase_profile in phases.items():
+                if phase not in merged:
+                    merged[phase] = _PhaseProfile()
+                merged[phase].merge(phase_profile)
+        return merged
+
+    def write(self, filename):
+        """Writes the summary of the profile.
+
+        Args:
+            filename (str): the name of the output file
+
+        For each worker (and for all the workers, ``all``) and each phase,
+        the summary contains the number of measurements, the total time (in
+        seconds), the percentage of the total profiled time, and the mean,
+        median, 95th percentile and maximal time (in milliseconds). The
+        summary for all the workers is also logged.
+
+        """
+        profiles = [("all", self.get_merged())]
+        profiles.extend(sorted(
+            self.workers.items(),
+            key=lambda worker: (worker[0] != "main", worker[0]),
+        ))
+
+        with open(filename, "w") as o_file:
+            print("worker", "phase", "nb", "total", "percent", "mean",
+                  "median", "p95", "max", sep="\t", file=o_file)
+
+            for worker, phases in profiles:
+                total = sum(p.total for p in phases.values())
+                for phase in sorted(phases.keys(), key=_get_phase_order):
+                    p = phases[phase]
+                    row = (
+                        worker, phase, p.nb, "{:.3f}".format(p.total),
+                        "{:.1f}".format(100 * p.total / max(total, 1e-9)),
+                        "{:.3f}".format(1000 * p.total / p.nb),
+                        "{:.3f}".format(1000 * p.get_percentile(50)),
+                        "{:.3f}".format(1000 * p.get_percentile(95)),
+                        "{:.3f}".format(1000 * p.max),
+                    )
+                    print(*row, sep="\t", file=o_file)
+
+                    if worker == "all":
+                        logging.info("  - {}: {:,.3f} s ({}%)".format(
+                            phase, p.total, row[4],
+                        ))
+
+        logging.info("Profile written in '{}'".format(filename))
+
+
+def _get_phase_order(phase):
+    """Gets the sort key of a phase (the order in the analysis).
+
+    Args:
+        phase (str): the name of the phase
+
+    Returns:
+        tuple: the sort key of the phase
+
+    """
+    if phase in _PROFILE_PHASES:
+        return (_PROFILE_PHASES.index(phase), phase)
+    return (len(_PROFILE_PHASES), phase)
+
+
+def _update_status(status, progress, nb_process, force=False):
+    """Updates the status file of the analysis.
+
+    Args:
+        status (genipe.task.status.StatusFile): the status file
+        progress (dict): the progress of the analysis
+        nb_process (int): the number of processes
+        force (bool): whether or not to write the file, even if it was
+                      written recently
+
+    The status contains the number of sites read and processed, the
+    throughput (sites per second), the number of bytes read (and the size of
+    the file, if known), the estimated remaining time (if the size of the
+    file is known) and the fraction of the time spent computing the
+    statistics (``workers_busy``, the rest of the time being spent reading
+    the file and writing the results).
+
+    """
+    elapsed = status.get_elapsed()
+    sites_per_second = progress["sites_processed"] / max(elapsed, 1e-6)
+
+    # The remaining time (according to the fraction of the file read)
+    eta = None
+    if progress["bytes_total"] and progress["bytes_read"] > 0:
+        eta = round(
+            elapsed * (progress["bytes_total"] - progress["bytes_read"]) /
+            progress["bytes_read"],
+            1,
+        )
+
+    status.update(
+        force=force,
+        sites_read=progress["sites_read"],
+        sites_processed=progress["sites_processed"],
+        sites_per_second=round(sites_per_second, 2),
+        bytes_read=progress["bytes_read"],
+        bytes_total=progress["bytes_total"],
+        eta=eta,
+        nb_process=nb_process,
+        workers_busy=round(progress["busy"] / max(elapsed, 1e-6), 3),
+    )
+
+
+def process_impute2_site(site_info, timer=None):
     """Process an IMPUTE2 site (a line in an IMPUTE2 file).
 
     Args:
         site_info (list): the impute2 line (split by space)
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
 
     Returns:
         list: the results of the analysis
@@ -920,6 +1932,7 @@ def process_impute2_site(site_info):
     """
     # Getting the probability matrix and site information
     (chrom, name, pos, a1, a2), geno = impute2.matrix_from_line(site_info.row)
+    _lap(timer, "parse")
 
     # The name of the dosage column
     dosage_columns = ["_D1", "_D2", "_D3"]
@@ -954,6 +1967,7 @@ def process_impute2_site(site_info):
     t_data = data
     if site_info.analysis_type == "mixedlm":
         t_data = data.groupby(level=0).first()
+    _lap(timer, "merge")
 
     # Checking gender if required
     gender = None
@@ -991,6 +2005,7 @@ def process_impute2_site(site_info):
     # If the marker is too rare, we continue with the rest
     if (maf == "NA") or (maf < site_info.maf_t):
         to_return.extend(["NA"] * (site_info.number_to_print - len(to_return)))
+        _lap(timer, "dosage")
         return to_return
 
     # Computing the dosage on the minor allele
@@ -1005,7 +2020,92 @@ def process_impute2_site(site_info):
     if site_info.del_g:
         unwanted_columns.append(site_info.gender_c)
     data = data.drop(unwanted_columns, axis=1)
+    _lap(timer, "dosage")
+
+    return _fit_site(data, name, to_return, site_info, timer)
+
 
+def process_dosage_site(site_info, timer=None):
+    """Process a site from a binary dosage store.
+
+    Args:
+        site_info (list): the site information (chromosome, name, position,
+                          minor and major allele, and dosage vector)
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
+
+    Returns:
+        list: the results of the analysis
+
+    The dosage values are on the minor allele (computed at extraction using
+    the good calls only), and missing values are the genotypes that were
+    below the probability threshold at extraction. The MAF is computed from
+    the dosage of the analyzed samples (and alleles are swapped if required).
+
+    """
+    chrom, name, pos, minor, major, dosage = site_info.row
+
+    # Creating the sample data frame
+    samples = site_info.samples
+    samples["_GenoD"] = dosage * (site_info.scale / 2)
+
+    # Merging with phenotypes (samples without dosage are removed)
+    data = pd.merge(
+        site_info.pheno,
+        samples,
+        how="inner",
+        left_index=True,
+        right_index=True
+    ).dropna(axis=0)[list(site_info.pheno.columns) + ["_GenoD"]]
+
+    # Only one measurement per sample for mixedlm (see process_impute2_site)
+    t_data = data
+    if site_info.analysis_type == "mixedlm":
+        t_data = data.groupby(level=0).first()
+    _lap(timer, "merge")
+
+    # Computing the frequency
+    maf = "NA"
+    if t_data.shape[0] > 0:
+        maf = t_data["_GenoD"].sum() / (t_data.shape[0] * site_info.scale)
+        if maf > 0.5:
+            maf = 1 - maf
+            minor, major = major, minor
+            data["_GenoD"] = site_info.scale - data["_GenoD"]
+
+    # What we want to print
+    to_return = [chrom, pos, name, major, minor, maf, t_data.shape[0]]
+
+    # If the marker is too rare, we continue with the rest
+    if (maf == "NA") or (maf < site_info.maf_t):
+        to_return.extend(["NA"] * (site_info.number_to_print - len(to_return)))
+        _lap(timer, "dosage")
+        return to_return
+
+    # Removing the unwanted columns
+    if site_info.del_g:
+        data = data.drop(site_info.gender_c, axis=1)
+    _lap(timer, "dosage")
+
+    return _fit_site(data, name, to_return, site_info, timer)
+
+
+def _fit_site(data, name, to_return, site_info, timer=None):
+    """Fits the statistical model for a site.
+
+    Args:
+        data (pandas.DataFrame): the data to analyse (with the ``_GenoD``
+                                 column)
+        name (str): the name of the site
+        to_return (list): the site information to print
+        site_info (list): the site information
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
+
+    Returns:
+        list: the results of the analysis
+
+    """
     # The column to get the result from
     result_from_column = "_GenoD"
     if site_info.inter_c is not None:
@@ -1032,10 +2132,12 @@ def process_impute2_site(site_info):
             random_effects=site_info.random_effects,
             mixedlm_p=site_info.mixedlm_p,
             interaction=site_info.inter_c is not None,
+            timer=timer,
         )
     except LinAlgError as e:
         # Something strange happened...
         logging.warning("{}: numpy LinAlgError: {}".format(name, str(e)))
+    _lap(timer, "fit")
 
     # Extending the list to return
     if len(results) == 0:
@@ -1045,6 +2147,52 @@ def process_impute2_site(site_info):
     return to_return
 
 
+def is_dosage_store(fn):
+    """Checks if the file is a binary dosage store.
+
+    Args:
+        fn (str): the name of the file
+
+    Returns:
+        bool: True if the file is a binary dosage store (created by
+              impute2-extractor), False otherwise.
+
+    """
+    return fn.endswith(".dosage.npy")
+
+
+def _read_dosage_store_rows(fn, samples, sample_indexes=None):
+    """Generates the rows of a binary dosage store.
+
+    Args:
+        fn (str): the name of the store (``.dosage.npy`` file)
+        samples (pandas.DataFrame): the list of samples
+        sample_indexes (numpy.array): the indexes of the samples to keep in
+                                      the store (``None`` if all samples are
+                                      kept)
+
+    Returns:
+        generator: the site information (chromosome, name, position, minor
+                   and major allele, and dosage vector) for each site
+
+    The dosage values are read from disk one chunk of sites at a time.
+
+    """
+    sites, store = impute2.read_dosage_store(fn[:-len(".dosage.npy")])
+    if sample_indexes is None and store.shape[1] != len(samples):
+        raise GenipeError("{}: {:,d} samples, but {:,d} samples in the "
+                          "sample file".format(fn, store.shape[1],
+                                               len(samples)))
+
+    sites = sites[["chrom", "name", "pos", "minor", "major"]].values
+    for first, dosage in impute2.dosage_store_chunks(store, len(sites)):
+        if sample_indexes is not None:
+            dosage = dosage[sample_indexes, :]
+        for i in range(dosage.shape[1]):
+            chrom, name, pos, minor, major = sites[first + i]
+            yield [chrom, name, str(pos), minor, major, dosage[:, i]]
+
+
 def samples_with_hetero_calls(data, hetero_c):
     """Gets male and heterozygous calls.
 
@@ -1106,7 +2254,8 @@ def get_formula(phenotype, covars, interaction, gender_c, categorical):
     return formula
 
 
-def fit_cox(data, time_to_event, event, formula, result_col, **kwargs):
+def fit_cox(data, time_to_event, event, formula, result_col, timer=None,
+            **kwargs):
     """Fit a Cox' proportional hazard to the data.
 
     Args:
@@ -1115,6 +2264,8 @@ def fit_cox(data, time_to_event, event, formula, result_col, **kwargs):
         event (str): the event column for the survival analysis
         formula (str): the formula for the data preparation
         result_col (str): the column that will contain the results
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
 
     Returns:
         numpy.array: the results from the survival analysis
@@ -1128,6 +2279,7 @@ def fit_cox(data, time_to_event, event, formula, result_col, **kwargs):
     y, X = dmatrices(formula, data=data, return_type="dataframe")
     data = pd.merge(y, X.drop("Intercept", axis=1), left_index=True,
                     right_index=True)
+    _lap(timer, "formula")
 
     # Fitting
     cf = CoxPHFitter(alpha=0.95, tie_method="Efron", normalize=False)
@@ -1135,45 +2287,47 @@ def fit_cox(data, time_to_event, event, formula, result_col, **kwargs):
     return cf.summary.loc[result_col, _COX_REQ_COLS].values
 
 
-def fit_linear(data, formula, result_col, **kwargs):
+def fit_linear(data, formula, result_col, timer=None, **kwargs):
     """Fit a linear regression to the data.
 
     Args:
         data (pandas.DataFrame): the data to analyse
         formula (str): the formula for the linear regression
         result_col (str): the column that will contain the results
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
 
     Returns:
         list: the results from the linear regression
 
     """
-    return _get_result_from_linear(
-        smf.ols(formula=formula, data=data).fit(),
-        result_col=result_col,
-    )
+    model = smf.ols(formula=formula, data=data)
+    _lap(timer, "formula")
+    return _get_result_from_linear(model.fit(), result_col=result_col)
 
 
-def fit_logistic(data, formula, result_col, **kwargs):
+def fit_logistic(data, formula, result_col, timer=None, **kwargs):
     """Fit a logistic regression to the data.
 
     Args:
         data (pandas.DataFrame): the data to analyse
         formula (str): the formula for the logistic regression
         result_col (str): the column that will contain the results
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
 
     Returns:
         list: the results from the logistic regression
 
     """
-    return _get_result_from_logistic_mixedlm(
-        smf.glm(formula=formula, data=data,
-                family=sm.families.Binomial()).fit(),
-        result_col=result_col,
-    )
+    model = smf.glm(formula=formula, data=data, family=sm.families.Binomial())
+    _lap(timer, "formula")
+    return _get_result_from_logistic_mixedlm(model.fit(),
+                                             result_col=result_col)
 
 
 def fit_mixedlm(data, formula, use_ml, groups, result_col, random_effects,
-                mixedlm_p, interaction, **kwargs):
+                mixedlm_p, interaction, timer=None, **kwargs):
     """Fit a linear mixed effects model to the data.
 
     Args:
@@ -1186,6 +2340,8 @@ def fit_mixedlm(data, formula, use_ml, groups, result_col, random_effects,
         mixedlm_p (float): the p-value threshold for which loci will be
                            computed with the real MixedLM analysis
         interaction (bool): Whether there is an interaction or not
+        timer (_PhaseTimer): the timer of the phases (``None`` if not
+                             profiling)
 
     Returns:
         list: the results from the linear mixed effects model
@@ -1203,10 +2359,11 @@ def fit_mixedlm(data, formula, use_ml, groups, result_col, random_effects,
                           left_index=True, right_index=True)
 
         # Approximating the results
-        approximate_r = _get_result_from_linear(
-            smf.ols(formula="RE ~ _GenoD", data=t_data).fit(),
-            result_col="_GenoD",
-        )
+        model = smf.ols(formula="RE ~ _GenoD", data=t_data)
+        _lap(timer, "formula")
+        approximate_r = _get_result_from_linear(model.fit(),
+                                                result_col="_GenoD")
+        _lap(timer, "fit")
 
         # If the approximated p-value is higher or equal to the threshold, we
         # return the approximation
@@ -1218,9 +2375,10 @@ def fit_mixedlm(data, formula, use_ml, groups, result_col, random_effects,
 
     # If we get here, it's because the p-value was low enough so we compute the
     # real statistics
+    model = smf.mixedlm(formula=formula, data=data, groups=groups)
+    _lap(timer, "formula")
     result = _get_result_from_logistic_mixedlm(
-        smf.mixedlm(formula=formula, data=data,
-                    groups=groups).fit(reml=not use_ml),
+        model.fit(reml=not use_ml),
         result_col=result_col,
     )
     result.append("MixedLM")
@@ -1317,18 +2475,31 @@ def check_args(args):
             raise GenipeError("missing optional module: statsmodels")
 
     elif args.analysis_type == "skat":
-        if not HAS_R:
-            raise GenipeError("R is not installed")
-        if not HAS_SKAT:
-            raise GenipeError("R library missing: SKAT")
+        if args.skat_backend == "python":
+            if not skat.HAS_SCIPY:
+                raise GenipeError("missing optional module: scipy")
+        else:
+            if not HAS_R:
+                raise GenipeError("R is not installed")
+            if not HAS_SKAT:
+                raise GenipeError("R library missing: SKAT")
 
     # Checking the required input files
     for filename in [args.impute2, args.sample, args.pheno]:
         if not os.path.isfile(filename):
             raise GenipeError("{}: no such file".format(filename))
 
+    # The binary dosage store is not compatible with some options
+    if is_dosage_store(args.impute2):
+        if args.analysis_type == "skat":
+            raise GenipeError("{}: dosage store not compatible with "
+                              "SKAT".format(args.impute2))
+        if args.chrx:
+            raise GenipeError("{}: dosage store not compatible with "
+                              "'--chrx'".format(args.impute2))
+
     # Checking the optional input files
-    for filename in [args.extract_sites]:
+    for filename in [args.extract_sites, args.keep]:
         if filename is not None:
             if not is_file_like(filename):
                 raise GenipeError("{}: no such file".format(filename))
@@ -1490,7 +2661,8 @@ def parse_args(parser, args=None):
     group = p_parser.add_argument_group("Input Files")
     group.add_argument(
         "--impute2", type=str, metavar="FILE", required=True,
-        help="The output from IMPUTE2.",
+        help="The output from IMPUTE2 (or a binary dosage store, i.e. a "
+             "'.dosage.npy' file created by impute2-extractor).",
     )
     group.add_argument(
         "--sample", type=str, metavar="FILE", required=True,
@@ -1505,6 +2677,11 @@ def parse_args(parser, args=None):
         "--extract-sites", type=str, metavar="FILE",
         help="A list of sites to extract for analysis (optional).",
     )
+    group.add_argument(
+        "--keep", type=str, metavar="FILE",
+        help="A list of samples to keep for analysis (optional). Only the "
+             "probabilities of those samples are read.",
+    )
 
     # The output files
     group = p_parser.add_argument_group("Output Options")
@@ -1523,6 +2700,13 @@ def parse_args(parser, args=None):
         "--nb-lines", type=int, metavar="INT", default=1000,
         help="The number of line to read at a time. [%(default)d]",
     )
+    group.add_argument(
+        "--profile", action="store_true",
+        help="Measure the time spent in each phase of the analysis (reading, "
+             "parsing, merging, dosage, formula, fitting and writing) and "
+             "write a summary in the '.profile.txt' file (not used for "
+             "SKAT).",
+    )
     group.add_argument(
         "--chrx", action="store_true",
         help="The analysis is performed for the non pseudo-autosomal region "
@@ -1717,6 +2901,17 @@ def parse_args(parser, args=None):
         help="The phenotype.",
     )
 
+    # The SKAT implementation
+    group.add_argument(
+        "--skat-backend", type=str, choices=("R", "R-batch", "python"),
+        default="R",
+        help="The SKAT implementation to use: the SKAT R package (one R "
+             "process per SNP set), the SKAT R package with one R process "
+             "per shard of SNP sets ('R-batch', the null model is fitted "
+             "once per process), or a NumPy/SciPy implementation which fits "
+             "the null model only once. [%(default)s]",
+    )
+
     if args is not None:
         return parser.parse_args(args)
 
@@ -76,13 +76,15 @@ def setup_package():
                 "impute2-extractor=genipe.tools.impute2_extractor:main",
                 "imputed-stats=genipe.tools.imputed_stats:main",
                 "genipe-tutorial=genipe.tools.genipe_tutorial:main",
+                "genipe-benchmark=genipe.benchmarks.runner:main",
             ],
         },
         install_requires=["numpy >= 1.9.2", "Jinja2 >= 2.7.3",
                           "pandas >= 0.17.0", "setuptools >= 12.0.5"],
         packages=["genipe", "genipe.pipeline", "genipe.task", "genipe.db",
                   "genipe.tools", "genipe.formats", "genipe.reporting",
-                  "genipe.config", "genipe.tests"],
+                  "genipe.config", "genipe.stats", "genipe.benchmarks",
+                  "genipe.tests"],
         package_data={"genipe.reporting": ["templates/*.tex",
                                            "templates/biblio/*",
                                            "templates/utils/*",